@@ -4,12 +4,135 @@ Research-validated performance indicators for Olympic taekwondo
 Based on 2024 machine learning studies and historical data analysis
 """
 
+import weakref
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
+from match_stats import athlete_perspective, name_keys
+from ranking_features import find_column
+from ranking_trends import fit_ranking_trends
+from points_simulator import Competition, COMPETITION_POINTS, UPCOMING_COMPETITIONS
+
+
+# Opportunity score weights: rank, competition density, form
+OPPORTUNITY_WEIGHTS = (0.60, 0.30, 0.10)
+
+# (min score, priority, recommendation), highest first
+OPPORTUNITY_PRIORITIES = [
+    (85, "CRITICAL", "Immediate action: Dedicated coach, all Grand Prix attendance, full resources"),
+    (75, "HIGH", "High priority: Increase training support, strategic competition selection"),
+    (60, "MEDIUM", "Monitor closely: Assess progress quarterly, targeted development"),
+    (0, "DEVELOPMENT", "Long-term development: Youth pipeline, skill development focus"),
+]
+
+# Medal zone used for category density
+MEDAL_ZONE_RANK = 8
+
+# Months of bouts used for the form component
+FORM_WINDOW_MONTHS = 6
+
+# Share of attempts that succeed at each tier for a top-ranked athlete
+TIER_DIFFICULTY = {
+    'world_champs': 0.3,  # Very competitive
+    'grand_prix': 0.5,    # Competitive
+    'grand_slam': 0.4,
+    'continental': 0.6,   # More achievable
+    'open': 0.7,          # Easiest
+}
+DEFAULT_TIER_DIFFICULTY = 0.5
+
+# Strategic value of each tier on top of the financial return
+STRATEGIC_MULTIPLIERS = {
+    'world_champs': 2.0,  # Extra valuable
+    'grand_prix': 1.5,
+    'grand_slam': 1.8,
+    'continental': 1.3,
+    'open': 1.0,
+}
+
+# Rank to reach for each qualification path (None = hold the current rank)
+PATH_TARGET_RANKS = {
+    'automatic': None,
+    'automatic_attainable': 5,
+    'continental': 12,
+    'continental_difficult': 15,
+    'tripartite_only': 30,
+}
+
+# Strategic ROI above which attendance is recommended
+ROI_ATTEND_THRESHOLD = 50
+
+# Scored rankings keyed by rankings and matches fingerprints (shared across analyzers)
+_OPPORTUNITY_CACHE: Dict[tuple, pd.DataFrame] = {}
+_OPPORTUNITY_CACHE_SIZE = 8
+
+# Fingerprints of live DataFrame objects: id -> (weak reference, fingerprint)
+_FINGERPRINTS: Dict[int, tuple] = {}
+
+
+def frame_fingerprint(df: pd.DataFrame) -> Optional[int]:
+    """
+    Order-independent content fingerprint of a DataFrame (None if empty).
+
+    Hashed once per DataFrame object and remembered while it is alive;
+    call forget_fingerprint after changing a frame in place.
+    """
+    if df is None or df.empty:
+        return None
+    cached = _FINGERPRINTS.get(id(df))
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False).values
+    fingerprint = int(hashes.sum() ^ len(df))
+    key = id(df)
+    _FINGERPRINTS[key] = (weakref.ref(df, lambda _: _FINGERPRINTS.pop(key, None)), fingerprint)
+    return fingerprint
+
+
+def forget_fingerprint(df: pd.DataFrame):
+    """Drop a frame's remembered fingerprint (after an in-place change)."""
+    if df is not None:
+        _FINGERPRINTS.pop(id(df), None)
+
+
+def competition_roi(tiers, costs, available_points, current_ranks) -> Dict[str, np.ndarray]:
+    """
+    Competition ROI for any broadcastable combination of events and ranks.
+
+    Args:
+        tiers: Competition tier(s), e.g. 'grand_prix'
+        costs: Estimated cost(s) in USD
+        available_points: Ranking points on offer
+        current_ranks: Athlete world rank(s)
+
+    Returns:
+        Dict of arrays (broadcast shape of the inputs): qualification_probability
+        (0-1), expected_points, financial_roi and strategic_roi (%)
+    """
+    tiers = np.char.lower(np.asarray(tiers, dtype=str))
+    difficulty = np.vectorize(lambda t: TIER_DIFFICULTY.get(t, DEFAULT_TIER_DIFFICULTY), otypes=[float])(tiers)
+    multiplier = np.vectorize(lambda t: STRATEGIC_MULTIPLIERS.get(t, 1.0), otypes=[float])(tiers)
+
+    # Better rank = higher success probability
+    rank_factor = np.maximum(0.2, 1 - np.asarray(current_ranks, dtype=float) / 100)
+    probability = difficulty * rank_factor
+
+    expected_points = np.asarray(available_points, dtype=float) * probability
+    costs = np.asarray(costs, dtype=float)
+    roi = np.where(costs > 0, expected_points / np.where(costs > 0, costs, 1.0) * 100, 0.0)
+
+    return {
+        'qualification_probability': probability,
+        'expected_points': expected_points,
+        'financial_roi': roi,
+        'strategic_roi': roi * multiplier,
+    }
+
 
 @dataclass
 class MedalOpportunity:
@@ -45,6 +168,10 @@ class AdvancedKPIAnalyzer:
     """
 
     def __init__(self, matches_df: pd.DataFrame = None, rankings_df: pd.DataFrame = None):
+        # Bumped whenever the data changes; memoized scores carry the version
+        self.data_version = 0
+        self._density: Optional[Tuple[int, pd.Series]] = None
+
         self.matches_df = matches_df
         self.rankings_df = rankings_df
 
@@ -53,6 +180,33 @@ class AdvancedKPIAnalyzer:
         self.OLYMPIC_AUTO_QUALIFY_RANK = 5  # Top 5 automatic
         self.CONTINENTAL_QUOTA = 2  # Approximate continental spots
 
+        # Whole-field quota simulation, keyed by the data version it was built on
+        self._quota_simulator: Optional[Tuple[int, object]] = None
+
+    @property
+    def matches_df(self) -> Optional[pd.DataFrame]:
+        return self._matches_df
+
+    @matches_df.setter
+    def matches_df(self, df: Optional[pd.DataFrame]):
+        self._matches_df = df
+        self.data_version += 1
+
+    @property
+    def rankings_df(self) -> Optional[pd.DataFrame]:
+        return self._rankings_df
+
+    @rankings_df.setter
+    def rankings_df(self, df: Optional[pd.DataFrame]):
+        self._rankings_df = df
+        self.data_version += 1
+
+    def refresh(self):
+        """Call after changing matches_df or rankings_df in place."""
+        forget_fingerprint(self._matches_df)
+        forget_fingerprint(self._rankings_df)
+        self.data_version += 1
+
     def calculate_medal_opportunity_score(
         self,
         rank: int,
@@ -78,12 +232,16 @@ class AdvancedKPIAnalyzer:
         rank_score = max(0, 100 - (rank * 4))
 
         # Component 2: Competition Density Score (30% weight)
-        # Estimate based on weight category
+        # From the rankings when loaded (top-8 share of category points),
+        # otherwise estimated from the weight category
         # Olympic categories: M-58, M-68, M-80, M+80, W-49, W-57, W-67, W+67
         high_competition_categories = ['M-68kg', 'M-58kg', 'W-57kg']
         low_competition_categories = ['M+80kg', 'W+67kg', 'M-54kg']
 
-        if weight_category in high_competition_categories:
+        density = self.category_density_scores()
+        if weight_category in density.index and pd.notna(density[weight_category]):
+            competition_factor = float(density[weight_category]) / 100
+        elif weight_category in high_competition_categories:
             competition_factor = 0.3  # High competition
         elif weight_category in low_competition_categories:
             competition_factor = 0.7  # Lower competition = better opportunity
@@ -99,25 +257,17 @@ class AdvancedKPIAnalyzer:
             form_score = 50  # Default if no data
 
         # Calculate total opportunity score
+        w_rank, w_density, w_form = OPPORTUNITY_WEIGHTS
         opportunity_score = (
-            (rank_score * 0.60) +
-            (competition_density_score * 0.30) +
-            (form_score * 0.10)
+            (rank_score * w_rank) +
+            (competition_density_score * w_density) +
+            (form_score * w_form)
         )
 
         # Generate recommendation
-        if opportunity_score >= 85:
-            priority = "CRITICAL"
-            recommendation = "Immediate action: Dedicated coach, all Grand Prix attendance, full resources"
-        elif opportunity_score >= 75:
-            priority = "HIGH"
-            recommendation = "High priority: Increase training support, strategic competition selection"
-        elif opportunity_score >= 60:
-            priority = "MEDIUM"
-            recommendation = "Monitor closely: Assess progress quarterly, targeted development"
-        else:
-            priority = "DEVELOPMENT"
-            recommendation = "Long-term development: Youth pipeline, skill development focus"
+        _, priority, recommendation = next(
+            band for band in OPPORTUNITY_PRIORITIES if opportunity_score >= band[0]
+        )
 
         return MedalOpportunity(
             athlete_name="",  # To be filled by caller
@@ -131,6 +281,118 @@ class AdvancedKPIAnalyzer:
             priority_level=priority
         )
 
+    def score_medal_opportunities(self, rankings_df: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Medal opportunity scores for every ranked athlete in one pass.
+
+        Same formula as calculate_medal_opportunity_score, with the
+        competition density taken from the data: the share of a category's
+        ranking points held by its top 8. Deep categories spread points
+        further down the list (low share, more competition); thin ones
+        concentrate them in the medal zone.
+
+        Results are cached per rankings and matches content (fingerprints
+        hashed once per DataFrame object).
+
+        Args:
+            rankings_df: Rankings (default: the analyzer's rankings)
+
+        Returns:
+            DataFrame per athlete with athlete_name, country, weight_category,
+            rank, points, top8_points_share, rank_score,
+            competition_density_score, form_score, opportunity_score,
+            priority_level and recommendation, best first
+        """
+        df = self.rankings_df if rankings_df is None else rankings_df
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        cache_key = (frame_fingerprint(df), frame_fingerprint(self.matches_df))
+        if cache_key in _OPPORTUNITY_CACHE:
+            return _OPPORTUNITY_CACHE[cache_key]
+
+        name_col = find_column(df, 'athlete_name', 'NAME')
+        rank_col = find_column(df, 'rank', 'RANK')
+        cat_col = find_column(df, 'weight_category', 'WEIGHT CATEGORY')
+        country_col = find_column(df, 'country', 'MEMBER NATION', 'country_code')
+        points_col = find_column(df, 'points', 'POINTS', 'TOTAL POINTS')
+
+        scored = pd.DataFrame({
+            'athlete_name': df[name_col].values if name_col else '',
+            'country': df[country_col].values if country_col else '',
+            'weight_category': df[cat_col].astype(str).values if cat_col else '',
+            'rank': pd.to_numeric(df[rank_col], errors='coerce').values if rank_col else np.nan,
+            'points': pd.to_numeric(df[points_col], errors='coerce').fillna(0).values if points_col else 0.0,
+        })
+
+        # Competition density: share of category points held by the top 8
+        in_zone = scored['points'].where(scored['rank'] <= MEDAL_ZONE_RANK, 0.0)
+        by_cat = scored.groupby('weight_category')
+        totals = by_cat['points'].transform('sum')
+        scored['top8_points_share'] = (in_zone.groupby(scored['weight_category']).transform('sum')
+                                       / totals.where(totals > 0)).round(3)
+
+        scored['rank_score'] = (100 - scored['rank'] * 4).clip(lower=0).fillna(0)
+        scored['competition_density_score'] = (scored['top8_points_share'] * 100).fillna(50)
+
+        form = self._recent_win_rates()
+        scored['form_score'] = (name_keys(scored['athlete_name']).map(form).fillna(50).values
+                                if len(form) else 50.0)
+
+        w_rank, w_density, w_form = OPPORTUNITY_WEIGHTS
+        scored['opportunity_score'] = (scored['rank_score'] * w_rank
+                                       + scored['competition_density_score'] * w_density
+                                       + scored['form_score'] * w_form).round(1)
+
+        thresholds = [t for t, _, _ in OPPORTUNITY_PRIORITIES]
+        levels = np.array([p for _, p, _ in OPPORTUNITY_PRIORITIES])
+        advice = np.array([r for _, _, r in OPPORTUNITY_PRIORITIES])
+        band = np.argmax(scored['opportunity_score'].values[:, None] >= np.array(thresholds)[None, :], axis=1)
+        scored['priority_level'] = levels[band]
+        scored['recommendation'] = advice[band]
+
+        for col in ('rank_score', 'competition_density_score', 'form_score'):
+            scored[col] = scored[col].round(1)
+
+        scored = scored.sort_values('opportunity_score', ascending=False, ignore_index=True)
+
+        if len(_OPPORTUNITY_CACHE) >= _OPPORTUNITY_CACHE_SIZE:
+            _OPPORTUNITY_CACHE.pop(next(iter(_OPPORTUNITY_CACHE)))
+        _OPPORTUNITY_CACHE[cache_key] = scored
+        return scored
+
+    def category_density_scores(self) -> pd.Series:
+        """
+        Competition density score (0-100) per weight category from the rankings.
+
+        Memoized per data version, so per-athlete scoring does not revisit
+        the rankings.
+        """
+        if self._density is None or self._density[0] != self.data_version:
+            scored = self.score_medal_opportunities()
+            density = (pd.Series(dtype=float) if scored.empty else
+                       scored.groupby('weight_category')['competition_density_score'].first())
+            self._density = (self.data_version, density)
+        return self._density[1]
+
+    def _recent_win_rates(self) -> pd.Series:
+        """Win rate (0-100) over the last FORM_WINDOW_MONTHS of bouts, by name key."""
+        if self.matches_df is None or self.matches_df.empty:
+            return pd.Series(dtype=float)
+
+        date_col = next((c for c in self.matches_df.columns if 'date' in c.lower()), None)
+        if date_col is None:
+            return pd.Series(dtype=float)
+
+        stacked = athlete_perspective(self.matches_df)
+        if stacked.empty:
+            return pd.Series(dtype=float)
+
+        dates = pd.to_datetime(self.matches_df[date_col], errors='coerce').values[stacked['match_idx'].values]
+        cutoff = np.datetime64(datetime.now() - timedelta(days=30 * FORM_WINDOW_MONTHS))
+        recent = stacked[dates >= cutoff]
+        return recent.groupby('athlete')['won'].mean() * 100
+
     def analyze_olympic_qualification_probability(
         self,
         athlete_name: str,
@@ -146,6 +408,10 @@ class AdvancedKPIAnalyzer:
         2. Continental qualification (2-3 spots)
         3. Tripartite commission (wild card)
 
+        When the rankings carry points, the probability and path come from
+        the whole-field quota simulation (olympic_quota_simulator); rank
+        bands adjusted for trend are used otherwise.
+
         Args:
             athlete_name: Athlete name
             current_rank: Current world rank
@@ -161,28 +427,18 @@ class AdvancedKPIAnalyzer:
         if current_rank <= self.OLYMPIC_AUTO_QUALIFY_RANK:
             path = "automatic"
             base_probability = 95  # Very high if maintaining
-            target_rank = current_rank  # Maintain
-            rank_gap = 0
         elif current_rank <= 12:
             path = "automatic_attainable"
             base_probability = 60  # Good chance
-            target_rank = 5
-            rank_gap = current_rank - 5
         elif current_rank <= 20:
             path = "continental"
             base_probability = 40  # Continental route likely
-            target_rank = 12  # Improve to be safe
-            rank_gap = current_rank - 12
         elif current_rank <= 50:
             path = "continental_difficult"
             base_probability = 20  # Challenging
-            target_rank = 15
-            rank_gap = current_rank - 15
         else:
             path = "tripartite_only"
             base_probability = 5  # Very difficult
-            target_rank = 30
-            rank_gap = current_rank - 30
 
         # Adjust for trend
         trend_adjustments = {
@@ -196,6 +452,20 @@ class AdvancedKPIAnalyzer:
         if days_remaining < 365:  # Less than 1 year
             probability *= 0.8  # Harder to improve
 
+        simulated = self._simulated_qualification(athlete_name)
+        if simulated is not None:
+            probability = simulated['p_qualify'] * 100
+            if simulated['p_automatic'] > 0 and simulated['p_automatic'] >= simulated['p_continental']:
+                path = "automatic" if simulated['p_automatic'] >= 0.5 else "automatic_attainable"
+            elif simulated['p_continental'] > 0:
+                path = "continental" if simulated['p_continental'] >= 0.25 else "continental_difficult"
+            else:
+                path = "tripartite_only"
+
+        # Target and gap follow the final path
+        target_rank = PATH_TARGET_RANKS[path] or current_rank
+        rank_gap = current_rank - target_rank
+
         # Recommended competitions based on gap
         if rank_gap > 10:
             competitions = ["ALL Grand Prix", "World Championships", "Asian Championships", "Continental Opens"]
@@ -218,6 +488,15 @@ class AdvancedKPIAnalyzer:
             recommended_competitions=competitions
         )
 
+    def _simulated_qualification(self, athlete_name: str) -> Optional[Dict]:
+        """Quota simulation result for an athlete (None without a ranked points field)."""
+        if self.rankings_df is None or self.rankings_df.empty:
+            return None
+        if self._quota_simulator is None or self._quota_simulator[0] != self.data_version:
+            from olympic_quota_simulator import OlympicQuotaSimulator
+            self._quota_simulator = (self.data_version, OlympicQuotaSimulator(self.rankings_df))
+        return self._quota_simulator[1].athlete_probability(athlete_name)
+
     def calculate_performance_trend_score(
         self,
         rankings_history: pd.DataFrame
@@ -239,19 +518,10 @@ class AdvancedKPIAnalyzer:
                 'acceleration': 0
             }
 
-        # Sort by date
-        rankings_history = rankings_history.sort_values('date')
-
-        # Calculate velocity (rank change per month)
-        ranks = rankings_history['rank'].values
-        first_rank = ranks[0]
-        last_rank = ranks[-1]
-        time_delta_days = (
-            pd.to_datetime(rankings_history.iloc[-1]['date']) -
-            pd.to_datetime(rankings_history.iloc[0]['date'])
-        ).days
+        # Least-squares velocity and acceleration (shared with the batch trend engine)
+        fit = fit_ranking_trends(rankings_history.assign(_series=0), group_cols=['_series']).iloc[0]
 
-        if time_delta_days == 0:
+        if fit['trend'] == 'insufficient_data':
             return {
                 'trend': 'stable',
                 'trend_score': 50,
@@ -259,41 +529,12 @@ class AdvancedKPIAnalyzer:
                 'acceleration': 0
             }
 
-        months = time_delta_days / 30
-        velocity = (first_rank - last_rank) / months  # Positive = improving
-
-        # Calculate acceleration (is improvement accelerating?)
-        if len(ranks) >= 3:
-            mid_point = len(ranks) // 2
-            first_half_velocity = (ranks[0] - ranks[mid_point]) / (months / 2)
-            second_half_velocity = (ranks[mid_point] - ranks[-1]) / (months / 2)
-            acceleration = second_half_velocity - first_half_velocity
-        else:
-            acceleration = 0
-
-        # Categorize trend
-        if velocity > 2:  # Improving >2 ranks/month
-            trend = 'rapidly_improving'
-            trend_score = 90
-        elif velocity > 0.5:
-            trend = 'improving'
-            trend_score = 70
-        elif velocity > -0.5:
-            trend = 'stable'
-            trend_score = 50
-        elif velocity > -2:
-            trend = 'declining'
-            trend_score = 30
-        else:
-            trend = 'rapidly_declining'
-            trend_score = 10
-
         return {
-            'trend': trend,
-            'trend_score': trend_score,
-            'velocity': round(velocity, 2),
-            'acceleration': round(acceleration, 2),
-            'months_tracked': round(months, 1)
+            'trend': fit['trend'],
+            'trend_score': int(fit['trend_score']),
+            'velocity': float(fit['velocity']),  # Positive = improving
+            'acceleration': float(fit['acceleration']),
+            'months_tracked': float(fit['months_tracked'])
         }
 
     def analyze_competition_roi(
@@ -315,53 +556,104 @@ class AdvancedKPIAnalyzer:
         Returns:
             Dict with ROI analysis
         """
-        # Estimate qualification probability based on rank and tier
-        tier_difficulty = {
-            'world_champs': 0.3,  # Very competitive
-            'grand_prix': 0.5,   # Competitive
-            'grand_slam': 0.4,
-            'continental': 0.6,  # More achievable
-            'open': 0.7          # Easiest
-        }
-
-        difficulty = tier_difficulty.get(competition_tier.lower(), 0.5)
-
-        # Adjust for rank (better rank = higher success probability)
-        rank_factor = max(0.2, 1 - (current_rank / 100))
-
-        qualification_probability = difficulty * rank_factor
-
-        # Expected points
-        expected_points = ranking_points * qualification_probability
-
-        # ROI calculation
-        if estimated_cost > 0:
-            roi = (expected_points / estimated_cost) * 100
-        else:
-            roi = 0
-
-        # Strategic value (not just financial)
-        strategic_multiplier = {
-            'world_champs': 2.0,  # Extra valuable
-            'grand_prix': 1.5,
-            'grand_slam': 1.8,
-            'continental': 1.3,
-            'open': 1.0
-        }
-
-        strategic_roi = roi * strategic_multiplier.get(competition_tier.lower(), 1.0)
+        roi = competition_roi(competition_tier, estimated_cost, ranking_points, current_rank)
+        strategic_roi = float(roi['strategic_roi'])
 
         return {
             'competition_tier': competition_tier,
             'estimated_cost': estimated_cost,
             'available_points': ranking_points,
-            'qualification_probability': round(qualification_probability * 100, 1),
-            'expected_points': round(expected_points, 1),
-            'financial_roi': round(roi, 2),
+            'qualification_probability': round(float(roi['qualification_probability']) * 100, 1),
+            'expected_points': round(float(roi['expected_points']), 1),
+            'financial_roi': round(float(roi['financial_roi']), 2),
             'strategic_roi': round(strategic_roi, 2),
-            'recommendation': 'Attend' if strategic_roi > 50 else 'Consider alternatives'
+            'recommendation': 'Attend' if strategic_roi > ROI_ATTEND_THRESHOLD else 'Consider alternatives'
         }
 
+    def competition_roi_matrix(
+        self,
+        competitions: List[Competition] = None,
+        country: str = 'KSA',
+        rankings_df: pd.DataFrame = None
+    ) -> pd.DataFrame:
+        """
+        Competition ROI for every athlete of a country against every event.
+
+        Same model as analyze_competition_roi, evaluated for the whole
+        athlete x event grid in one broadcast (athletes on rows, events on
+        columns) with each event's gold points as the points available.
+
+        Args:
+            competitions: Events to evaluate (default: upcoming events in
+                UPCOMING_COMPETITIONS)
+            country: Country code filter for athletes (None = all athletes)
+            rankings_df: Rankings (default: the analyzer's rankings)
+
+        Returns:
+            Long DataFrame with one row per athlete and event: athlete_name,
+            country, weight_category, rank, points, competition, date, tier,
+            estimated_cost, available_points, qualification_probability (%),
+            expected_points, financial_roi, strategic_roi and recommendation.
+            Pivot on athlete_name x competition for the matrix view.
+        """
+        df = self.rankings_df if rankings_df is None else rankings_df
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        if competitions is None:
+            today = datetime.now().strftime('%Y-%m-%d')
+            competitions = [c for c in UPCOMING_COMPETITIONS if c.date >= today]
+        competitions = sorted(competitions, key=lambda c: c.date)
+        if not competitions:
+            return pd.DataFrame()
+
+        name_col = find_column(df, 'athlete_name', 'NAME')
+        rank_col = find_column(df, 'rank', 'RANK')
+        cat_col = find_column(df, 'weight_category', 'WEIGHT CATEGORY')
+        country_col = find_column(df, 'country', 'MEMBER NATION', 'country_code')
+        points_col = find_column(df, 'points', 'POINTS', 'TOTAL POINTS')
+        if not name_col or not rank_col:
+            return pd.DataFrame()
+
+        athletes = pd.DataFrame({
+            'athlete_name': df[name_col].values,
+            'country': df[country_col].values if country_col else '',
+            'weight_category': df[cat_col].astype(str).values if cat_col else '',
+            'rank': pd.to_numeric(df[rank_col], errors='coerce').values,
+            'points': pd.to_numeric(df[points_col], errors='coerce').fillna(0).values if points_col else 0.0,
+        }).dropna(subset=['rank'])
+        if country and country_col:
+            athletes = athletes[athletes['country'].astype(str).str.upper().str.contains(country.upper(), na=False)]
+        if athletes.empty:
+            return pd.DataFrame()
+        athletes = athletes.sort_values('rank', ignore_index=True)
+
+        tiers = np.array([c.tier for c in competitions])
+        costs = np.array([c.estimated_cost_usd for c in competitions], dtype=float)
+        available = np.array([
+            c.points_gold or COMPETITION_POINTS.get(c.tier, {}).get('gold', 0)
+            for c in competitions
+        ], dtype=float)
+
+        # (athletes, events) grid
+        roi = competition_roi(tiers[None, :], costs[None, :], available[None, :],
+                              athletes['rank'].values[:, None])
+
+        n_athletes, n_events = len(athletes), len(competitions)
+        matrix = athletes.loc[np.repeat(np.arange(n_athletes), n_events)].reset_index(drop=True)
+        matrix['competition'] = np.tile([c.name for c in competitions], n_athletes)
+        matrix['date'] = np.tile([c.date for c in competitions], n_athletes)
+        matrix['tier'] = np.tile(tiers, n_athletes)
+        matrix['estimated_cost'] = np.tile(costs, n_athletes)
+        matrix['available_points'] = np.tile(available, n_athletes)
+        matrix['qualification_probability'] = (roi['qualification_probability'].ravel() * 100).round(1)
+        matrix['expected_points'] = roi['expected_points'].ravel().round(1)
+        matrix['financial_roi'] = roi['financial_roi'].ravel().round(2)
+        matrix['strategic_roi'] = roi['strategic_roi'].ravel().round(2)
+        matrix['recommendation'] = np.where(roi['strategic_roi'].ravel() > ROI_ATTEND_THRESHOLD,
+                                            'Attend', 'Consider alternatives')
+        return matrix
+
 
 def main():
     """Example usage and testing"""
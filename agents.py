@@ -11,6 +11,8 @@ import logging
 
 from taekwondo_scraper import TaekwondoDataScraper
 from performance_analyzer import TaekwondoPerformanceAnalyzer
+from ranking_tracker import RankingHistoryTracker
+from alerts import AlertSystem
 
 # Set up logging
 logging.basicConfig(
@@ -84,6 +86,9 @@ class AnalysisAgent:
 
     def __init__(self, data_dir="data", reports_dir="reports"):
         self.analyzer = TaekwondoPerformanceAnalyzer(data_dir=data_dir)
+        self.tracker = RankingHistoryTracker(db_path=str(Path(data_dir) / 'ranking_history.db'))
+        self.alerts = AlertSystem()
+        self.trend_alert_state = str(Path(data_dir) / 'trend_alert_state.json')
         self.reports_dir = Path(reports_dir)
         self.reports_dir.mkdir(exist_ok=True)
 
@@ -115,8 +120,16 @@ class AnalysisAgent:
             logger.info(f"  Athletes in Top 50: {team_analytics.athletes_in_top50}")
             logger.info(f"  Total medals: {team_analytics.total_gold + team_analytics.total_silver + team_analytics.total_bronze}")
 
-            # Check for significant changes (would need historical data)
-            # if rankings improved significantly, send alert
+            # Sustained ranking trends from the materialized trend table
+            # (refreshed by sync_rankings); only label changes are alerted
+            trends = self.tracker.get_trend_table(country='KSA')
+            moving = trends[trends['trend'].isin(['rapidly_improving', 'rapidly_declining'])]
+            for _, row in moving.iterrows():
+                logger.info(
+                    f"  Trend: {row['athlete_name']} ({row['weight_category']}) "
+                    f"{row['trend']} at {row['velocity']:+.2f} ranks/month, now #{row['current_rank']}"
+                )
+            self.alerts.alert_ranking_trends(trends, country='KSA', state_path=self.trend_alert_state)
 
         except Exception as e:
             logger.error(f"Error checking ranking changes: {e}", exc_info=True)
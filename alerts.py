@@ -4,12 +4,15 @@ Send email/SMS alerts for important events
 """
 
 import os
+import json
 import logging
 from datetime import datetime
 from typing import List, Dict, Optional
 from pathlib import Path
 from dataclasses import dataclass
 
+import pandas as pd
+
 # Email sending (install: pip install sendgrid)
 try:
     from sendgrid import SendGridAPIClient
@@ -25,6 +28,11 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Trend labels seen on the previous alert_ranking_trends run, so a trend is
+# reported once when it starts rather than on every daily check
+TREND_ALERT_STATE = 'data/trend_alert_state.json'
+ALERT_TRENDS = ['rapidly_improving', 'rapidly_declining']
+
 
 @dataclass
 class Alert:
@@ -291,6 +299,70 @@ class AlertSystem:
 
         self.send_alert(alert)
 
+    def alert_ranking_trends(self, trends, country: str = 'KSA', state_path: str = TREND_ALERT_STATE):
+        """
+        Alert when an athlete's ranking trend turns rapid
+
+        An athlete/category is reported only when its trend label changed
+        since the previous run; the labels are kept in state_path.
+
+        Args:
+            trends: DataFrame from RankingHistoryTracker.get_trend_table
+            country: Only athletes of this country (code or name)
+            state_path: JSON file with the labels seen on the previous run
+        """
+        if trends is None or trends.empty:
+            return
+
+        from ranking_features import country_codes
+
+        code = country_codes(pd.Series([country])).iloc[0]
+        trends = trends[country_codes(trends['country']) == code]
+        keys = (code + '|' + trends['athlete_name'].astype(str) + '|'
+                + trends['weight_category'].astype(str))
+
+        state_file = Path(state_path)
+        previous = {}
+        if state_file.exists():
+            try:
+                previous = json.loads(state_file.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read trend alert state: {e}")
+
+        changed = keys.map(previous).fillna('').to_numpy() != trends['trend'].to_numpy()
+        flagged = trends[trends['trend'].isin(ALERT_TRENDS) & changed]
+
+        for _, row in flagged.iterrows():
+            improving = row['trend'] == 'rapidly_improving'
+            direction = "climbing" if improving else "falling"
+            months = (pd.Timestamp(row['last_date']) - pd.Timestamp(row['first_date'])).days / 30.44
+            message = (f"{row['athlete_name']} ({row['weight_category']}) is {direction} "
+                       f"{abs(row['velocity']):.1f} ranks/month over {months:.0f} months "
+                       f"(now #{row['current_rank']})")
+
+            alert = Alert(
+                title="Ranking Trend Detected",
+                message=message,
+                severity='info' if improving else 'warning',
+                category='ranking',
+                athlete_name=row['athlete_name'],
+                data={
+                    'Weight Category': row['weight_category'],
+                    'Current Rank': int(row['current_rank']),
+                    'Velocity (ranks/month)': f"{row['velocity']:+.2f}",
+                    'Acceleration': f"{row['acceleration']:+.2f}",
+                    'Snapshots': int(row['data_points'])
+                }
+            )
+
+            self.send_alert(alert)
+
+        previous.update(zip(keys, trends['trend'].astype(str)))
+        state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = state_file.with_suffix('.tmp')
+        tmp.write_text(json.dumps(previous, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, state_file)
+
     def alert_medal_opportunity(self, athlete_name: str, category: str, opportunity_score: float, current_rank: int):
         """Alert when high medal opportunity identified"""
         if opportunity_score < self.opportunity_score_threshold:
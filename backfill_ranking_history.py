@@ -0,0 +1,449 @@
+"""
+Ranking History Backfill
+Bulk-load archived ranking snapshots into the history store
+
+RankingHistoryTracker only holds snapshots recorded since it was deployed.
+This discovers every older snapshot:
+- Azure blob rankings/history/rankings_YYYYMMDD.parquet (daily files) and
+  rankings/history/intervals.parquet (delta history, one snapshot per change)
+- Dated CSVs in data/rankings and data_incremental/rankings
+  (rankings_YYYYMMDD.csv, rankings_YYYYMMDD_HHMMSS.csv)
+
+Files are parsed in parallel and normalized with snapshot_frame. Files that
+share a date are merged, deduplicated per athlete and category by source
+priority. Each batch of dates is bulk-loaded in one transaction. Loaded
+files go into a checkpoint, so an interrupted run resumes where it stopped.
+
+Usage:
+    python backfill_ranking_history.py                     # SQLite tracker, full storage
+    python backfill_ranking_history.py --storage delta     # SQLite tracker, delta storage
+    python backfill_ranking_history.py --target parquet    # ParquetRankingStore
+    python backfill_ranking_history.py --no-blob --workers 8
+    python backfill_ranking_history.py --dry-run           # Discover and report only
+    python backfill_ranking_history.py --reset             # Ignore the checkpoint
+"""
+
+import os
+import sys
+import io
+import re
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# UTF-8 encoding for Windows compatibility
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+import pandas as pd
+
+from ranking_tracker import RankingHistoryTracker, snapshot_frame, SNAPSHOT_COLUMNS
+from row_hashes import HASH_SUFFIX
+
+try:
+    from blob_storage import (
+        get_container_client, download_parquet, _use_azure, _load_ranking_intervals,
+        BLOB_PATHS
+    )
+    BLOB_STORAGE_AVAILABLE = True
+except ImportError:
+    BLOB_STORAGE_AVAILABLE = False
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Local snapshot folders, lowest priority first (later sources win a tie)
+LOCAL_SNAPSHOT_DIRS = ['data/rankings', 'data_incremental/rankings']
+
+CHECKPOINT_FILE = 'data/ranking_backfill_checkpoint.json'
+
+# Snapshot dates loaded per transaction (and per checkpoint write)
+BATCH_DATES = 30
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# Snapshot date in a file name: 20250112 or 2025-01-12
+DATE_PATTERN = re.compile(r'(20\d{2})-?(\d{2})-?(\d{2})')
+
+HISTORY_COLUMNS = ['date'] + list(SNAPSHOT_COLUMNS)
+
+
+@dataclass
+class SnapshotSource:
+    """One archived snapshot file (or one date of the blob delta history)."""
+    kind: str           # 'local', 'blob' or 'blob-delta'
+    path: str
+    date: str           # 'YYYY-MM-DD'
+    priority: int       # Higher wins when sources share a date
+    size: int = 0
+    version: str = ''   # mtime / etag, so a rewritten file is loaded again
+
+    @property
+    def key(self) -> str:
+        """Checkpoint identity."""
+        return f"{self.kind}:{self.path}:{self.date}:{self.size}:{self.version}"
+
+
+def _file_date(name: str) -> Optional[str]:
+    """Snapshot date from a file name, or None if it has none."""
+    match = DATE_PATTERN.search(name)
+    if not match:
+        return None
+    try:
+        return datetime(*map(int, match.groups())).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+# =============================================================================
+# DISCOVERY
+# =============================================================================
+
+@lru_cache(maxsize=1)
+def _blob_intervals() -> Optional[pd.DataFrame]:
+    """Blob delta history, downloaded once per run."""
+    return _load_ranking_intervals()
+
+
+def discover_local(dirs: List[str] = None) -> Tuple[List[SnapshotSource], List[str]]:
+    """
+    Dated ranking files in the local snapshot folders.
+
+    Returns:
+        (sources, undated file paths that were skipped)
+    """
+    sources, undated = [], []
+    for priority, folder in enumerate(dirs or LOCAL_SNAPSHOT_DIRS):
+        path = Path(folder)
+        if not path.exists():
+            continue
+        for f in sorted(list(path.glob('*.csv')) + list(path.glob('*.parquet'))):
+            if f.name.endswith(HASH_SUFFIX):
+                continue
+            date = _file_date(f.name)
+            if date is None:
+                undated.append(str(f))
+                continue
+            stat = f.stat()
+            sources.append(SnapshotSource('local', str(f), date, priority,
+                                          stat.st_size, str(int(stat.st_mtime))))
+    return sources, undated
+
+
+def discover_blob() -> List[SnapshotSource]:
+    """Daily snapshot files and delta history dates in Azure blob storage."""
+    if not BLOB_STORAGE_AVAILABLE or not _use_azure():
+        return []
+
+    container = get_container_client()
+    if not container:
+        return []
+
+    priority = len(LOCAL_SNAPSHOT_DIRS)
+    sources = []
+    try:
+        for blob in container.list_blobs(name_starts_with=BLOB_PATHS['rankings_history']):
+            name = Path(blob.name).name
+            date = _file_date(name)
+            if name.startswith('rankings_') and date and not name.endswith(HASH_SUFFIX):
+                sources.append(SnapshotSource('blob', blob.name, date, priority,
+                                              blob.size, str(blob.etag)))
+    except Exception as e:
+        print(f"Error listing {BLOB_PATHS['rankings_history']}: {e}")
+
+    # Delta history: every date on which an interval starts is a snapshot;
+    # its version is the number of intervals opened that day
+    intervals = _blob_intervals()
+    if intervals is not None and not intervals.empty:
+        for date, opened in intervals.groupby('valid_from').size().items():
+            sources.append(SnapshotSource('blob-delta', BLOB_PATHS['rankings_intervals'], date,
+                                          priority, 0, str(opened)))
+    return sources
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def _parse_local(path: str) -> Optional[pd.DataFrame]:
+    """Read and normalize a local snapshot file (runs in a worker process)."""
+    try:
+        if path.endswith('.parquet'):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, low_memory=False)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+    return snapshot_frame(df)
+
+
+def _parse_blob(path: str) -> Optional[pd.DataFrame]:
+    """Download and normalize a daily snapshot from blob storage."""
+    df = download_parquet(path)
+    return snapshot_frame(df) if df is not None else None
+
+
+def parse_sources(sources: List[SnapshotSource], workers: int = DEFAULT_WORKERS,
+                  pool: ProcessPoolExecutor = None) -> Dict[str, pd.DataFrame]:
+    """
+    Parse snapshot files in parallel.
+
+    Local files are parsed in worker processes (CPU-bound CSV parsing),
+    blob files are downloaded on threads (I/O-bound), and delta history
+    dates are reconstructed from one download of the intervals.
+
+    Args:
+        sources: Files to parse
+        workers: Parallel workers (1 parses local files in this process)
+        pool: Process pool to reuse across calls (one is started per call
+            otherwise)
+
+    Returns:
+        Normalized snapshot per source key (missing if unreadable)
+    """
+    local = [s for s in sources if s.kind == 'local']
+    blob = [s for s in sources if s.kind == 'blob']
+    delta = [s for s in sources if s.kind == 'blob-delta']
+    parsed = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as threads:
+        blob_results = threads.map(_parse_blob, [s.path for s in blob])
+
+        if pool is not None:
+            local_results = list(pool.map(_parse_local, [s.path for s in local], chunksize=4))
+        elif workers > 1 and len(local) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(local))) as local_pool:
+                local_results = list(local_pool.map(_parse_local, [s.path for s in local], chunksize=4))
+        else:
+            local_results = [_parse_local(s.path) for s in local]
+
+        for source, frame in zip(local + blob, list(local_results) + list(blob_results)):
+            if frame is not None and not frame.empty:
+                parsed[source.key] = frame
+
+    if delta:
+        from ranking_intervals import intervals_at
+        intervals = _blob_intervals()
+        for source in delta:
+            frame = intervals_at(intervals, source.date)
+            if not frame.empty:
+                parsed[source.key] = frame
+
+    return parsed
+
+
+def combine_snapshots(sources: List[SnapshotSource], parsed: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge parsed files into one history frame.
+
+    Files sharing a date are unioned (e.g. per-category files); an athlete
+    and category present in several keeps the highest-priority, latest
+    file's row.
+
+    Returns:
+        DataFrame with HISTORY_COLUMNS
+    """
+    ordered = sorted((s for s in sources if s.key in parsed),
+                     key=lambda s: (s.date, s.priority, s.path))
+    if not ordered:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    history = pd.concat([parsed[s.key].assign(date=s.date) for s in ordered], ignore_index=True)
+    history = history.drop_duplicates(['date', 'athlete_name', 'weight_category'], keep='last')
+    return history.reindex(columns=HISTORY_COLUMNS).reset_index(drop=True)
+
+
+# =============================================================================
+# CHECKPOINT
+# =============================================================================
+
+def load_checkpoint(path: str = CHECKPOINT_FILE) -> Dict:
+    """Previously loaded source keys per target."""
+    if Path(path).exists():
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Ignoring unreadable checkpoint {path}: {e}")
+    return {}
+
+
+def save_checkpoint(checkpoint: Dict, path: str = CHECKPOINT_FILE):
+    """Write the checkpoint atomically."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+
+# =============================================================================
+# BACKFILL
+# =============================================================================
+
+def _batches(sources: List[SnapshotSource], batch_dates: int) -> List[List[SnapshotSource]]:
+    """Group sources into batches of whole dates, oldest first."""
+    dates = sorted({s.date for s in sources})
+    by_date = {}
+    for source in sources:
+        by_date.setdefault(source.date, []).append(source)
+    return [
+        [s for date in dates[i:i + batch_dates] for s in by_date[date]]
+        for i in range(0, len(dates), batch_dates)
+    ]
+
+
+def backfill(target: str = 'tracker', storage: str = 'full', db_path: str = 'data/ranking_history.db',
+             store_root: str = None, include_blob: bool = True, workers: int = DEFAULT_WORKERS,
+             batch_dates: int = BATCH_DATES, checkpoint_file: str = CHECKPOINT_FILE,
+             reset: bool = False, dry_run: bool = False) -> Dict:
+    """
+    Discover, parse and bulk-load archived ranking snapshots.
+
+    Args:
+        target: 'tracker' (SQLite RankingHistoryTracker) or 'parquet'
+            (ParquetRankingStore)
+        storage: Tracker storage mode, 'full' or 'delta'
+        db_path: Tracker database
+        store_root: ParquetRankingStore root (default store path)
+        include_blob: Also read Azure rankings/history/
+        workers: Parallel parse workers
+        batch_dates: Snapshot dates per load transaction
+        checkpoint_file: Resume state
+        reset: Reload everything, ignoring the checkpoint
+        dry_run: Only discover and report
+
+    Returns:
+        Dict with discovered, skipped, loaded files, dates, rows, MB read,
+        seconds and rows_per_second
+    """
+    start = time.time()
+
+    sources, undated = discover_local()
+    if include_blob:
+        sources += discover_blob()
+
+    target_id = f"{target}:{db_path}:{storage}" if target == 'tracker' else f"{target}:{store_root or 'default'}"
+    checkpoint = {} if reset else load_checkpoint(checkpoint_file)
+    done = set(checkpoint.get(target_id, []))
+    pending = [s for s in sources if s.key not in done]
+
+    print(f"Discovered {len(sources)} snapshot files "
+          f"({sum(s.kind == 'local' for s in sources)} local, {sum(s.kind != 'local' for s in sources)} blob) "
+          f"over {len({s.date for s in sources})} dates")
+    if undated:
+        print(f"Skipped {len(undated)} files without a date in the name")
+    print(f"{len(sources) - len(pending)} already loaded, {len(pending)} to load")
+
+    result = {
+        'discovered': len(sources), 'undated': len(undated), 'skipped': len(sources) - len(pending),
+        'loaded_files': 0, 'dates': 0, 'rows': 0, 'mb_read': 0.0,
+    }
+    if dry_run or not pending:
+        result.update({'seconds': round(time.time() - start, 1), 'rows_per_second': 0})
+        return result
+
+    if target == 'parquet':
+        from ranking_store import ParquetRankingStore
+        store = ParquetRankingStore(store_root) if store_root else ParquetRankingStore()
+    else:
+        store = RankingHistoryTracker(db_path, storage=storage)
+
+    batches = _batches(pending, batch_dates)
+
+    # One worker pool for the whole run
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for i, batch in enumerate(batches, 1):
+            batch_start = time.time()
+            parsed = parse_sources(batch, workers, pool)
+            history = combine_snapshots(batch, parsed)
+
+            if not history.empty:
+                if target == 'parquet':
+                    store.record_snapshots(history)
+                else:
+                    source_files = {s.date: s.path for s in sorted(batch, key=lambda s: s.priority)
+                                    if s.key in parsed}
+                    store.record_snapshots(history, source_files)
+
+            # Unreadable files are checkpointed too; they would fail again
+            checkpoint[target_id] = sorted(done.union(s.key for s in batch))
+            done = set(checkpoint[target_id])
+            save_checkpoint(checkpoint, checkpoint_file)
+
+            mb = sum(s.size for s in batch) / (1024 * 1024)
+            elapsed = time.time() - batch_start
+            result['loaded_files'] += len(parsed)
+            result['dates'] += history['date'].nunique() if not history.empty else 0
+            result['rows'] += len(history)
+            result['mb_read'] += mb
+            print(f"Batch {i}/{len(batches)}: {batch[0].date} to {batch[-1].date}, "
+                  f"{len(parsed)}/{len(batch)} files, {len(history):,} rows in {elapsed:.1f}s "
+                  f"({len(history) / max(elapsed, 1e-9):,.0f} rows/s, {mb / max(elapsed, 1e-9):.1f} MB/s)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.time() - start
+    result['mb_read'] = round(result['mb_read'], 1)
+    result['seconds'] = round(elapsed, 1)
+    result['rows_per_second'] = int(result['rows'] / max(elapsed, 1e-9))
+    return result
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill ranking history from archived snapshots')
+    parser.add_argument('--target', choices=['tracker', 'parquet'], default='tracker',
+                        help='History store to load (default: tracker)')
+    parser.add_argument('--storage', choices=['full', 'delta'], default='full',
+                        help='Tracker storage mode (default: full)')
+    parser.add_argument('--db', default='data/ranking_history.db',
+                        help='Tracker database (default: data/ranking_history.db)')
+    parser.add_argument('--store-root', default=None,
+                        help='ParquetRankingStore root (default: data/rankings/history_store)')
+    parser.add_argument('--no-blob', action='store_true',
+                        help='Skip Azure rankings/history/')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Parallel parse workers (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--batch-dates', type=int, default=BATCH_DATES,
+                        help=f'Snapshot dates per load transaction (default: {BATCH_DATES})')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE,
+                        help=f'Checkpoint file (default: {CHECKPOINT_FILE})')
+    parser.add_argument('--reset', action='store_true',
+                        help='Ignore the checkpoint and reload everything')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Discover snapshots without loading')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RANKING HISTORY BACKFILL")
+    print("=" * 60)
+
+    result = backfill(
+        target=args.target, storage=args.storage, db_path=args.db, store_root=args.store_root,
+        include_blob=not args.no_blob, workers=args.workers, batch_dates=args.batch_dates,
+        checkpoint_file=args.checkpoint, reset=args.reset, dry_run=args.dry_run,
+    )
+
+    print("-" * 60)
+    print(f"Loaded {result['loaded_files']} files: {result['rows']:,} rows over {result['dates']} dates "
+          f"({result['mb_read']} MB) in {result['seconds']}s - {result['rows_per_second']:,} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Batch Scouting Report Generator
+Produce scouting reports for every athlete in a weight category or draw
+
+Profiles for the whole field are built once (in parallel across a process
+pool) and shared by every report, then written out as one JSON file and one
+combined HTML bundle.
+
+Usage:
+    python batch_scouting.py --category=-68kg
+    python batch_scouting.py --category=-68kg --workers 4 --limit 32
+    python batch_scouting.py --draw data/draws/m68_draw.txt --competition "Asian Games 2026"
+"""
+
+import sys
+import io
+
+try:
+    if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer') and sys.stdout.buffer is not None:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+except (ValueError, AttributeError):
+    pass
+
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from scouting_manager import ScoutingManager
+
+
+def load_draw(path: str) -> List[str]:
+    """
+    Load a draw list of athlete names.
+
+    Accepts a CSV with an athlete name column, or a plain text file with
+    one name per line.
+    """
+    draw_path = Path(path)
+    if draw_path.suffix.lower() == '.csv':
+        df = pd.read_csv(draw_path)
+        name_col = next((c for c in ['athlete_name', 'NAME', 'name', 'athlete'] if c in df.columns),
+                        df.columns[0])
+        return df[name_col].dropna().astype(str).str.strip().tolist()
+
+    with open(draw_path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate scouting reports for a whole category or draw')
+    parser.add_argument('--category', '-c', help='Weight category (e.g., --category=-68kg)')
+    parser.add_argument('--draw', '-d', help='Draw file (CSV or one name per line)')
+    parser.add_argument('--competition', default='Upcoming Competition', help='Competition name')
+    parser.add_argument('--limit', type=int, default=32, help='Field size when using --category')
+    parser.add_argument('--opponents', type=int, default=10, help='Likely opponents per report')
+    parser.add_argument('--workers', '-w', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Worker processes for profile building (1 = no pool)')
+    parser.add_argument('--data-dir', default='.', help='Base directory for data files')
+    parser.add_argument('--output-dir', '-o', default='reports/scouting', help='Output directory')
+
+    args = parser.parse_args()
+
+    if not args.category and not args.draw:
+        parser.error('one of --category or --draw is required')
+
+    print("=" * 60)
+    print("BATCH SCOUTING REPORTS")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    scout = ScoutingManager(args.data_dir)
+    if scout.rankings_df is None:
+        print("[ERROR] No rankings data found")
+        return 1
+    load_time = time.perf_counter() - start
+
+    draw = load_draw(args.draw) if args.draw else None
+
+    start = time.perf_counter()
+    reports = scout.generate_batch_reports(
+        weight_category=args.category,
+        draw=draw,
+        competition=args.competition,
+        limit=args.limit,
+        opponents_per_report=args.opponents,
+        workers=args.workers
+    )
+    build_time = time.perf_counter() - start
+
+    if not reports:
+        print("[WARN] No athletes found for the requested field")
+        return 1
+
+    label = args.category or Path(args.draw).stem
+    paths = scout.export_batch_reports(reports, output_dir=args.output_dir, label=label)
+
+    print(f"\nData load: {load_time:.2f}s")
+    print(f"Reports:   {len(reports)} in {build_time:.2f}s ({args.workers} workers)")
+    print(f"JSON:      {paths['json']}")
+    print(f"HTML:      {paths['html']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -62,12 +62,26 @@ STORAGE_ACCOUNT_URL = "https://teamsaudianalytics.blob.core.windows.net/"
 BLOB_PATHS = {
     'rankings': 'rankings/world_rankings_latest.parquet',
     'rankings_history': 'rankings/history/',
+    'rankings_intervals': 'rankings/history/intervals.parquet',
     'competitions': 'competitions/competitions_master.parquet',
     'matches': 'matches/matches_master.parquet',
     'athletes': 'athletes/athletes_master.parquet',
     'scouting': 'scouting/scouting_profiles.parquet',
+    'state': 'state/',
 }
 
+# Local state directories kept in Azure between stateless CI runs
+# (blob prefix under BLOB_PATHS['state'] -> local directory)
+STATE_DIRS = {
+    'events': 'data/events',
+    'ratings': 'data/ratings',
+}
+
+# Ranking history layout: 'snapshot' writes a full rankings_YYYYMMDD.parquet
+# per save; 'delta' keeps one intervals.parquet that only grows with changes
+RANKINGS_HISTORY_MODE = os.getenv('RANKINGS_HISTORY_MODE', 'snapshot')
+HISTORY_MODES = ('snapshot', 'delta')
+
 # =============================================================================
 # CONNECTION MANAGEMENT
 # =============================================================================
@@ -346,8 +360,15 @@ def _load_local_athletes() -> pd.DataFrame:
     return pd.DataFrame()
 
 
-def save_rankings(df: pd.DataFrame, create_history: bool = True) -> bool:
-    """Save rankings to Azure with optional history snapshot."""
+def save_rankings(df: pd.DataFrame, create_history: bool = True, history_mode: str = None) -> bool:
+    """Save rankings to Azure with optional history snapshot.
+
+    Args:
+        df: Rankings to save as latest
+        create_history: Also record the rankings in the history
+        history_mode: 'snapshot' (daily full file) or 'delta' (interval
+            changes); defaults to RANKINGS_HISTORY_MODE
+    """
     if not _use_azure():
         print("Azure not configured, saving locally")
         df.to_parquet('data/rankings/world_rankings_latest.parquet', index=False)
@@ -355,23 +376,131 @@ def save_rankings(df: pd.DataFrame, create_history: bool = True) -> bool:
 
     # Create backup/history
     if create_history:
-        timestamp = datetime.now().strftime("%Y%m%d")
-        history_path = f"{BLOB_PATHS['rankings_history']}rankings_{timestamp}.parquet"
-        upload_parquet(df, history_path)
+        history_mode = history_mode or RANKINGS_HISTORY_MODE
+        if history_mode not in HISTORY_MODES:
+            raise ValueError(f"history_mode must be one of {HISTORY_MODES}, got {history_mode!r}")
+
+        if history_mode == 'delta':
+            _save_ranking_intervals(df, datetime.now().strftime("%Y-%m-%d"))
+        else:
+            from row_hashes import row_hashes, ranking_key_columns, HASH_SUFFIX
+
+            timestamp = datetime.now().strftime("%Y%m%d")
+            history_path = f"{BLOB_PATHS['rankings_history']}rankings_{timestamp}.parquet"
+            upload_parquet(df, history_path)
+            upload_parquet(row_hashes(df, ranking_key_columns(df)), history_path + HASH_SUFFIX)
 
     # Upload as latest
     return upload_parquet(df, BLOB_PATHS['rankings'])
 
 
+def _load_ranking_intervals() -> Optional[pd.DataFrame]:
+    """Download the delta ranking history (None if there is none yet)."""
+    intervals = download_parquet(BLOB_PATHS['rankings_intervals'])
+    if intervals is None:
+        return None
+
+    # upload_parquet stores missing strings as ''; an open interval has no valid_to
+    intervals['valid_to'] = intervals['valid_to'].replace('', None)
+    intervals['rank'] = pd.to_numeric(intervals['rank'], errors='coerce')
+    intervals['points'] = pd.to_numeric(intervals['points'], errors='coerce')
+    return intervals
+
+
+def _save_ranking_intervals(df: pd.DataFrame, date: str) -> bool:
+    """Apply a rankings snapshot to the delta history and upload it."""
+    from ranking_intervals import apply_snapshot
+    from ranking_tracker import snapshot_frame
+
+    snapshot = snapshot_frame(df)
+    if snapshot is None:
+        print("Rankings have no athlete/rank columns, history not updated")
+        return False
+
+    intervals, counts = apply_snapshot(_load_ranking_intervals(), snapshot, date)
+    print(f"Ranking history {date}: {counts['inserted']} new, {counts['updated']} updated, "
+          f"{counts['dropped']} dropped, {counts['unchanged']} unchanged")
+    if not (counts['inserted'] or counts['updated'] or counts['dropped']) and len(intervals):
+        return True
+
+    # Keep numeric columns numeric (upload_parquet stringifies object columns)
+    intervals = intervals.astype({'rank': int, 'points': float})
+    return upload_parquet(intervals, BLOB_PATHS['rankings_intervals'])
+
+
+def load_rankings_as_of(date: str, history_mode: str = None) -> pd.DataFrame:
+    """Rankings as they stood on a date, from the Azure ranking history.
+
+    Args:
+        date: Date to reconstruct ('YYYY-MM-DD')
+        history_mode: 'snapshot' or 'delta'; defaults to RANKINGS_HISTORY_MODE
+
+    Returns:
+        Delta mode: the normalized snapshot columns reconstructed from the
+        intervals. Snapshot mode: the latest daily file on or before the
+        date, as saved. Empty if there is no history for the date.
+    """
+    history_mode = history_mode or RANKINGS_HISTORY_MODE
+
+    if history_mode == 'delta':
+        from ranking_intervals import intervals_at
+        return intervals_at(_load_ranking_intervals(), date)
+
+    container = get_container_client()
+    if not container:
+        return pd.DataFrame()
+
+    from row_hashes import HASH_SUFFIX
+
+    # Daily files sort by name; pick the last one dated on or before the date
+    cutoff = f"{BLOB_PATHS['rankings_history']}rankings_{pd.Timestamp(date):%Y%m%d}.parquet"
+    try:
+        names = sorted(
+            blob.name for blob in container.list_blobs(name_starts_with=BLOB_PATHS['rankings_history'])
+            if Path(blob.name).stem.startswith('rankings_') and blob.name.endswith('.parquet')
+            and not blob.name.endswith(HASH_SUFFIX) and blob.name <= cutoff
+        )
+    except Exception as e:
+        print(f"Error listing ranking history: {e}")
+        return pd.DataFrame()
+
+    if not names:
+        return pd.DataFrame()
+    df = download_parquet(names[-1])
+    return df if df is not None else pd.DataFrame()
+
+
+def _publish_new_matches(df: pd.DataFrame, existing: Optional[pd.DataFrame]):
+    """Log match_added events for bouts not in the existing match data."""
+    try:
+        from change_events import ChangeEventLog, match_events
+        from rating_engine import match_ids
+
+        known = match_ids(existing) if existing is not None and not existing.empty else ()
+        logged = ChangeEventLog().append(match_events(df, known_ids=known))
+        if logged:
+            print(f"Match events logged: {len(logged)}")
+    except Exception as e:
+        print(f"Warning: could not log match events: {e}")
+
+
 def save_matches(df: pd.DataFrame, append: bool = True) -> bool:
-    """Save matches to Azure."""
+    """Save matches to Azure (new bouts are logged as match_added events)."""
     if not _use_azure():
         print("Azure not configured, saving locally")
-        df.to_parquet('data/matches/matches_master.parquet', index=False)
+        local_path = Path('data/matches/matches_master.parquet')
+        try:
+            existing = pd.read_parquet(local_path) if local_path.exists() else None
+        except Exception:
+            existing = None
+        _publish_new_matches(df, existing)
+        df.to_parquet(local_path, index=False)
         return True
 
+    existing = download_parquet(BLOB_PATHS['matches'])
+    _publish_new_matches(df, existing)
+
     if append:
-        existing = download_parquet(BLOB_PATHS['matches'])
         if existing is not None and not existing.empty:
             df = pd.concat([existing, df], ignore_index=True)
             # Remove duplicates if we have an ID column
@@ -381,6 +510,83 @@ def save_matches(df: pd.DataFrame, append: bool = True) -> bool:
     return upload_parquet(df, BLOB_PATHS['matches'])
 
 
+# =============================================================================
+# STATE SYNC (event log, rating state)
+# =============================================================================
+
+def download_state(names: List[str] = None) -> bool:
+    """
+    Restore local state directories from Azure.
+
+    Each CI run starts from a fresh checkout, so the change event log
+    (with its subscriber offsets) and the rating engine state are pulled
+    down before anything appends to or consumes them.
+
+    Args:
+        names: Keys of STATE_DIRS to restore (default: all)
+
+    Returns:
+        True if Azure is reachable and every listed file was downloaded
+        (a prefix with no blobs yet counts as restored, empty state)
+    """
+    container = get_container_client()
+    if not container:
+        print("No Azure connection available, state not restored")
+        return False
+
+    ok = True
+    for name in names or list(STATE_DIRS):
+        prefix = f"{BLOB_PATHS['state']}{name}/"
+        local_dir = Path(STATE_DIRS[name])
+        count = 0
+        try:
+            for blob in container.list_blobs(name_starts_with=prefix):
+                target = local_dir / blob.name[len(prefix):]
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(container.get_blob_client(blob.name).download_blob().readall())
+                count += 1
+        except Exception as e:
+            print(f"Error restoring {name} state: {e}")
+            ok = False
+            continue
+        print(f"Restored {name} state: {count} files -> {local_dir}")
+    return ok
+
+
+def upload_state(names: List[str] = None) -> bool:
+    """
+    Save local state directories back to Azure (see download_state).
+
+    Args:
+        names: Keys of STATE_DIRS to save (default: all)
+
+    Returns:
+        True if every file was uploaded
+    """
+    container = get_container_client()
+    if not container:
+        print("No Azure connection available, state not saved")
+        return False
+
+    ok = True
+    for name in names or list(STATE_DIRS):
+        prefix = f"{BLOB_PATHS['state']}{name}/"
+        local_dir = Path(STATE_DIRS[name])
+        if not local_dir.exists():
+            continue
+        count = 0
+        for path in sorted(p for p in local_dir.rglob('*') if p.is_file()):
+            blob_name = prefix + path.relative_to(local_dir).as_posix()
+            try:
+                container.get_blob_client(blob_name).upload_blob(path.read_bytes(), overwrite=True)
+                count += 1
+            except Exception as e:
+                print(f"Failed to upload {blob_name}: {e}")
+                ok = False
+        print(f"Saved {name} state: {count} files from {local_dir}")
+    return ok
+
+
 # =============================================================================
 # MIGRATION UTILITIES
 # =============================================================================
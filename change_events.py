@@ -0,0 +1,393 @@
+"""
+Change Event Log
+Append-only log of typed ranking and match events with offset-based subscribers
+
+Each sync used to rewrite ranking_changes.json with its whole change report
+appended, and alerts were rebuilt by re-scanning that report. Here every
+change is one typed event with a monotonically increasing offset:
+
+- rank_change: an athlete's rank or points changed within a category
+- new_entry / dropped_out: an athlete entered or left a category's ranking
+- category_move: an athlete left one category and entered another
+- overtake: a rival moved from behind to ahead of a focus (KSA) athlete
+- match_added: a bout not stored before
+
+Events are appended as JSON lines to segment files
+(data/events/events_<first offset>.jsonl, a new segment every
+SEGMENT_EVENTS events). Subscribers (alert rules, dashboard caches, the
+rating engine) keep their last consumed offset in offsets.json and read
+only the segments after it, never the full history or a full snapshot.
+
+Usage:
+    from change_events import ChangeEventLog, ranking_events
+
+    log = ChangeEventLog()
+    log.append(ranking_events(diff, moves, overtakes))
+
+    log.subscribe('alerts', send_alerts, types=['rank_change', 'overtake'])
+    log.dispatch()                          # each subscriber gets its new events
+
+    python change_events.py                 # log size and subscriber offsets
+    python change_events.py --tail 20       # latest events
+"""
+
+import os
+import sys
+import io
+import json
+import argparse
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# UTF-8 encoding for Windows compatibility
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+import pandas as pd
+import numpy as np
+
+from ranking_features import country_codes
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+RANKING_EVENT_TYPES = ['rank_change', 'new_entry', 'dropped_out', 'category_move', 'overtake']
+EVENT_TYPES = RANKING_EVENT_TYPES + ['match_added']
+
+DEFAULT_EVENT_DIR = 'data/events'
+
+# Events per segment file (older segments are never rewritten)
+SEGMENT_EVENTS = 10000
+
+SEGMENT_PREFIX = 'events_'
+OFFSETS_FILE = 'offsets.json'
+
+# Event fields holding ranks (ints in the log, not floats from NaN-padded merges)
+RANK_FIELDS = ['old_rank', 'new_rank', 'change', 'rival_old_rank', 'rival_new_rank']
+
+
+def _json_value(value):
+    """Plain JSON value for numpy/pandas scalars (missing values as None)."""
+    if value is None:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _records(frame: pd.DataFrame, event_type: str) -> List[Dict]:
+    """One event dict per frame row."""
+    if frame.empty:
+        return []
+    frame = frame.astype(object).where(frame.notna(), None)
+    for col in RANK_FIELDS:
+        if col in frame.columns:
+            frame[col] = [None if v is None else int(v) for v in frame[col]]
+    records = frame.to_dict('records')
+    for record in records:
+        record['type'] = event_type
+    return records
+
+
+# =============================================================================
+# EVENT BUILDERS
+# =============================================================================
+
+def ranking_events(diff: pd.DataFrame, moves: pd.DataFrame = None,
+                   overtakes: List[Dict] = None) -> List[Dict]:
+    """
+    Ranking events from a keyed snapshot diff.
+
+    Args:
+        diff: Output of sync_rankings.diff_rankings (the whole field)
+        moves: Output of sync_rankings.category_moves
+        overtakes: Output of sync_rankings.find_rival_overtakes
+
+    Returns:
+        List of event dicts (type plus payload), not yet appended
+    """
+    if diff is None or diff.empty:
+        return []
+
+    diff = diff.assign(country_code=country_codes(diff['country']).values)
+    base = {'athlete_name': 'athlete', 'athlete_key': 'athlete_key',
+            'country': 'country', 'country_code': 'country_code', 'weight_category': 'category'}
+
+    def select(status: str, columns: Dict[str, str]) -> pd.DataFrame:
+        columns = {**base, **columns}
+        return diff.loc[diff['status'] == status, list(columns)].rename(columns=columns)
+
+    events = []
+    events += _records(select('changed', {
+        'old_rank': 'old_rank', 'new_rank': 'new_rank', 'rank_change': 'change',
+        'old_points': 'old_points', 'new_points': 'new_points', 'points_change': 'points_change'}),
+        'rank_change')
+    events += _records(select('entry', {'new_rank': 'new_rank', 'new_points': 'new_points'}), 'new_entry')
+    events += _records(select('exit', {'old_rank': 'old_rank', 'old_points': 'old_points'}), 'dropped_out')
+
+    if moves is not None and not moves.empty:
+        moved = moves.rename(columns={'athlete_name': 'athlete'})
+        moved = moved.assign(country_code=country_codes(moved['country']).values)
+        events += _records(moved, 'category_move')
+
+    if overtakes:
+        events += _records(pd.DataFrame(overtakes), 'overtake')
+
+    return events
+
+
+def match_events(matches_df: pd.DataFrame, known_ids: Iterable[str] = ()) -> List[Dict]:
+    """
+    match_added events for bouts whose id is not in known_ids.
+
+    Ids come from rating_engine.match_ids, so the rating engine recognises
+    bouts it has already rated.
+    """
+    if matches_df is None or matches_df.empty:
+        return []
+
+    from match_stats import normalize_match_columns
+    from rating_engine import match_ids
+
+    matches_df = normalize_match_columns(matches_df)
+    ids = match_ids(matches_df)
+    new = ~ids.isin(set(known_ids)).values
+    if not new.any():
+        return []
+    frame = matches_df[new].drop(columns=['match_id'], errors='ignore')
+    frame.insert(0, 'match_id', ids[new].values)
+    return _records(frame, 'match_added')
+
+
+def events_frame(events: List[Dict]) -> pd.DataFrame:
+    """Events as a DataFrame (match_date parsed back to datetimes)."""
+    frame = pd.DataFrame(events)
+    if 'match_date' in frame.columns:
+        frame['match_date'] = pd.to_datetime(frame['match_date'], errors='coerce')
+    return frame
+
+
+# =============================================================================
+# EVENT LOG
+# =============================================================================
+
+class ChangeEventLog:
+    """
+    Append-only event log in JSON-lines segments with per-subscriber offsets.
+    """
+
+    def __init__(self, event_dir: str = DEFAULT_EVENT_DIR, segment_events: int = SEGMENT_EVENTS):
+        self.event_dir = Path(event_dir)
+        self.offsets_path = self.event_dir / OFFSETS_FILE
+        self.segment_events = segment_events
+        self.subscribers: Dict[str, Tuple[Callable[[List[Dict]], None], Optional[List[str]]]] = {}
+
+    # =========================================================================
+    # SEGMENTS
+    # =========================================================================
+
+    def _segment_path(self, start: int) -> Path:
+        return self.event_dir / f'{SEGMENT_PREFIX}{start:010d}.jsonl'
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        """(first offset, path) of every segment, oldest first."""
+        if not self.event_dir.exists():
+            return []
+        found = []
+        for path in self.event_dir.glob(f'{SEGMENT_PREFIX}*.jsonl'):
+            try:
+                found.append((int(path.stem[len(SEGMENT_PREFIX):]), path))
+            except ValueError:
+                continue
+        return sorted(found)
+
+    @property
+    def next_offset(self) -> int:
+        """Offset the next appended event will get (only the last segment is counted)."""
+        segments = self.segments()
+        if not segments:
+            return 0
+        start, path = segments[-1]
+        with open(path, 'rb') as f:
+            return start + sum(1 for _ in f)
+
+    # =========================================================================
+    # WRITE / READ
+    # =========================================================================
+
+    def append(self, events: List[Dict], batch: str = None) -> List[Dict]:
+        """
+        Append events to the log.
+
+        Args:
+            events: Event dicts with a 'type' from EVENT_TYPES
+            batch: Identifier shared by the events (default: the append time)
+
+        Returns:
+            The stored records (with offset, timestamp and batch)
+        """
+        if not events:
+            return []
+
+        timestamp = datetime.now().isoformat()
+        batch = batch or timestamp
+        offset = self.next_offset
+
+        records = []
+        for event in events:
+            if event.get('type') not in EVENT_TYPES:
+                raise ValueError(f"Unknown event type: {event.get('type')!r}")
+            record = {'offset': offset, 'type': event['type'], 'timestamp': timestamp, 'batch': batch}
+            record.update({k: _json_value(v) for k, v in event.items() if k not in record})
+            records.append(record)
+            offset += 1
+
+        self.event_dir.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        start = segments[-1][0] if segments else 0
+
+        written = 0
+        while written < len(records):
+            first = records[written]['offset']
+            if first - start >= self.segment_events:
+                start = first
+            chunk = records[written:written + start + self.segment_events - first]
+            with open(self._segment_path(start), 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in chunk))
+            written += len(chunk)
+
+        return records
+
+    def read(self, since: int = -1, types: List[str] = None, limit: int = None) -> List[Dict]:
+        """
+        Events after an offset, oldest first.
+
+        Segments that end before the offset are not opened, and lines at or
+        before it are skipped without parsing.
+
+        Args:
+            since: Last offset already seen (-1 for the whole log)
+            types: Only these event types (default all)
+            limit: Maximum number of events returned
+        """
+        segments = self.segments()
+        first = max(bisect_right([start for start, _ in segments], since + 1) - 1, 0)
+        wanted = set(types) if types else None
+
+        events = []
+        for start, path in segments[first:]:
+            with open(path, 'r', encoding='utf-8') as f:
+                for n, line in enumerate(f):
+                    if start + n <= since or not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if wanted is None or event['type'] in wanted:
+                        events.append(event)
+                        if limit is not None and len(events) >= limit:
+                            return events
+        return events
+
+    # =========================================================================
+    # SUBSCRIBERS
+    # =========================================================================
+
+    def _load_offsets(self) -> Dict[str, int]:
+        if not self.offsets_path.exists():
+            return {}
+        try:
+            with open(self.offsets_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[WARN] Could not read subscriber offsets: {e}")
+            return {}
+
+    def get_offset(self, subscriber: str) -> int:
+        """Last offset a subscriber has consumed (-1 if none)."""
+        return int(self._load_offsets().get(subscriber, -1))
+
+    def commit(self, subscriber: str, offset: int):
+        """Record a subscriber's consumed offset (atomic replace)."""
+        offsets = self._load_offsets()
+        offsets[subscriber] = int(offset)
+        self.event_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.offsets_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(offsets, f, indent=2)
+        os.replace(tmp, self.offsets_path)
+
+    def consume(self, subscriber: str, handler: Callable[[List[Dict]], None],
+                types: List[str] = None) -> int:
+        """
+        Hand a subscriber the events since its last offset.
+
+        The offset is committed only after the handler returns, so a failed
+        handler sees the same events again next time. Events of other types
+        are skipped but still count as consumed.
+
+        Returns:
+            Number of events passed to the handler
+        """
+        since = self.get_offset(subscriber)
+        end = self.next_offset - 1
+        if end <= since:
+            return 0
+
+        events = [e for e in self.read(since, types) if e['offset'] <= end]
+        if events:
+            handler(events)
+        self.commit(subscriber, end)
+        return len(events)
+
+    def subscribe(self, subscriber: str, handler: Callable[[List[Dict]], None],
+                  types: List[str] = None):
+        """Register a handler for dispatch()."""
+        self.subscribers[subscriber] = (handler, types)
+
+    def dispatch(self) -> Dict[str, int]:
+        """Run every registered subscriber over its new events."""
+        counts = {}
+        for subscriber, (handler, types) in self.subscribers.items():
+            try:
+                counts[subscriber] = self.consume(subscriber, handler, types)
+            except Exception as e:
+                print(f"[WARN] Subscriber {subscriber} failed: {e}")
+                counts[subscriber] = 0
+        return counts
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Change event log')
+    parser.add_argument('--dir', default=DEFAULT_EVENT_DIR, help='Event log directory')
+    parser.add_argument('--tail', type=int, default=0, help='Show the latest N events')
+    parser.add_argument('--type', action='append', choices=EVENT_TYPES, help='Filter by event type')
+    args = parser.parse_args()
+
+    log = ChangeEventLog(args.dir)
+    end = log.next_offset
+    print(f"Events: {end:,} in {len(log.segments())} segment(s)")
+    for subscriber, offset in sorted(log._load_offsets().items()):
+        print(f"  {subscriber:<20} offset {offset:>8}  ({end - 1 - offset:,} pending)")
+
+    if args.tail:
+        # A type filter has to look further back than the last N offsets
+        since = -1 if args.type else end - 1 - args.tail
+        events = log.read(since=since, types=args.type)[-args.tail:]
+        for event in events:
+            payload = {k: v for k, v in event.items() if k not in ('offset', 'type', 'timestamp', 'batch')}
+            print(f"{event['offset']:>8} {event['type']:<14} {json.dumps(payload, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -61,6 +61,41 @@ ASIAN_COUNTRIES = [
     'TJK', 'KGZ', 'TKM', 'AFG', 'NPL', 'BAN', 'SRI', 'MDV'
 ]
 
+# Other continental unions (for continental rankings)
+EUROPEAN_COUNTRIES = [
+    'GBR', 'FRA', 'ESP', 'ITA', 'GER', 'TUR', 'RUS', 'CRO', 'SRB', 'BEL',
+    'NED', 'POL', 'GRE', 'POR', 'SWE', 'NOR', 'DEN', 'FIN', 'AUT', 'SUI',
+    'UKR', 'AZE', 'GEO', 'ARM', 'BUL', 'ROU', 'HUN', 'CZE', 'SVK', 'SLO',
+    'BIH', 'MNE', 'MKD', 'ALB', 'KOS', 'MDA', 'BLR', 'LTU', 'LAT', 'EST',
+    'IRL', 'ISL', 'LUX', 'CYP', 'MLT', 'ISR', 'AIN'
+]
+
+AFRICAN_COUNTRIES = [
+    'EGY', 'MAR', 'TUN', 'ALG', 'CIV', 'NIG', 'NGR', 'SEN', 'GAB', 'CMR',
+    'RSA', 'KEN', 'ETH', 'MLI', 'BUR', 'GHA', 'LBA', 'SUD', 'UGA',
+    'RWA', 'COD', 'CGO', 'BEN', 'TOG', 'GEQ', 'CPV', 'MRI', 'ZIM', 'ZAM',
+    'BOT', 'NAM', 'MAD', 'LES', 'CHA', 'CAF', 'GUI', 'SLE', 'LBR', 'SOM'
+]
+
+PAN_AMERICAN_COUNTRIES = [
+    'USA', 'MEX', 'BRA', 'ARG', 'CAN', 'COL', 'CUB', 'DOM', 'VEN', 'PER',
+    'CHI', 'ECU', 'PUR', 'CRC', 'GUA', 'PAN', 'HON', 'ESA', 'NCA', 'BOL',
+    'PAR', 'URU', 'HAI', 'JAM', 'TTO', 'BAH', 'BAR', 'ARU', 'GUY', 'SUR'
+]
+
+OCEANIA_COUNTRIES = [
+    'AUS', 'NZL', 'FIJ', 'PNG', 'SAM', 'TGA', 'VAN', 'SOL', 'NRU', 'KIR'
+]
+
+# Continental unions used for continental rank columns
+CONTINENTS = {
+    'Asia': ASIAN_COUNTRIES,
+    'Europe': EUROPEAN_COUNTRIES,
+    'Africa': AFRICAN_COUNTRIES,
+    'Pan America': PAN_AMERICAN_COUNTRIES,
+    'Oceania': OCEANIA_COUNTRIES,
+}
+
 # Weight categories (all 16)
 WEIGHT_CATEGORIES = {
     'M': ['-54kg', '-58kg', '-63kg', '-68kg', '-74kg', '-80kg', '-87kg', '+87kg'],
@@ -176,6 +211,16 @@ COMPETITION_RANKING_POINTS = {
     'National Championships': 20,
 }
 
+# Ranking points validity schedule: (months since event, weight).
+# Points count at the weight of the first bound they are younger than and
+# expire once older than the last bound.
+RANKING_POINTS_DECAY = [
+    (12, 1.00),
+    (24, 0.75),
+    (36, 0.50),
+    (48, 0.25),
+]
+
 # Match statistics to track (if available)
 MATCH_STATS = [
     'head_kicks',
@@ -16,6 +16,9 @@ from performance_analyzer import TaekwondoPerformanceAnalyzer
 from models import WeightCategory
 from advanced_kpis import AdvancedKPIAnalyzer
 from ranking_tracker import RankingHistoryTracker
+from ranking_trends import history_intervals
+from ranking_intervals import expand_intervals, boundary_dates
+from change_events import ChangeEventLog
 from config import ASIAN_RIVALS, ASIAN_COUNTRIES, ASIAN_GAMES_2026, LA_2028_OLYMPICS, DUAL_TRACK_MILESTONES
 
 # Theme assets path
@@ -122,6 +125,14 @@ def load_analyzer():
     return TaekwondoPerformanceAnalyzer(data_dir="data")
 
 
+def refresh_cached_data():
+    """Clear cached data when sync has logged ranking or match events since the last check"""
+    try:
+        ChangeEventLog().consume('dashboard', lambda events: st.cache_data.clear())
+    except OSError:
+        pass  # Read-only deployments keep their caches until restart
+
+
 def main():
     """Main dashboard application"""
 
@@ -154,6 +165,7 @@ def main():
         st.markdown("---")
 
     # Initialize analyzer
+    refresh_cached_data()
     try:
         analyzer = load_analyzer()
     except Exception as e:
@@ -818,11 +830,11 @@ def show_olympic_qualification_tracker(analyzer):
 
 
 def show_ranking_trends(analyzer):
-    """Display historical ranking trends using ranking tracker"""
+    """Display historical ranking trends from the materialized trend table"""
     st.header("📈 Ranking History & Trend Analysis")
 
-    # Initialize ranking tracker
-    tracker = RankingHistoryTracker()
+    # Initialize ranking tracker (read-only pooled connections)
+    tracker = RankingHistoryTracker(read_only=True)
 
     st.info("""
     **Historical Ranking Analysis**
@@ -832,9 +844,11 @@ def show_ranking_trends(analyzer):
 
     # Check if historical data exists
     try:
-        saudi_trends = tracker.get_saudi_ranking_trends(days=365)
+        # One read: trends, deltas and rank history per Saudi athlete,
+        # refreshed by sync_rankings after each snapshot
+        trend_table = tracker.get_trend_table(country='KSA')
 
-        if saudi_trends.empty:
+        if trend_table.empty:
             st.warning("""
             No historical ranking data available yet.
 
@@ -845,10 +859,12 @@ def show_ranking_trends(analyzer):
             """)
             return
 
-        st.success(f"Loaded {len(saudi_trends)} historical ranking records for Saudi athletes")
+        intervals = history_intervals(trend_table)
+        st.success(f"Loaded ranking trends for {trend_table['athlete_name'].nunique()} Saudi athletes "
+                   f"(updated {trend_table['refreshed_at'].max()})")
 
         # Display athletes with historical data
-        athletes_with_history = saudi_trends['athlete_name'].unique()
+        athletes_with_history = trend_table['athlete_name'].unique()
 
         selected_athlete = st.selectbox(
             "Select Athlete for Trend Analysis",
@@ -856,71 +872,83 @@ def show_ranking_trends(analyzer):
         )
 
         if selected_athlete:
-            # Get athlete history
-            athlete_history = tracker.get_athlete_history(selected_athlete, days=365)
+            athlete_rows = trend_table[trend_table['athlete_name'] == selected_athlete]
+            row = athlete_rows.sort_values('last_date').iloc[-1]
+            change = int(row['change'])
+            trend = str(row['trend'])
 
-            if not athlete_history.empty:
-                # Calculate trend
-                trend_analysis = tracker.calculate_trend(selected_athlete, days=180)
+            # Display metrics
+            col1, col2, col3, col4, col5 = st.columns(5)
 
-                # Display metrics
-                col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Current Rank", int(row['current_rank']))
 
-                with col1:
-                    st.metric("Current Rank", trend_analysis['current_rank'])
+            with col2:
+                trend_emoji = "📈" if trend.endswith('improving') else "📉" if trend.endswith('declining') else "➡️"
+                st.metric("Trend", f"{trend_emoji} {trend.replace('_', ' ').upper()}")
 
-                with col2:
-                    trend_emoji = "📈" if trend_analysis['trend'] == 'improving' else "📉" if trend_analysis['trend'] == 'declining' else "➡️"
-                    st.metric("Trend", f"{trend_emoji} {trend_analysis['trend'].upper()}")
+            with col3:
+                change_color = "normal" if change == 0 else "inverse" if change < 0 else "off"
+                st.metric("Rank Change (6mo)", change, delta_color=change_color)
 
-                with col3:
-                    change_color = "normal" if trend_analysis['change'] == 0 else "inverse" if trend_analysis['change'] < 0 else "off"
-                    st.metric("Rank Change (6mo)", trend_analysis['change'], delta_color=change_color)
+            with col4:
+                st.metric("Velocity (ranks/mo)", f"{row['velocity']:+.2f}")
 
-                with col4:
-                    st.metric("Data Points", trend_analysis['data_points'])
+            with col5:
+                st.metric("Data Points", int(row['data_points']))
+
+            col1, col2, col3, col4, col5 = st.columns(5)
+            for col, days in zip((col1, col2, col3), (30, 90, 365)):
+                delta = row[f'rank_delta_{days}d']
+                with col:
+                    st.metric(f"Rank Change ({days}d)", "—" if pd.isna(delta) else f"{int(delta):+d}")
 
+            with col4:
+                st.metric("Best / Worst Rank", f"{int(row['best_rank'])} / {int(row['worst_rank'])}")
+
+            with col5:
+                st.metric("Volatility (ranks)", f"{row['volatility']:.1f}")
+
+            # Rank history: one point per change, drawn as steps
+            athlete_intervals = intervals[intervals['athlete_name'] == selected_athlete]
+            athlete_history = expand_intervals(
+                athlete_intervals, list(boundary_dates(athlete_intervals)) + [row['last_date']])
+
+            if not athlete_history.empty:
                 # Visualization
                 st.subheader(f"Ranking History: {selected_athlete}")
 
-                # Convert date to datetime
                 athlete_history['date'] = pd.to_datetime(athlete_history['date'])
+                athlete_history = athlete_history.sort_values('date')
 
                 fig = px.line(
-                    athlete_history.sort_values('date'),
+                    athlete_history,
                     x='date',
                     y='rank',
                     title=f"{selected_athlete} - World Ranking Over Time",
                     labels={'rank': 'World Rank', 'date': 'Date'},
                     markers=True,
+                    line_shape='hv',
                     color_discrete_sequence=[THEME_COLORS['primary_teal']]
                 )
 
                 # Invert y-axis (lower rank = better)
                 fig.update_yaxes(autorange="reversed")
 
-                # Add trend line
-                fig.add_scatter(
-                    x=athlete_history['date'],
-                    y=athlete_history['rank'],
-                    mode='lines',
-                    name='Trend',
-                    line=dict(dash='dash', color=THEME_COLORS['gold'])
-                )
-
                 st.plotly_chart(fig, use_container_width=True)
 
                 # Points history if available
-                if 'points' in athlete_history.columns:
+                if athlete_history['points'].notna().any():
                     st.subheader("Ranking Points History")
 
                     fig = px.line(
-                        athlete_history.sort_values('date'),
+                        athlete_history,
                         x='date',
                         y='points',
                         title=f"{selected_athlete} - Ranking Points Over Time",
                         labels={'points': 'Ranking Points', 'date': 'Date'},
                         markers=True,
+                        line_shape='hv',
                         color_discrete_sequence=[THEME_COLORS['gold']]
                     )
                     st.plotly_chart(fig, use_container_width=True)
@@ -929,11 +957,23 @@ def show_ranking_trends(analyzer):
         st.markdown("---")
         st.subheader("🇸🇦 Saudi Team Ranking Trends")
 
-        # Group by date and calculate team metrics
-        team_trends = saudi_trends.groupby('date').agg({
+        st.dataframe(
+            trend_table.sort_values('velocity', ascending=False)[[
+                'athlete_name', 'weight_category', 'current_rank', 'rank_delta_30d',
+                'rank_delta_90d', 'rank_delta_365d', 'best_rank', 'worst_rank',
+                'volatility', 'velocity', 'acceleration', 'trend', 'data_points'
+            ]],
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # Team metrics on every date the Saudi rankings changed
+        saudi_history = expand_intervals(
+            intervals, list(boundary_dates(intervals)) + [trend_table['last_date'].max()])
+        team_trends = saudi_history.groupby('date').agg({
             'athlete_name': 'count',
             'rank': 'mean',
-            'points': 'sum' if 'points' in saudi_trends.columns else 'count'
+            'points': 'sum'
         }).reset_index()
 
         team_trends.columns = ['Date', 'Active Athletes', 'Average Rank', 'Total Points']
@@ -948,6 +988,7 @@ def show_ranking_trends(analyzer):
                 y='Active Athletes',
                 title="Saudi Active Athletes Over Time",
                 markers=True,
+                line_shape='hv',
                 color_discrete_sequence=[THEME_COLORS['primary_teal']]
             )
             st.plotly_chart(fig, use_container_width=True)
@@ -959,6 +1000,7 @@ def show_ranking_trends(analyzer):
                 y='Average Rank',
                 title="Team Average Ranking Over Time",
                 markers=True,
+                line_shape='hv',
                 color_discrete_sequence=[THEME_COLORS['gold']]
             )
             fig.update_yaxes(autorange="reversed")
@@ -968,22 +1010,19 @@ def show_ranking_trends(analyzer):
         st.markdown("---")
         st.subheader("🔔 Recent Ranking Changes")
 
-        recent_changes = tracker.detect_rank_changes(days=7, min_change=5)
-
-        if recent_changes:
-            changes_df = pd.DataFrame(recent_changes)
-
-            # Filter for Saudi athletes
-            saudi_changes = changes_df[
-                changes_df['country'].str.upper().str.contains('KSA', na=False)
-            ] if 'country' in changes_df.columns else changes_df
-
-            if not saudi_changes.empty:
-                st.dataframe(saudi_changes, use_container_width=True)
-            else:
-                st.info("No significant ranking changes for Saudi athletes in the past 7 days.")
+        recent = trend_table[trend_table['rank_delta_7d'].abs() >= 5]
+        if not recent.empty:
+            saudi_changes = pd.DataFrame({
+                'athlete_name': recent['athlete_name'],
+                'country': recent['country'],
+                'weight_category': recent['weight_category'],
+                'old_rank': (recent['current_rank'] + recent['rank_delta_7d']).astype(int),
+                'new_rank': recent['current_rank'],
+                'change': recent['rank_delta_7d'].astype(int),
+            }).sort_values('change', key=abs, ascending=False)
+            st.dataframe(saudi_changes, use_container_width=True, hide_index=True)
         else:
-            st.info("No significant ranking changes detected in the past 7 days.")
+            st.info("No significant ranking changes for Saudi athletes in the past 7 days.")
 
     except Exception as e:
         st.error(f"Error loading ranking history: {e}")
@@ -1024,6 +1063,63 @@ def show_competition_planning(analyzer):
 
             st.markdown("---")
 
+    # Athlete x event ROI matrix
+    st.subheader("💰 Competition ROI Matrix")
+
+    kpi_analyzer = AdvancedKPIAnalyzer(
+        matches_df=analyzer.matches_df,
+        rankings_df=analyzer.rankings_df
+    )
+    roi_matrix = kpi_analyzer.competition_roi_matrix(country='KSA')
+
+    if roi_matrix.empty:
+        st.info("No ranked Saudi athletes or upcoming competitions to evaluate")
+    else:
+        heatmap = roi_matrix.pivot_table(index='athlete_name', columns='competition',
+                                         values='strategic_roi', sort=False)
+        fig = px.imshow(
+            heatmap,
+            color_continuous_scale='Greens',
+            aspect='auto',
+            labels={'color': 'Strategic ROI (%)'}
+        )
+        fig.update_layout(height=max(300, 35 * len(heatmap)), xaxis_title='', yaxis_title='')
+        st.plotly_chart(fig, use_container_width=True)
+
+        athlete = st.selectbox("Athlete", heatmap.index.tolist(), key="roi_athlete")
+        athlete_roi = roi_matrix[roi_matrix['athlete_name'] == athlete]
+        st.dataframe(
+            athlete_roi[['competition', 'date', 'tier', 'estimated_cost', 'qualification_probability',
+                         'expected_points', 'financial_roi', 'strategic_roi', 'recommendation']],
+            use_container_width=True,
+            hide_index=True
+        )
+
+        budget = st.number_input("Season budget (USD)", min_value=0, value=30000, step=5000, key="roi_budget")
+        if st.button("Optimize calendar from ROI matrix"):
+            from points_simulator import PointsSimulator, MAX_CALENDAR_EVENTS
+
+            row = athlete_roi.iloc[0]
+            simulator = PointsSimulator(rankings_df=analyzer.rankings_df)
+            calendar = simulator.get_available_competitions()
+            if len(calendar) > MAX_CALENDAR_EVENTS:
+                st.warning(f"{len(calendar)} upcoming events; optimizing over the nearest {MAX_CALENDAR_EVENTS}")
+                calendar = simulator.nearest_competitions(calendar)
+            plan = simulator.optimize_calendar(
+                current_rank=int(row['rank']),
+                current_points=float(row['points']),
+                budget=float(budget),
+                competitions=calendar,
+                weight_category=row['weight_category'],
+                athlete_name=athlete,
+                event_points=dict(zip(athlete_roi['competition'], athlete_roi['expected_points']))
+            )
+            if plan['competitions']:
+                st.success(f"**Plan:** {', '.join(plan['competitions'])}  \n"
+                           f"Cost ${plan['total_cost']:,.0f} · Expected points {plan['expected_points']}")
+            else:
+                st.warning("No feasible plan within this budget")
+
     # Strategic recommendations
     st.subheader("🎯 Strategic Recommendations")
 
@@ -1342,7 +1438,7 @@ def show_points_simulator(analyzer):
     try:
         from points_simulator import PointsSimulator, SimulationScenario, UPCOMING_COMPETITIONS
 
-        simulator = PointsSimulator()
+        simulator = PointsSimulator(rankings_df=analyzer.rankings_df)
 
         # Get available competitions using the correct method
         available_competitions = simulator.get_available_competitions()
@@ -1369,6 +1465,15 @@ def show_points_simulator(analyzer):
                 index=2  # Default to bronze
             )
 
+            monte_carlo = st.checkbox(
+                "Monte Carlo mode",
+                value=False,
+                help="Sample thousands of seasons from finish probabilities instead of one fixed finish"
+            )
+            n_trials = 20000
+            if monte_carlo:
+                n_trials = st.select_slider("Simulated seasons", options=[5000, 10000, 20000, 50000], value=20000)
+
         with col2:
             st.subheader("Select Competitions to Simulate")
 
@@ -1396,11 +1501,63 @@ def show_points_simulator(analyzer):
         calendar_df = simulator.get_competition_calendar_df()
         st.dataframe(calendar_df, use_container_width=True, hide_index=True)
 
+        # Field-aware projection for the whole Saudi squad
+        with st.expander("🇸🇦 Projected rankings - all Saudi athletes (next 12 months)"):
+            saudi_projection = simulator.project_saudi_athletes()
+            if saudi_projection.empty:
+                st.info("Ranking points not available for projection.")
+            else:
+                st.caption("Rivals are advanced by their expected schedules; ranks come from the projected category field.")
+                st.dataframe(saudi_projection.rename(columns={
+                    'athlete_name': 'Athlete', 'weight_category': 'Category', 'rank': 'World Rank',
+                    'points': 'Points', 'asian_rank': 'Asian Rank', 'expected_gain': 'Expected Gain',
+                    'projected_points': 'Projected Points', 'projected_rank': 'Projected Rank',
+                    'projected_asian_rank': 'Projected Asian Rank'
+                }), use_container_width=True, hide_index=True)
+
         st.markdown("---")
 
         # Run simulation
         if st.button("🎯 Run Simulation", type="primary"):
-            if selected_comp_names:
+            if selected_comp_names and monte_carlo:
+                mc = simulator.simulate_monte_carlo(
+                    athlete_name=athlete_name,
+                    current_rank=current_rank,
+                    current_points=current_points,
+                    competitions=selected_comp_names,
+                    weight_category=weight_category,
+                    n_trials=n_trials
+                )
+
+                st.subheader(f"Monte Carlo Results ({mc['n_trials']:,} seasons)")
+
+                col1, col2, col3, col4 = st.columns(4)
+                pts = mc['points_percentiles']
+                ranks = mc['world_rank_percentiles']
+                with col1:
+                    st.metric("Median Points", f"{pts[50]:.1f}", f"P10–P90: {pts[10]:.0f}–{pts[90]:.0f}")
+                with col2:
+                    st.metric("Median Rank", f"#{ranks[50]}", f"Range #{ranks[10]} to #{ranks[90]}", delta_color="off")
+                with col3:
+                    st.metric("Asian Games Qualified", f"{mc['asian_games_qualified_probability']:.0%}",
+                              f"Bubble {mc['asian_games_bubble_probability']:.0%}", delta_color="off")
+                with col4:
+                    st.metric("LA 2028 Probability", f"{mc['olympic_probability']:.0f}%",
+                              f"{mc['expected_medals']:.1f} medals expected", delta_color="off")
+
+                fig = px.histogram(x=mc['points_samples'], nbins=40,
+                                   labels={'x': 'Projected Points'}, color_discrete_sequence=['#1E5631'])
+                for q, color in [(10, '#dc3545'), (50, '#a08e66'), (90, '#1E5631')]:
+                    fig.add_vline(x=pts[q], line_dash='dash', line_color=color, annotation_text=f"P{q}")
+                fig.update_layout(height=350, showlegend=False, yaxis_title='Seasons')
+                st.plotly_chart(fig, use_container_width=True)
+
+                st.subheader("Finish Probabilities by Competition")
+                finish_df = pd.DataFrame(mc['finish_probabilities']).T
+                finish_df.insert(0, 'Bout Win %', pd.Series(mc['bout_win_probability']))
+                st.dataframe(finish_df.style.format('{:.0%}'), use_container_width=True)
+
+            elif selected_comp_names:
                 # Create expected finishes dict
                 expected_finishes = {name: expected_finish for name in selected_comp_names}
 
@@ -1463,12 +1620,12 @@ def show_points_simulator(analyzer):
                     """, unsafe_allow_html=True)
 
                 with col2:
-                    oly_color = "#1E5631" if result.olympic_probability >= 0.5 else "#a08e66" if result.olympic_probability >= 0.25 else "#6c757d"
+                    oly_color = "#1E5631" if result.olympic_probability >= 50 else "#a08e66" if result.olympic_probability >= 25 else "#6c757d"
                     st.markdown(f"""
                     <div style="background: {oly_color}; padding: 1rem; border-radius: 8px; text-align: center;">
                         <p style="color: white; margin: 0; font-size: 0.9rem;">LA 2028 Probability</p>
                         <p style="color: white; margin: 0; font-size: 1.3rem; font-weight: bold;">
-                            {result.olympic_probability:.0%}
+                            {result.olympic_probability:.0f}%
                         </p>
                     </div>
                     """, unsafe_allow_html=True)
@@ -1546,6 +1703,22 @@ def show_tactical_scouting(analyzer):
                     if profile:
                         st.markdown(render_opponent_card(profile), unsafe_allow_html=True)
 
+                        # Sparring / video analogues
+                        similar = scout.find_similar_opponents(profile.name, k=5)
+                        if similar:
+                            with st.expander("🥋 Athletes with a similar fighting profile"):
+                                st.dataframe(pd.DataFrame(similar), use_container_width=True, hide_index=True)
+
+                        # Match rating history
+                        rating_history = scout.get_rating_engine().get_history(profile.name)
+                        if not rating_history.empty:
+                            with st.expander(f"📈 Match rating history ({profile.rating:.0f})"):
+                                fig = px.line(rating_history, x='date', y='post_rating', markers=True,
+                                              hover_data=['opponent', 'pre_rating', 'expected', 'result'],
+                                              labels={'post_rating': 'Rating', 'date': 'Date'})
+                                fig.update_layout(height=300, showlegend=False)
+                                st.plotly_chart(fig, use_container_width=True)
+
                         # Head-to-head section
                         st.markdown("---")
                         st.subheader("Head-to-Head Analysis")
@@ -11,6 +11,8 @@ from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from collections import defaultdict
 
+from match_stats import parse_match_scores, head_to_head_differentials
+
 
 class HeadToHeadAnalyzer:
     """
@@ -29,7 +31,9 @@ class HeadToHeadAnalyzer:
         # Load match data
         match_files = list((self.data_dir / "matches").glob("*.csv"))
         if match_files:
-            self.matches_df = pd.concat([pd.read_csv(f) for f in match_files])
+            self.matches_df = pd.concat([pd.read_csv(f) for f in match_files], ignore_index=True)
+            # Parse scores once into numeric score_a/score_b columns
+            self.matches_df = parse_match_scores(self.matches_df)
             print(f"Loaded {len(self.matches_df)} matches")
 
         # Load athlete data
@@ -83,21 +87,10 @@ class HeadToHeadAnalyzer:
             else:
                 last_5_results.append('L')
 
-        # Calculate average point differential (if available)
-        point_diff = None
-        if 'athlete1_total' in matches.columns and 'athlete2_total' in matches.columns:
-            for _, match in matches.iterrows():
-                # Determine which athlete is athlete1 in this match
-                if athlete1_name.lower() in str(match.get('athlete1_name', '')).lower():
-                    diff = match['athlete1_total'] - match['athlete2_total']
-                else:
-                    diff = match['athlete2_total'] - match['athlete1_total']
-
-                if point_diff is None:
-                    point_diff = []
-                point_diff.append(diff)
+        # Calculate average point differential from parsed scores (if available)
+        point_diff = head_to_head_differentials(matches, athlete1_name)
 
-        avg_point_diff = np.mean(point_diff) if point_diff else None
+        avg_point_diff = np.mean(point_diff) if len(point_diff) else None
 
         # Determine trend (recent form)
         trend = "N/A"
@@ -0,0 +1,286 @@
+"""
+Match Statistics Module
+Vectorized score parsing and per-athlete scoring aggregates
+
+Scores are parsed once when match data is loaded into numeric columns:
+- score_a / score_b: total points for athlete 1 / athlete 2
+- round1_a, round1_b, ... : round-by-round points (where the source has them)
+
+Per-athlete points scored, conceded and differential then come from a single
+grouped aggregation over the match table instead of per-profile row loops.
+
+Usage:
+    from match_stats import parse_match_scores, build_athlete_scoring_table
+
+    matches_df = parse_match_scores(matches_df)
+    scoring = build_athlete_scoring_table(matches_df)
+    scoring.loc[name_key('Jun Jang')]
+"""
+
+import re
+from typing import List, Optional
+
+import pandas as pd
+import numpy as np
+
+
+# Score strings seen in scraped results: "12-8", "12 - 8", "2:1"
+SCORE_PATTERN = r'(\d+)\s*[-:]\s*(\d+)'
+
+# Round columns used by models.Match (athlete1_round1 ... athlete2_round3)
+ROUND_COLUMN_PATTERN = re.compile(r'^athlete([12])_round(\d+)$')
+
+# WT results table headers -> normalized match columns
+MATCH_COLUMN_MAP = {
+    'ATHLETE 1': 'athlete1_name',
+    'ATHLETE 2': 'athlete2_name',
+    'COUNTRY 1': 'country1',
+    'COUNTRY 2': 'country2',
+    'SCORE': 'score',
+    'WINNER': 'winner',
+    'ROUND': 'round_stage',
+    'WEIGHT': 'weight_category',
+    'COMPETITION': 'competition',
+    'DATE': 'date',
+}
+
+
+def name_key(name) -> str:
+    """Normalize an athlete name into the key used by scoring tables."""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ''
+    return ' '.join(str(name).upper().split())
+
+
+def name_keys(names: pd.Series) -> pd.Series:
+    """Vectorized version of name_key for a Series of names."""
+    return (
+        names.fillna('').astype(str).str.upper()
+        .str.split().str.join(' ')
+    )
+
+
+def normalize_match_columns(matches_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename WT result headers to the normalized match columns and parse
+    match_date, so every reader and writer sees the same columns.
+    """
+    if matches_df is None:
+        return matches_df
+
+    cols = set(matches_df.columns)
+    df = matches_df.rename(columns={old: new for old, new in MATCH_COLUMN_MAP.items()
+                                    if old in cols and new not in cols})
+    date_col = 'match_date' if 'match_date' in df.columns else next(
+        (c for c in df.columns if 'date' in str(c).lower()), None)
+    if date_col:
+        df = df.assign(match_date=pd.to_datetime(df[date_col], errors='coerce'))
+    return df
+
+
+def find_athlete_columns(df: pd.DataFrame) -> tuple:
+    """
+    Find the athlete 1 / athlete 2 name columns in a match table.
+
+    Prefers the normalized 'athlete1_name'/'athlete2_name' columns and falls
+    back to the first column mentioning athlete1/athlete_1.
+    """
+    if df is None:
+        return None, None
+
+    cols = list(df.columns)
+    a1 = 'athlete1_name' if 'athlete1_name' in cols else next(
+        (c for c in cols if 'athlete1' in c.lower() or 'athlete_1' in c.lower()), None)
+    a2 = 'athlete2_name' if 'athlete2_name' in cols else next(
+        (c for c in cols if 'athlete2' in c.lower() or 'athlete_2' in c.lower()), None)
+    return a1, a2
+
+
+def find_winner_column(df: pd.DataFrame) -> Optional[str]:
+    """Find the winner name column in a match table."""
+    if df is None:
+        return None
+    if 'winner_name' in df.columns:
+        return 'winner_name'
+    return next((c for c in df.columns if 'winner' in c.lower()), None)
+
+
+def parse_match_scores(matches_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse match scores into numeric columns (vectorized).
+
+    Totals come from athlete1_total/athlete2_total when present, otherwise
+    from the score string column. Round columns are copied from
+    athlete{1,2}_round{n} where available.
+
+    Args:
+        matches_df: Match DataFrame (normalized column names)
+
+    Returns:
+        The same DataFrame with score_a, score_b and roundN_a/roundN_b added
+    """
+    if matches_df is None or matches_df.empty:
+        return matches_df
+
+    df = matches_df
+
+    score_a = pd.Series(np.nan, index=df.index, dtype=float)
+    score_b = pd.Series(np.nan, index=df.index, dtype=float)
+
+    # Explicit totals take priority over parsed strings
+    if 'athlete1_total' in df.columns and 'athlete2_total' in df.columns:
+        score_a = pd.to_numeric(df['athlete1_total'], errors='coerce')
+        score_b = pd.to_numeric(df['athlete2_total'], errors='coerce')
+
+    score_col = 'score' if 'score' in df.columns else next(
+        (c for c in df.columns if 'score' in c.lower()
+         and c not in ('score_a', 'score_b')), None)
+    if score_col is not None:
+        parsed = df[score_col].astype(str).str.extract(SCORE_PATTERN)
+        missing = score_a.isna() | score_b.isna()
+        score_a = score_a.where(~missing, pd.to_numeric(parsed[0], errors='coerce'))
+        score_b = score_b.where(~missing, pd.to_numeric(parsed[1], errors='coerce'))
+
+    df['score_a'] = score_a.astype(float)
+    df['score_b'] = score_b.astype(float)
+
+    # Round-by-round scores
+    for col in list(df.columns):
+        match = ROUND_COLUMN_PATTERN.match(str(col))
+        if match:
+            side = 'a' if match.group(1) == '1' else 'b'
+            df[f"round{match.group(2)}_{side}"] = pd.to_numeric(df[col], errors='coerce')
+
+    return df
+
+
+def round_numbers(df: pd.DataFrame) -> List[int]:
+    """Round numbers that have parsed columns on both sides."""
+    rounds = []
+    for col in df.columns:
+        m = re.match(r'^round(\d+)_a$', str(col))
+        if m and f"round{m.group(1)}_b" in df.columns:
+            rounds.append(int(m.group(1)))
+    return sorted(rounds)
+
+
+def athlete_perspective(matches_df: pd.DataFrame,
+                        athlete1_col: str = None,
+                        athlete2_col: str = None,
+                        winner_col: str = None) -> pd.DataFrame:
+    """
+    Stack the match table so every bout appears once per participant.
+
+    Each output row holds the athlete key, the opponent key, and points
+    scored/conceded from that athlete's side of the bout.
+    """
+    if athlete1_col is None or athlete2_col is None:
+        athlete1_col, athlete2_col = find_athlete_columns(matches_df)
+    if winner_col is None:
+        winner_col = find_winner_column(matches_df)
+
+    if matches_df is None or matches_df.empty or not athlete1_col or not athlete2_col:
+        return pd.DataFrame(columns=['match_idx', 'athlete', 'opponent',
+                                     'scored', 'conceded', 'won'])
+
+    df = matches_df
+    if 'score_a' not in df.columns:
+        df = parse_match_scores(df.copy())
+
+    key1 = name_keys(df[athlete1_col])
+    key2 = name_keys(df[athlete2_col])
+    winner = name_keys(df[winner_col]) if winner_col else pd.Series('', index=df.index)
+
+    rounds = round_numbers(df)
+
+    def side(own_key, opp_key, own, opp):
+        data = {
+            'match_idx': np.arange(len(df)),
+            'athlete': own_key.values,
+            'opponent': opp_key.values,
+            'scored': df[f'score_{own}'].values,
+            'conceded': df[f'score_{opp}'].values,
+            # Substring match mirrors how winners were matched before
+            'won': [bool(k) and k in w for k, w in zip(own_key.values, winner.values)],
+        }
+        for r in rounds:
+            data[f'round{r}_scored'] = df[f'round{r}_{own}'].values
+            data[f'round{r}_conceded'] = df[f'round{r}_{opp}'].values
+        return pd.DataFrame(data)
+
+    stacked = pd.concat([side(key1, key2, 'a', 'b'), side(key2, key1, 'b', 'a')],
+                        ignore_index=True)
+    return stacked[stacked['athlete'] != '']
+
+
+def build_athlete_scoring_table(matches_df: pd.DataFrame,
+                                athlete1_col: str = None,
+                                athlete2_col: str = None,
+                                winner_col: str = None) -> pd.DataFrame:
+    """
+    Aggregate points scored, conceded and differential for every athlete.
+
+    Args:
+        matches_df: Match DataFrame with parsed score_a/score_b columns
+
+    Returns:
+        DataFrame indexed by athlete name key with columns:
+        matches, wins, losses, win_rate, scored_matches, avg_points_scored,
+        avg_points_conceded, point_differential and roundN averages
+    """
+    stacked = athlete_perspective(matches_df, athlete1_col, athlete2_col, winner_col)
+
+    if stacked.empty:
+        return pd.DataFrame(columns=['matches', 'wins', 'losses', 'win_rate',
+                                     'scored_matches', 'avg_points_scored',
+                                     'avg_points_conceded', 'point_differential'])
+
+    # Only bouts with both totals parsed count towards points averages
+    has_score = stacked['scored'].notna() & stacked['conceded'].notna()
+    stacked = stacked.assign(
+        scored=stacked['scored'].where(has_score),
+        conceded=stacked['conceded'].where(has_score),
+        has_score=has_score,
+    )
+
+    agg = {
+        'matches': ('match_idx', 'size'),
+        'wins': ('won', 'sum'),
+        'scored_matches': ('has_score', 'sum'),
+        'avg_points_scored': ('scored', 'mean'),
+        'avg_points_conceded': ('conceded', 'mean'),
+    }
+    for col in stacked.columns:
+        if col.startswith('round') and (col.endswith('_scored') or col.endswith('_conceded')):
+            agg[f'avg_{col}'] = (col, 'mean')
+
+    table = stacked.groupby('athlete').agg(**agg)
+    table['wins'] = table['wins'].astype(int)
+    table['losses'] = table['matches'] - table['wins']
+    table['win_rate'] = table['wins'] / table['matches']
+    table['point_differential'] = table['avg_points_scored'] - table['avg_points_conceded']
+
+    return table
+
+
+def head_to_head_differentials(matches: pd.DataFrame, athlete_name: str,
+                               athlete1_col: str = 'athlete1_name') -> np.ndarray:
+    """
+    Point differentials from one athlete's perspective for a set of bouts.
+
+    Args:
+        matches: Bouts involving the athlete (with score_a/score_b parsed)
+        athlete_name: Athlete whose perspective to use (substring match)
+
+    Returns:
+        Array of differentials; bouts without parsed scores are dropped
+    """
+    if matches is None or matches.empty or 'score_a' not in matches.columns:
+        return np.array([])
+
+    is_side_a = matches[athlete1_col].astype(str).str.contains(
+        athlete_name, case=False, regex=False, na=False).values
+    diff = np.where(is_side_a,
+                    matches['score_a'].values - matches['score_b'].values,
+                    matches['score_b'].values - matches['score_a'].values)
+    return diff[~np.isnan(diff)]
@@ -0,0 +1,280 @@
+"""
+Olympic Quota Allocation Simulator
+Monte Carlo allocation of LA 2028 places across the whole ranked field
+
+For each of the 8 Olympic categories, every trial:
+1. Draws each athlete's ranking points at the qualification deadline
+   around their projected total (decay, expiry and expected schedule
+   from PointsSimulator.project_field)
+2. Takes each NOC's best-ranked athlete as its nominee (one place per
+   NOC per category)
+3. Allocates the automatic places to the top nominees by ranking
+4. Runs a continental qualification tournament on every continent among
+   the remaining nominees, awarding the continental places; winners are
+   drawn with Gumbel-max sampling on rank-implied match ratings
+
+All trials for a category run at once as (trials x athletes) arrays.
+Tripartite / universality places are invitation-based and not modelled.
+
+Usage:
+    from olympic_quota_simulator import OlympicQuotaSimulator
+
+    sim = OlympicQuotaSimulator(rankings_df)
+    results = sim.simulate_all(n_trials=5000)
+    results[results['country'] == 'KSA']
+"""
+
+from typing import Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from config import LA_2028_OLYMPICS
+from ranking_features import add_continental_ranks
+from points_simulator import PointsSimulator, rank_to_rating
+from match_stats import name_key
+
+
+# Ranking categories used when an Olympic category has no ranking list of its own
+OLYMPIC_CATEGORY_SOURCES = {
+    ('M', '+80kg'): ['-87kg', '+87kg'],
+    ('F', '+67kg'): ['-73kg', '+73kg'],
+}
+
+GENDER_PATTERNS = {
+    'M': r'^M|\bMEN\b|\bMALE\b',
+    'F': r'^F|WOMEN|FEMALE',
+}
+
+# Spread of deadline points around the projection: sd = fraction * points + floor
+POINTS_SD_FRACTION = 0.15
+POINTS_SD_FLOOR = 10.0
+
+
+class OlympicQuotaSimulator:
+    """
+    Simulate LA 2028 quota allocation for every athlete in the Olympic categories.
+    """
+
+    def __init__(self, rankings_df: pd.DataFrame, simulator: PointsSimulator = None,
+                 config: Dict = None):
+        self.config = config or LA_2028_OLYMPICS
+        self.deadline = self.config['qualification_deadline']
+
+        paths = self.config.get('qualification_paths', {})
+        self.automatic_spots = paths.get('automatic', {}).get('spots', 5)
+        self.continental_spots = paths.get('continental', {}).get('spots_per_continent', 2)
+
+        if rankings_df is not None and not rankings_df.empty and 'continent' not in rankings_df.columns:
+            rankings_df = add_continental_ranks(rankings_df.copy())
+        self.rankings_df = rankings_df
+        self.simulator = simulator or PointsSimulator(rankings_df)
+
+        self._results: Optional[pd.DataFrame] = None
+        self._rank_curves: Dict[str, np.ndarray] = {}
+
+    def olympic_categories(self) -> List[tuple]:
+        """(gender, weight) pairs for the Olympic categories."""
+        return [
+            (gender, weight)
+            for gender, weights in self.config['weight_categories'].items()
+            for weight in weights
+        ]
+
+    def category_field(self, gender: str, weight: str) -> pd.DataFrame:
+        """
+        Ranked athletes contesting an Olympic category, with projected deadline points.
+        """
+        field = self.simulator.project_field('', horizon_date=self.deadline)
+        if field.empty:
+            return field
+
+        cats = field['weight_category'].astype(str)
+        gender_mask = cats.str.upper().str.contains(GENDER_PATTERNS[gender], regex=True, na=False)
+        if not gender_mask.any():
+            gender_mask = pd.Series(True, index=field.index)
+
+        mask = gender_mask & cats.str.contains(weight, regex=False, na=False)
+        if not mask.any():
+            sources = OLYMPIC_CATEGORY_SOURCES.get((gender, weight), [])
+            mask = gender_mask & cats.apply(lambda c: any(s in c for s in sources))
+
+        selected = field[mask.values].copy()
+
+        # Athletes ranked in two source categories keep their better entry
+        selected['athlete_key'] = selected['athlete_name'].map(name_key)
+        selected = (selected.sort_values('projected_points', ascending=False)
+                    .drop_duplicates('athlete_key').reset_index(drop=True))
+        return selected
+
+    def simulate_category(self, gender: str, weight: str, n_trials: int = 5000,
+                          seed: int = None) -> pd.DataFrame:
+        """
+        Simulate quota allocation for one Olympic category.
+
+        Returns:
+            DataFrame per athlete with p_automatic, p_continental, p_qualify
+            (athlete qualifies) and p_noc_quota (their NOC earns the place)
+        """
+        field = self.category_field(gender, weight)
+        if field.empty:
+            return pd.DataFrame()
+
+        rng = np.random.default_rng(seed)
+        n = len(field)
+        T = n_trials
+
+        # Deadline points per trial: (T, n)
+        mean = field['projected_points'].values.astype(float)
+        sd = POINTS_SD_FRACTION * np.abs(mean) + POINTS_SD_FLOOR
+        points = mean[None, :] + rng.standard_normal((T, n)) * sd[None, :]
+
+        # Ranking order and each athlete's rank per trial
+        order = np.argsort(-points, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, n + 1)[None, :].repeat(T, axis=0), axis=1)
+
+        # One nominee per NOC: the NOC's best-ranked athlete in the trial
+        _, noc_idx = np.unique(field['country'].astype(str).str.upper().values, return_inverse=True)
+        by_noc = np.argsort(noc_idx, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(noc_idx[by_noc]) != 0])
+        noc_best = np.minimum.reduceat(ranks[:, by_noc], starts, axis=1)       # (T, n_noc)
+        nominee = ranks == noc_best[:, noc_idx]
+
+        # Automatic places: top nominees by ranking
+        nominee_in_order = np.take_along_axis(nominee, order, axis=1)
+        auto_in_order = nominee_in_order & (np.cumsum(nominee_in_order, axis=1) <= self.automatic_spots)
+        automatic = np.zeros_like(nominee)
+        np.put_along_axis(automatic, order, auto_in_order, axis=1)
+
+        # Continental tournaments among the remaining nominees
+        strength = rank_to_rating(ranks) * np.log(10) / 400.0
+        gumbel = -np.log(-np.log(rng.random((T, n))))
+        scores = np.where(nominee & ~automatic, strength + gumbel, -np.inf)
+
+        continental = np.zeros_like(nominee)
+        continents = field['continent'].fillna('').values
+        spots = self.continental_spots
+        for continent in [c for c in np.unique(continents) if c]:
+            members = np.flatnonzero(continents == continent)
+            cont_scores = scores[:, members]
+            k = min(spots, len(members))
+            top = np.argpartition(-cont_scores, k - 1, axis=1)[:, :k]
+            winners = np.isfinite(np.take_along_axis(cont_scores, top, axis=1))
+            rows = np.repeat(np.arange(T), k)
+            cols = members[top.ravel()]
+            continental[rows[winners.ravel()], cols[winners.ravel()]] = True
+
+        qualified = automatic | continental
+        noc_quota = np.logical_or.reduceat(qualified[:, by_noc], starts, axis=1)   # (T, n_noc)
+
+        # Qualification rate by trial rank position (for rank-based lookups)
+        by_rank = np.bincount(ranks.ravel() - 1, weights=qualified.ravel(), minlength=n)
+        self._rank_curves[f"{gender}{weight}"] = by_rank / T
+
+        return pd.DataFrame({
+            'olympic_category': f"{gender}{weight}",
+            'athlete_name': field['athlete_name'].values,
+            'country': field['country'].values,
+            'continent': field['continent'].values,
+            'rank': field['rank'].values,
+            'points': field['points'].values,
+            'projected_points': np.round(mean, 1),
+            'p_automatic': automatic.mean(axis=0).round(3),
+            'p_continental': continental.mean(axis=0).round(3),
+            'p_qualify': qualified.mean(axis=0).round(3),
+            'p_noc_quota': noc_quota.mean(axis=0)[noc_idx].round(3),
+        })
+
+    def simulate_all(self, n_trials: int = 5000, seed: int = None) -> pd.DataFrame:
+        """
+        Simulate all Olympic categories and report every athlete's probabilities.
+
+        Returns:
+            DataFrame with one row per athlete per Olympic category, sorted by
+            category and qualification probability
+        """
+        rng = np.random.default_rng(seed)
+        frames = [
+            self.simulate_category(gender, weight, n_trials, seed=int(rng.integers(2 ** 31)))
+            for gender, weight in self.olympic_categories()
+        ]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            self._results = pd.DataFrame()
+            return self._results
+
+        self._results = (pd.concat(frames, ignore_index=True)
+                         .sort_values(['olympic_category', 'p_qualify'], ascending=[True, False])
+                         .reset_index(drop=True))
+        return self._results
+
+    def get_results(self, n_trials: int = 5000) -> pd.DataFrame:
+        """Cached results of simulate_all."""
+        if self._results is None:
+            self.simulate_all(n_trials=n_trials, seed=0)
+        return self._results
+
+    def athlete_probability(self, athlete_name: str) -> Optional[Dict]:
+        """Qualification probabilities for one athlete (None if not in an Olympic field)."""
+        results = self.get_results()
+        if results.empty:
+            return None
+        match = results[results['athlete_name'].map(name_key) == name_key(athlete_name)]
+        if match.empty:
+            return None
+        return match.sort_values('p_qualify', ascending=False).iloc[0].to_dict()
+
+    def rank_probability(self, olympic_category: str, world_rank: int) -> Optional[float]:
+        """
+        Qualification rate for an athlete ranked at a given position.
+
+        Args:
+            olympic_category: e.g. 'M-68kg'
+            world_rank: Rank in the category at the deadline
+
+        Returns:
+            Probability (0-1), or None if the category has no simulated field
+        """
+        if olympic_category not in self._rank_curves:
+            self.get_results()
+        curve = self._rank_curves.get(olympic_category)
+        if curve is None or len(curve) == 0:
+            return None
+        return float(curve[min(max(int(world_rank), 1), len(curve)) - 1])
+
+
+def main():
+    """Run the quota simulation on the latest rankings."""
+    from scouting_manager import ScoutingManager
+
+    print("=" * 60)
+    print("LA 2028 OLYMPIC QUOTA SIMULATOR")
+    print("=" * 60)
+
+    scout = ScoutingManager()
+    if scout.rankings_df is None:
+        print("No rankings data found")
+        return
+
+    sim = OlympicQuotaSimulator(scout.rankings_df)
+    results = sim.simulate_all(n_trials=5000, seed=0)
+    if results.empty:
+        print("No Olympic category fields found in rankings")
+        return
+
+    for category, group in results.groupby('olympic_category'):
+        print(f"\n{category}: {len(group)} athletes")
+        for _, row in group.head(8).iterrows():
+            print(f"  {row['athlete_name']:<30} {row['country']:<5} "
+                  f"qualify {row['p_qualify']:.0%} (auto {row['p_automatic']:.0%}, "
+                  f"continental {row['p_continental']:.0%})")
+
+    saudi = results[results['country'].astype(str).str.contains('KSA', na=False)]
+    if not saudi.empty:
+        print("\nSaudi athletes:")
+        print(saudi[['olympic_category', 'athlete_name', 'rank', 'p_qualify', 'p_noc_quota']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
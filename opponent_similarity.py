@@ -0,0 +1,236 @@
+"""
+Opponent Similarity Search
+Find athletes who fight like a given opponent
+
+Each athlete with match data gets a numeric feature vector:
+- avg points scored / conceded, point differential, win rate
+- experience (log of bouts fought)
+- round-level scoring pattern (share of points scored in each round)
+- recent form (win rate over the last bouts by date)
+
+Vectors are z-scored per feature, L2-normalised and stored as one
+contiguous float32 matrix, so a nearest-neighbour query is a single
+matrix-vector product plus a partial sort.
+
+Usage:
+    from opponent_similarity import OpponentSimilarityIndex
+
+    index = OpponentSimilarityIndex.from_matches(matches_df, rankings_df)
+    index.most_similar('Jun Jang', k=5)
+"""
+
+from typing import Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from match_stats import athlete_perspective, build_athlete_scoring_table, name_key, name_keys
+from ranking_features import find_column
+
+
+# Bouts used for the recent form feature
+RECENT_FORM_BOUTS = 5
+
+BASE_FEATURES = [
+    'avg_points_scored',
+    'avg_points_conceded',
+    'point_differential',
+    'win_rate',
+    'experience',
+    'recent_form',
+]
+
+
+def build_feature_frame(matches_df: pd.DataFrame, min_matches: int = 2) -> pd.DataFrame:
+    """
+    Build the per-athlete feature table (one row per name key).
+
+    Args:
+        matches_df: Match DataFrame with parsed score columns
+        min_matches: Minimum bouts for an athlete to be included
+
+    Returns:
+        DataFrame indexed by name key with the raw (unscaled) features
+    """
+    scoring = build_athlete_scoring_table(matches_df)
+    if scoring.empty:
+        return pd.DataFrame(columns=BASE_FEATURES)
+
+    scoring = scoring[scoring['matches'] >= min_matches]
+
+    features = pd.DataFrame(index=scoring.index)
+    features['avg_points_scored'] = scoring['avg_points_scored']
+    features['avg_points_conceded'] = scoring['avg_points_conceded']
+    features['point_differential'] = scoring['point_differential']
+    features['win_rate'] = scoring['win_rate']
+    features['experience'] = np.log1p(scoring['matches'].astype(float))
+
+    # Round pattern: share of scored points coming from each round
+    round_cols = sorted(c for c in scoring.columns
+                        if c.startswith('avg_round') and c.endswith('_scored'))
+    if round_cols:
+        rounds = scoring[round_cols].astype(float)
+        totals = rounds.sum(axis=1, min_count=1)
+        shares = rounds.div(totals.where(totals > 0), axis=0)
+        for col in round_cols:
+            features[col.replace('avg_', '').replace('_scored', '_share')] = shares[col]
+
+    # Recent form: win rate over each athlete's last bouts by date
+    stacked = athlete_perspective(matches_df)
+    if 'match_date' in matches_df.columns and not stacked.empty:
+        stacked = stacked.assign(
+            match_date=matches_df['match_date'].values[stacked['match_idx'].values]
+        ).sort_values('match_date', kind='stable')
+    recent = stacked.groupby('athlete').tail(RECENT_FORM_BOUTS)
+    features['recent_form'] = recent.groupby('athlete')['won'].mean().reindex(features.index)
+
+    return features
+
+
+class OpponentSimilarityIndex:
+    """
+    Nearest-neighbour index over athlete feature vectors.
+
+    Attributes:
+        keys: Athlete name keys (row order of the matrix)
+        matrix: (n_athletes, n_features) float32, C-contiguous, unit rows
+        feature_names: Column names of the matrix
+        meta: Display name, country and weight category per key
+    """
+
+    def __init__(self, features: pd.DataFrame, meta: pd.DataFrame = None):
+        self.feature_names: List[str] = list(features.columns)
+        self.keys = np.asarray(features.index, dtype=object)
+        self._positions: Dict[str, int] = {k: i for i, k in enumerate(self.keys)}
+
+        values = features.to_numpy(dtype=np.float64)
+
+        # Z-score each feature; missing values sit at the mean (0)
+        mean = np.nanmean(values, axis=0) if len(values) else np.zeros(values.shape[1])
+        std = np.nanstd(values, axis=0) if len(values) else np.ones(values.shape[1])
+        std = np.where((std > 0) & ~np.isnan(std), std, 1.0)
+        scaled = np.nan_to_num((values - np.nan_to_num(mean)) / std)
+
+        # Unit rows so cosine similarity is a dot product
+        norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+        scaled = scaled / np.where(norms > 0, norms, 1.0)
+
+        self.matrix = np.ascontiguousarray(scaled, dtype=np.float32)
+        self.meta = meta if meta is not None else pd.DataFrame(index=features.index)
+
+    @classmethod
+    def from_matches(cls, matches_df: pd.DataFrame,
+                     rankings_df: pd.DataFrame = None,
+                     min_matches: int = 2) -> 'OpponentSimilarityIndex':
+        """
+        Build the index from match data (and rankings for display metadata).
+
+        Args:
+            matches_df: Match DataFrame with parsed score columns
+            rankings_df: Rankings DataFrame (raw or normalized columns)
+            min_matches: Minimum bouts for an athlete to be included
+        """
+        features = build_feature_frame(matches_df, min_matches=min_matches)
+        return cls(features, _build_meta(features.index, rankings_df))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def vector(self, athlete_name: str) -> Optional[np.ndarray]:
+        """Feature vector for an athlete (None if not indexed)."""
+        pos = self._positions.get(name_key(athlete_name))
+        return None if pos is None else self.matrix[pos]
+
+    def most_similar(self, athlete_name: str, k: int = 5,
+                     weight_category: str = None) -> List[Dict]:
+        """
+        Top-k most similar athletes by cosine similarity.
+
+        Args:
+            athlete_name: Athlete to compare against
+            k: Number of results
+            weight_category: Restrict results to a category (substring match);
+                None searches across all categories
+
+        Returns:
+            List of dicts (athlete_name, country, weight_category, similarity),
+            most similar first
+        """
+        pos = self._positions.get(name_key(athlete_name))
+        if pos is None or len(self.keys) < 2:
+            return []
+
+        scores = self.matrix @ self.matrix[pos]
+        scores[pos] = -np.inf
+
+        if weight_category and 'weight_category' in self.meta.columns:
+            in_cat = self.meta['weight_category'].astype(str).str.contains(
+                weight_category, case=False, regex=False, na=False).values
+            scores[~in_cat] = -np.inf
+
+        candidates = int(np.isfinite(scores).sum())
+        k = min(k, candidates)
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            key = self.keys[i]
+            row = self.meta.iloc[i]
+            results.append({
+                'athlete_name': row.get('athlete_name') or key,
+                'country': row.get('country', ''),
+                'weight_category': row.get('weight_category', ''),
+                'similarity': round(float(scores[i]), 4),
+            })
+        return results
+
+
+def _build_meta(keys: pd.Index, rankings_df: pd.DataFrame = None) -> pd.DataFrame:
+    """Display name, country and category per name key from the rankings."""
+    meta = pd.DataFrame(index=keys)
+    if rankings_df is None or rankings_df.empty or len(keys) == 0:
+        return meta
+
+    name_col = find_column(rankings_df, 'athlete_name', 'NAME')
+    if name_col is None:
+        return meta
+
+    country_col = find_column(rankings_df, 'country_code', 'country', 'MEMBER NATION')
+    cat_col = find_column(rankings_df, 'weight_category', 'WEIGHT CATEGORY')
+
+    lookup = pd.DataFrame({'athlete_name': rankings_df[name_col].values})
+    if country_col:
+        lookup['country'] = rankings_df[country_col].values
+    if cat_col:
+        lookup['weight_category'] = rankings_df[cat_col].values
+    lookup.index = name_keys(rankings_df[name_col]).values
+    lookup = lookup[~lookup.index.duplicated(keep='first')]
+
+    return meta.join(lookup, how='left').fillna('')
+
+
+def main():
+    """Smoke test on local match data."""
+    from scouting_manager import ScoutingManager
+
+    scout = ScoutingManager()
+    if scout.matches_df is None or scout.matches_df.empty:
+        print("No match data found")
+        return
+
+    index = OpponentSimilarityIndex.from_matches(scout.matches_df, scout.rankings_df)
+    print(f"Indexed {len(index)} athletes x {len(index.feature_names)} features")
+
+    if len(index):
+        sample = index.keys[0]
+        print(f"\nMost similar to {sample}:")
+        for r in index.most_similar(sample, k=5):
+            print(f"  {r['athlete_name']} ({r['country']}) {r['weight_category']} - {r['similarity']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
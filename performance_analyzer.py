@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 import json
 
+from advanced_kpis import AdvancedKPIAnalyzer
 from models import (
     Athlete, Match, Competition, PerformanceMetrics,
     SaudiTeamAnalytics, CompetitionLevel, WeightCategory
@@ -253,6 +254,10 @@ class TaekwondoPerformanceAnalyzer:
         """
         Identify weight categories where Saudi athletes have best medal chances
         Based on current rankings and competition
+
+        Scores come from AdvancedKPIAnalyzer.score_medal_opportunities (one
+        vectorized pass over the whole rankings table, cached per snapshot);
+        the best-ranked Saudi athlete per category within the top 20 is kept.
         """
         opportunities = []
 
@@ -264,45 +269,30 @@ class TaekwondoPerformanceAnalyzer:
             # No weight category data - return empty or analyze globally
             return opportunities
 
-        # Analyze each weight category
-        weight_categories = self.rankings_df['weight_category'].unique()
-
-        for category in weight_categories:
-            category_rankings = self.rankings_df[
-                self.rankings_df['weight_category'] == category
-            ].copy()
+        scored = AdvancedKPIAnalyzer(self.matches_df, self.rankings_df).score_medal_opportunities()
+        if scored.empty:
+            return opportunities
 
-            # Find Saudi athletes in this category
-            saudi_in_cat = category_rankings[
-                category_rankings['country'].str.upper().str.contains('KSA', na=False)
-            ]
+        # Competitors ranked in the medal zone (top 8) per category
+        top8_counts = scored[scored['rank'] <= 8].groupby('weight_category').size()
 
-            if not saudi_in_cat.empty:
-                saudi_in_cat['rank'] = pd.to_numeric(saudi_in_cat['rank'], errors='coerce')
-                best_saudi_rank = saudi_in_cat['rank'].min()
-
-                # Medal opportunity if Saudi athlete in top 20
-                if best_saudi_rank <= 20:
-                    athlete_name = saudi_in_cat[
-                        saudi_in_cat['rank'] == best_saudi_rank
-                    ]['athlete_name'].iloc[0]
-
-                    # Count competitors in top 8 (medal positions)
-                    top8_in_category = len(category_rankings[
-                        pd.to_numeric(category_rankings['rank'], errors='coerce') <= 8
-                    ])
-
-                    opportunities.append({
-                        'weight_category': category,
-                        'athlete_name': athlete_name,
-                        'current_rank': int(best_saudi_rank),
-                        'gap_to_medals': max(0, int(best_saudi_rank) - 8),
-                        'top8_competition_level': top8_in_category,
-                        'opportunity_score': self._calculate_opportunity_score(
-                            best_saudi_rank,
-                            top8_in_category
-                        )
-                    })
+        saudi = scored[
+            scored['country'].astype(str).str.upper().str.contains('KSA', na=False)
+            & (scored['rank'] <= 20)
+        ]
+        best = saudi.sort_values('rank').drop_duplicates('weight_category')
+
+        for _, row in best.iterrows():
+            opportunities.append({
+                'weight_category': row['weight_category'],
+                'athlete_name': row['athlete_name'],
+                'current_rank': int(row['rank']),
+                'gap_to_medals': max(0, int(row['rank']) - 8),
+                'top8_competition_level': int(top8_counts.get(row['weight_category'], 0)),
+                'top8_points_share': float(row['top8_points_share']),
+                'opportunity_score': float(row['opportunity_score']),
+                'priority_level': row['priority_level'],
+            })
 
         # Sort by opportunity score
         opportunities = sorted(
@@ -349,24 +339,6 @@ class TaekwondoPerformanceAnalyzer:
 
         return total_loaded
 
-    def _calculate_opportunity_score(self, rank: float, competition: int) -> float:
-        """
-        Calculate medal opportunity score (0-100)
-        Higher score = better opportunity
-        """
-        if pd.isna(rank):
-            return 0
-
-        # Base score from ranking
-        rank_score = max(0, 100 - (rank * 4))  # Rank 1 = 96, Rank 25 = 0
-
-        # Adjust for competition level
-        competition_factor = 1.0 - (competition / 20)  # Less competition = better
-
-        score = rank_score * (0.7 + 0.3 * competition_factor)
-
-        return round(min(100, max(0, score)), 1)
-
     def generate_competition_recommendations(self) -> List[Dict]:
         """
         Recommend which competitions Saudi athletes should prioritize
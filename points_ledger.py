@@ -0,0 +1,376 @@
+"""
+Ranking Points Ledger
+Per-athlete points entries with expiry and decay
+
+WT ranking points lose weight as they age and eventually drop out. The
+ledger keeps one entry per athlete per event (face-value points and event
+date) and computes what every athlete's total will be on any date in one
+vectorized pass, using the schedule in config.RANKING_POINTS_DECAY.
+
+Entries can come from:
+- explicit results (athlete, event, date, points)
+- the ranking history database: each (athlete, weight category) series is
+  reconciled snapshot by snapshot, so the ledger reproduces every snapshot
+  total (rises are new points, falls expire the oldest earlier points)
+- a single rankings snapshot: each total is booked as one opening entry
+
+Usage:
+    from points_ledger import PointsLedger
+
+    ledger = PointsLedger.from_tracker('data/ranking_history.db')
+    ledger.points_as_of('2028-06-30', weight_category='M-68kg')
+    ledger.retained_points('Jun Jang', '2026-07-01')
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+import numpy as np
+
+from match_stats import name_key, name_keys
+from ranking_features import find_column
+
+try:
+    from config import RANKING_POINTS_DECAY
+except ImportError:
+    RANKING_POINTS_DECAY = [(12, 1.00), (24, 0.75), (36, 0.50), (48, 0.25)]
+
+
+# date = event date the points decay from; booked = first date they count
+# (later than date only for expiry entries written against earlier points)
+LEDGER_COLUMNS = ['athlete_key', 'athlete_name', 'weight_category', 'event', 'date', 'booked', 'points']
+
+# Ledger totals are reported per athlete within a weight category
+SERIES_KEYS = ['athlete_key', 'weight_category']
+
+# Booked amounts smaller than this are rounding noise
+MIN_ENTRY_POINTS = 1e-6
+
+# Average month length used for ages in months
+DAYS_PER_MONTH = 30.4375
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+# Ledgers built from tracker databases: path -> (file state, ledger)
+_TRACKER_LEDGERS: Dict[str, Tuple[tuple, 'PointsLedger']] = {}
+
+
+def decay_weights(age_months, schedule: List = None) -> np.ndarray:
+    """
+    Weight applied to points of a given age (vectorized).
+
+    Args:
+        age_months: Ages in months (array-like); negative = event not yet held
+        schedule: [(months, weight), ...] (default: config.RANKING_POINTS_DECAY)
+
+    Returns:
+        Array of weights; 0 for expired points and for future events
+    """
+    schedule = schedule or RANKING_POINTS_DECAY
+    bounds = np.array([b for b, _ in schedule], dtype=float)
+    weights = np.append([w for _, w in schedule], 0.0)
+
+    age = np.asarray(age_months, dtype=float)
+    result = weights[np.searchsorted(bounds, age, side='right')]
+    return np.where(age < 0, 0.0, result)
+
+
+def decay_weights_at(event_dates, as_of: DateLike, schedule: List = None) -> np.ndarray:
+    """Weight of points from events on the given dates, as counted on as_of."""
+    dates = pd.to_datetime(pd.Series(event_dates), errors='coerce').values
+    ages = (pd.Timestamp(as_of).to_datetime64() - dates) / np.timedelta64(1, 'D') / DAYS_PER_MONTH
+    return decay_weights(np.nan_to_num(ages, nan=-1.0), schedule)
+
+
+class PointsLedger:
+    """
+    Ledger of ranking points entries with date-aware totals.
+    """
+
+    def __init__(self, entries: pd.DataFrame = None, schedule: List = None):
+        self.schedule = schedule or RANKING_POINTS_DECAY
+        self.entries = pd.DataFrame(columns=LEDGER_COLUMNS)
+        if entries is not None and not entries.empty:
+            self.add_entries(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # =========================================================================
+    # BUILDING THE LEDGER
+    # =========================================================================
+
+    def add_entries(self, entries: pd.DataFrame):
+        """
+        Append entries (columns: athlete_name, event, date, points, and
+        optionally weight_category and booked).
+        """
+        dates = pd.to_datetime(entries['date'], errors='coerce')
+        df = pd.DataFrame({
+            'athlete_key': name_keys(entries['athlete_name']).values,
+            'athlete_name': entries['athlete_name'].values,
+            'weight_category': (entries['weight_category'].fillna('').astype(str).values
+                                if 'weight_category' in entries.columns else ''),
+            'event': entries['event'].values if 'event' in entries.columns else '',
+            'date': dates.values,
+            'booked': (pd.to_datetime(entries['booked'], errors='coerce').fillna(dates).values
+                       if 'booked' in entries.columns else dates.values),
+            'points': pd.to_numeric(entries['points'], errors='coerce').fillna(0).values,
+        })
+        df = df[df['date'].notna() & (df['points'] != 0)]
+        self.entries = df if self.entries.empty else pd.concat([self.entries, df], ignore_index=True)
+
+    def add(self, athlete_name: str, event: str, date: DateLike, points: float,
+            weight_category: str = ''):
+        """Append a single entry."""
+        self.add_entries(pd.DataFrame([{
+            'athlete_name': athlete_name, 'event': event, 'date': date,
+            'points': points, 'weight_category': weight_category,
+        }]))
+
+    @classmethod
+    def from_ranking_history(cls, history_df: pd.DataFrame, schedule: List = None) -> 'PointsLedger':
+        """
+        Build entries from ranking snapshots over time.
+
+        Every (athlete, weight category) series is reconciled against what
+        its earlier entries still count on each snapshot date, for all
+        series at once:
+        - a total above that is booked as new points on the snapshot date
+          (the first as the opening balance)
+        - a total below it expires the oldest earlier points first, as
+          negative entries dated with the points they cancel and counted
+          from the snapshot date on
+        - a series missing from a snapshot counts 0
+
+        Ledger totals therefore equal every snapshot, opening balances are
+        not decayed twice, and no projection falls below zero.
+
+        Args:
+            history_df: Columns date, athlete_name, weight_category, points
+        """
+        if history_df is None or history_df.empty:
+            return cls(schedule=schedule)
+        schedule = schedule or RANKING_POINTS_DECAY
+
+        df = history_df[['date', 'athlete_name', 'weight_category', 'points']].copy()
+        df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.normalize()
+        df['points'] = pd.to_numeric(df['points'], errors='coerce').fillna(0)
+        df['weight_category'] = df['weight_category'].fillna('').astype(str)
+        df['athlete_key'] = name_keys(df['athlete_name'])
+        df = df.dropna(subset=['date']).sort_values('date')
+
+        # (series, snapshot date) totals and the weight between any two snapshots
+        totals = df.pivot_table(index=SERIES_KEYS, columns='date', values='points',
+                                aggfunc='last', fill_value=0.0)
+        names = df.groupby(SERIES_KEYS)['athlete_name'].last().reindex(totals.index).values
+        snapshot = totals.to_numpy(dtype=float)
+        dates = totals.columns.values
+        ages = (dates[None, :] - dates[:, None]) / np.timedelta64(1, 'D') / DAYS_PER_MONTH
+        weights = decay_weights(ages, schedule)
+
+        # Face value still standing from each snapshot's points
+        face = np.zeros_like(snapshot)
+        gains = np.zeros_like(snapshot)
+        expiries = []
+        for k in range(len(dates)):
+            counted = face[:, :k] * weights[:k, k]
+            change = snapshot[:, k] - counted.sum(axis=1)
+
+            rising = change > MIN_ENTRY_POINTS
+            gains[rising, k] = change[rising] / weights[k, k]
+            face[rising, k] = gains[rising, k]
+
+            # Oldest counted points absorb the fall first
+            shortfall = np.clip(-change, 0, None)[:, None]
+            absorbed = np.clip(shortfall - (counted.cumsum(axis=1) - counted), 0, counted)
+            cancelled = np.divide(absorbed, weights[:k, k], out=np.zeros_like(absorbed),
+                                  where=weights[:k, k] > 0)
+            cancelled[cancelled < MIN_ENTRY_POINTS] = 0.0
+            face[:, :k] -= cancelled
+            rows, cols = np.nonzero(cancelled)
+            if len(rows):
+                expiries.append(pd.DataFrame({
+                    'series': rows, 'date': dates[cols], 'booked': dates[k],
+                    'points': -cancelled[rows, cols], 'event': 'expiry',
+                }))
+
+        rows, cols = np.nonzero(gains)
+        first = (gains != 0).argmax(axis=1)
+        entries = pd.concat([pd.DataFrame({
+            'series': rows, 'date': dates[cols], 'booked': dates[cols],
+            'points': gains[rows, cols],
+            'event': np.where(cols == first[rows], 'opening balance', 'ranking update'),
+        })] + expiries, ignore_index=True)
+
+        entries['athlete_name'] = names[entries['series'].values]
+        entries['weight_category'] = totals.index.get_level_values('weight_category')[entries['series'].values]
+        return cls(entries, schedule=schedule)
+
+    @classmethod
+    def from_tracker(cls, db_path: str = 'data/ranking_history.db',
+                     schedule: List = None) -> 'PointsLedger':
+        """Build entries from the RankingHistoryTracker database (full or delta storage)."""
+        from ranking_tracker import RankingHistoryTracker, detect_storage
+
+        if not Path(db_path).exists():
+            return cls(schedule=schedule)
+
+        tracker = RankingHistoryTracker(db_path, read_only=True, storage=detect_storage(db_path))
+        try:
+            history = tracker.get_history()
+        except (sqlite3.Error, pd.errors.DatabaseError):
+            history = pd.DataFrame()
+
+        return cls.from_ranking_history(history, schedule=schedule)
+
+    @classmethod
+    def from_rankings(cls, rankings_df: pd.DataFrame, snapshot_date: DateLike = None,
+                      schedule: List = None) -> 'PointsLedger':
+        """
+        Open a ledger from a single rankings snapshot.
+
+        Without a per-event breakdown each total is booked as one entry on
+        the snapshot date, so decay is counted from that date.
+        """
+        if rankings_df is None or rankings_df.empty:
+            return cls(schedule=schedule)
+
+        name_col = find_column(rankings_df, 'athlete_name', 'NAME', 'name')
+        points_col = find_column(rankings_df, 'points', 'POINTS', 'TOTAL POINTS')
+        cat_col = find_column(rankings_df, 'weight_category', 'WEIGHT CATEGORY', 'category')
+        if name_col is None or points_col is None:
+            return cls(schedule=schedule)
+
+        entries = pd.DataFrame({
+            'athlete_name': rankings_df[name_col].values,
+            'weight_category': rankings_df[cat_col].values if cat_col else '',
+            'event': 'opening balance',
+            'date': pd.Timestamp(snapshot_date or datetime.now().date()),
+            'points': rankings_df[points_col].values,
+        })
+        return cls(entries, schedule=schedule)
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def _filtered(self, weight_category: str = None) -> pd.DataFrame:
+        if weight_category:
+            return self.entries[self.entries['weight_category'].astype(str).str.contains(
+                weight_category, case=False, regex=False, na=False)]
+        return self.entries
+
+    def _counted(self, entries: pd.DataFrame, stamps: np.ndarray) -> np.ndarray:
+        """(entries, dates) points counted on each date, broadcast in one step."""
+        ages = (stamps[None, :] - entries['date'].values[:, None]) / np.timedelta64(1, 'D') / DAYS_PER_MONTH
+        weights = decay_weights(ages, self.schedule) * (entries['booked'].values[:, None] <= stamps[None, :])
+        return entries['points'].values[:, None] * weights
+
+    def points_as_of(self, as_of: DateLike, weight_category: str = None) -> pd.Series:
+        """
+        Counted points for every athlete on a date.
+
+        Args:
+            as_of: Date to evaluate
+            weight_category: Category filter (substring match)
+
+        Returns:
+            Series of points indexed by (athlete name key, weight category)
+        """
+        totals = self.points_as_of_dates([as_of], weight_category)
+        if totals.empty:
+            return pd.Series(dtype=float)
+        return totals.iloc[:, 0]
+
+    def points_as_of_dates(self, dates: List[DateLike], weight_category: str = None) -> pd.DataFrame:
+        """
+        Counted points for every athlete on several dates at once.
+
+        Returns:
+            DataFrame indexed by (athlete name key, weight category) with
+            one column per date
+        """
+        entries = self._filtered(weight_category)
+        stamps = pd.to_datetime(pd.Series(dates)).values
+        columns = [pd.Timestamp(d).strftime('%Y-%m-%d') for d in stamps]
+        if entries.empty:
+            return pd.DataFrame(columns=columns)
+
+        result = pd.DataFrame(self._counted(entries, stamps), columns=columns,
+                              index=pd.MultiIndex.from_frame(entries[SERIES_KEYS]))
+        return result.groupby(level=SERIES_KEYS).sum()
+
+    def retained_points(self, athlete_name: str, as_of: DateLike,
+                        weight_category: str = None) -> Optional[float]:
+        """
+        Counted points for one athlete on a date (None if not in the ledger).
+
+        Args:
+            athlete_name: Athlete name
+            as_of: Date to evaluate
+            weight_category: Category filter (substring match); default is
+                the category the athlete was most recently ranked in
+        """
+        entries = self._filtered(weight_category)
+        entries = entries[entries['athlete_key'] == name_key(athlete_name)]
+        if entries.empty:
+            return None
+        if not weight_category:
+            latest = entries.loc[entries['booked'].idxmax(), 'weight_category']
+            entries = entries[entries['weight_category'] == latest]
+        stamps = np.array([pd.Timestamp(as_of).to_datetime64()])
+        return float(self._counted(entries, stamps).sum())
+
+    def expiring_points(self, start: DateLike, end: DateLike,
+                        weight_category: str = None) -> pd.Series:
+        """Points each athlete loses to decay/expiry between two dates."""
+        totals = self.points_as_of_dates([start, end], weight_category)
+        if totals.empty:
+            return pd.Series(dtype=float)
+        return (totals.iloc[:, 0] - totals.iloc[:, 1]).clip(lower=0)
+
+
+def tracker_ledger(db_path: str = 'data/ranking_history.db') -> PointsLedger:
+    """
+    Shared ledger for a tracker database, rebuilt only when the database
+    (or its write-ahead log) changes.
+    """
+    path = Path(db_path)
+
+    def file_state() -> tuple:
+        return tuple((f.stat().st_mtime_ns, f.stat().st_size) if f.exists() else None
+                     for f in (path, Path(f'{path}-wal')))
+
+    key = str(path.resolve())
+    cached = _TRACKER_LEDGERS.get(key)
+    if cached is None or cached[0] != file_state():
+        ledger = PointsLedger.from_tracker(db_path)
+        # Taken after reading: opening the database creates its empty log
+        cached = _TRACKER_LEDGERS[key] = (file_state(), ledger)
+    return cached[1]
+
+
+def main():
+    """Show projected expiry for the tracked field."""
+    try:
+        from config import ASIAN_GAMES_2026, LA_2028_OLYMPICS
+        deadlines = [ASIAN_GAMES_2026['qualification_deadline'], LA_2028_OLYMPICS['qualification_deadline']]
+    except ImportError:
+        deadlines = ['2026-07-01', '2028-06-30']
+
+    ledger = tracker_ledger()
+    print(f"Ledger entries: {len(ledger)}")
+    if not len(ledger):
+        return
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    totals = ledger.points_as_of_dates([today] + deadlines)
+    print(totals.sort_values(today, ascending=False).head(20).round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
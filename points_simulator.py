@@ -17,6 +17,9 @@ from config import (
     ASIAN_GAMES_2026, LA_2028_OLYMPICS, DUAL_TRACK_MILESTONES,
     COMPETITION_RANKING_POINTS
 )
+from ranking_features import add_continental_ranks, continental_rank_for_world_rank, find_column
+from match_stats import name_key, name_keys
+from points_ledger import PointsLedger, RANKING_POINTS_DECAY, decay_weights_at, tracker_ledger
 
 
 @dataclass
@@ -82,6 +85,78 @@ COMPETITION_POINTS = {
     }
 }
 
+# Finish outcomes in bracket order (best first)
+FINISH_ORDER = ['gold', 'silver', 'bronze', 'r16', 'r32']
+
+# Typical field strength (rating of the average opponent) per tier
+TIER_FIELD_RATING = {
+    'olympic': 1700,
+    'world_champs': 1650,
+    'grand_slam': 1650,
+    'grand_prix': 1620,
+    'continental': 1560,
+    'open': 1500,
+}
+
+# Rank-implied rating: rank 1 ~ 1850, falling with log(rank)
+RANK_RATING_TOP = 1850
+RANK_RATING_SLOPE = 60
+
+# Minimum days between two attended events (travel, weight cut, recovery)
+MIN_TRAVEL_GAP_DAYS = 21
+
+# Largest calendar searched exhaustively (2^20 plans, ~20 MB attendance matrix)
+MAX_CALENDAR_EVENTS = 20
+
+# Probability a ranked rival attends an event of each tier (expected schedule)
+RIVAL_ATTENDANCE = {
+    'olympic': 1.0,        # Applied only to likely qualifiers (see OLYMPIC_FIELD_RANK)
+    'world_champs': 0.9,
+    'grand_slam': 0.6,
+    'grand_prix': 0.7,
+    'continental': 0.8,    # Own-continent events only
+    'open': 0.3,
+}
+OLYMPIC_FIELD_RANK = 16
+
+# Continental events by name keyword
+EVENT_CONTINENTS = {'Asian': 'Asia', 'European': 'Europe', 'African': 'Africa',
+                    'Pan Am': 'Pan America', 'Oceania': 'Oceania'}
+
+
+def rank_to_rating(world_rank) -> np.ndarray:
+    """Approximate match rating implied by a world rank (vectorized)."""
+    rank = np.maximum(np.asarray(world_rank, dtype=float), 1.0)
+    return RANK_RATING_TOP - RANK_RATING_SLOPE * np.log(rank)
+
+
+def bout_win_probability(rating, field_rating) -> np.ndarray:
+    """Elo probability of winning a bout against the average opponent."""
+    return 1.0 / (1.0 + np.power(10.0, (np.asarray(field_rating) - np.asarray(rating)) / 400.0))
+
+
+def finish_distribution(p) -> np.ndarray:
+    """
+    Finish probabilities for a 32-athlete single-elimination draw.
+
+    Args:
+        p: Bout win probability (scalar or array of shape (n,))
+
+    Returns:
+        Array of shape (..., 5) in FINISH_ORDER: gold = p^5, silver = p^4(1-p),
+        bronze = p^3(1-p), r16 = quarter-final or last-16 exit, r32 = first-round exit
+    """
+    p = np.asarray(p, dtype=float)
+    q = 1.0 - p
+    return np.stack([
+        p ** 5,
+        p ** 4 * q,
+        p ** 3 * q,
+        p * q + p ** 2 * q,
+        q,
+    ], axis=-1)
+
+
 # Upcoming competitions calendar (2025-2028)
 UPCOMING_COMPETITIONS = [
     Competition('Grand Prix Rome 2025', '2025-03-15', 'grand_prix', 'Rome, Italy', 5000),
@@ -106,10 +181,22 @@ class PointsSimulator:
     Simulate ranking points and project future rankings
     """
 
-    def __init__(self, rankings_df: pd.DataFrame = None):
+    def __init__(self, rankings_df: pd.DataFrame = None, ledger: PointsLedger = None):
         self.rankings_df = rankings_df
+
+        # Points ledger for expiry/decay (default: shared ranking history ledger, loaded on first use)
+        self._ledger = ledger
+
+        if rankings_df is not None and not rankings_df.empty and 'asian_rank' not in rankings_df.columns:
+            self.rankings_df = add_continental_ranks(rankings_df.copy())
         self.competitions = {c.name: c for c in UPCOMING_COMPETITIONS}
 
+        # Projected fields keyed by (weight_category, horizon_date)
+        self._field_cache: Dict[Tuple[str, Optional[str]], pd.DataFrame] = {}
+
+        # Whole-field quota simulation (built on first Olympic probability lookup)
+        self._quota_simulator = None
+
         # Populate point values
         for comp in UPCOMING_COMPETITIONS:
             if comp.tier in COMPETITION_POINTS:
@@ -120,6 +207,18 @@ class PointsSimulator:
                 comp.points_r16 = points['r16']
                 comp.points_r32 = points['r32']
 
+    @property
+    def ledger(self) -> PointsLedger:
+        """Points ledger, loaded from the ranking history database on first use."""
+        if self._ledger is None:
+            self._ledger = tracker_ledger()
+        return self._ledger
+
+    @property
+    def decay_schedule(self) -> List:
+        """Decay schedule for new points (the injected ledger's, else the configured one)."""
+        return self._ledger.schedule if self._ledger is not None else RANKING_POINTS_DECAY
+
     def get_available_competitions(self, start_date: str = None, end_date: str = None) -> List[Competition]:
         """Get list of upcoming competitions within date range."""
         if start_date is None:
@@ -135,6 +234,28 @@ class PointsSimulator:
 
         return sorted(competitions, key=lambda x: x.date)
 
+    def nearest_competitions(self, competitions: List[Competition], must_attend: List[str] = None,
+                             limit: int = MAX_CALENDAR_EVENTS) -> List[Competition]:
+        """
+        Cap a calendar at the size optimize_calendar can search.
+
+        Must-attend events are kept; the remaining places go to the earliest
+        other events.
+
+        Args:
+            competitions: Candidate events
+            must_attend: Event names that are always kept
+            limit: Maximum number of events
+
+        Returns:
+            At most `limit` events, in date order
+        """
+        competitions = sorted(competitions, key=lambda c: c.date)
+        required = set(must_attend or [])
+        kept = [c for c in competitions if c.name in required][:limit]
+        kept += [c for c in competitions if c.name not in required][:limit - len(kept)]
+        return sorted(kept, key=lambda c: c.date)
+
     def calculate_points_for_finish(self, competition_name: str, finish: str) -> float:
         """Calculate points earned for a given finish at a competition."""
         comp = self.competitions.get(competition_name)
@@ -197,20 +318,22 @@ class PointsSimulator:
             points = self.calculate_points_for_finish(comp_name, finish)
             total_new_points += points
 
-        scenario.projected_points = current_points + total_new_points
-
-        # Estimate rank change (simplified model)
-        # Assume average competitor gains ~30 points per year
-        avg_competitor_gain = 30
-        points_advantage = total_new_points - avg_competitor_gain
-
-        # Rough estimate: every 10 points = 1 rank position
-        rank_change = int(points_advantage / 10)
-        scenario.projected_world_rank = max(1, current_rank - rank_change)
-
-        # Asian rank estimate (assume similar ratio)
-        current_asian_rank = self._estimate_asian_rank(current_rank)
-        scenario.projected_asian_rank = max(1, current_asian_rank - int(rank_change * 0.6))
+        # Points as counted at the horizon (older points decayed or expired)
+        horizon = self._horizon_for(competitions)
+        counted_new_points = float(np.dot(
+            [self.calculate_points_for_finish(n, expected_finishes.get(n, 'r32')) for n in competitions],
+            self.event_decay_weights(competitions, horizon)
+        )) if competitions else 0.0
+        scenario.projected_points = self.retained_points(
+            athlete_name, current_points, horizon, weight_category) + counted_new_points
+
+        # Project world and Asian rank against the category field
+        world_ranks, asian_ranks = self.project_ranks(
+            athlete_name, current_rank, current_points, np.array([counted_new_points]),
+            weight_category, horizon_date=horizon
+        )
+        scenario.projected_world_rank = int(world_ranks[0])
+        scenario.projected_asian_rank = int(asian_ranks[0])
 
         # Asian Games qualification status
         if scenario.projected_asian_rank <= 8:
@@ -236,8 +359,44 @@ class PointsSimulator:
 
         return scenario
 
+    def _has_asian_ranks(self) -> bool:
+        """Whether real Asian rank columns are available."""
+        return (
+            self.rankings_df is not None
+            and not self.rankings_df.empty
+            and 'asian_rank' in self.rankings_df.columns
+        )
+
+    def get_asian_rank(self, athlete_name: str, weight_category: str = "",
+                       world_rank: int = None) -> int:
+        """
+        Get an athlete's Asian rank.
+
+        Reads the precomputed asian_rank column when the athlete is in the
+        rankings, places a world rank into the real Asian field otherwise,
+        and falls back to the rough estimate without rankings data.
+        """
+        if self._has_asian_ranks():
+            df = self.rankings_df
+            name_col = 'athlete_name' if 'athlete_name' in df.columns else 'NAME'
+            if athlete_name and name_col in df.columns:
+                mask = df[name_col].astype(str).str.upper() == athlete_name.upper()
+                if weight_category:
+                    cat_col = 'weight_category' if 'weight_category' in df.columns else 'WEIGHT CATEGORY'
+                    if cat_col in df.columns:
+                        mask &= df[cat_col].astype(str).str.contains(weight_category, case=False, regex=False, na=False)
+                asian = df.loc[mask, 'asian_rank'].dropna()
+                if not asian.empty:
+                    return int(asian.iloc[0])
+            if world_rank is not None:
+                return max(1, continental_rank_for_world_rank(
+                    df, world_rank, weight_category, continent='Asia', exclude_name=athlete_name
+                ))
+
+        return self._estimate_asian_rank(world_rank or 0)
+
     def _estimate_asian_rank(self, world_rank: int) -> int:
-        """Estimate Asian rank from world rank (rough approximation)."""
+        """Estimate Asian rank from world rank (rough approximation, no rankings data)."""
         # Assume ~40% of top 50 are Asian
         if world_rank <= 10:
             return max(1, int(world_rank * 0.4))
@@ -252,17 +411,24 @@ class PointsSimulator:
         asian_rank: int,
         weight_category: str
     ) -> float:
-        """Calculate probability of Olympic qualification."""
+        """
+        Calculate probability of Olympic qualification.
+
+        Uses the whole-field quota simulation (automatic places, one per NOC,
+        continental tournaments) when the rankings carry points; otherwise
+        falls back to rank bands.
+        """
         # Check if Olympic category
         olympic_categories = LA_2028_OLYMPICS['weight_categories']
-        is_olympic_category = (
-            weight_category in olympic_categories.get('M', []) or
-            weight_category in olympic_categories.get('F', [])
-        )
+        genders = [g for g, weights in olympic_categories.items() if weight_category in weights]
 
-        if not is_olympic_category:
+        if not genders:
             return 0  # Non-Olympic category
 
+        quota_prob = self._quota_probability(f"{genders[0]}{weight_category}", world_rank)
+        if quota_prob is not None:
+            return round(quota_prob * 100, 1)
+
         # Base probability from world rank
         if world_rank <= 5:
             base_prob = 95  # Almost certain
@@ -285,6 +451,15 @@ class PointsSimulator:
 
         return base_prob
 
+    def _quota_probability(self, olympic_category: str, world_rank: int) -> Optional[float]:
+        """Simulated qualification rate at a deadline rank (None without a points field)."""
+        if not self._has_points_field():
+            return None
+        if self._quota_simulator is None:
+            from olympic_quota_simulator import OlympicQuotaSimulator
+            self._quota_simulator = OlympicQuotaSimulator(self.rankings_df, simulator=self)
+        return self._quota_simulator.rank_probability(olympic_category, world_rank)
+
     def compare_scenarios(
         self,
         athlete_name: str,
@@ -333,7 +508,10 @@ class PointsSimulator:
         budget: float,
         target_rank: int = None,
         weight_category: str = "",
-        target_event: str = "asian_games"  # 'asian_games' or 'olympics'
+        target_event: str = "asian_games",  # 'asian_games' or 'olympics'
+        objective: str = "points",  # 'points' or 'qualification'
+        min_gap_days: int = MIN_TRAVEL_GAP_DAYS,
+        event_points: Dict[str, float] = None
     ) -> Dict:
         """
         Generate optimal competition attendance strategy within budget.
@@ -346,6 +524,10 @@ class PointsSimulator:
             target_rank: Target rank to achieve (optional)
             weight_category: Weight category
             target_event: 'asian_games' or 'olympics'
+            objective: Maximise 'points' (expected) or 'qualification' probability
+            min_gap_days: Minimum days between attended events
+            event_points: Expected points per competition name (optional,
+                overrides the rating model in the calendar search)
 
         Returns:
             Dict with optimal strategy recommendation
@@ -359,24 +541,28 @@ class PointsSimulator:
             must_attend = ['World Championships 2025', 'World Championships 2026', 'World Championships 2027']
 
         available_comps = self.get_available_competitions(end_date=deadline)
-
-        # Filter by budget
-        affordable_comps = []
-        remaining_budget = budget
-
-        # Prioritize must-attend events
-        for comp in available_comps:
-            if comp.name in must_attend and comp.estimated_cost_usd <= remaining_budget:
-                affordable_comps.append(comp)
-                remaining_budget -= comp.estimated_cost_usd
-
-        # Add high-value competitions
-        for comp in available_comps:
-            if comp.name not in must_attend and comp.estimated_cost_usd <= remaining_budget:
-                # Prioritize by tier
-                if comp.tier in ['world_champs', 'grand_prix', 'grand_slam']:
-                    affordable_comps.append(comp)
-                    remaining_budget -= comp.estimated_cost_usd
+        if len(available_comps) > MAX_CALENDAR_EVENTS:
+            print(f"{len(available_comps)} events before the deadline; "
+                  f"planning over the nearest {MAX_CALENDAR_EVENTS}")
+            available_comps = self.nearest_competitions(available_comps, must_attend)
+
+        # Exact search over all feasible attendance plans
+        plan = self.optimize_calendar(
+            current_rank=current_rank,
+            current_points=current_points,
+            budget=budget,
+            competitions=available_comps,
+            must_attend=must_attend,
+            min_gap_days=min_gap_days,
+            objective=objective,
+            target_event=target_event,
+            weight_category=weight_category,
+            athlete_name=athlete_name,
+            horizon_date=deadline,
+            event_points=event_points
+        )
+        chosen = set(plan['competitions'])
+        affordable_comps = [c for c in available_comps if c.name in chosen]
 
         # Create scenarios
         conservative_finishes = {c.name: 'r16' for c in affordable_comps}
@@ -402,10 +588,577 @@ class PointsSimulator:
             'target_event': target_event,
             'recommended_competitions': [c.name for c in affordable_comps],
             'total_cost': sum(c.estimated_cost_usd for c in affordable_comps),
+            'expected_points': plan['expected_points'],
+            'objective': objective,
+            'objective_value': plan['objective_value'],
+            'pareto_frontier': plan['pareto_frontier'],
             'scenarios': results,
             'recommendation': results[0] if results else None
         }
 
+    # =========================================================================
+    # FIELD-AWARE RANK PROJECTION
+    # =========================================================================
+
+    def _horizon_for(self, competitions: List[str]) -> Optional[str]:
+        """Projection horizon: date of the last attended competition."""
+        dates = [self.competitions[n].date for n in competitions if n in self.competitions]
+        return max(dates) if dates else None
+
+    @staticmethod
+    def _resolve_horizon(horizon_date: str = None) -> str:
+        """Horizon date, defaulting to one year ahead."""
+        return horizon_date or (datetime.now() + timedelta(days=365)).strftime('%Y-%m-%d')
+
+    def event_decay_weights(self, competitions: List[str], horizon_date: str = None) -> np.ndarray:
+        """
+        Weight each competition's points still carry on the horizon date.
+
+        Returns:
+            Array aligned with competitions; unknown names weigh 0
+        """
+        known = [n in self.competitions for n in competitions]
+        if not any(known):
+            return np.zeros(len(competitions))
+        dates = [self.competitions[n].date if k else None for n, k in zip(competitions, known)]
+        horizon = self._resolve_horizon(horizon_date or max(d for d in dates if d))
+        return decay_weights_at(dates, horizon, self.decay_schedule)
+
+    def retained_points(self, athlete_name: str, current_points: float,
+                        as_of: str = None, weight_category: str = "") -> float:
+        """
+        Current points still counted on a future date.
+
+        Uses the athlete's ledger entries (in weight_category, or their
+        latest category) when available; otherwise the current total is
+        assumed to hold.
+        """
+        if as_of and athlete_name and len(self.ledger):
+            retained = self.ledger.retained_points(athlete_name, as_of, weight_category)
+            if retained is not None:
+                return retained
+        return current_points
+
+    def _rankings_columns(self) -> Dict[str, Optional[str]]:
+        """Column names in the loaded rankings (raw or normalized)."""
+        df = self.rankings_df
+        return {
+            'name': find_column(df, 'athlete_name', 'NAME'),
+            'points': find_column(df, 'points', 'POINTS', 'TOTAL POINTS'),
+            'rank': find_column(df, 'rank', 'RANK'),
+            'category': find_column(df, 'weight_category', 'WEIGHT CATEGORY'),
+            'country': find_column(df, 'country_code', 'country', 'MEMBER NATION'),
+        }
+
+    def _has_points_field(self) -> bool:
+        """Whether rankings with a points column are loaded."""
+        return (
+            self.rankings_df is not None
+            and not self.rankings_df.empty
+            and self._rankings_columns()['points'] is not None
+        )
+
+    def expected_schedule_gains(self, world_ranks: np.ndarray, continents: np.ndarray,
+                                start_date: str = None, horizon_date: str = None) -> np.ndarray:
+        """
+        Expected points each athlete gains from their own likely schedule.
+
+        Every athlete is assumed to attend each upcoming event with the
+        tier's attendance probability (own-continent events only; the
+        Olympics only for likely qualifiers), finishing according to the
+        rank-implied bout win probability against that event's field.
+
+        Args:
+            world_ranks: Current world ranks, shape (m,)
+            continents: Continent per athlete, shape (m,)
+            start_date: First event date considered (default: today)
+            horizon_date: Last event date considered (default: one year ahead)
+
+        Returns:
+            Expected points gained per athlete (as counted on the horizon
+            date), shape (m,)
+        """
+        if start_date is None:
+            start_date = datetime.now().strftime('%Y-%m-%d')
+        horizon_date = self._resolve_horizon(horizon_date)
+
+        comps = self.get_available_competitions(start_date, horizon_date)
+        ranks = np.asarray(world_ranks, dtype=float)
+        if not comps or len(ranks) == 0:
+            return np.zeros(len(ranks))
+
+        ranks = np.where(np.isnan(ranks), 999, ranks)
+        continents = np.asarray(continents, dtype=object)
+
+        # (m athletes, n events) attendance probability
+        attendance = np.tile(
+            np.array([RIVAL_ATTENDANCE.get(c.tier, 0.5) for c in comps]), (len(ranks), 1))
+        for j, comp in enumerate(comps):
+            event_continent = next((v for k, v in EVENT_CONTINENTS.items() if k in comp.name), None)
+            if event_continent:
+                attendance[:, j] *= (continents == event_continent)
+            if comp.tier == 'olympic':
+                attendance[:, j] *= (ranks <= OLYMPIC_FIELD_RANK)
+
+        field = np.array([TIER_FIELD_RATING.get(c.tier, 1600) for c in comps], dtype=float)
+        win_probs = bout_win_probability(rank_to_rating(ranks)[:, None], field[None, :])
+        event_points = (finish_distribution(win_probs) * self.finish_points_matrix(comps)[None]).sum(axis=2)
+
+        # Points as they will count on the horizon date
+        event_points *= decay_weights_at([c.date for c in comps], horizon_date, self.decay_schedule)[None, :]
+
+        return (attendance * event_points).sum(axis=1)
+
+    def project_field(self, weight_category: str = "", horizon_date: str = None) -> pd.DataFrame:
+        """
+        Project every ranked athlete forward by their expected schedule.
+
+        Args:
+            weight_category: Category filter (substring match); empty = all categories
+            horizon_date: Last event date considered
+
+        Returns:
+            DataFrame with athlete_name, weight_category, country, continent,
+            current rank/points/asian rank, retained_points (after expiry),
+            expected_gain, projected_points, projected_rank and
+            projected_asian_rank (ranked within category)
+        """
+        if not self._has_points_field():
+            return pd.DataFrame()
+
+        horizon_date = self._resolve_horizon(horizon_date)
+        cache_key = (weight_category, horizon_date)
+        if cache_key in self._field_cache:
+            return self._field_cache[cache_key]
+
+        cols = self._rankings_columns()
+        df = self.rankings_df
+        if weight_category and cols['category']:
+            df = df[df[cols['category']].astype(str).str.contains(
+                weight_category, case=False, regex=False, na=False)]
+
+        field = pd.DataFrame({
+            'athlete_name': df[cols['name']].values if cols['name'] else '',
+            'weight_category': df[cols['category']].astype(str).values if cols['category'] else weight_category,
+            'country': df[cols['country']].values if cols['country'] else '',
+            'continent': df['continent'].values if 'continent' in df.columns else None,
+            'rank': pd.to_numeric(df[cols['rank']], errors='coerce').values if cols['rank'] else np.nan,
+            'points': pd.to_numeric(df[cols['points']], errors='coerce').fillna(0).values,
+            'asian_rank': df['asian_rank'].values if 'asian_rank' in df.columns else np.nan,
+        })
+
+        # Current points still counted at the horizon (ledger), else as-is
+        field['retained_points'] = field['points']
+        if len(self.ledger):
+            retained = self.ledger.points_as_of(horizon_date, weight_category)
+            series = pd.MultiIndex.from_arrays([name_keys(field['athlete_name']), field['weight_category']])
+            field['retained_points'] = retained.reindex(series).to_numpy(dtype=float)
+            field['retained_points'] = field['retained_points'].fillna(field['points'])
+
+        field['expected_gain'] = self.expected_schedule_gains(
+            field['rank'].values, field['continent'].values, horizon_date=horizon_date)
+        field['projected_points'] = field['retained_points'] + field['expected_gain']
+
+        # Rank everyone within their category (and continent) on projected points
+        field['projected_rank'] = (
+            field.groupby('weight_category')['projected_points']
+            .rank(ascending=False, method='min').astype(int)
+        )
+        field['projected_asian_rank'] = (
+            field['projected_points'].where(field['continent'] == 'Asia')
+            .groupby(field['weight_category']).rank(ascending=False, method='min')
+        )
+
+        self._field_cache[cache_key] = field
+        return field
+
+    def project_ranks(self, athlete_name: str, current_rank: int, current_points: float,
+                      new_points: np.ndarray, weight_category: str = "",
+                      horizon_date: str = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Projected world and Asian rank for an array of points gains.
+
+        The athlete's projected points are placed into the category's
+        projected field (rivals advanced by their expected schedules) with
+        a binary search over the sorted field points. Without rankings
+        points, falls back to the simple points-per-rank model.
+
+        Args:
+            athlete_name: Athlete (left out of the field)
+            current_rank: Current world rank (fallback model)
+            current_points: Current ranking points (expired points removed via the ledger)
+            new_points: Points gained as counted on the horizon, shape (k,)
+                (e.g. one per trial or plan)
+            weight_category: Weight category
+            horizon_date: Last event date considered for rivals
+
+        Returns:
+            (world_ranks, asian_ranks) integer arrays of shape (k,)
+        """
+        new_points = np.atleast_1d(np.asarray(new_points, dtype=float))
+        horizon_date = self._resolve_horizon(horizon_date)
+        field = self.project_field(weight_category, horizon_date) if weight_category else pd.DataFrame()
+
+        if field.empty:
+            expired = current_points - self.retained_points(athlete_name, current_points, horizon_date, weight_category)
+            world = self._project_world_ranks(current_rank, current_points, new_points - expired,
+                                              weight_category, athlete_name)
+            return world, self._asian_ranks_for(world, weight_category, athlete_name)
+
+        if athlete_name:
+            field = field[name_keys(field['athlete_name']).values != name_key(athlete_name)]
+
+        projected = self.retained_points(athlete_name, current_points, horizon_date, weight_category) + new_points
+        all_points = np.sort(field['projected_points'].values)
+        asian_points = np.sort(field.loc[field['continent'] == 'Asia', 'projected_points'].values)
+
+        # Rank = athletes strictly ahead + 1
+        world = len(all_points) - np.searchsorted(all_points, projected, side='right') + 1
+        asian = len(asian_points) - np.searchsorted(asian_points, projected, side='right') + 1
+        return world.astype(int), asian.astype(int)
+
+    def project_saudi_athletes(self, horizon_date: str = None, country: str = 'KSA') -> pd.DataFrame:
+        """
+        Batch projection for every athlete of a country across all categories.
+
+        All athletes (Saudi and rivals) are advanced by their expected
+        schedules in one vectorized pass and re-ranked within category.
+
+        Args:
+            horizon_date: Last event date considered (default: one year ahead)
+            country: NOC code to report
+
+        Returns:
+            DataFrame with current and projected points, world rank and Asian rank
+        """
+        field = self.project_field('', horizon_date)
+        if field.empty:
+            return field
+
+        codes = field['country'].astype(str).str.upper()
+        mine = field[codes.str.contains(country, regex=False, na=False) |
+                     (codes.str.contains('SAUDI', na=False) if country == 'KSA' else False)]
+
+        result = mine[['athlete_name', 'weight_category', 'rank', 'points', 'asian_rank', 'retained_points',
+                       'expected_gain', 'projected_points', 'projected_rank', 'projected_asian_rank']].copy()
+        rounded = ['retained_points', 'expected_gain', 'projected_points']
+        result[rounded] = result[rounded].round(1)
+        result['projected_asian_rank'] = result['projected_asian_rank'].astype('Int64')
+        return result.sort_values(['weight_category', 'projected_rank']).reset_index(drop=True)
+
+    # =========================================================================
+    # MONTE CARLO SIMULATION
+    # =========================================================================
+
+    def simulate_monte_carlo(
+        self,
+        athlete_name: str,
+        current_rank: int,
+        current_points: float,
+        competitions: List[str],
+        weight_category: str = "",
+        n_trials: int = 20000,
+        athlete_rating: float = None,
+        seed: int = None
+    ) -> Dict:
+        """
+        Sample whole seasons of finishes and summarise the outcome spread.
+
+        Finishes are drawn for all events and trials at once as an
+        (events x trials) array from each event's finish distribution, which
+        depends on the athlete's rating versus the tier's typical field.
+
+        Args:
+            athlete_name: Athlete name
+            current_rank: Current world rank
+            current_points: Current ranking points
+            competitions: Competition names to attend
+            weight_category: Weight category
+            n_trials: Number of simulated seasons
+            athlete_rating: Match rating (default: implied by current rank)
+            seed: Random seed for reproducible runs
+
+        Returns:
+            Dict with percentile bands for points, world rank and Asian rank,
+            qualification probabilities and per-event finish probabilities.
+            Band keys are outcome percentiles, so 10 is the pessimistic end
+            for points and ranks alike.
+        """
+        comps = [self.competitions[name] for name in competitions if name in self.competitions]
+        percentiles = [10, 25, 50, 75, 90]
+
+        rating = athlete_rating if athlete_rating is not None else float(rank_to_rating(current_rank))
+        field = np.array([TIER_FIELD_RATING.get(c.tier, 1600) for c in comps], dtype=float)
+        win_probs = bout_win_probability(rating, field)
+        dist = finish_distribution(win_probs) if comps else np.zeros((0, len(FINISH_ORDER)))
+
+        rng = np.random.default_rng(seed)
+
+        # Finish index per (event, trial) by inverse CDF
+        cdf = np.cumsum(dist, axis=1)
+        draws = rng.random((len(comps), n_trials))
+        finish_idx = (draws[:, :, None] >= cdf[:, None, :-1]).sum(axis=2)
+
+        points_matrix = self.finish_points_matrix(comps)
+        event_points = np.take_along_axis(points_matrix, finish_idx, axis=1) if comps else np.zeros((0, n_trials))
+
+        # Points as counted on the horizon date
+        horizon = self._horizon_for(competitions)
+        decay = self.event_decay_weights([c.name for c in comps], horizon)
+        new_points = (event_points * decay[:, None]).sum(axis=0)
+        base_points = self.retained_points(athlete_name, current_points, horizon, weight_category)
+
+        world_ranks, asian_ranks = self.project_ranks(
+            athlete_name, current_rank, current_points, new_points, weight_category,
+            horizon_date=horizon
+        )
+
+        unique_ranks, inverse = np.unique(np.stack([world_ranks, asian_ranks]), axis=1, return_inverse=True)
+        olympic = np.array([
+            self._calculate_olympic_probability(int(w), int(a), weight_category)
+            for w, a in unique_ranks.T
+        ], dtype=float)[np.ravel(inverse)]
+
+        medals = (finish_idx <= FINISH_ORDER.index('bronze')).sum(axis=0)
+
+        return {
+            'athlete': athlete_name,
+            'n_trials': n_trials,
+            'competitions': [c.name for c in comps],
+            'total_cost': float(sum(c.estimated_cost_usd for c in comps)),
+            'bout_win_probability': {c.name: round(float(p), 3) for c, p in zip(comps, win_probs)},
+            'finish_probabilities': {
+                c.name: dict(zip(FINISH_ORDER, np.round(d, 4).tolist())) for c, d in zip(comps, dist)
+            },
+            'expected_points': round(float(base_points + new_points.mean()), 1),
+            'points_percentiles': dict(zip(
+                percentiles, np.round(base_points + np.percentile(new_points, percentiles), 1).tolist())),
+            'world_rank_percentiles': dict(zip(
+                percentiles, np.percentile(world_ranks, percentiles[::-1]).round().astype(int).tolist())),
+            'asian_rank_percentiles': dict(zip(
+                percentiles, np.percentile(asian_ranks, percentiles[::-1]).round().astype(int).tolist())),
+            'asian_games_qualified_probability': round(float((asian_ranks <= 8).mean()), 3),
+            'asian_games_bubble_probability': round(float(((asian_ranks > 8) & (asian_ranks <= 12)).mean()), 3),
+            'olympic_probability': round(float(olympic.mean()), 1),
+            'expected_medals': round(float(medals.mean()), 2),
+            'points_samples': base_points + new_points,
+        }
+
+    # =========================================================================
+    # CALENDAR OPTIMIZATION
+    # =========================================================================
+
+    def finish_points_matrix(self, competitions: List[Competition]) -> np.ndarray:
+        """Points per finish for each competition, shape (n, 5) in FINISH_ORDER."""
+        return np.array([
+            [c.points_gold, c.points_silver, c.points_bronze, c.points_r16, c.points_r32]
+            for c in competitions
+        ], dtype=float).reshape(len(competitions), len(FINISH_ORDER))
+
+    def event_win_probabilities(self, competitions: List[Competition],
+                                current_rank: int) -> np.ndarray:
+        """Bout win probability at each competition against its typical field."""
+        rating = rank_to_rating(current_rank)
+        field = np.array([TIER_FIELD_RATING.get(c.tier, 1600) for c in competitions], dtype=float)
+        return bout_win_probability(rating, field)
+
+    def expected_event_points(self, competitions: List[Competition],
+                              current_rank: int) -> np.ndarray:
+        """Expected ranking points from attending each competition."""
+        if not competitions:
+            return np.zeros(0)
+        probs = finish_distribution(self.event_win_probabilities(competitions, current_rank))
+        return (probs * self.finish_points_matrix(competitions)).sum(axis=1)
+
+    def optimize_calendar(
+        self,
+        current_rank: int,
+        current_points: float,
+        budget: float,
+        competitions: List[Competition] = None,
+        must_attend: List[str] = None,
+        min_gap_days: int = MIN_TRAVEL_GAP_DAYS,
+        objective: str = 'points',
+        target_event: str = 'asian_games',
+        weight_category: str = "",
+        athlete_name: str = "",
+        horizon_date: str = None,
+        event_points: Dict[str, float] = None
+    ) -> Dict:
+        """
+        Exact search over every subset of the competition calendar.
+
+        All 2^n attendance plans are enumerated as a bitmask matrix and
+        scored at once, then filtered by budget, must-attend events and the
+        minimum travel gap between attended events.
+
+        Args:
+            current_rank: Current world rank
+            current_points: Current ranking points
+            budget: Maximum budget in USD
+            competitions: Candidate events (default: all upcoming)
+            must_attend: Events that every plan must include (dropped if
+                they alone exceed the budget)
+            min_gap_days: Minimum days between two attended events
+            objective: 'points' (expected points) or 'qualification'
+                (qualification probability for target_event)
+            target_event: 'asian_games' or 'olympics' (qualification objective)
+            weight_category: Weight category (qualification objective)
+            athlete_name: Athlete name (excluded from the field when ranking)
+            horizon_date: Date points are counted on (default: last event);
+                points from earlier events are decayed to that date
+            event_points: Expected points per competition name, replacing the
+                rating model (e.g. an athlete's row of
+                AdvancedKPIAnalyzer.competition_roi_matrix)
+
+        Returns:
+            Dict with the best plan, its cost and expected points, and the
+            Pareto frontier of cost versus objective
+
+        Raises:
+            ValueError: More than MAX_CALENDAR_EVENTS candidate events (the
+                search doubles in time and memory with every event)
+        """
+        if competitions is None:
+            competitions = self.get_available_competitions()
+        competitions = sorted(competitions, key=lambda c: c.date)
+        n = len(competitions)
+        if n > MAX_CALENDAR_EVENTS:
+            raise ValueError(f"Calendar search is limited to {MAX_CALENDAR_EVENTS} events, got {n}; "
+                             f"narrow the date range or pass fewer competitions")
+
+        result = {
+            'competitions': [], 'total_cost': 0.0, 'expected_points': 0.0,
+            'objective': objective, 'objective_value': 0.0,
+            'must_attend_applied': [], 'pareto_frontier': [], 'plans_evaluated': 0,
+        }
+        if n == 0:
+            return result
+
+        names = [c.name for c in competitions]
+        costs = np.array([c.estimated_cost_usd for c in competitions], dtype=float)
+        horizon_date = horizon_date or competitions[-1].date
+        expected = self.expected_event_points(competitions, current_rank)
+        if event_points:
+            expected = np.array([event_points.get(name, e) for name, e in zip(names, expected)], dtype=float)
+        event_points = expected * decay_weights_at([c.date for c in competitions], horizon_date,
+                                                   self.decay_schedule)
+
+        # Every subset as a row of attendance bits: (2^n, n)
+        masks = np.arange(1 << n, dtype=np.int64)
+        bits = ((masks[:, None] >> np.arange(n)) & 1).astype(bool)
+
+        plan_cost = bits @ costs
+        plan_points = bits @ event_points
+
+        feasible = plan_cost <= budget
+
+        # Must-attend events (only enforced if they fit the budget together)
+        required = [i for i, name in enumerate(names) if name in (must_attend or [])]
+        if required and costs[required].sum() <= budget:
+            feasible &= bits[:, required].all(axis=1)
+            result['must_attend_applied'] = [names[i] for i in required]
+
+        # Travel gap: no two attended events closer than min_gap_days
+        if min_gap_days and n > 1:
+            days = np.array([
+                (datetime.strptime(c.date, '%Y-%m-%d') - datetime(2000, 1, 1)).days
+                for c in competitions
+            ])
+            close_i, close_j = np.nonzero(np.triu(np.abs(days[:, None] - days[None, :]) < min_gap_days, k=1))
+            for i, j in zip(close_i, close_j):
+                feasible &= ~(bits[:, i] & bits[:, j])
+
+        if objective == 'qualification':
+            plan_value = self._qualification_values(
+                current_rank, current_points, plan_points, target_event,
+                weight_category, athlete_name, horizon_date=horizon_date)
+        else:
+            plan_value = plan_points
+
+        idx = np.flatnonzero(feasible)
+        result['plans_evaluated'] = int(len(masks))
+        if len(idx) == 0:
+            return result
+
+        # Best plan: highest objective, then highest expected points, then cheapest
+        order = np.lexsort((plan_cost[idx], -plan_points[idx], -plan_value[idx]))
+        best = idx[order[0]]
+
+        result.update({
+            'competitions': [names[i] for i in np.flatnonzero(bits[best])],
+            'total_cost': float(plan_cost[best]),
+            'expected_points': round(float(plan_points[best]), 1),
+            'objective_value': round(float(plan_value[best]), 2),
+        })
+
+        # Pareto frontier: cheapest plan for each improvement in the objective
+        by_cost = idx[np.lexsort((-plan_value[idx], plan_cost[idx]))]
+        values = plan_value[by_cost]
+        running_best = np.maximum.accumulate(values)
+        improves = np.ones(len(values), dtype=bool)
+        improves[1:] = values[1:] > running_best[:-1]
+
+        result['pareto_frontier'] = [
+            {
+                'competitions': [names[i] for i in np.flatnonzero(bits[m])],
+                'total_cost': float(plan_cost[m]),
+                'expected_points': round(float(plan_points[m]), 1),
+                'objective_value': round(float(plan_value[m]), 2),
+            }
+            for m in by_cost[improves]
+        ]
+
+        return result
+
+    def _qualification_values(self, current_rank: int, current_points: float,
+                              new_points: np.ndarray, target_event: str,
+                              weight_category: str, athlete_name: str,
+                              horizon_date: str = None) -> np.ndarray:
+        """Qualification probability (0-100) for an array of points gains."""
+        world_ranks, asian_ranks = self.project_ranks(
+            athlete_name, current_rank, current_points, new_points, weight_category,
+            horizon_date=horizon_date
+        )
+
+        pairs, inverse = np.unique(np.stack([world_ranks, asian_ranks]), axis=1, return_inverse=True)
+        unique_ranks, asian = pairs[0], pairs[1]
+        inverse = np.ravel(inverse)
+
+        if target_event == 'olympics':
+            values = np.array([
+                self._calculate_olympic_probability(int(w), int(a), weight_category)
+                for w, a in zip(unique_ranks, asian)
+            ], dtype=float)
+        else:
+            values = np.select([asian <= 8, asian <= 12], [100.0, 50.0], default=0.0)
+
+        return values[inverse]
+
+    def _asian_ranks_for(self, world_ranks: np.ndarray, weight_category: str = "",
+                         athlete_name: str = "") -> np.ndarray:
+        """Asian rank for each of an array of world ranks."""
+        # Distinct projected ranks are few, so place each once
+        unique_ranks, inverse = np.unique(np.asarray(world_ranks, dtype=int), return_inverse=True)
+        placed = np.array([
+            max(1, continental_rank_for_world_rank(
+                self.rankings_df, int(r), weight_category, continent='Asia',
+                exclude_name=athlete_name or None))
+            if self._has_asian_ranks() else self._estimate_asian_rank(int(r))
+            for r in unique_ranks
+        ], dtype=int)
+        return placed[inverse].reshape(np.shape(world_ranks))
+
+    def _project_world_ranks(self, current_rank: int, current_points: float,
+                             new_points: np.ndarray, weight_category: str = "",
+                             athlete_name: str = "") -> np.ndarray:
+        """Projected world rank for an array of points gains."""
+        # Assume average competitor gains ~30 points per year;
+        # every 10 points of advantage = 1 rank position
+        avg_competitor_gain = 30
+        rank_change = ((np.asarray(new_points, dtype=float) - avg_competitor_gain) / 10).astype(int)
+        return np.maximum(1, current_rank - rank_change)
+
     def get_competition_calendar_df(self) -> pd.DataFrame:
         """Get competitions as DataFrame for display."""
         data = []
@@ -524,6 +1277,13 @@ def main():
     for comp in strategy['recommended_competitions']:
         print(f"  - {comp}")
     print(f"\nTotal Cost: ${strategy['total_cost']:,.0f}")
+    print(f"Expected Points: {strategy['expected_points']:.1f}")
+
+    if strategy['pareto_frontier']:
+        print("\nCost vs expected points (Pareto frontier):")
+        for plan in strategy['pareto_frontier']:
+            print(f"  ${plan['total_cost']:>8,.0f}  {plan['expected_points']:>6.1f} pts  "
+                  f"({len(plan['competitions'])} events)")
 
     if strategy['recommendation']:
         rec = strategy['recommendation']
@@ -0,0 +1,178 @@
+"""
+Ranking Table Features
+Precomputed columns for the world rankings table
+
+Computed once when rankings are loaded so downstream modules read columns
+instead of re-filtering and re-sorting the table per athlete:
+- country_code: 3-letter NOC code
+- continent: continental union ('Asia', 'Europe', 'Africa', 'Pan America', 'Oceania')
+- continental_rank: rank among athletes of the same continent and weight category
+- asian_rank: continental_rank for Asian athletes (NaN otherwise)
+
+Usage:
+    from ranking_features import add_continental_ranks
+
+    rankings_df = add_continental_ranks(rankings_df)
+    rankings_df[rankings_df['country_code'] == 'KSA'][['athlete_name', 'rank', 'asian_rank']]
+"""
+
+from typing import Dict, Optional
+
+import pandas as pd
+import numpy as np
+
+try:
+    from config import CONTINENTS
+except ImportError:
+    CONTINENTS = {
+        'Asia': ['KOR', 'CHN', 'IRI', 'JPN', 'JOR', 'UZB', 'THA', 'KAZ', 'TPE', 'VIE', 'KSA', 'UAE'],
+    }
+
+
+# Common country name -> code mappings found in scraped rankings
+COUNTRY_NAME_CODES = {
+    'KOREA': 'KOR', 'SOUTH KOREA': 'KOR',
+    'IRAN': 'IRI',
+    'SAUDI ARABIA': 'KSA', 'SAUDI': 'KSA',
+    'CHINA': 'CHN',
+    'JAPAN': 'JPN',
+    'JORDAN': 'JOR',
+    'TURKEY': 'TUR', 'TURKIYE': 'TUR',
+    'GREAT BRITAIN': 'GBR', 'UK': 'GBR',
+    'FRANCE': 'FRA',
+    'MEXICO': 'MEX',
+    'UAE': 'UAE', 'UNITED ARAB EMIRATES': 'UAE',
+    'THAILAND': 'THA',
+    'UZBEKISTAN': 'UZB',
+    'KAZAKHSTAN': 'KAZ',
+    'CHINESE TAIPEI': 'TPE', 'TAIWAN': 'TPE',
+    'VIETNAM': 'VIE',
+}
+
+# Reverse lookup: country code -> continent
+CODE_TO_CONTINENT: Dict[str, str] = {
+    code: continent
+    for continent, codes in CONTINENTS.items()
+    for code in codes
+}
+
+
+def find_column(df: pd.DataFrame, *candidates: str) -> Optional[str]:
+    """Return the first candidate column present in the DataFrame."""
+    return next((c for c in candidates if c in df.columns), None)
+
+
+def country_codes(countries: pd.Series) -> pd.Series:
+    """
+    Vectorized 3-letter country code extraction.
+
+    Handles "KOR", "Korea (KOR)" and plain country names.
+    """
+    upper = countries.fillna('').astype(str).str.upper().str.strip()
+
+    codes = upper.str.extract(r'\(([A-Z]{3})\)')[0]
+    codes = codes.where(codes.notna(), upper.where(upper.str.len() == 3))
+
+    # Map the remaining unique names once rather than per row
+    missing = codes.isna() & (upper != '')
+    if missing.any():
+        unique_names = upper[missing].unique()
+        mapped = {}
+        for name in unique_names:
+            code = next((c for n, c in COUNTRY_NAME_CODES.items() if n in name), None)
+            mapped[name] = code if code else name[:3]
+        codes = codes.where(~missing, upper.map(mapped))
+
+    return codes.fillna('')
+
+
+def add_continental_ranks(rankings_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add country_code, continent, continental_rank and asian_rank columns.
+
+    Continental rank is a grouped rank over (weight category, continent)
+    ordered by world rank, so every athlete's rank is computed in one pass.
+
+    Args:
+        rankings_df: Rankings DataFrame (raw or normalized column names)
+
+    Returns:
+        The DataFrame with the continental columns added
+    """
+    if rankings_df is None or rankings_df.empty:
+        return rankings_df
+
+    df = rankings_df
+    country_col = find_column(df, 'country', 'MEMBER NATION')
+    rank_col = find_column(df, 'rank', 'RANK')
+    cat_col = find_column(df, 'weight_category', 'WEIGHT CATEGORY')
+
+    if country_col is None or rank_col is None:
+        return df
+
+    df['country_code'] = country_codes(df[country_col])
+    df['continent'] = df['country_code'].map(CODE_TO_CONTINENT)
+
+    world_rank = pd.to_numeric(df[rank_col], errors='coerce')
+    group_keys = [df['continent']]
+    if cat_col is not None:
+        group_keys.insert(0, df[cat_col].fillna(''))
+
+    df['continental_rank'] = (
+        world_rank.groupby(group_keys, dropna=True).rank(method='first')
+    )
+    df['asian_rank'] = df['continental_rank'].where(df['continent'] == 'Asia')
+
+    return df
+
+
+def continental_rank_for_world_rank(rankings_df: pd.DataFrame,
+                                    world_rank: float,
+                                    weight_category: str = None,
+                                    continent: str = 'Asia',
+                                    exclude_name: str = None) -> int:
+    """
+    Continental rank an athlete would hold at a given world rank.
+
+    Counts athletes of the continent (in the category) ranked strictly
+    ahead of the given world rank with a binary search.
+
+    Args:
+        rankings_df: Rankings with continent column (see add_continental_ranks)
+        world_rank: World rank to place
+        weight_category: Category filter (substring match, e.g. '-68kg')
+        continent: Continent to rank within
+        exclude_name: Athlete to leave out of the field (the athlete themselves)
+
+    Returns:
+        1-based continental rank, or 0 if no data
+    """
+    if rankings_df is None or rankings_df.empty or 'continent' not in rankings_df.columns:
+        return 0
+
+    field = continental_field(rankings_df, weight_category, continent, exclude_name)
+    if len(field) == 0 and weight_category:
+        return 0
+
+    return int(np.searchsorted(field, world_rank, side='left')) + 1
+
+
+def continental_field(rankings_df: pd.DataFrame,
+                      weight_category: str = None,
+                      continent: str = 'Asia',
+                      exclude_name: str = None) -> np.ndarray:
+    """Sorted world ranks of a continent's athletes in a category."""
+    rank_col = find_column(rankings_df, 'rank', 'RANK')
+    cat_col = find_column(rankings_df, 'weight_category', 'WEIGHT CATEGORY')
+    name_col = find_column(rankings_df, 'athlete_name', 'NAME')
+
+    mask = rankings_df['continent'] == continent
+    if weight_category and cat_col is not None:
+        mask &= rankings_df[cat_col].astype(str).str.contains(
+            weight_category, case=False, regex=False, na=False)
+    if exclude_name and name_col is not None:
+        mask &= ~rankings_df[name_col].astype(str).str.upper().str.contains(
+            exclude_name.upper(), regex=False, na=False)
+
+    ranks = pd.to_numeric(rankings_df.loc[mask, rank_col], errors='coerce').dropna().values
+    return np.sort(ranks)
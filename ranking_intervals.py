@@ -0,0 +1,230 @@
+"""
+Delta-Encoded Ranking History
+Change-only storage of ranking snapshots as validity intervals
+
+Most athletes' rank and points are identical from one daily snapshot to
+the next. Instead of one row per athlete per snapshot, an interval row is
+kept per run of identical values:
+
+    athlete_name, weight_category, country, rank, points, gender,
+    valid_from, valid_to
+
+valid_from is the first snapshot with those values and valid_to the first
+later snapshot where they changed or the athlete was absent (exclusive;
+None while still current). A category move closes the old (athlete,
+category) interval and opens a new one. Storage grows with actual churn
+rather than days x athletes, and any date can be reconstructed exactly.
+
+Usage:
+    from ranking_intervals import encode_intervals, apply_snapshot, intervals_at
+
+    intervals = encode_intervals(history_df)            # date + snapshot columns
+    intervals, counts = apply_snapshot(intervals, snapshot_df, '2025-11-12')
+    intervals_at(intervals, '2025-06-30')               # rankings on that date
+"""
+
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import numpy as np
+
+
+INTERVAL_KEY = ['athlete_name', 'weight_category']
+
+# Values whose change opens a new interval (gender is carried along)
+CHANGE_COLUMNS = ['country', 'rank', 'points']
+
+INTERVAL_COLUMNS = INTERVAL_KEY + ['country', 'rank', 'points', 'gender', 'valid_from', 'valid_to']
+
+SNAPSHOT_COLUMNS = ['athlete_name', 'country', 'weight_category', 'rank', 'points', 'gender']
+
+
+def _empty_intervals() -> pd.DataFrame:
+    return pd.DataFrame(columns=INTERVAL_COLUMNS)
+
+
+def _dates(values) -> pd.Series:
+    """Dates as 'YYYY-MM-DD' strings (the stored representation)."""
+    return pd.to_datetime(pd.Series(values)).dt.strftime('%Y-%m-%d')
+
+
+def _differs(a: pd.DataFrame, b: pd.DataFrame) -> np.ndarray:
+    """Row-wise CHANGE_COLUMNS inequality, treating two missing values as equal."""
+    changed = np.zeros(len(a), dtype=bool)
+    for col in CHANGE_COLUMNS:
+        x, y = a[col].values, b[col].values
+        both_missing = pd.isna(x) & pd.isna(y)
+        with np.errstate(invalid='ignore'):
+            changed |= ~both_missing & (pd.isna(x) | pd.isna(y) | (x != y))
+    return changed
+
+
+def encode_intervals(history_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Encode full snapshots as validity intervals.
+
+    Args:
+        history_df: Columns date plus SNAPSHOT_COLUMNS (gender optional),
+            one row per athlete and category per snapshot date
+
+    Returns:
+        DataFrame with INTERVAL_COLUMNS, sorted by key and valid_from
+    """
+    if history_df is None or history_df.empty:
+        return _empty_intervals()
+
+    df = history_df.reindex(columns=['date'] + SNAPSHOT_COLUMNS).copy()
+    df['date'] = _dates(df['date']).values
+    dates = np.sort(df['date'].unique())
+    df['_k'] = np.searchsorted(dates, df['date'].values)
+
+    df = (df.drop_duplicates(INTERVAL_KEY + ['_k'], keep='last')
+          .sort_values(INTERVAL_KEY + ['_k'], kind='stable')
+          .reset_index(drop=True))
+
+    prev = df.shift(1)
+    new_key = (df['athlete_name'] != prev['athlete_name']) | (df['weight_category'] != prev['weight_category'])
+    gap = df['_k'].values != prev['_k'].values + 1           # absent from the previous snapshot
+    start = new_key.values | gap | _differs(df, prev)
+
+    first = np.flatnonzero(start)
+    last = np.r_[first[1:] - 1, len(df) - 1]
+
+    # An interval ends at the snapshot after its last row (None if current)
+    end_k = df['_k'].values[last] + 1
+    valid_to = np.where(end_k < len(dates), dates[np.minimum(end_k, len(dates) - 1)], None)
+
+    intervals = df.iloc[first][INTERVAL_KEY + ['country', 'rank', 'points', 'gender']].reset_index(drop=True)
+    intervals['valid_from'] = df['date'].values[first]
+    intervals['valid_to'] = valid_to
+    return intervals[INTERVAL_COLUMNS]
+
+
+def intervals_at(intervals: pd.DataFrame, date: str) -> pd.DataFrame:
+    """
+    Reconstruct the rankings valid on a date.
+
+    Returns:
+        DataFrame with SNAPSHOT_COLUMNS, by weight category and rank
+    """
+    if intervals is None or intervals.empty:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+    date = _dates([date]).iloc[0]
+    valid = (intervals['valid_from'] <= date) & (intervals['valid_to'].isna() | (intervals['valid_to'] > date))
+    return (intervals.loc[valid, SNAPSHOT_COLUMNS]
+            .sort_values(['weight_category', 'rank'])
+            .reset_index(drop=True))
+
+
+def expand_intervals(intervals: pd.DataFrame, dates: List[str]) -> pd.DataFrame:
+    """
+    Decode intervals back to full snapshots on the given dates.
+
+    Returns:
+        DataFrame with date plus SNAPSHOT_COLUMNS
+    """
+    if intervals is None or intervals.empty or len(dates) == 0:
+        return pd.DataFrame(columns=['date'] + SNAPSHOT_COLUMNS)
+
+    dates = np.sort(_dates(dates).unique())
+    start = np.searchsorted(dates, intervals['valid_from'].values, side='left')
+    valid_to = intervals['valid_to'].fillna('9999-12-31').values.astype(str)
+    stop = np.searchsorted(dates, valid_to, side='left')
+    counts = np.maximum(stop - start, 0)
+
+    rows = np.repeat(np.arange(len(intervals)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    expanded = intervals.iloc[rows][SNAPSHOT_COLUMNS].reset_index(drop=True)
+    expanded.insert(0, 'date', dates[np.repeat(start, counts) + offsets])
+    return expanded
+
+
+def boundary_dates(intervals: pd.DataFrame) -> np.ndarray:
+    """Every date on which some interval starts or ends."""
+    if intervals is None or intervals.empty:
+        return np.array([], dtype=object)
+    return np.unique(np.r_[intervals['valid_from'].values, intervals['valid_to'].dropna().values])
+
+
+def diff_snapshot(current: pd.DataFrame, snapshot: pd.DataFrame, date: str) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
+    """
+    Compare a new snapshot with the rankings currently in force.
+
+    Args:
+        current: Open intervals (or any SNAPSHOT_COLUMNS frame) in force
+            just before the snapshot
+        snapshot: New snapshot, SNAPSHOT_COLUMNS
+        date: Snapshot date
+
+    Returns:
+        (closed, opened, counts): keys of intervals that end on date,
+        new INTERVAL_COLUMNS rows starting on date, and inserted / updated /
+        unchanged / dropped / total counts
+    """
+    date = _dates([date]).iloc[0]
+    snapshot = snapshot.reindex(columns=SNAPSHOT_COLUMNS)
+    current = current.reindex(columns=SNAPSHOT_COLUMNS)
+
+    merged = current.merge(snapshot, on=INTERVAL_KEY, how='outer', suffixes=('_old', ''), indicator=True)
+    old = merged[[f'{c}_old' for c in CHANGE_COLUMNS]].set_axis(CHANGE_COLUMNS, axis=1)
+    both = (merged['_merge'] == 'both').values
+    changed = both & _differs(old, merged)
+
+    new_only = (merged['_merge'] == 'right_only').values
+    dropped = (merged['_merge'] == 'left_only').values
+
+    closed = merged.loc[changed | dropped, INTERVAL_KEY].reset_index(drop=True)
+    opened = merged.loc[changed | new_only, SNAPSHOT_COLUMNS].reset_index(drop=True)
+    opened['rank'] = opened['rank'].astype(int)
+    opened['valid_from'] = date
+    opened['valid_to'] = None
+
+    counts = {
+        'inserted': int(new_only.sum()),
+        'updated': int(changed.sum()),
+        'unchanged': int((both & ~changed).sum()),
+        'dropped': int(dropped.sum()),
+        'total': len(snapshot),
+    }
+    return closed, opened[INTERVAL_COLUMNS], counts
+
+
+def apply_snapshot(intervals: pd.DataFrame, snapshot: pd.DataFrame, date: str) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Add a snapshot to an interval history.
+
+    Snapshots after every stored boundary are applied incrementally (close
+    changed intervals, open new ones). Earlier or repeated dates rebuild
+    the history from its boundary snapshots with this one inserted or
+    replaced. A snapshot matching the rankings already in force leaves the
+    intervals as they are.
+
+    Returns:
+        (intervals, counts) with counts relative to the rankings in force
+        on the date before the snapshot was applied
+    """
+    date = _dates([date]).iloc[0]
+    if intervals is None:
+        intervals = _empty_intervals()
+    snapshot = snapshot.reindex(columns=SNAPSHOT_COLUMNS)
+
+    boundaries = boundary_dates(intervals)
+    before = intervals_at(intervals, date)
+    closed, opened, counts = diff_snapshot(before, snapshot, date)
+
+    if not (counts['inserted'] or counts['updated'] or counts['dropped']):
+        return intervals, counts
+
+    if len(boundaries) == 0 or date > boundaries[-1]:
+        keys = pd.MultiIndex.from_frame(intervals[INTERVAL_KEY])
+        ending = intervals['valid_to'].isna().values & keys.isin(pd.MultiIndex.from_frame(closed))
+        intervals = intervals.copy()
+        intervals.loc[ending, 'valid_to'] = date
+        updated = pd.concat([intervals, opened], ignore_index=True) if len(opened) else intervals
+        return updated.sort_values(INTERVAL_KEY + ['valid_from'], ignore_index=True), counts
+
+    dates = [d for d in boundaries if d != date]
+    history = expand_intervals(intervals, dates)
+    history = pd.concat([history, snapshot.assign(date=date)], ignore_index=True)
+    return encode_intervals(history), counts
@@ -0,0 +1,440 @@
+"""
+Columnar Ranking History Store
+DuckDB over year-partitioned parquet, with as-of queries
+
+Alternative backend to the SQLite RankingHistoryTracker for long
+histories. Daily snapshots are stored columnar, one parquet file per year:
+
+    data/rankings/history_store/year=2025/rankings.parquet
+
+sorted by weight category, athlete and date, so multi-year trend queries
+over all 16 categories are a single scan of a few files. Recording a
+snapshot rewrites only its year's file and replaces any earlier copy of
+that date, so re-recording is idempotent.
+
+As-of queries return each athlete's latest snapshot on or before a date,
+so comparisons work even when no snapshot exists on the exact day.
+
+Usage:
+    from ranking_store import ParquetRankingStore
+
+    store = ParquetRankingStore()
+    store.record_current_rankings(rankings_df, date='2025-11-12')
+    store.as_of('2025-06-30', athletes=['...'])
+    store.ranks_as_of(requests_df)          # athlete_name, date per row
+    store.detect_rank_changes(days=30)
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from ranking_tracker import RankingHistoryTracker, snapshot_frame, detect_storage
+from ranking_trends import DAYS_PER_MONTH, trends_from_moments
+
+# DuckDB import (optional)
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+
+DEFAULT_STORE_PATH = 'data/rankings/history_store'
+
+HISTORY_COLUMNS = ['date', 'athlete_name', 'country', 'weight_category', 'rank', 'points', 'gender']
+
+# Typed projection applied to every row written to the store
+_TYPED_COLUMNS = '''
+    CAST(date AS DATE) AS date,
+    CAST(athlete_name AS VARCHAR) AS athlete_name,
+    CAST(country AS VARCHAR) AS country,
+    CAST(weight_category AS VARCHAR) AS weight_category,
+    CAST(rank AS INTEGER) AS rank,
+    CAST(points AS DOUBLE) AS points,
+    CAST(gender AS VARCHAR) AS gender
+'''
+
+# Row order within each year file (clusters an athlete's series together)
+SORT_ORDER = 'weight_category, athlete_name, date'
+
+SAUDI_COUNTRIES = ('KSA', 'SAUDI ARABIA', 'SAUDI')
+
+
+class ParquetRankingStore:
+    """
+    Ranking history as year-partitioned parquet, queried with DuckDB.
+
+    Exposes the RankingHistoryTracker query methods (get_athlete_history,
+    get_saudi_ranking_trends, detect_rank_changes, calculate_all_trends)
+    so either backend can serve the dashboard and agents.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH):
+        if not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb required for ParquetRankingStore. Run: pip install duckdb")
+
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # One in-memory DuckDB per store; queries are serialized across threads
+        self._conn = duckdb.connect(':memory:')
+        self._lock = threading.Lock()
+
+    # =========================================================================
+    # STORAGE
+    # =========================================================================
+
+    def _year_path(self, year: int) -> Path:
+        return self.root / f"year={int(year)}" / 'rankings.parquet'
+
+    def _files(self, start: str = None, end: str = None) -> List[Path]:
+        """Year files overlapping [start, end] (partition pruning by path)."""
+        first = int(start[:4]) if start else 0
+        last = int(end[:4]) if end else 9999
+        files = []
+        for path in sorted(self.root.glob('year=*/rankings.parquet')):
+            year = int(path.parent.name.split('=', 1)[1])
+            if first <= year <= last:
+                files.append(path)
+        return files
+
+    @staticmethod
+    def _scan(files: List[Path]) -> str:
+        paths = ', '.join("'" + str(p).replace("'", "''") + "'" for p in files)
+        return f"read_parquet([{paths}])"
+
+    def _query(self, sql: str, params: List = None, **frames: pd.DataFrame) -> pd.DataFrame:
+        """Run a query with optional DataFrames registered as tables."""
+        with self._lock:
+            for name, frame in frames.items():
+                self._conn.register(name, frame)
+            try:
+                return self._conn.execute(sql, params or []).fetchdf()
+            finally:
+                for name in frames:
+                    self._conn.unregister(name)
+
+    def record_snapshots(self, history_df: pd.DataFrame) -> int:
+        """
+        Write many snapshots at once (bulk load / backfill).
+
+        Args:
+            history_df: HISTORY_COLUMNS rows for any number of dates; each
+                date present replaces that date's stored snapshot
+
+        Returns:
+            Number of rows written
+        """
+        if history_df is None or history_df.empty:
+            return 0
+
+        incoming = history_df.reindex(columns=HISTORY_COLUMNS)
+        incoming['date'] = pd.to_datetime(incoming['date']).dt.strftime('%Y-%m-%d')
+        years = incoming['date'].str[:4].astype(int)
+
+        for year, frame in incoming.groupby(years):
+            path = self._year_path(year)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.parquet.tmp')
+
+            sources = [f"SELECT {_TYPED_COLUMNS} FROM incoming"]
+            if path.exists():
+                sources.append(
+                    f"SELECT {', '.join(HISTORY_COLUMNS)} FROM {self._scan([path])} "
+                    f"WHERE date NOT IN (SELECT DISTINCT CAST(date AS DATE) FROM incoming)"
+                )
+            tmp_sql = str(tmp).replace("'", "''")
+            self._query(
+                f"COPY (SELECT * FROM ({' UNION ALL '.join(sources)}) ORDER BY {SORT_ORDER}) "
+                f"TO '{tmp_sql}' (FORMAT PARQUET, COMPRESSION ZSTD)",
+                incoming=frame.reset_index(drop=True),
+            )
+            os.replace(tmp, path)
+
+        return len(incoming)
+
+    def record_current_rankings(self, rankings_df: pd.DataFrame, date: str = None) -> Dict:
+        """
+        Record one rankings snapshot (replaces any stored copy of the date).
+
+        Returns:
+            Dict with date, total rows written and replaced (rows of the
+            date previously stored)
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+
+        snapshot = snapshot_frame(rankings_df)
+        if snapshot is None:
+            print(f"ERROR: No ranking columns found in DataFrame")
+            return {'date': date, 'total': 0, 'replaced': 0}
+
+        files = self._files(date, date)
+        replaced = 0
+        if files:
+            replaced = int(self._query(
+                f"SELECT COUNT(*) AS n FROM {self._scan(files)} WHERE date = CAST(? AS DATE)", [date]
+            )['n'].iloc[0])
+
+        total = self.record_snapshots(snapshot.assign(date=date))
+        print(f"Stored {total} rankings for {date}" + (f" (replaced {replaced})" if replaced else ""))
+        return {'date': date, 'total': total, 'replaced': replaced}
+
+    def import_tracker(self, db_path: str = 'data/ranking_history.db') -> int:
+        """Copy the SQLite ranking history (full or delta storage) into the store."""
+        if not Path(db_path).exists():
+            return 0
+        tracker = RankingHistoryTracker(db_path, read_only=True, storage=detect_storage(db_path))
+        return self.record_snapshots(tracker.get_history()[HISTORY_COLUMNS])
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def history(self, start: str = None, end: str = None, athletes: List[str] = None,
+                country: str = None, weight_category: str = None) -> pd.DataFrame:
+        """
+        Stored rows in a date range, optionally for given athletes/country/category.
+
+        Returns:
+            DataFrame with HISTORY_COLUMNS (date as 'YYYY-MM-DD'), by date then rank
+        """
+        files = self._files(start, end)
+        if not files:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+        where, params, frames = self._filters(start, end, athletes, country, weight_category)
+        return self._query(
+            f"SELECT strftime(date, '%Y-%m-%d') AS date, athlete_name, country, weight_category, "
+            f"rank, points, gender FROM {self._scan(files)} {where} ORDER BY date, rank",
+            params, **frames
+        )
+
+    @staticmethod
+    def _filters(start=None, end=None, athletes=None, country=None, weight_category=None):
+        clauses, params, frames = [], [], {}
+        if start:
+            clauses.append('date >= CAST(? AS DATE)')
+            params.append(start)
+        if end:
+            clauses.append('date <= CAST(? AS DATE)')
+            params.append(end)
+        if athletes is not None:
+            clauses.append('athlete_name IN (SELECT athlete_name FROM wanted)')
+            frames['wanted'] = pd.DataFrame({'athlete_name': list(athletes)})
+        if country:
+            clauses.append('UPPER(country) LIKE ?')
+            params.append(f'%{country.upper()}%')
+        if weight_category:
+            clauses.append('weight_category = ?')
+            params.append(weight_category)
+        where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        return where, params, frames
+
+    def as_of(self, date: str, athletes: List[str] = None, country: str = None,
+              max_age_days: int = None) -> pd.DataFrame:
+        """
+        Each athlete's latest ranking on or before a date.
+
+        Args:
+            date: As-of date ('YYYY-MM-DD')
+            athletes: Restrict to these athletes (default: everyone)
+            country: Optional country filter
+            max_age_days: Ignore snapshots older than this (drops athletes
+                who have left the rankings)
+
+        Returns:
+            DataFrame with HISTORY_COLUMNS, one row per athlete and weight
+            category; date is the snapshot the rank comes from
+        """
+        start = None
+        if max_age_days is not None:
+            start = (pd.Timestamp(date) - pd.Timedelta(days=max_age_days)).strftime('%Y-%m-%d')
+        files = self._files(start, date)
+        if not files:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+        where, params, frames = self._filters(start, date, athletes, country)
+        return self._query(
+            f"SELECT strftime(date, '%Y-%m-%d') AS date, athlete_name, country, weight_category, "
+            f"rank, points, gender FROM {self._scan(files)} {where} "
+            f"QUALIFY row_number() OVER (PARTITION BY athlete_name, weight_category ORDER BY date DESC) = 1 "
+            f"ORDER BY weight_category, rank",
+            params, **frames
+        )
+
+    def ranks_as_of(self, requests: pd.DataFrame) -> pd.DataFrame:
+        """
+        As-of join: rank on or before each requested date.
+
+        Args:
+            requests: Columns athlete_name and date (weight_category optional,
+                to pin the category); any number of rows and dates
+
+        Returns:
+            The requests with rank, points and snapshot_date added (NaN when
+            the athlete has no snapshot on or before the date)
+        """
+        if requests is None or requests.empty:
+            return pd.DataFrame()
+        files = self._files(None, str(pd.to_datetime(requests['date']).max().date()))
+        if not files:
+            return requests.assign(rank=pd.NA, points=pd.NA, snapshot_date=None)
+
+        by_category = 'weight_category' in requests.columns
+        on = 'r.athlete_name = h.athlete_name' + (
+            ' AND r.weight_category = h.weight_category' if by_category else '')
+        keyed = requests.assign(_row=range(len(requests)),
+                                _date=pd.to_datetime(requests['date']))
+
+        joined = self._query(
+            f"SELECT r._row, h.rank, h.points, strftime(h.date, '%Y-%m-%d') AS snapshot_date "
+            f"FROM keyed r ASOF LEFT JOIN {self._scan(files)} h "
+            f"ON {on} AND CAST(r._date AS DATE) >= h.date",
+            keyed=keyed
+        ).sort_values('_row')
+
+        result = requests.reset_index(drop=True)
+        result[['rank', 'points', 'snapshot_date']] = joined[['rank', 'points', 'snapshot_date']].values
+        return result
+
+    def detect_rank_changes(self, days: int = 7, min_change: int = 5,
+                            as_of_date: str = None) -> List[Dict]:
+        """
+        Significant rank changes over the last N days (as-of, not exact dates)
+
+        Compares the athletes in the latest snapshot on or before as_of_date
+        with each one's latest rank on or before as_of_date - N days.
+
+        Returns:
+            List of change events (same keys as RankingHistoryTracker)
+        """
+        date_new = as_of_date or datetime.now().strftime('%Y-%m-%d')
+        date_old = (pd.Timestamp(date_new) - timedelta(days=days)).strftime('%Y-%m-%d')
+        files = self._files(None, date_new)
+        if not files:
+            return []
+
+        scan = self._scan(files)
+        df = self._query(f'''
+            WITH latest AS (
+                SELECT MAX(date) AS d FROM {scan} WHERE date <= CAST(? AS DATE)
+            ),
+            new_ranks AS (
+                SELECT athlete_name, weight_category, rank AS new_rank, country
+                FROM {scan} WHERE date = (SELECT d FROM latest)
+            ),
+            old_ranks AS (
+                SELECT athlete_name, weight_category, rank AS old_rank
+                FROM {scan} WHERE date <= CAST(? AS DATE)
+                QUALIFY row_number() OVER (PARTITION BY athlete_name, weight_category
+                                           ORDER BY date DESC) = 1
+            )
+            SELECT n.athlete_name, n.country, n.weight_category, o.old_rank, n.new_rank,
+                   (o.old_rank - n.new_rank) AS change
+            FROM new_ranks n
+            JOIN old_ranks o
+                ON n.athlete_name = o.athlete_name AND n.weight_category = o.weight_category
+            WHERE ABS(o.old_rank - n.new_rank) >= ?
+            ORDER BY ABS(o.old_rank - n.new_rank) DESC
+        ''', [date_new, date_old, min_change])
+        return df.to_dict('records')
+
+    def get_athlete_history(self, athlete_name: str, days: int = 180) -> pd.DataFrame:
+        """Ranking history for one athlete"""
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        df = self.history(start=cutoff, athletes=[athlete_name])
+        return df[['date', 'rank', 'points', 'weight_category']]
+
+    def get_saudi_ranking_trends(self, days: int = 365) -> pd.DataFrame:
+        """Ranking history for all Saudi athletes"""
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        df = self.history(start=cutoff)
+        df = df[df['country'].str.upper().isin(SAUDI_COUNTRIES)]
+        return df[['date', 'athlete_name', 'weight_category', 'rank', 'points']].reset_index(drop=True)
+
+    def calculate_all_trends(self, days: int = 180, country: str = None) -> pd.DataFrame:
+        """
+        Trend table for every athlete (same output as ranking_trends.fit_ranking_trends)
+
+        The per-series least-squares sums are aggregated inside DuckDB, so
+        only one row per athlete and category leaves the query.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        files = self._files(cutoff)
+        if not files:
+            return trends_from_moments(None)
+
+        where, params, frames = self._filters(start=cutoff, country=country)
+        moments = self._query(f'''
+            SELECT athlete_name, weight_category,
+                   arg_max(country, date) AS country,
+                   COUNT(*) AS n,
+                   SUM(m) AS t1, SUM(m * m) AS t2, SUM(m * m * m) AS t3, SUM(m * m * m * m) AS t4,
+                   SUM(rank) AS y0, SUM(m * rank) AS y1, SUM(m * m * rank) AS y2,
+                   COUNT(*) AS distinct_dates,      -- one row per date per series
+                   arg_min(rank, date) AS first_rank,
+                   arg_max(rank, date) AS current_rank,
+                   MAX(m) - MIN(m) AS months_tracked,
+                   CAST(MIN(date) AS TIMESTAMP) AS first_date,
+                   CAST(MAX(date) AS TIMESTAMP) AS last_date
+            FROM (
+                SELECT *, date_diff('day', CAST(? AS DATE), date) / {DAYS_PER_MONTH} AS m
+                FROM {self._scan(files)} {where}
+            )
+            GROUP BY athlete_name, weight_category
+            ORDER BY athlete_name, weight_category
+        ''', [cutoff] + params, **frames)
+        return trends_from_moments(moments)
+
+    def stats(self) -> Dict:
+        """Row, snapshot and size totals for the store."""
+        files = self._files()
+        if not files:
+            return {'rows': 0, 'snapshots': 0, 'first_date': None, 'last_date': None, 'size_mb': 0.0}
+        row = self._query(
+            f"SELECT COUNT(*) AS rows, COUNT(DISTINCT date) AS snapshots, "
+            f"strftime(MIN(date), '%Y-%m-%d') AS first_date, "
+            f"strftime(MAX(date), '%Y-%m-%d') AS last_date FROM {self._scan(files)}"
+        ).iloc[0].to_dict()
+        row['size_mb'] = round(sum(p.stat().st_size for p in files) / (1024 * 1024), 2)
+        return row
+
+
+def main():
+    """Import the SQLite history and time a multi-year trend query."""
+    import time
+
+    print("=" * 60)
+    print("COLUMNAR RANKING HISTORY STORE")
+    print("=" * 60)
+
+    store = ParquetRankingStore()
+    if store.stats()['rows'] == 0:
+        imported = store.import_tracker()
+        print(f"Imported {imported:,} rows from data/ranking_history.db")
+
+    stats = store.stats()
+    print(f"{stats['rows']:,} rows, {stats['snapshots']} snapshots "
+          f"({stats['first_date']} to {stats['last_date']}), {stats['size_mb']} MB")
+    if stats['rows'] == 0:
+        return
+
+    start = time.time()
+    trends = store.calculate_all_trends(days=3 * 365)
+    print(f"3-year trends for {len(trends):,} series in {(time.time() - start) * 1000:.0f}ms")
+
+    changes = store.detect_rank_changes(days=30, min_change=5)
+    print(f"{len(changes)} athletes moved 5+ places in 30 days")
+    for change in changes[:5]:
+        print(f"  {change['athlete_name']} ({change['weight_category']}): "
+              f"{change['old_rank']} -> {change['new_rank']} ({change['change']:+d})")
+
+
+if __name__ == "__main__":
+    main()
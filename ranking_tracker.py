@@ -5,11 +5,130 @@ Critical component for automated alerts
 """
 
 import pandas as pd
+import numpy as np
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import sqlite3
+import threading
+
+from ranking_trends import fit_ranking_trends, materialize_trends, MATERIALIZED_COLUMNS, MATERIALIZE_HISTORY_DAYS
+from ranking_features import country_codes, find_column
+from ranking_intervals import diff_snapshot, encode_intervals, expand_intervals, intervals_at, INTERVAL_COLUMNS
+
+
+# Columns written per snapshot row (besides date), with accepted source names
+SNAPSHOT_COLUMNS = {
+    'athlete_name': ('athlete_name', 'NAME'),
+    'country': ('country', 'MEMBER NATION', 'country_code'),
+    'weight_category': ('weight_category', 'WEIGHT CATEGORY'),
+    'rank': ('rank', 'RANK'),
+    'points': ('points', 'POINTS', 'TOTAL POINTS'),
+    'gender': ('gender', 'GENDER'),
+}
+
+# Per-connection tuning: statement cache size and read-oriented pragmas
+CACHED_STATEMENTS = 256
+CONNECTION_PRAGMAS = [
+    'PRAGMA mmap_size=268435456',   # 256 MB memory-mapped reads
+    'PRAGMA cache_size=-65536',     # 64 MB page cache
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',     # Wait for a concurrent writer instead of failing
+]
+WRITE_PRAGMAS = [
+    'PRAGMA synchronous=NORMAL',    # Safe with WAL, one fsync per checkpoint
+]
+
+# One connection per (thread, database, mode); sqlite3 connections must not
+# cross threads, so each Streamlit session thread gets its own
+_LOCAL = threading.local()
+
+# Databases whose schema has been created in this process
+_INITIALIZED = set()
+_INIT_LOCK = threading.Lock()
+
+# 'full': one row per athlete per snapshot; 'delta': validity intervals,
+# a row only when rank/points/category change (see ranking_intervals)
+STORAGE_MODES = ('full', 'delta')
+
+INSERT_INTERVAL_SQL = f'''
+    INSERT INTO ranking_intervals ({', '.join(INTERVAL_COLUMNS)})
+    VALUES ({', '.join('?' * len(INTERVAL_COLUMNS))})
+'''
+
+# Upsert keyed on the snapshot identity; unchanged rows are not rewritten
+UPSERT_SQL = '''
+    INSERT INTO ranking_history
+        (date, athlete_name, country, weight_category, rank, points, gender, source_file)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(date, athlete_name, weight_category) DO UPDATE SET
+        country = excluded.country,
+        rank = excluded.rank,
+        points = excluded.points,
+        gender = COALESCE(excluded.gender, gender),
+        source_file = COALESCE(excluded.source_file, source_file)
+    WHERE rank IS NOT excluded.rank
+        OR points IS NOT excluded.points
+        OR country IS NOT excluded.country
+'''
+
+
+# Materialized per-athlete trends, replaced wholesale on each refresh
+TREND_TABLE_COLUMNS = MATERIALIZED_COLUMNS + ['refreshed_at']
+
+INSERT_TREND_SQL = f'''
+    INSERT INTO ranking_trends ({', '.join(TREND_TABLE_COLUMNS)})
+    VALUES ({', '.join('?' * len(TREND_TABLE_COLUMNS))})
+'''
+
+
+def snapshot_frame(rankings_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Normalize a rankings snapshot to the history schema
+
+    Returns:
+        DataFrame with the SNAPSHOT_COLUMNS (one row per athlete and weight
+        category, ranked rows only), or None without name/rank columns
+    """
+    columns = {col: find_column(rankings_df, *names) for col, names in SNAPSHOT_COLUMNS.items()}
+    if not columns['athlete_name'] or not columns['rank']:
+        return None
+
+    snapshot = pd.DataFrame({
+        col: rankings_df[src].values if src else None
+        for col, src in columns.items()
+    })
+    snapshot['athlete_name'] = snapshot['athlete_name'].astype(str).str.strip()
+    snapshot['country'] = snapshot['country'].fillna('').astype(str)
+    snapshot['weight_category'] = snapshot['weight_category'].fillna('').astype(str)
+    snapshot['rank'] = pd.to_numeric(snapshot['rank'], errors='coerce')
+    snapshot['points'] = pd.to_numeric(snapshot['points'], errors='coerce')
+    snapshot = (snapshot.dropna(subset=['rank'])
+                .drop_duplicates(['athlete_name', 'weight_category'], keep='last'))
+    snapshot['rank'] = snapshot['rank'].astype(int)
+    return snapshot.reset_index(drop=True)
+
+
+def detect_storage(db_path: str) -> str:
+    """
+    Storage mode a history database was written in
+
+    Returns:
+        'delta' when it holds intervals but no full snapshot rows, else 'full'
+    """
+    path = Path(db_path)
+    if not path.exists():
+        return 'full'
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        has_full = conn.execute('SELECT 1 FROM ranking_history LIMIT 1').fetchone() is not None
+        has_delta = conn.execute('SELECT 1 FROM ranking_intervals LIMIT 1').fetchone() is not None
+    except sqlite3.Error:
+        return 'full'
+    finally:
+        conn.close()
+    return 'delta' if has_delta and not has_full else 'full'
 
 
 class RankingHistoryTracker:
@@ -18,14 +137,91 @@ class RankingHistoryTracker:
     Enables trend analysis, change detection, and forecasting
     """
 
-    def __init__(self, db_path: str = "data/ranking_history.db"):
+    def __init__(self, db_path: str = "data/ranking_history.db", read_only: bool = False,
+                 storage: str = 'full'):
+        """
+        Args:
+            db_path: SQLite database path
+            read_only: Open connections in read-only mode (dashboard use);
+                writes raise sqlite3.OperationalError
+            storage: 'full' snapshots or change-only 'delta' intervals; queries
+                behave the same in both modes
+        """
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"storage must be one of {STORAGE_MODES}, got {storage!r}")
+
         self.db_path = Path(db_path)
+        self.read_only = read_only
+        self.storage = storage
+
+        # Row source for queries and the table listing snapshot dates
+        self._history = 'ranking_history' if storage == 'full' else 'ranking_history_delta'
+        self._snapshot_dates = 'ranking_history' if storage == 'full' else 'ranking_snapshots'
+        # Read-only trackers never create or migrate the database
+        if read_only:
+            return
+
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._init_database()
+
+        with _INIT_LOCK:
+            key = str(self.db_path.resolve())
+            if key not in _INITIALIZED or not self.db_path.exists():
+                self._init_database()
+                _INITIALIZED.add(key)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        This thread's pooled connection to the database
+
+        Connections persist for the life of the thread and are shared by all
+        trackers on the same database and mode, so back-to-back queries reuse
+        one connection and its prepared statement cache.
+        """
+        if self.read_only and not self.db_path.exists():
+            # No database yet: an empty in-memory schema, so queries return
+            # no rows (not pooled; the file may appear later)
+            conn = sqlite3.connect(':memory:')
+            self._create_schema(conn)
+            return conn
+
+        pool = getattr(_LOCAL, 'connections', None)
+        if pool is None:
+            pool = _LOCAL.connections = {}
+
+        key = (str(self.db_path.resolve()), self.read_only)
+        conn = pool.get(key)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                       cached_statements=CACHED_STATEMENTS)
+            else:
+                conn = sqlite3.connect(self.db_path, cached_statements=CACHED_STATEMENTS)
+            for pragma in CONNECTION_PRAGMAS + ([] if self.read_only else WRITE_PRAGMAS):
+                conn.execute(pragma)
+            pool[key] = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection to the database (reopened on next use)"""
+        pool = getattr(_LOCAL, 'connections', {})
+        conn = pool.pop((str(self.db_path.resolve()), self.read_only), None)
+        if conn is not None:
+            conn.close()
 
     def _init_database(self):
         """Initialize SQLite database for ranking history"""
         conn = sqlite3.connect(self.db_path)
+
+        # WAL: readers (dashboard) are not blocked by the daily write
+        conn.execute('PRAGMA journal_mode=WAL')
+
+        self._create_schema(conn)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        """Create the history tables, indices and views (idempotent)"""
         cursor = conn.cursor()
 
         # Create ranking history table
@@ -61,73 +257,376 @@ class RankingHistoryTracker:
             ON ranking_history(weight_category, date)
         ''')
 
-        conn.commit()
-        conn.close()
+        # Change-only storage: one row per run of unchanged values
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ranking_intervals (
+                athlete_name TEXT NOT NULL,
+                weight_category TEXT NOT NULL,
+                country TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                points REAL,
+                gender TEXT,
+                valid_from TEXT NOT NULL,
+                valid_to TEXT,
+                PRIMARY KEY (athlete_name, weight_category, valid_from)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_interval_validity
+            ON ranking_intervals(valid_from, valid_to)
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ranking_snapshots (
+                date TEXT PRIMARY KEY,
+                rows INTEGER,
+                source_file TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Per-athlete trends, refreshed after each snapshot (refresh_trend_table).
+        # Materialized, so a table from an older layout is dropped and rebuilt
+        trend_columns = {row[1] for row in cursor.execute('PRAGMA table_info(ranking_trends)')}
+        if trend_columns and 'country_code' not in trend_columns:
+            cursor.execute('DROP TABLE ranking_trends')
 
-    def record_current_rankings(self, rankings_df: pd.DataFrame, date: str = None):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ranking_trends (
+                athlete_name TEXT NOT NULL,
+                weight_category TEXT NOT NULL,
+                country TEXT,
+                country_code TEXT,
+                current_rank INTEGER,
+                current_points REAL,
+                rank_delta_7d REAL,
+                rank_delta_30d REAL,
+                rank_delta_90d REAL,
+                rank_delta_180d REAL,
+                rank_delta_365d REAL,
+                best_rank INTEGER,
+                worst_rank INTEGER,
+                volatility REAL,
+                change INTEGER,
+                velocity REAL,
+                acceleration REAL,
+                trend TEXT,
+                trend_score INTEGER,
+                data_points INTEGER,
+                first_date TEXT,
+                last_date TEXT,
+                history TEXT,
+                refreshed_at TEXT,
+                PRIMARY KEY (athlete_name, weight_category)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_trends_country_code
+            ON ranking_trends(country_code)
+        ''')
+
+        # Intervals expanded to one row per athlete per snapshot date
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS ranking_history_delta AS
+            SELECT s.date, i.athlete_name, i.country, i.weight_category,
+                   i.rank, i.points, i.gender
+            FROM ranking_snapshots s
+            JOIN ranking_intervals i
+                ON i.valid_from <= s.date
+                AND (i.valid_to IS NULL OR s.date < i.valid_to)
+        ''')
+
+    def record_current_rankings(self, rankings_df: pd.DataFrame, date: str = None,
+                                source_file: str = None) -> Dict:
         """
-        Record current rankings snapshot
+        Record current rankings snapshot (idempotent bulk upsert)
+
+        Rows are keyed on (date, athlete_name, weight_category): new rows are
+        inserted, changed rows updated in place and identical rows left alone,
+        all in a single transaction. Re-recording a snapshot is a no-op.
 
         Args:
             rankings_df: DataFrame with current rankings
             date: Date of snapshot (default: today)
+            source_file: Optional file the snapshot was read from
+
+        Returns:
+            Dict with date and inserted, updated, unchanged and total row counts
         """
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
 
-        conn = sqlite3.connect(self.db_path)
+        counts = {'date': date, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'total': 0}
 
-        # Prepare data
-        rankings_df = rankings_df.copy()
-        rankings_df['date'] = date
-
-        # Required columns mapping
-        column_mapping = {
-            'athlete_name': 'athlete_name',
-            'country': 'country',
-            'weight_category': 'weight_category',
-            'rank': 'rank',
-            'points': 'points',
-        }
+        snapshot = snapshot_frame(rankings_df)
+        if snapshot is None:
+            print(f"ERROR: No ranking columns found in DataFrame")
+            return counts
+
+        if self.storage == 'delta':
+            counts = self._record_delta(snapshot, date, source_file)
+            print(f"Recorded {counts['total']} rankings for {date}: {counts['inserted']} new, "
+                  f"{counts['updated']} updated, {counts['unchanged']} unchanged, "
+                  f"{counts['dropped']} dropped")
+            return counts
+
+        conn = self._connection()
+        with conn:
+            # Write lock up front so the diff and the upsert see the same rows
+            conn.execute('BEGIN IMMEDIATE')
+            existing = pd.read_sql_query(
+                'SELECT athlete_name, weight_category, country, rank AS old_rank, '
+                'points AS old_points FROM ranking_history WHERE date = ?',
+                conn, params=(date,)
+            )
+            merged = snapshot.merge(existing, on=['athlete_name', 'weight_category'], how='left')
+            is_new = merged['old_rank'].isna()
+            same = (~is_new
+                    & (merged['rank'] == merged['old_rank'])
+                    & ((merged['points'] == merged['old_points'])
+                       | (merged['points'].isna() & merged['old_points'].isna()))
+                    & (merged['country_x'] == merged['country_y']))
+
+            rows = zip(
+                [date] * len(snapshot),
+                snapshot['athlete_name'],
+                snapshot['country'],
+                snapshot['weight_category'],
+                snapshot['rank'].tolist(),
+                snapshot['points'].astype(object).where(snapshot['points'].notna(), None),
+                snapshot['gender'].astype(object).where(snapshot['gender'].notna(), None),
+                [source_file] * len(snapshot),
+            )
+            conn.executemany(UPSERT_SQL, rows)
+
+        counts.update({
+            'inserted': int(is_new.sum()),
+            'updated': int((~is_new & ~same).sum()),
+            'unchanged': int(same.sum()),
+            'total': len(snapshot),
+        })
+        print(f"Recorded {counts['total']} rankings for {date}: {counts['inserted']} new, "
+              f"{counts['updated']} updated, {counts['unchanged']} unchanged")
+        return counts
+
+    def record_snapshots(self, history_df: pd.DataFrame, source_files: Dict[str, str] = None) -> Dict:
+        """
+        Record many snapshots at once (bulk load / backfill)
 
-        # Select and rename columns
-        required_cols = list(column_mapping.keys())
-        available_cols = [col for col in required_cols if col in rankings_df.columns]
+        Full storage upserts every row in one transaction. Delta storage
+        applies dates after the stored history one by one (incremental) and
+        otherwise re-encodes the intervals once for the whole batch.
 
-        if not available_cols:
-            print(f"ERROR: No ranking columns found in DataFrame")
-            conn.close()
-            return
+        Args:
+            history_df: date plus snapshot_frame columns, any number of dates
+            source_files: Optional file each date was read from, by date
 
-        # Insert records (ignore duplicates)
-        try:
-            rankings_df[available_cols + ['date']].to_sql(
-                'ranking_history',
-                conn,
-                if_exists='append',
-                index=False
+        Returns:
+            Dict with snapshots and rows recorded
+        """
+        if history_df is None or history_df.empty:
+            return {'snapshots': 0, 'rows': 0}
+
+        source_files = source_files or {}
+        history = history_df.reindex(columns=['date'] + list(SNAPSHOT_COLUMNS))
+        history['date'] = pd.to_datetime(history['date']).dt.strftime('%Y-%m-%d')
+        history = history.drop_duplicates(['date', 'athlete_name', 'weight_category'], keep='last')
+        dates = sorted(history['date'].unique())
+        conn = self._connection()
+
+        if self.storage == 'full':
+            rows = zip(
+                history['date'],
+                history['athlete_name'],
+                history['country'],
+                history['weight_category'],
+                history['rank'].map(int),
+                history['points'].astype(object).where(history['points'].notna(), None),
+                history['gender'].astype(object).where(history['gender'].notna(), None),
+                [source_files.get(d) for d in history['date']],
             )
-            print(f"Recorded {len(rankings_df)} rankings for {date}")
-        except sqlite3.IntegrityError as e:
-            print(f"Some rankings already exist for {date} - skipping duplicates")
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(UPSERT_SQL, rows)
+            return {'snapshots': len(dates), 'rows': len(history)}
+
+        last = conn.execute('SELECT MAX(date) FROM ranking_snapshots').fetchone()[0]
+        if last is None or dates[0] > last:
+            for date, snapshot in history.groupby('date', sort=True):
+                self._record_delta(snapshot.drop(columns='date'), date, source_files.get(date))
+            return {'snapshots': len(dates), 'rows': len(history)}
+
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            intervals = pd.read_sql_query(
+                f"SELECT {', '.join(INTERVAL_COLUMNS)} FROM ranking_intervals", conn)
+            incoming = set(dates)
+            stored = [d for (d,) in conn.execute('SELECT date FROM ranking_snapshots') if d not in incoming]
+            combined = pd.concat([expand_intervals(intervals, stored), history], ignore_index=True)
+
+            conn.execute('DELETE FROM ranking_intervals')
+            conn.executemany(INSERT_INTERVAL_SQL, self._interval_rows(encode_intervals(combined)))
+            conn.executemany(
+                'INSERT OR REPLACE INTO ranking_snapshots (date, rows, source_file) VALUES (?, ?, ?)',
+                ((date, int(rows), source_files.get(date))
+                 for date, rows in history.groupby('date').size().items())
+            )
+        return {'snapshots': len(dates), 'rows': len(history)}
 
-        conn.close()
+    def _record_delta(self, snapshot: pd.DataFrame, date: str, source_file: str = None) -> Dict:
+        """
+        Record a snapshot as interval changes (delta storage)
+
+        A snapshot newer than every stored one closes the intervals that
+        changed or disappeared and opens new ones. An earlier or repeated
+        date re-encodes the intervals from the stored snapshots, unless it
+        matches the rankings already in force on that date.
+
+        Returns:
+            Dict with date and inserted, updated, unchanged, dropped and
+            total counts relative to the rankings in force before the date
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            last = conn.execute('SELECT MAX(date) FROM ranking_snapshots').fetchone()[0]
+
+            if last is None or date > last:
+                current = pd.read_sql_query(
+                    'SELECT athlete_name, country, weight_category, rank, points, gender '
+                    'FROM ranking_intervals WHERE valid_to IS NULL', conn)
+                closed, opened, counts = diff_snapshot(current, snapshot, date)
+                conn.executemany(
+                    'UPDATE ranking_intervals SET valid_to = ? '
+                    'WHERE athlete_name = ? AND weight_category = ? AND valid_to IS NULL',
+                    ((date, name, category) for name, category in closed.itertuples(index=False))
+                )
+            else:
+                intervals = pd.read_sql_query(
+                    f"SELECT {', '.join(INTERVAL_COLUMNS)} FROM ranking_intervals", conn)
+                counts = diff_snapshot(intervals_at(intervals, date), snapshot, date)[2]
+
+                if counts['inserted'] or counts['updated'] or counts['dropped']:
+                    dates = [d for (d,) in conn.execute('SELECT date FROM ranking_snapshots') if d != date]
+                    history = pd.concat([expand_intervals(intervals, dates), snapshot.assign(date=date)],
+                                        ignore_index=True)
+                    opened = encode_intervals(history)
+                    conn.execute('DELETE FROM ranking_intervals')
+                else:
+                    # Same rankings as already in force: the intervals stand
+                    opened = intervals.iloc[:0]
+
+            conn.executemany(INSERT_INTERVAL_SQL, self._interval_rows(opened))
+            conn.execute(
+                'INSERT OR REPLACE INTO ranking_snapshots (date, rows, source_file) VALUES (?, ?, ?)',
+                (date, len(snapshot), source_file)
+            )
+
+        counts['date'] = date
+        return counts
+
+    @staticmethod
+    def _interval_rows(intervals: pd.DataFrame):
+        """Interval rows as SQLite parameters (missing values as NULL)."""
+        frame = intervals[INTERVAL_COLUMNS].astype(object)
+        frame = frame.where(frame.notna(), None)
+        frame['rank'] = frame['rank'].map(int)
+        return frame.itertuples(index=False, name=None)
+
+    def get_snapshot(self, date: str = None) -> pd.DataFrame:
+        """
+        Rankings as they stood on a date (latest snapshot on or before it)
+
+        Args:
+            date: Date to reconstruct (default: today)
+
+        Returns:
+            DataFrame with athlete_name, country, weight_category, rank,
+            points and gender, by weight category and rank
+        """
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        conn = self._connection()
+
+        if self.storage == 'delta':
+            query = '''
+                SELECT athlete_name, country, weight_category, rank, points, gender
+                FROM ranking_intervals
+                WHERE valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+                ORDER BY weight_category, rank
+            '''
+            params = (date, date)
+        else:
+            query = '''
+                SELECT athlete_name, country, weight_category, rank, points, gender
+                FROM ranking_history
+                WHERE date = (SELECT MAX(date) FROM ranking_history WHERE date <= ?)
+                ORDER BY weight_category, rank
+            '''
+            params = (date,)
+
+        return pd.read_sql_query(query, conn, params=params)
+
+    def convert_to_delta(self) -> Dict:
+        """
+        Encode the full snapshot table into delta storage
+
+        Replaces the interval and snapshot tables from ranking_history; the
+        full table is left in place (drop it once the delta mode is in use).
+
+        Returns:
+            Dict with full_rows, interval_rows and snapshots
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            history = pd.read_sql_query(
+                'SELECT date, athlete_name, country, weight_category, rank, points, gender, source_file '
+                'FROM ranking_history', conn)
+            intervals = encode_intervals(history)
+
+            conn.execute('DELETE FROM ranking_intervals')
+            conn.execute('DELETE FROM ranking_snapshots')
+            conn.executemany(INSERT_INTERVAL_SQL, self._interval_rows(intervals))
+
+            per_date = history.groupby('date').agg(rows=('athlete_name', 'size'),
+                                                   source_file=('source_file', 'first'))
+            conn.executemany(
+                'INSERT INTO ranking_snapshots (date, rows, source_file) VALUES (?, ?, ?)',
+                ((d, int(r.rows), r.source_file if pd.notna(r.source_file) else None)
+                 for d, r in per_date.iterrows())
+            )
+
+        result = {'full_rows': len(history), 'interval_rows': len(intervals), 'snapshots': len(per_date)}
+        print(f"Encoded {result['full_rows']:,} rows from {result['snapshots']} snapshots "
+              f"as {result['interval_rows']:,} intervals")
+        return result
+
+    def storage_stats(self) -> Dict:
+        """Row counts of the full and delta storage tables"""
+        conn = self._connection()
+        return {
+            'storage': self.storage,
+            'full_rows': conn.execute('SELECT COUNT(*) FROM ranking_history').fetchone()[0],
+            'interval_rows': conn.execute('SELECT COUNT(*) FROM ranking_intervals').fetchone()[0],
+            'snapshots': conn.execute(f'SELECT COUNT(DISTINCT date) FROM {self._snapshot_dates}').fetchone()[0],
+        }
 
     def get_athlete_history(self, athlete_name: str, days: int = 180) -> pd.DataFrame:
         """Get ranking history for specific athlete"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
 
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
 
-        query = '''
+        query = f'''
             SELECT date, rank, points, weight_category
-            FROM ranking_history
+            FROM {self._history}
             WHERE athlete_name = ? AND date >= ?
             ORDER BY date ASC
         '''
 
         df = pd.read_sql_query(query, conn, params=(athlete_name, cutoff_date))
-        conn.close()
 
         return df
 
@@ -142,71 +641,88 @@ class RankingHistoryTracker:
         Returns:
             List of change events
         """
-        conn = sqlite3.connect(self.db_path)
-
-        # Get rankings from N days ago and latest
+        # Compare the rankings in force N days ago and today; each side is
+        # one indexed snapshot lookup in either storage mode
         date_old = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
         date_new = datetime.now().strftime('%Y-%m-%d')
 
-        query = '''
-            WITH old_ranks AS (
-                SELECT athlete_name, weight_category, rank as old_rank
-                FROM ranking_history
-                WHERE date = ?
-            ),
-            new_ranks AS (
-                SELECT athlete_name, weight_category, rank as new_rank, country
-                FROM ranking_history
-                WHERE date = ?
-            )
-            SELECT
-                n.athlete_name,
-                n.country,
-                n.weight_category,
-                o.old_rank,
-                n.new_rank,
-                (o.old_rank - n.new_rank) as change
-            FROM new_ranks n
-            LEFT JOIN old_ranks o
-                ON n.athlete_name = o.athlete_name
-                AND n.weight_category = o.weight_category
-            WHERE ABS(o.old_rank - n.new_rank) >= ?
-            ORDER BY ABS(o.old_rank - n.new_rank) DESC
-        '''
+        old_ranks = self.get_snapshot(date_old)[['athlete_name', 'weight_category', 'rank']]
+        new_ranks = self.get_snapshot(date_new)[['athlete_name', 'country', 'weight_category', 'rank']]
 
-        df = pd.read_sql_query(query, conn, params=(date_old, date_new, min_change))
-        conn.close()
+        df = new_ranks.merge(old_ranks, on=['athlete_name', 'weight_category'], suffixes=('', '_old'))
+        df = df.rename(columns={'rank': 'new_rank', 'rank_old': 'old_rank'})
+        df['change'] = df['old_rank'] - df['new_rank']
+        df = df[df['change'].abs() >= min_change]
+        df = df.iloc[np.argsort(-df['change'].abs().values, kind='stable')]
 
         # Convert to list of dicts
-        changes = df.to_dict('records')
+        changes = df[['athlete_name', 'country', 'weight_category',
+                      'old_rank', 'new_rank', 'change']].to_dict('records')
 
         return changes
 
+    def _history_since(self, cutoff_date: str, where: str = '', params: tuple = ()) -> pd.DataFrame:
+        """
+        Snapshot rows dated on or after cutoff_date
+
+        Delta storage reads only the intervals overlapping the window and
+        expands them in memory, instead of joining every interval against
+        every snapshot date in SQL.
+
+        Args:
+            cutoff_date: First date included
+            where: Extra SQL condition on the row columns (e.g. country)
+            params: Parameters for the condition
+
+        Returns:
+            DataFrame with date plus the snapshot columns
+        """
+        conn = self._connection()
+        condition = f' AND ({where})' if where else ''
+
+        if self.storage == 'full':
+            query = f'''
+                SELECT date, athlete_name, country, weight_category, rank, points, gender
+                FROM ranking_history
+                WHERE date >= ?{condition}
+            '''
+            return pd.read_sql_query(query, conn, params=(cutoff_date, *params))
+
+        intervals = pd.read_sql_query(f'''
+            SELECT {', '.join(INTERVAL_COLUMNS)}
+            FROM ranking_intervals
+            WHERE (valid_to IS NULL OR valid_to > ?){condition}
+        ''', conn, params=(cutoff_date, *params))
+        dates = [d for (d,) in conn.execute('SELECT date FROM ranking_snapshots WHERE date >= ?',
+                                            (cutoff_date,))]
+        return expand_intervals(intervals, dates)
+
+    def get_history(self, start: str = None) -> pd.DataFrame:
+        """
+        Every stored snapshot row (from a date onwards), in either storage mode
+
+        Returns:
+            DataFrame with date, athlete_name, country, weight_category,
+            rank, points and gender
+        """
+        return self._history_since(start or '0000-01-01')
+
     def get_saudi_ranking_trends(self, days: int = 365) -> pd.DataFrame:
         """Get ranking trends for all Saudi athletes"""
-        conn = sqlite3.connect(self.db_path)
-
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
 
-        query = '''
-            SELECT date, athlete_name, weight_category, rank, points
-            FROM ranking_history
-            WHERE country IN ('KSA', 'SAUDI ARABIA', 'SAUDI')
-                AND date >= ?
-            ORDER BY date ASC, rank ASC
-        '''
+        df = self._history_since(cutoff_date, "country IN ('KSA', 'SAUDI ARABIA', 'SAUDI')")
+        df = df.sort_values(['date', 'rank'], kind='stable').reset_index(drop=True)
 
-        df = pd.read_sql_query(query, conn, params=(cutoff_date,))
-        conn.close()
-
-        return df
+        return df[['date', 'athlete_name', 'weight_category', 'rank', 'points']]
 
     def calculate_trend(self, athlete_name: str, days: int = 180) -> Dict:
         """
         Calculate ranking trend for athlete
 
         Returns:
-            Dict with trend analysis (improving/stable/declining)
+            Dict with trend analysis (improving/stable/declining), plus the
+            least-squares velocity and acceleration
         """
         history = self.get_athlete_history(athlete_name, days)
 
@@ -218,10 +734,9 @@ class RankingHistoryTracker:
                 'change': 0
             }
 
-        # Calculate trend
-        recent_rank = history.iloc[-1]['rank']
-        old_rank = history.iloc[0]['rank']
-        change = old_rank - recent_rank  # Positive = improvement
+        fit = fit_ranking_trends(history.assign(athlete_name=athlete_name),
+                                 group_cols=['athlete_name']).iloc[0]
+        change = int(fit['change'])  # Positive = improvement
 
         # Categorize
         if change >= 5:
@@ -234,27 +749,106 @@ class RankingHistoryTracker:
         return {
             'athlete': athlete_name,
             'trend': trend,
-            'change': int(change),
-            'current_rank': int(recent_rank),
+            'change': change,
+            'current_rank': int(fit['current_rank']),
+            'velocity': float(fit['velocity']),
+            'acceleration': float(fit['acceleration']),
             'data_points': len(history),
             'days_tracked': days
         }
 
+    def calculate_all_trends(self, days: int = 180, country: str = None) -> pd.DataFrame:
+        """
+        Trend table for every athlete from one history query
+
+        Args:
+            days: Look back period
+            country: Optional country filter (code or name, matched on the
+                normalized country code)
+
+        Returns:
+            DataFrame from ranking_trends.fit_ranking_trends, one row per
+            athlete and weight category
+        """
+        cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+        df = self._history_since(cutoff_date)
+        if country and not df.empty:
+            code = country_codes(pd.Series([country])).iloc[0]
+            df = df[country_codes(df['country']).values == code]
+
+        return fit_ranking_trends(df)
+
+    def refresh_trend_table(self, as_of: str = None) -> int:
+        """
+        Rebuild the materialized trend table from the ranking history
+
+        One history read and one transaction; readers see either the old or
+        the new table.
+
+        Args:
+            as_of: Reference date (default: the latest snapshot)
+
+        Returns:
+            Number of athlete/category rows written
+        """
+        conn = self._connection()
+        if as_of is None:
+            # Anchor on the latest snapshot, as materialize_trends does
+            as_of = conn.execute(f'SELECT MAX(date) FROM {self._snapshot_dates}').fetchone()[0]
+        reference = pd.Timestamp(as_of) if as_of else pd.Timestamp(datetime.now().date())
+        cutoff_date = (reference - timedelta(days=MATERIALIZE_HISTORY_DAYS)).strftime('%Y-%m-%d')
+
+        table = materialize_trends(self._history_since(cutoff_date), as_of)
+        table['refreshed_at'] = datetime.now().isoformat(timespec='seconds')
+        rows = table[TREND_TABLE_COLUMNS].astype(object).where(table[TREND_TABLE_COLUMNS].notna(), None)
+
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM ranking_trends')
+            conn.executemany(INSERT_TREND_SQL, rows.itertuples(index=False, name=None))
+
+        print(f"Trend table refreshed: {len(table)} athlete series")
+        return len(table)
+
+    def get_trend_table(self, country: str = None) -> pd.DataFrame:
+        """
+        Materialized trend table (see refresh_trend_table)
+
+        Args:
+            country: Optional country filter (code or name, e.g. 'KSA' or
+                'Saudi Arabia'; matched on the normalized country code)
+
+        Returns:
+            DataFrame with TREND_TABLE_COLUMNS; empty until the first refresh
+        """
+        conn = self._connection()
+        query = f'SELECT {", ".join(TREND_TABLE_COLUMNS)} FROM ranking_trends'
+        params = ()
+        if country:
+            query += ' WHERE country_code = ?'
+            params = (country_codes(pd.Series([country])).iloc[0],)
+
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        except (sqlite3.OperationalError, pd.errors.DatabaseError):
+            # Database created before the trend table existed
+            return pd.DataFrame(columns=TREND_TABLE_COLUMNS)
+
     def export_history_csv(self, output_file: str, days: int = 365):
         """Export ranking history to CSV"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
 
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
 
-        query = '''
+        query = f'''
             SELECT *
-            FROM ranking_history
+            FROM {self._history}
             WHERE date >= ?
             ORDER BY date DESC, rank ASC
         '''
 
         df = pd.read_sql_query(query, conn, params=(cutoff_date,))
-        conn.close()
 
         df.to_csv(output_file, index=False)
         print(f"Exported {len(df)} records to {output_file}")
@@ -279,6 +873,8 @@ def main():
         except Exception as e:
             print(f"Could not load rankings: {e}")
 
+    tracker.refresh_trend_table()
+
     # Example: Detect changes
     print("\nDetecting rank changes...")
     changes = tracker.detect_rank_changes(days=7, min_change=5)
@@ -0,0 +1,354 @@
+"""
+Ranking Trend Engine
+Least-squares ranking trends for every athlete in one pass
+
+For each (athlete, weight category) series in the ranking history, fits
+    rank = a + b*t + c*t^2        (t in months, centred per series)
+by ordinary least squares. Per-series sums of t^k and t^k * rank are
+built with grouped reductions and all the 3x3 normal equations are
+solved together, so the whole history costs a handful of array
+operations instead of one query and fit per athlete.
+
+Output per series:
+- velocity: ranks gained per month (positive = improving), -b
+- acceleration: change in velocity per month, -2c (0 with < 3 snapshots)
+- trend / trend_score: velocity bands (as in AdvancedKPIAnalyzer)
+- change: first minus latest rank, current_rank, data_points, months_tracked
+
+materialize_trends builds the per-athlete table that sync refreshes after
+each snapshot: current rank, rank deltas over DELTA_WINDOWS, best/worst
+rank, volatility, the fitted trend and the rank history as intervals.
+
+Usage:
+    from ranking_trends import fit_ranking_trends, materialize_trends
+
+    trends = fit_ranking_trends(history_df)   # date, athlete_name, weight_category, rank
+    table = materialize_trends(history_df)    # one row per athlete and category
+"""
+
+import json
+from typing import List
+
+import pandas as pd
+import numpy as np
+
+from ranking_features import country_codes
+from ranking_intervals import encode_intervals, INTERVAL_COLUMNS
+
+
+# Average month length used for time in months
+DAYS_PER_MONTH = 30.4375
+
+# (min velocity, trend, trend score), highest first
+VELOCITY_BANDS = [
+    (2.0, 'rapidly_improving', 90),
+    (0.5, 'improving', 70),
+    (-0.5, 'stable', 50),
+    (-2.0, 'declining', 30),
+    (-np.inf, 'rapidly_declining', 10),
+]
+
+TREND_COLUMNS = ['athlete_name', 'weight_category', 'country', 'current_rank', 'first_rank',
+                 'change', 'velocity', 'acceleration', 'trend', 'trend_score',
+                 'data_points', 'months_tracked', 'first_date', 'last_date']
+
+# Look-back windows (days) of the materialized rank deltas
+DELTA_WINDOWS = [7, 30, 90, 180, 365]
+
+# Days behind best/worst rank, volatility and the stored history
+SUMMARY_WINDOW_DAYS = 365
+
+# Days behind the fitted trend (as the dashboard's 6-month view)
+FIT_WINDOW_DAYS = 180
+
+# History read for materialization: the rank in force at the start of the
+# longest delta window may come from a snapshot up to a month earlier
+MATERIALIZE_HISTORY_DAYS = max(DELTA_WINDOWS) + 31
+
+MATERIALIZED_COLUMNS = (
+    ['athlete_name', 'weight_category', 'country', 'country_code', 'current_rank', 'current_points']
+    + [f'rank_delta_{days}d' for days in DELTA_WINDOWS]
+    + ['best_rank', 'worst_rank', 'volatility', 'change', 'velocity', 'acceleration',
+       'trend', 'trend_score', 'data_points', 'first_date', 'last_date', 'history']
+)
+
+
+def classify_velocity(velocity) -> tuple:
+    """Trend labels and scores for an array of velocities (ranks/month)."""
+    velocity = np.asarray(velocity, dtype=float)
+    bounds = np.array([b for b, _, _ in VELOCITY_BANDS])
+    labels = np.array([t for _, t, _ in VELOCITY_BANDS])
+    scores = np.array([s for _, _, s in VELOCITY_BANDS])
+    band = np.argmax(velocity[:, None] > bounds[None, :], axis=1)
+    return labels[band], scores[band]
+
+
+def fit_ranking_trends(history_df: pd.DataFrame, group_cols: List[str] = None) -> pd.DataFrame:
+    """
+    Fit trend lines for every series in a ranking history.
+
+    Args:
+        history_df: Columns date, rank, athlete_name (and weight_category,
+            country if present); any number of athletes and snapshots
+        group_cols: Columns identifying a series (default: athlete_name and
+            weight_category when present)
+
+    Returns:
+        DataFrame with TREND_COLUMNS, one row per series; series with a
+        single snapshot get trend 'insufficient_data'
+    """
+    if history_df is None or history_df.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    if group_cols is None:
+        group_cols = [c for c in ('athlete_name', 'weight_category') if c in history_df.columns]
+
+    df = history_df.assign(
+        date=pd.to_datetime(history_df['date'], errors='coerce'),
+        rank=pd.to_numeric(history_df['rank'], errors='coerce'),
+    ).dropna(subset=['date', 'rank'])
+    if df.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    df = df.sort_values(group_cols + ['date'], kind='stable')
+    group_id = df.groupby(group_cols, sort=False).ngroup().values
+    n_groups = group_id.max() + 1
+
+    def group_sum(values):
+        return np.bincount(group_id, weights=values, minlength=n_groups)
+
+    # Time in months, centred on each series' mean for conditioning
+    days = (df['date'].values - df['date'].values.min()) / np.timedelta64(1, 'D')
+    months = days / DAYS_PER_MONTH
+    count = np.bincount(group_id, minlength=n_groups).astype(float)
+    t = months - (group_sum(months) / count)[group_id]
+    y = df['rank'].values.astype(float)
+
+    # Distinct snapshot dates decide which terms can be fitted
+    distinct = df.assign(_g=group_id).drop_duplicates(['_g', 'date']).groupby('_g').size()
+
+    first = np.r_[0, np.flatnonzero(np.diff(group_id)) + 1]
+    last = np.r_[first[1:] - 1, len(group_id) - 1]
+
+    # Normal equation sums per series: t^0..t^4 and t^0..t^2 * y
+    moments = df.iloc[first][group_cols].reset_index(drop=True).assign(
+        country=df['country'].values[last] if 'country' in df.columns else '',
+        n=count,
+        t1=group_sum(t), t2=group_sum(t ** 2), t3=group_sum(t ** 3), t4=group_sum(t ** 4),
+        y0=group_sum(y), y1=group_sum(t * y), y2=group_sum(t * t * y),
+        distinct_dates=distinct.reindex(np.arange(n_groups), fill_value=0).values,
+        first_rank=y[first],
+        current_rank=y[last],
+        months_tracked=months[last] - months[first],
+        first_date=df['date'].values[first],
+        last_date=df['date'].values[last],
+    )
+    return trends_from_moments(moments)
+
+
+def trends_from_moments(moments: pd.DataFrame) -> pd.DataFrame:
+    """
+    Solve trend fits from per-series least-squares sums.
+
+    Lets a database compute the grouped sums (one aggregate query) and
+    share the fit with fit_ranking_trends.
+
+    Args:
+        moments: One row per series with its key columns (athlete_name,
+            weight_category), country, n, t1..t4 (sums of t^k, t in months
+            from any origin near the data), y0..y2 (sums of t^k * rank),
+            distinct_dates, first_rank, current_rank, months_tracked,
+            first_date and last_date
+
+    Returns:
+        DataFrame with TREND_COLUMNS, one row per series
+    """
+    if moments is None or moments.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    n, m1, m2, m3, m4 = [moments[c].values.astype(float) for c in ('n', 't1', 't2', 't3', 't4')]
+    y0, y1, y2 = [moments[c].values.astype(float) for c in ('y0', 'y1', 'y2')]
+    n_groups = len(moments)
+
+    # Centre t on each series' mean (binomial expansion of the raw sums)
+    mu = m1 / n
+    s = [
+        n,
+        m1 - n * mu,
+        m2 - 2 * mu * m1 + n * mu ** 2,
+        m3 - 3 * mu * m2 + 3 * mu ** 2 * m1 - n * mu ** 3,
+        m4 - 4 * mu * m3 + 6 * mu ** 2 * m2 - 4 * mu ** 3 * m1 + n * mu ** 4,
+    ]
+    r = [y0, y1 - mu * y0, y2 - 2 * mu * y1 + mu ** 2 * y0]
+
+    lhs = np.stack([
+        np.stack([s[0], s[1], s[2]], axis=-1),
+        np.stack([s[1], s[2], s[3]], axis=-1),
+        np.stack([s[2], s[3], s[4]], axis=-1),
+    ], axis=1)                                          # (groups, 3, 3)
+    rhs = np.stack(r, axis=-1)                          # (groups, 3)
+
+    distinct = moments['distinct_dates'].values
+    quadratic = distinct >= 3
+    linear = distinct == 2
+
+    slope = np.zeros(n_groups)
+    curvature = np.zeros(n_groups)
+    if quadratic.any():
+        coef = np.linalg.solve(lhs[quadratic], rhs[quadratic][..., None])[..., 0]
+        slope[quadratic] = coef[:, 1]
+        curvature[quadratic] = coef[:, 2]
+    if linear.any():
+        # Centred t: slope = sum(t*y) / sum(t^2)
+        slope[linear] = r[1][linear] / s[2][linear]
+
+    first_rank = moments['first_rank'].values.astype(float)
+    current_rank = moments['current_rank'].values.astype(float)
+    key_cols = [c for c in ('athlete_name', 'weight_category') if c in moments.columns]
+
+    trends = moments[key_cols].reset_index(drop=True).assign(
+        country=moments['country'].values if 'country' in moments.columns else '',
+        current_rank=current_rank.astype(int),
+        first_rank=first_rank.astype(int),
+        change=(first_rank - current_rank).astype(int),
+        velocity=np.round(-slope, 2) + 0.0,
+        acceleration=np.round(-2 * curvature, 2) + 0.0,
+        data_points=s[0].astype(int),
+        months_tracked=np.round(moments['months_tracked'].values.astype(float), 1),
+        first_date=moments['first_date'].values,
+        last_date=moments['last_date'].values,
+    )
+
+    labels, scores = classify_velocity(trends['velocity'].values)
+    trends['trend'] = np.where(distinct >= 2, labels, 'insufficient_data')
+    trends['trend_score'] = np.where(distinct >= 2, scores, 0)
+
+    for col in ('athlete_name', 'weight_category'):
+        if col not in trends.columns:
+            trends[col] = ''
+    return trends[TREND_COLUMNS]
+
+
+def materialize_trends(history_df: pd.DataFrame, as_of=None) -> pd.DataFrame:
+    """
+    Per-athlete trend table over a ranking history.
+
+    Args:
+        history_df: Columns date, athlete_name, weight_category, country,
+            rank, points; should reach MATERIALIZE_HISTORY_DAYS back
+        as_of: Reference date (default: the latest snapshot)
+
+    Returns:
+        DataFrame with MATERIALIZED_COLUMNS, one row per athlete and weight
+        category ranked in the last SUMMARY_WINDOW_DAYS. rank_delta_<N>d is
+        the rank in force N days earlier minus the current rank (positive =
+        improvement; missing if not ranked then). volatility is the standard
+        deviation of snapshot-to-snapshot rank moves. history is a JSON list
+        of [valid_from, valid_to, rank, points] intervals (valid_to
+        exclusive, null while current).
+    """
+    if history_df is None or history_df.empty:
+        return pd.DataFrame(columns=MATERIALIZED_COLUMNS)
+
+    keys = ['athlete_name', 'weight_category']
+    df = history_df.reindex(columns=['date'] + keys + ['country', 'rank', 'points']).assign(
+        date=pd.to_datetime(history_df['date'], errors='coerce'),
+        rank=pd.to_numeric(history_df['rank'], errors='coerce'),
+        points=pd.to_numeric(history_df.get('points'), errors='coerce'),
+    ).dropna(subset=['date', 'rank'])
+    if df.empty:
+        return pd.DataFrame(columns=MATERIALIZED_COLUMNS)
+
+    as_of = pd.Timestamp(as_of) if as_of is not None else df['date'].max()
+    df = df[df['date'] <= as_of].sort_values(keys + ['date'], kind='stable')
+    window = df[df['date'] >= as_of - pd.Timedelta(days=SUMMARY_WINDOW_DAYS)]
+    if window.empty:
+        return pd.DataFrame(columns=MATERIALIZED_COLUMNS)
+
+    same_series = ((window['athlete_name'] == window['athlete_name'].shift())
+                   & (window['weight_category'] == window['weight_category'].shift()))
+    window = window.assign(step=window['rank'].diff().where(same_series))
+
+    grouped = window.groupby(keys, sort=True)
+    table = grouped.agg(
+        country=('country', 'last'),
+        current_rank=('rank', 'last'),
+        current_points=('points', 'last'),
+        best_rank=('rank', 'min'),
+        worst_rank=('rank', 'max'),
+        first_date=('date', 'first'),
+        last_date=('date', 'last'),
+    ).reset_index()
+    table['volatility'] = grouped['step'].std(ddof=0).fillna(0.0).round(2).values
+    table['country_code'] = country_codes(table['country']).values
+
+    # Rank in force at the start of each window: one as-of join per window
+    by_date = df[keys + ['date', 'rank']].sort_values('date', kind='stable')
+    for days in DELTA_WINDOWS:
+        targets = table[keys].assign(date=as_of - pd.Timedelta(days=days))
+        then = pd.merge_asof(targets, by_date, on='date', by=keys, direction='backward')
+        table[f'rank_delta_{days}d'] = (then['rank'].values - table['current_rank'].values)
+
+    fit = fit_ranking_trends(window[window['date'] >= as_of - pd.Timedelta(days=FIT_WINDOW_DAYS)])
+    table = table.merge(fit[keys + ['change', 'velocity', 'acceleration', 'trend',
+                                    'trend_score', 'data_points']], on=keys, how='left')
+    table = table.fillna({'change': 0, 'velocity': 0.0, 'acceleration': 0.0,
+                          'trend': 'insufficient_data', 'trend_score': 0, 'data_points': 0})
+
+    # Rank history as change intervals (a row per run of unchanged values)
+    intervals = encode_intervals(window)
+    valid_to = intervals['valid_to'].astype(object)
+    points = pd.to_numeric(intervals['points'], errors='coerce').round(2)
+    cells = ('["' + intervals['valid_from'].astype(str) + '", '
+             + ('"' + valid_to.astype(str) + '"').where(valid_to.notna(), 'null') + ', '
+             + intervals['rank'].astype(int).astype(str) + ', '
+             + points.astype(str).where(points.notna(), 'null') + ']')
+    history = (intervals[keys].assign(history=cells.values)
+               .groupby(keys, sort=False)['history'].agg(','.join))
+    history = '[' + history + ']'
+    table = table.merge(history.reset_index(), on=keys, how='left')
+    table['history'] = table['history'].fillna('[]')
+
+    for col in ('current_rank', 'best_rank', 'worst_rank', 'change', 'trend_score', 'data_points'):
+        table[col] = table[col].astype(int)
+    for col in ('first_date', 'last_date'):
+        table[col] = table[col].dt.strftime('%Y-%m-%d')
+    return table[MATERIALIZED_COLUMNS]
+
+
+def history_intervals(trend_table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Decode the history column of a materialized trend table.
+
+    Returns:
+        DataFrame with INTERVAL_COLUMNS (see ranking_intervals), usable with
+        expand_intervals and intervals_at
+    """
+    rows = [
+        (name, category, country, rank, points, None, valid_from, valid_to)
+        for name, category, country, history in zip(
+            trend_table['athlete_name'], trend_table['weight_category'],
+            trend_table['country'], trend_table['history'])
+        for valid_from, valid_to, rank, points in json.loads(history or '[]')
+    ]
+    return pd.DataFrame(rows, columns=INTERVAL_COLUMNS)
+
+
+def main():
+    """Fit trends over the ranking history database."""
+    from ranking_tracker import RankingHistoryTracker
+
+    tracker = RankingHistoryTracker()
+    trends = tracker.calculate_all_trends(days=365)
+    print(f"Trends for {len(trends)} athlete series")
+    if trends.empty:
+        return
+
+    fitted = trends[trends['trend'] != 'insufficient_data']
+    print("\nFastest improving:")
+    print(fitted.nlargest(10, 'velocity')[['athlete_name', 'weight_category', 'current_rank',
+                                           'velocity', 'acceleration', 'trend']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Match Rating Engine
+Incremental Elo ratings over the match stream
+
+Ratings are built from who actually beat whom rather than from ranking
+points. Matches are processed in date order and the rating state is
+persisted, so each update only processes bouts that have not been seen
+before (O(new matches)) instead of replaying the whole history. Bouts that
+arrive dated before the watermark (the latest rated date) are the
+exception: Elo depends on order, so the saved history is replayed with
+them slotted in by date.
+
+State files (data/ratings/):
+- rating_state.json: current rating, bout count and display name per
+  athlete, processed match ids and the date watermark
+- rating_history.csv: one row per athlete per bout with the pre-match
+  rating, expected score, result and post-match rating
+
+Usage:
+    from rating_engine import RatingEngine
+
+    engine = RatingEngine()
+    engine.update(matches_df)          # only new bouts are processed
+    engine.save()
+    engine.consume_events(ChangeEventLog())   # bouts logged as match_added events
+
+    python rating_engine.py            # rate new bouts in the local match data
+    python rating_engine.py --events   # rate bouts logged since the last run
+    engine.get_rating('Jun Jang')
+    engine.get_history('Jun Jang')
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from match_stats import (
+    name_key, name_keys, find_athlete_columns, find_winner_column, normalize_match_columns
+)
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+PROVISIONAL_K_FACTOR = 40.0   # Used while an athlete has few rated bouts
+PROVISIONAL_BOUTS = 15
+
+# Rated bouts before a rating is considered established
+ESTABLISHED_BOUTS = 10
+
+DEFAULT_STATE_DIR = 'data/ratings'
+
+HISTORY_COLUMNS = ['match_id', 'date', 'athlete', 'opponent', 'pre_rating',
+                   'opponent_rating', 'expected', 'result', 'post_rating']
+
+# Columns that identify a bout (after normalize_match_columns; missing = blank)
+MATCH_ID_COLUMNS = ['match_date', 'athlete1_name', 'athlete2_name',
+                    'competition', 'round_stage', 'weight_category']
+
+
+def expected_score(rating_a, rating_b):
+    """Elo expected score of A against B (works on scalars or arrays)."""
+    return 1.0 / (1.0 + np.power(10.0, (np.asarray(rating_b) - np.asarray(rating_a)) / 400.0))
+
+
+def match_ids(matches_df: pd.DataFrame) -> pd.Series:
+    """
+    Stable per-bout ids from the identifying columns (vectorized hash).
+
+    Raw WT headers and normalized columns give the same id, and extra
+    columns in either table do not change it.
+    """
+    df = normalize_match_columns(matches_df)
+    keys = pd.DataFrame({
+        col: df[col].fillna('').astype(str) if col in df.columns else ''
+        for col in MATCH_ID_COLUMNS
+    }, index=df.index)
+    keys['match_date'] = df['match_date'].dt.strftime('%Y-%m-%d').fillna('') \
+        if 'match_date' in df.columns else ''
+    for col in ('athlete1_name', 'athlete2_name'):
+        keys[col] = name_keys(keys[col])
+    hashes = pd.util.hash_pandas_object(keys, index=False)
+    return hashes.map('{:016x}'.format)
+
+
+class RatingEngine:
+    """
+    Persistent, incrementally updated Elo ratings keyed by athlete name key.
+    """
+
+    def __init__(self, state_dir: str = DEFAULT_STATE_DIR,
+                 k_factor: float = K_FACTOR,
+                 provisional_k: float = PROVISIONAL_K_FACTOR,
+                 initial_rating: float = INITIAL_RATING):
+        self.state_dir = Path(state_dir)
+        self.state_path = self.state_dir / 'rating_state.json'
+        self.history_path = self.state_dir / 'rating_history.csv'
+
+        self.k_factor = k_factor
+        self.provisional_k = provisional_k
+        self.initial_rating = initial_rating
+
+        self.ratings: Dict[str, float] = {}
+        self.bouts: Dict[str, int] = {}
+        self.names: Dict[str, str] = {}
+        self.processed_ids: set = set()
+        self.watermark: Optional[str] = None
+        self.updated_at: Optional[str] = None
+
+        # History rows produced since the last save (appended on save, or
+        # replacing the file after a replay)
+        self._pending_history: List[Dict] = []
+        self._rewrite_history = False
+        self._history_df: Optional[pd.DataFrame] = None
+
+        self.load()
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def load(self):
+        """Load rating state from disk (no-op if none saved yet)."""
+        if not self.state_path.exists():
+            return
+
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[WARN] Could not read rating state: {e}")
+            return
+
+        self.ratings = {k: float(v) for k, v in state.get('ratings', {}).items()}
+        self.bouts = {k: int(v) for k, v in state.get('bouts', {}).items()}
+        self.names = state.get('names', {})
+        self.processed_ids = set(state.get('processed_ids', []))
+        self.watermark = state.get('watermark')
+        self.updated_at = state.get('updated_at')
+
+    def save(self):
+        """Persist rating state (atomic replace) and append new history rows."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.updated_at = datetime.now().isoformat()
+
+        state = {
+            'ratings': {k: round(v, 2) for k, v in self.ratings.items()},
+            'bouts': self.bouts,
+            'names': self.names,
+            'processed_ids': sorted(self.processed_ids),
+            'watermark': self.watermark,
+            'updated_at': self.updated_at,
+        }
+        if self._rewrite_history:
+            tmp = self.history_path.with_suffix('.tmp')
+            pd.DataFrame(self._pending_history, columns=HISTORY_COLUMNS).to_csv(tmp, index=False)
+            os.replace(tmp, self.history_path)
+        elif self._pending_history:
+            rows = pd.DataFrame(self._pending_history, columns=HISTORY_COLUMNS)
+            write_header = not self.history_path.exists()
+            rows.to_csv(self.history_path, mode='a', header=write_header, index=False)
+
+        tmp = self.state_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+        self._pending_history = []
+        self._rewrite_history = False
+
+    # =========================================================================
+    # UPDATES
+    # =========================================================================
+
+    def update(self, matches_df: pd.DataFrame) -> int:
+        """
+        Process bouts not seen before, in date order.
+
+        Bouts without a determinable winner are skipped (and not marked
+        processed, so they are picked up if the result is filled in later).
+        New bouts dated before the watermark trigger a replay of the rated
+        history so every bout is rated in date order.
+
+        Args:
+            matches_df: Match DataFrame (normalized columns; match_date if available)
+
+        Returns:
+            Number of bouts rated in this update
+        """
+        if matches_df is None or matches_df.empty:
+            return 0
+
+        df = normalize_match_columns(matches_df)
+        athlete1_col, athlete2_col = find_athlete_columns(df)
+        winner_col = find_winner_column(df)
+        if not athlete1_col or not athlete2_col or not winner_col:
+            return 0
+        if 'match_date' not in df.columns:
+            df = df.assign(match_date=pd.NaT)
+
+        ids = match_ids(df)
+        new = ~ids.isin(self.processed_ids).values
+        if not new.any():
+            return 0
+
+        new_df = df[new].assign(_match_id=ids[new].values)
+
+        key_a = name_keys(new_df[athlete1_col]).values
+        key_b = name_keys(new_df[athlete2_col]).values
+        winner = name_keys(new_df[winner_col]).values
+
+        # Winner by substring, as elsewhere in the match code
+        a_won = np.array([bool(a) and a in w for a, w in zip(key_a, winner)])
+        b_won = np.array([bool(b) and b in w for b, w in zip(key_b, winner)])
+        decided = (key_a != '') & (key_b != '') & (a_won ^ b_won)
+
+        order = np.argsort(new_df['match_date'].values, kind='stable')
+        order = order[decided[order]]
+
+        dates = new_df['match_date'].dt.strftime('%Y-%m-%d').fillna('').values
+        bouts = pd.DataFrame({
+            'match_id': new_df['_match_id'].values, 'date': dates,
+            'key_a': key_a, 'key_b': key_b,
+            'name_a': new_df[athlete1_col].astype(str).values,
+            'name_b': new_df[athlete2_col].astype(str).values,
+            'score_a': np.where(a_won, 1.0, 0.0),
+        }).iloc[order]
+        if bouts.empty:
+            return 0
+
+        rated_dates = bouts['date'][bouts['date'] != '']
+        if self.watermark and not rated_dates.empty and rated_dates.min() < self.watermark:
+            if self._replay(bouts):
+                return int(len(bouts))
+            print(f"[WARN] Rating history incomplete; {len(bouts)} late bouts rated out of date order")
+
+        self._rate_bouts(bouts)
+        return int(len(bouts))
+
+    def _rate_bouts(self, bouts: pd.DataFrame):
+        """Rate bouts in the given order and advance the watermark."""
+        for row in bouts.itertuples(index=False):
+            self._rate_bout(row.match_id, row.date, row.key_a, row.key_b,
+                            row.name_a, row.name_b, row.score_a)
+
+        rated_dates = bouts['date'][bouts['date'] != '']
+        if not rated_dates.empty and (self.watermark is None or rated_dates.max() > self.watermark):
+            self.watermark = rated_dates.max()
+        self._history_df = None
+
+    def _replay(self, late_bouts: pd.DataFrame) -> bool:
+        """
+        Re-rate every bout from scratch with late bouts slotted in by date.
+
+        Needs the saved history to cover every processed bout; returns
+        False (state untouched) when it does not.
+        """
+        history = self._load_history()
+        rated = history.drop_duplicates('match_id')    # First row of a bout = athlete 1's side
+        if not self.processed_ids <= set(rated['match_id']):
+            return False
+
+        earlier = pd.DataFrame({
+            'match_id': rated['match_id'].values,
+            'date': rated['date'].fillna('').values,
+            'key_a': rated['athlete'].values,
+            'key_b': rated['opponent'].values,
+            'name_a': rated['athlete'].map(self.names).fillna(rated['athlete']).values,
+            'name_b': rated['opponent'].map(self.names).fillna(rated['opponent']).values,
+            'score_a': pd.to_numeric(rated['result'], errors='coerce').values,
+        })
+        bouts = pd.concat([earlier, late_bouts], ignore_index=True)
+        order = np.argsort(pd.to_datetime(bouts['date'], errors='coerce').values, kind='stable')
+
+        self.ratings, self.bouts, self.processed_ids = {}, {}, set()
+        self.watermark = None
+        self._pending_history = []
+        self._rewrite_history = True
+        self._rate_bouts(bouts.iloc[order])
+        print(f"Replayed {len(bouts)} bouts to rate {len(late_bouts)} late arrivals in date order")
+        return True
+
+    def consume_events(self, log, subscriber: str = 'rating_engine') -> int:
+        """
+        Rate the bouts from match_added events since this engine's last offset.
+
+        The offset is left in place (events kept for the next run) when the
+        events carry no athlete/winner columns the engine can rate.
+
+        Args:
+            log: change_events.ChangeEventLog
+            subscriber: Offset name in the log
+
+        Returns:
+            Number of bouts rated
+        """
+        from change_events import events_frame
+
+        rated = 0
+
+        def handle(events):
+            nonlocal rated
+            frame = normalize_match_columns(events_frame(events))
+            athlete1_col, athlete2_col = find_athlete_columns(frame)
+            if not athlete1_col or not athlete2_col or not find_winner_column(frame):
+                raise ValueError(f"match events without athlete/winner columns: {list(frame.columns)}")
+            rated = self.update(frame)
+            if rated:
+                self.save()
+
+        try:
+            log.consume(subscriber, handle, types=['match_added'])
+        except ValueError as e:
+            print(f"[WARN] Match events not rated: {e}")
+        return rated
+
+    def _k(self, key: str) -> float:
+        """K-factor for an athlete (higher while provisional)."""
+        return self.provisional_k if self.bouts.get(key, 0) < PROVISIONAL_BOUTS else self.k_factor
+
+    def _rate_bout(self, match_id: str, date: str, key_a: str, key_b: str,
+                   name_a: str, name_b: str, score_a: float):
+        """Apply one Elo update and record the pre/post ratings."""
+        rating_a = self.ratings.get(key_a, self.initial_rating)
+        rating_b = self.ratings.get(key_b, self.initial_rating)
+        exp_a = float(expected_score(rating_a, rating_b))
+
+        post_a = rating_a + self._k(key_a) * (score_a - exp_a)
+        post_b = rating_b + self._k(key_b) * ((1.0 - score_a) - (1.0 - exp_a))
+
+        self.ratings[key_a] = post_a
+        self.ratings[key_b] = post_b
+        self.bouts[key_a] = self.bouts.get(key_a, 0) + 1
+        self.bouts[key_b] = self.bouts.get(key_b, 0) + 1
+        self.names.setdefault(key_a, name_a)
+        self.names.setdefault(key_b, name_b)
+        self.processed_ids.add(match_id)
+
+        self._pending_history.append({
+            'match_id': match_id, 'date': date, 'athlete': key_a, 'opponent': key_b,
+            'pre_rating': round(rating_a, 2), 'opponent_rating': round(rating_b, 2),
+            'expected': round(exp_a, 4), 'result': score_a, 'post_rating': round(post_a, 2),
+        })
+        self._pending_history.append({
+            'match_id': match_id, 'date': date, 'athlete': key_b, 'opponent': key_a,
+            'pre_rating': round(rating_b, 2), 'opponent_rating': round(rating_a, 2),
+            'expected': round(1.0 - exp_a, 4), 'result': 1.0 - score_a, 'post_rating': round(post_b, 2),
+        })
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def get_rating(self, athlete_name: str) -> Optional[float]:
+        """Current rating for an athlete (None if never rated)."""
+        rating = self.ratings.get(name_key(athlete_name))
+        return None if rating is None else round(rating, 1)
+
+    def is_established(self, athlete_name: str) -> bool:
+        """True once an athlete has enough rated bouts to trust the rating."""
+        return self.bouts.get(name_key(athlete_name), 0) >= ESTABLISHED_BOUTS
+
+    def win_probability(self, athlete_a: str, athlete_b: str) -> float:
+        """Elo win probability of A over B."""
+        rating_a = self.ratings.get(name_key(athlete_a), self.initial_rating)
+        rating_b = self.ratings.get(name_key(athlete_b), self.initial_rating)
+        return float(expected_score(rating_a, rating_b))
+
+    def ratings_table(self) -> pd.DataFrame:
+        """All current ratings, best first."""
+        if not self.ratings:
+            return pd.DataFrame(columns=['athlete_key', 'athlete_name', 'rating', 'bouts', 'rating_rank'])
+
+        keys = list(self.ratings.keys())
+        df = pd.DataFrame({
+            'athlete_key': keys,
+            'athlete_name': [self.names.get(k, k) for k in keys],
+            'rating': np.round([self.ratings[k] for k in keys], 1),
+            'bouts': [self.bouts.get(k, 0) for k in keys],
+        }).sort_values('rating', ascending=False, ignore_index=True)
+        df['rating_rank'] = np.arange(1, len(df) + 1)
+        return df
+
+    def get_history(self, athlete_name: str = None) -> pd.DataFrame:
+        """Rating history for an athlete (one row per bout, oldest first); None = all athletes."""
+        history = self._load_history()
+        if athlete_name is None:
+            return history
+        key = name_key(athlete_name)
+        return history[history['athlete'] == key].reset_index(drop=True)
+
+    def _load_history(self) -> pd.DataFrame:
+        """Saved plus pending history rows (cached until the next update)."""
+        if self._history_df is None:
+            parts = []
+            if self.history_path.exists() and not self._rewrite_history:
+                parts.append(pd.read_csv(self.history_path, dtype={
+                    'match_id': str, 'date': str, 'athlete': str, 'opponent': str}, keep_default_na=False))
+            if self._pending_history:
+                parts.append(pd.DataFrame(self._pending_history, columns=HISTORY_COLUMNS))
+            self._history_df = (pd.concat(parts, ignore_index=True) if parts
+                                else pd.DataFrame(columns=HISTORY_COLUMNS))
+        return self._history_df
+
+
+def main():
+    """Update ratings from local match data (or logged events) and show the top of the table."""
+    parser = argparse.ArgumentParser(description='Match rating engine')
+    parser.add_argument('--events', action='store_true',
+                        help='Rate bouts logged as match_added events since the last run')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MATCH RATING ENGINE")
+    print("=" * 60)
+
+    engine = RatingEngine()
+    print(f"Loaded state: {len(engine.ratings)} athletes, watermark {engine.watermark}")
+
+    if args.events:
+        from change_events import ChangeEventLog
+        rated = engine.consume_events(ChangeEventLog())
+    else:
+        from scouting_manager import ScoutingManager
+        rated = engine.update(ScoutingManager().matches_df)
+        engine.save()
+    print(f"Rated {rated} new bouts")
+
+    table = engine.ratings_table()
+    if not table.empty:
+        print("\nTop 10:")
+        for _, row in table.head(10).iterrows():
+            print(f"  {row['rating_rank']:>3}. {row['athlete_name']:<30} {row['rating']:.0f} ({row['bouts']} bouts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Row-Level Content Hashing
+Stable per-row hashes, order-independent table fingerprints and keyed row diffs
+
+Change detection used to sort a whole frame and hash its CSV/JSON text,
+which only answers "changed or not". Here every row gets a 64-bit hash
+(pd.util.hash_pandas_object over canonicalized values), so:
+- a table fingerprint combines the row hashes order-independently (no sort,
+  no serialization)
+- keyed rows (e.g. athlete + weight category) diff into added / removed /
+  changed keys without comparing column by column
+- the hashes are saved next to each snapshot (<file>.hashes.parquet), so a
+  previous snapshot never needs re-parsing to be compared
+
+Values are canonicalized before hashing so a frame and its CSV round trip
+hash the same (12 and 12.0 agree, floats are rounded to FLOAT_DECIMALS,
+missing text is '', column order does not matter).
+
+Usage:
+    from row_hashes import row_hashes, table_fingerprint, diff_hashes
+
+    hashes = row_hashes(df, key_columns=['NAME', 'WEIGHT CATEGORY'])
+    table_fingerprint(hashes)                  # md5 hex, order-independent
+    diff_hashes(old_hashes, hashes)            # added / removed / changed keys
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+
+
+HASH_COLUMNS = ['key_hash', 'row_hash']
+
+# Sidecar written next to each snapshot file
+HASH_SUFFIX = '.hashes.parquet'
+
+# Decimal places kept when hashing numbers
+FLOAT_DECIMALS = 9
+
+# Ranking identity columns (raw scrape names, then normalized names)
+RANKING_KEY_COLUMNS = [('NAME', 'athlete_name'), ('WEIGHT CATEGORY', 'weight_category')]
+
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """Numbers as rounded floats, text stripped with missing as '', columns in name order."""
+    out = {}
+    for col in sorted(df.columns, key=str):
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values):
+            # Rounding absorbs the last-digit drift of a CSV round trip
+            out[str(col)] = np.round(values.astype(float).values, FLOAT_DECIMALS)
+        else:
+            out[str(col)] = values.astype(object).where(values.notna(), '').astype(str).str.strip().values
+    return pd.DataFrame(out, index=df.index)
+
+
+def ranking_key_columns(df: pd.DataFrame) -> Optional[List[str]]:
+    """Athlete name and weight category columns, if the frame has them."""
+    columns = []
+    for candidates in RANKING_KEY_COLUMNS:
+        col = next((c for c in candidates if c in df.columns), None)
+        if col is not None:
+            columns.append(col)
+    return columns if columns and columns[0] in ('NAME', 'athlete_name') else None
+
+
+def row_hashes(df: pd.DataFrame, key_columns: List[str] = None) -> pd.DataFrame:
+    """
+    Stable 64-bit hashes per row.
+
+    Args:
+        df: Any DataFrame
+        key_columns: Columns identifying a row across snapshots; without
+            them each row is keyed by its own content
+
+    Returns:
+        DataFrame with key_hash and row_hash (uint64), one row per input row
+    """
+    if df is None or df.empty:
+        return pd.DataFrame({col: pd.Series(dtype='uint64') for col in HASH_COLUMNS})
+
+    canonical = _canonical(df)
+    row = pd.util.hash_pandas_object(canonical, index=False).values
+    if key_columns:
+        key = pd.util.hash_pandas_object(canonical[sorted(map(str, key_columns))], index=False).values
+    else:
+        key = row
+    return pd.DataFrame({'key_hash': key, 'row_hash': row})
+
+
+def table_fingerprint(hashes: pd.DataFrame, columns: List[str] = None) -> str:
+    """
+    Order-independent fingerprint of a table from its row hashes.
+
+    Combines the row count, the wrapping sum and the xor of the row hashes
+    (a multiset digest: reordering rows does not change it, duplicating or
+    editing one does), plus the column names when given.
+
+    Returns:
+        md5 hex digest ('' for an empty table)
+    """
+    if hashes is None or hashes.empty:
+        return ""
+    values = hashes['row_hash'].values.astype(np.uint64)
+    with np.errstate(over='ignore'):
+        total = int(values.sum(dtype=np.uint64))
+    mixed = int(np.bitwise_xor.reduce(values))
+    header = ','.join(sorted(map(str, columns))) if columns is not None else ''
+    return hashlib.md5(f"{len(values)}:{total}:{mixed}:{header}".encode()).hexdigest()
+
+
+def diff_hashes(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Keyed row diff of two hash frames.
+
+    Returns:
+        Dict of key_hash arrays: added (only in new), removed (only in old)
+        and changed (in both, different row_hash)
+    """
+    old = old.drop_duplicates('key_hash', keep='last').set_index('key_hash')['row_hash']
+    new = new.drop_duplicates('key_hash', keep='last').set_index('key_hash')['row_hash']
+
+    common = new.index.intersection(old.index)
+    changed = common[new.loc[common].values != old.loc[common].values]
+    return {
+        'added': new.index.difference(old.index).values,
+        'removed': old.index.difference(new.index).values,
+        'changed': changed.values,
+    }
+
+
+def diff_summary(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, int]:
+    """Counts of added, removed, changed and unchanged rows."""
+    diff = diff_hashes(old, new)
+    counts = {name: int(len(keys)) for name, keys in diff.items()}
+    counts['unchanged'] = int(new['key_hash'].nunique()) - counts['added'] - counts['changed']
+    return counts
+
+
+def hashes_path(snapshot_path) -> Path:
+    """Sidecar path holding a snapshot's row hashes."""
+    path = Path(snapshot_path)
+    return path.with_name(path.name + HASH_SUFFIX)
+
+
+def save_row_hashes(hashes: pd.DataFrame, snapshot_path) -> Path:
+    """Write a snapshot's row hashes next to it."""
+    path = hashes_path(snapshot_path)
+    hashes[HASH_COLUMNS].to_parquet(path, index=False)
+    return path
+
+
+def load_row_hashes(snapshot_path) -> Optional[pd.DataFrame]:
+    """Row hashes saved next to a snapshot (None if missing or unreadable)."""
+    path = hashes_path(snapshot_path)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        return None
@@ -17,6 +17,9 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 import json
 
+from points_ledger import PointsLedger
+from match_stats import name_key, name_keys
+
 # Team Saudi Brand Colors
 TEAL_PRIMARY = '#1E5631'
 GOLD_ACCENT = '#a08e66'
@@ -201,6 +204,7 @@ class SaudiDevelopmentSystem:
 
         self.saudi_athletes: List[SaudiAthlete] = []
         self.rankings_df: Optional[pd.DataFrame] = None
+        self._ledger: Optional[PointsLedger] = None
 
         self.load_data()
 
@@ -296,8 +300,18 @@ class SaudiDevelopmentSystem:
                 return True
         return False
 
-    def calculate_points_gap(self, athlete: SaudiAthlete, target_rank: int) -> Dict:
-        """Calculate points needed to reach target rank"""
+    def calculate_points_gap(self, athlete: SaudiAthlete, target_rank: int,
+                             as_of: str = None) -> Dict:
+        """
+        Calculate points needed to reach target rank
+
+        Args:
+            athlete: Saudi athlete
+            target_rank: Target world rank
+            as_of: Evaluate the gap on a future date (e.g. a qualification
+                deadline), after points have decayed or expired for the
+                athlete and the whole category
+        """
         if self.rankings_df is None:
             return {'error': 'No rankings data'}
 
@@ -319,6 +333,9 @@ class SaudiDevelopmentSystem:
                 'message': f'Only {len(cat_df)} athletes ranked in {athlete.weight_category}'
             }
 
+        if as_of:
+            return self._points_gap_as_of(athlete, target_rank, cat_df, as_of)
+
         target_points = float(cat_df.iloc[target_rank - 1]['points'])
         points_gap = max(0, target_points - athlete.ranking_points)
 
@@ -331,6 +348,52 @@ class SaudiDevelopmentSystem:
             'competitions_needed': self._estimate_competitions_needed(points_gap)
         }
 
+    def get_points_ledger(self) -> PointsLedger:
+        """Points ledger from ranking history, or the current snapshot if none."""
+        if self._ledger is None:
+            self._ledger = PointsLedger.from_tracker(str(self.data_dir / 'ranking_history.db'))
+            if not len(self._ledger):
+                self._ledger = PointsLedger.from_rankings(self.rankings_df)
+        return self._ledger
+
+    def _points_gap_as_of(self, athlete: SaudiAthlete, target_rank: int,
+                          cat_df: pd.DataFrame, as_of: str) -> Dict:
+        """Points gap on a future date with decayed/expired points removed."""
+        ledger = self.get_points_ledger()
+        name_col = next((c for c in ['athlete_name', 'name', 'NAME'] if c in cat_df.columns), None)
+
+        # Whole category on the date in one pass; unknown athletes keep their total
+        counted = ledger.points_as_of(as_of)
+        if not counted.empty:
+            counted = counted[counted.index.get_level_values('weight_category') == athlete.weight_category]
+            counted = counted.droplevel('weight_category')
+        keys = name_keys(cat_df[name_col]) if name_col else None
+        field_points = keys.map(counted).fillna(cat_df['points']).values if keys is not None \
+            else cat_df['points'].values
+
+        athlete_points = ledger.retained_points(athlete.name, as_of, athlete.weight_category)
+        if athlete_points is None:
+            athlete_points = athlete.ranking_points
+
+        # Target rank among the rest of the field
+        if keys is not None:
+            field_points = field_points[keys.values != name_key(athlete.name)]
+        ordered = np.sort(field_points)[::-1]
+        target_points = float(ordered[min(target_rank, len(ordered)) - 1])
+        points_gap = max(0, target_points - athlete_points)
+
+        return {
+            'as_of': as_of,
+            'current_points': athlete.ranking_points,
+            'current_rank': athlete.current_world_rank,
+            'points_at_date': round(athlete_points, 1),
+            'points_expiring': round(max(0, athlete.ranking_points - athlete_points), 1),
+            'target_rank': target_rank,
+            'target_points': round(target_points, 1),
+            'points_gap': round(points_gap, 1),
+            'competitions_needed': self._estimate_competitions_needed(points_gap)
+        }
+
     def _estimate_competitions_needed(self, points_gap: float) -> Dict:
         """Estimate competitions needed to close points gap"""
         estimates = {}
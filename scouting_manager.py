@@ -16,12 +16,17 @@ Usage:
     profile = scout.get_opponent_profile('KOR-1234')
     h2h = scout.head_to_head('KSA-0001', 'KOR-1234')
     report = scout.generate_scouting_report('KSA-0001', category='-68kg')
+
+    # Whole category in one pass (see batch_scouting.py for the CLI)
+    reports = scout.generate_batch_reports(weight_category='-68kg', workers=4)
+    scout.export_batch_reports(reports, label='M-68kg')
 """
 
 import os
 import sys
 import io
 import json
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
@@ -46,6 +51,21 @@ except ImportError:
         'F': ['-46kg', '-49kg', '-53kg', '-57kg', '-62kg', '-67kg', '-73kg', '+73kg']
     }
 
+from match_stats import (
+    parse_match_scores, build_athlete_scoring_table, athlete_perspective,
+    name_key, find_athlete_columns, find_winner_column, normalize_match_columns
+)
+from ranking_features import add_continental_ranks
+from opponent_similarity import OpponentSimilarityIndex
+from rating_engine import RatingEngine, ESTABLISHED_BOUTS
+from bracket_simulator import BracketSimulator, seeded_draw
+from win_probability import WinProbabilityModel, MatchupContext
+from points_simulator import rank_to_rating
+
+# Medal probabilities: simulated draw size and tournaments per category
+BRACKET_SIZE = 32
+BRACKET_TRIALS = 20000
+
 
 # =============================================================================
 # DATA CLASSES
@@ -105,8 +125,14 @@ class OpponentProfile:
     # Rankings
     world_rank: int = 0
     asian_rank: int = 0  # If Asian athlete
+    continental_rank: int = 0
+    continent: str = ""
     olympic_rank: int = 0
 
+    # Match rating (Elo over results, see rating_engine)
+    rating: float = 0.0
+    rating_bouts: int = 0
+
     # Performance stats
     total_matches: int = 0
     wins: int = 0
@@ -223,14 +249,17 @@ class ScoutingManager:
     Manages tactical scouting and opponent analysis.
     """
 
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, read_only: bool = False):
         """
         Initialize the scouting manager.
 
         Args:
             data_dir: Base directory for data files
+            read_only: Never write derived state (rating files); used by
+                batch worker processes
         """
         self.data_dir = Path(data_dir) if data_dir else Path('.')
+        self.read_only = read_only
         self.rankings_df = None
         self.matches_df = None
         self.athletes_df = None
@@ -238,6 +267,21 @@ class ScoutingManager:
         # Cache for profiles
         self._profile_cache: Dict[str, OpponentProfile] = {}
 
+        # Per-athlete scoring aggregates (built lazily from matches_df)
+        self._scoring_table: Optional[pd.DataFrame] = None
+
+        # Shared lookup indexes (built lazily, reused across profiles)
+        self._match_index: Optional[Dict[str, np.ndarray]] = None
+        self._similarity_index: Optional[OpponentSimilarityIndex] = None
+        self._rating_engine: Optional[RatingEngine] = None
+
+        # Simulated category brackets keyed by weight category
+        self._bracket_cache: Dict[object, pd.DataFrame] = {}
+
+        # Trained win probability model (False once looked up and missing)
+        self._win_model = None
+        self._matchup_context: Optional[MatchupContext] = None
+
         # Load data
         self._load_data()
 
@@ -348,27 +392,95 @@ class ScoutingManager:
                     self.rankings_df = self.rankings_df.rename(columns={col: 'weight_category'})
                     break
 
+        # Continental ranks computed once for every athlete
+        self.rankings_df = add_continental_ranks(self.rankings_df)
+
     def _normalize_matches_columns(self):
         """Normalize column names in matches DataFrame."""
         if self.matches_df is None:
             return
 
-        column_map = {
-            'ATHLETE 1': 'athlete1_name',
-            'ATHLETE 2': 'athlete2_name',
-            'COUNTRY 1': 'country1',
-            'COUNTRY 2': 'country2',
-            'SCORE': 'score',
-            'WINNER': 'winner',
-            'ROUND': 'round_stage',
-            'WEIGHT': 'weight_category',
-            'COMPETITION': 'competition',
-            'DATE': 'date',
-        }
+        # Shared with the rating engine and match events, so bout ids agree
+        self.matches_df = normalize_match_columns(self.matches_df)
+
+        # Parse scores once at ingest
+        self.matches_df = parse_match_scores(self.matches_df)
+        self._scoring_table = None
+        self._match_index = None
+        self._similarity_index = None
+        self._rating_engine = None
+        self._bracket_cache = {}
+        self._matchup_context = None
+
+    def _get_match_index(self) -> Dict[str, np.ndarray]:
+        """Map athlete name key -> row positions of their bouts in matches_df."""
+        if self._match_index is None:
+            stacked = athlete_perspective(self.matches_df)
+            if stacked.empty:
+                self._match_index = {}
+            else:
+                self._match_index = {
+                    key: np.sort(rows) for key, rows in
+                    stacked.groupby('athlete')['match_idx'].apply(np.asarray).items()
+                }
+        return self._match_index
+
+    def _athlete_matches(self, athlete_name: str) -> pd.DataFrame:
+        """All bouts involving an athlete (exact key first, partial name fallback)."""
+        if self.matches_df is None or self.matches_df.empty or not athlete_name:
+            return pd.DataFrame()
+
+        rows = self._get_match_index().get(name_key(athlete_name))
+        if rows is not None:
+            return self.matches_df.iloc[rows]
+
+        athlete1_col, athlete2_col = find_athlete_columns(self.matches_df)
+        if not athlete1_col or not athlete2_col:
+            return pd.DataFrame()
 
-        for old_name, new_name in column_map.items():
-            if old_name in self.matches_df.columns and new_name not in self.matches_df.columns:
-                self.matches_df = self.matches_df.rename(columns={old_name: new_name})
+        name_pattern = athlete_name.upper()
+        df = self.matches_df
+        return df[
+            (df[athlete1_col].str.upper().str.contains(name_pattern, regex=False, na=False)) |
+            (df[athlete2_col].str.upper().str.contains(name_pattern, regex=False, na=False))
+        ]
+
+    def get_rating_engine(self) -> RatingEngine:
+        """
+        Rating engine brought up to date with the loaded matches.
+
+        New bouts are saved to the rating state unless the manager is
+        read-only (then they are rated in memory only).
+        """
+        if self._rating_engine is None:
+            self._rating_engine = RatingEngine(state_dir=str(self.data_dir / 'data' / 'ratings'))
+            if self.matches_df is not None and not self.matches_df.empty:
+                try:
+                    if self._rating_engine.update(self.matches_df) and not self.read_only:
+                        self._rating_engine.save()
+                except OSError:
+                    pass  # Read-only deployments keep the in-memory ratings
+        return self._rating_engine
+
+    def get_win_model(self) -> Optional[WinProbabilityModel]:
+        """Saved win probability model (None until one has been trained)."""
+        if self._win_model is None:
+            self._win_model = WinProbabilityModel.load(
+                str(self.data_dir / 'data' / 'models' / 'win_probability.json')) or False
+        return self._win_model or None
+
+    def get_matchup_context(self) -> MatchupContext:
+        """Current ranks, ratings, form and H2H used by the win probability model."""
+        if self._matchup_context is None:
+            self._matchup_context = MatchupContext.build(
+                self.matches_df, self.rankings_df, self.get_rating_engine())
+        return self._matchup_context
+
+    def get_scoring_table(self) -> pd.DataFrame:
+        """Get per-athlete points scored/conceded/differential aggregates."""
+        if self._scoring_table is None:
+            self._scoring_table = build_athlete_scoring_table(self.matches_df)
+        return self._scoring_table
 
     # =========================================================================
     # OPPONENT PROFILING
@@ -409,13 +521,21 @@ class ScoutingManager:
             last_updated=datetime.now().isoformat()
         )
 
-        # Calculate Asian rank if applicable
-        if profile.country_code in ASIAN_RIVALS or profile.country_code in ['KSA']:
-            profile.asian_rank = self._calculate_asian_rank(profile)
+        # Continental ranks are precomputed columns on the rankings table
+        profile.continent = athlete_data.get('continent') if isinstance(athlete_data.get('continent'), str) else ''
+        profile.continental_rank = self._rank_value(athlete_data.get('continental_rank'))
+        profile.asian_rank = self._calculate_asian_rank(profile, athlete_data)
 
         # Get match statistics
         self._populate_match_stats(profile)
 
+        # Match rating
+        engine = self.get_rating_engine()
+        key = name_key(profile.name)
+        if key in engine.ratings:
+            profile.rating = round(engine.ratings[key], 1)
+            profile.rating_bouts = engine.bouts.get(key, 0)
+
         # Analyze fighting style
         self._analyze_fighting_style(profile)
 
@@ -436,6 +556,29 @@ class ScoutingManager:
 
         return profile
 
+    def find_similar_opponents(self, athlete_name: str, k: int = 5,
+                               weight_category: str = None) -> List[Dict]:
+        """
+        Find athletes who fight most like the given athlete.
+
+        Args:
+            athlete_name: Reference athlete
+            k: Number of similar athletes to return
+            weight_category: Restrict to a category (None = all categories)
+
+        Returns:
+            List of dicts with athlete_name, country, weight_category, similarity
+        """
+        if self.matches_df is None or self.matches_df.empty:
+            return []
+
+        if self._similarity_index is None:
+            self._similarity_index = OpponentSimilarityIndex.from_matches(
+                self.matches_df, self.rankings_df)
+
+        return self._similarity_index.most_similar(athlete_name, k=k,
+                                                   weight_category=weight_category)
+
     def _find_athlete(self, athlete_id: str = None,
                      athlete_name: str = None,
                      country: str = None) -> Optional[Dict]:
@@ -443,7 +586,7 @@ class ScoutingManager:
         if self.rankings_df is None or self.rankings_df.empty:
             return None
 
-        df = self.rankings_df.copy()
+        df = self.rankings_df
 
         # Search by ID
         if athlete_id and 'athlete_id' in df.columns:
@@ -516,58 +659,55 @@ class ScoutingManager:
 
         return country[:3] if len(country) >= 3 else country
 
-    def _calculate_asian_rank(self, profile: OpponentProfile) -> int:
-        """Calculate Asian rank from world rankings."""
-        if self.rankings_df is None or profile.weight_category == '':
+    def _calculate_asian_rank(self, profile: OpponentProfile, athlete_data: Dict = None) -> int:
+        """Read Asian rank from the precomputed asian_rank column."""
+        if athlete_data is None:
+            athlete_data = self._find_athlete(profile.athlete_id or None, profile.name, profile.country)
+        if not athlete_data:
             return 0
-
-        df = self.rankings_df.copy()
-
-        # Filter to same weight category
-        cat_col = 'weight_category' if 'weight_category' in df.columns else 'WEIGHT CATEGORY'
-        if cat_col in df.columns:
-            df = df[df[cat_col].str.contains(profile.weight_category.replace('+', r'\+'), case=False, na=False)]
-
-        # Filter to Asian countries
-        country_col = 'country' if 'country' in df.columns else 'MEMBER NATION'
-        asian_countries_pattern = '|'.join(ASIAN_RIVALS + ['KSA'])
-        asian_df = df[df[country_col].str.contains(asian_countries_pattern, case=False, na=False)]
-
-        if asian_df.empty:
+        return self._rank_value(athlete_data.get('asian_rank'))
+
+    @staticmethod
+    def _rank_value(value) -> int:
+        """Convert a rank cell (possibly NaN) to int, 0 if missing."""
+        try:
+            return int(value) if pd.notna(value) else 0
+        except (TypeError, ValueError):
             return 0
 
-        # Sort by world rank and find position
-        rank_col = 'rank' if 'rank' in asian_df.columns else 'RANK'
-        asian_df = asian_df.sort_values(rank_col)
-
-        name_col = 'athlete_name' if 'athlete_name' in asian_df.columns else 'NAME'
-        for idx, (_, row) in enumerate(asian_df.iterrows(), 1):
-            if profile.name.upper() in str(row[name_col]).upper():
-                return idx
-
-        return 0
-
     def _populate_match_stats(self, profile: OpponentProfile):
         """Populate match statistics for the profile."""
         if self.matches_df is None or self.matches_df.empty:
             return
 
-        df = self.matches_df.copy()
-
-        # Find matches involving this athlete
-        name_pattern = profile.name.upper()
-
-        # Check for athlete in either position
-        athlete1_col = next((c for c in df.columns if 'athlete1' in c.lower() or 'athlete_1' in c.lower()), None)
-        athlete2_col = next((c for c in df.columns if 'athlete2' in c.lower() or 'athlete_2' in c.lower()), None)
-
+        athlete1_col, athlete2_col = find_athlete_columns(self.matches_df)
         if not athlete1_col or not athlete2_col:
             return
 
-        athlete_matches = df[
-            (df[athlete1_col].str.upper().str.contains(name_pattern, na=False)) |
-            (df[athlete2_col].str.upper().str.contains(name_pattern, na=False))
-        ]
+        # Fast path: exact name key in the grouped aggregation
+        scoring = self.get_scoring_table()
+        key = name_key(profile.name)
+        if key and key in scoring.index:
+            stats = scoring.loc[key]
+            profile.total_matches = int(stats['matches'])
+            if find_winner_column(self.matches_df):
+                profile.wins = int(stats['wins'])
+                profile.losses = int(stats['losses'])
+                profile.win_rate = float(stats['win_rate'])
+            if stats['scored_matches'] > 0:
+                profile.avg_points_scored = float(stats['avg_points_scored'])
+                profile.avg_points_conceded = float(stats['avg_points_conceded'])
+                profile.point_differential = float(stats['point_differential'])
+            return
+
+        # Fallback: partial name match against the parsed score columns
+        df = self.matches_df
+        name_pattern = profile.name.upper()
+
+        on_side_a = df[athlete1_col].str.upper().str.contains(name_pattern, regex=False, na=False)
+        on_side_b = df[athlete2_col].str.upper().str.contains(name_pattern, regex=False, na=False)
+        involved = (on_side_a | on_side_b).values
+        athlete_matches = df[involved]
 
         profile.total_matches = len(athlete_matches)
 
@@ -575,43 +715,25 @@ class ScoutingManager:
             return
 
         # Calculate wins/losses
-        winner_col = next((c for c in df.columns if 'winner' in c.lower()), None)
+        winner_col = find_winner_column(df)
         if winner_col:
             wins = athlete_matches[
-                athlete_matches[winner_col].str.upper().str.contains(name_pattern, na=False)
+                athlete_matches[winner_col].str.upper().str.contains(name_pattern, regex=False, na=False)
             ]
             profile.wins = len(wins)
             profile.losses = profile.total_matches - profile.wins
             profile.win_rate = profile.wins / profile.total_matches if profile.total_matches > 0 else 0.0
 
-        # Calculate points averages (if score data available)
-        score_col = next((c for c in df.columns if 'score' in c.lower()), None)
-        if score_col:
-            points_scored = []
-            points_conceded = []
+        # Calculate points averages from parsed scores
+        side_a = on_side_a.values[involved]
+        scored = np.where(side_a, athlete_matches['score_a'].values, athlete_matches['score_b'].values)
+        conceded = np.where(side_a, athlete_matches['score_b'].values, athlete_matches['score_a'].values)
+        valid = ~(np.isnan(scored) | np.isnan(conceded))
 
-            for _, row in athlete_matches.iterrows():
-                score = str(row.get(score_col, ''))
-                if '-' in score:
-                    try:
-                        parts = score.split('-')
-                        p1 = int(parts[0].strip())
-                        p2 = int(parts[1].strip())
-
-                        # Determine which side the athlete was on
-                        if name_pattern in str(row.get(athlete1_col, '')).upper():
-                            points_scored.append(p1)
-                            points_conceded.append(p2)
-                        else:
-                            points_scored.append(p2)
-                            points_conceded.append(p1)
-                    except (ValueError, IndexError):
-                        continue
-
-            if points_scored:
-                profile.avg_points_scored = np.mean(points_scored)
-                profile.avg_points_conceded = np.mean(points_conceded)
-                profile.point_differential = profile.avg_points_scored - profile.avg_points_conceded
+        if valid.any():
+            profile.avg_points_scored = float(scored[valid].mean())
+            profile.avg_points_conceded = float(conceded[valid].mean())
+            profile.point_differential = profile.avg_points_scored - profile.avg_points_conceded
 
     def _analyze_fighting_style(self, profile: OpponentProfile):
         """Analyze and classify fighting style."""
@@ -694,43 +816,32 @@ class ScoutingManager:
         if profile.country_code in ['KOR', 'IRI', 'CHN'] and profile.threat_level == ThreatLevel.MEDIUM:
             profile.threat_level = ThreatLevel.HIGH
 
+        # Elevate on an established match rating (results beat rank bands)
+        if profile.rating_bouts >= ESTABLISHED_BOUTS:
+            if profile.rating >= 1700 and profile.threat_level != ThreatLevel.CRITICAL:
+                profile.threat_level = ThreatLevel.CRITICAL if profile.rating >= 1800 else ThreatLevel.HIGH
+            elif profile.rating >= 1600 and profile.threat_level in [ThreatLevel.LOW, ThreatLevel.UNKNOWN]:
+                profile.threat_level = ThreatLevel.MEDIUM
+
     def _analyze_recent_form(self, profile: OpponentProfile):
         """Analyze recent form over last 6 months."""
-        if self.matches_df is None or self.matches_df.empty:
+        df = self._athlete_matches(profile.name)
+        if df.empty:
             return
 
-        df = self.matches_df.copy()
-
         # Filter to recent matches
-        date_col = next((c for c in df.columns if 'date' in c.lower()), None)
-        if date_col:
-            try:
-                df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-                six_months_ago = datetime.now() - timedelta(days=180)
-                df = df[df[date_col] >= six_months_ago]
-            except Exception:
-                pass
+        if 'match_date' in df.columns:
+            six_months_ago = datetime.now() - timedelta(days=180)
+            df = df[df['match_date'] >= six_months_ago]
 
-        # Find athlete's matches
-        name_pattern = profile.name.upper()
-        athlete1_col = next((c for c in df.columns if 'athlete1' in c.lower()), None)
-        athlete2_col = next((c for c in df.columns if 'athlete2' in c.lower()), None)
-        winner_col = next((c for c in df.columns if 'winner' in c.lower()), None)
-
-        if not all([athlete1_col, athlete2_col, winner_col]):
+        winner_col = find_winner_column(df)
+        if not winner_col:
             return
 
-        recent_matches = df[
-            (df[athlete1_col].str.upper().str.contains(name_pattern, na=False)) |
-            (df[athlete2_col].str.upper().str.contains(name_pattern, na=False))
-        ]
-
         # Build form string
-        for _, match in recent_matches.iterrows():
-            if name_pattern in str(match.get(winner_col, '')).upper():
-                profile.recent_form.append('W')
-            else:
-                profile.recent_form.append('L')
+        name_pattern = profile.name.upper()
+        is_win = df[winner_col].astype(str).str.upper().str.contains(name_pattern, regex=False, na=False)
+        profile.recent_form.extend(np.where(is_win.values, 'W', 'L').tolist())
 
         # Determine trend
         if len(profile.recent_form) >= 3:
@@ -744,46 +855,43 @@ class ScoutingManager:
 
     def _get_major_results(self, profile: OpponentProfile):
         """Get major competition results."""
-        if self.matches_df is None:
+        athlete_matches = self._athlete_matches(profile.name)
+        if athlete_matches.empty:
             return
 
-        df = self.matches_df.copy()
+        comp_col = next((c for c in athlete_matches.columns if 'competition' in c.lower()), None)
+        round_col = next((c for c in athlete_matches.columns if 'round' in c.lower()
+                          and not c.startswith('round') and 'athlete' not in c.lower()), None)
 
-        # Find athlete's matches in major events
-        name_pattern = profile.name.upper()
-        athlete1_col = next((c for c in df.columns if 'athlete1' in c.lower()), None)
-        athlete2_col = next((c for c in df.columns if 'athlete2' in c.lower()), None)
-        comp_col = next((c for c in df.columns if 'competition' in c.lower()), None)
-        round_col = next((c for c in df.columns if 'round' in c.lower()), None)
-
-        if not all([athlete1_col, athlete2_col, comp_col]):
+        if not comp_col:
             return
 
-        athlete_matches = df[
-            (df[athlete1_col].str.upper().str.contains(name_pattern, na=False)) |
-            (df[athlete2_col].str.upper().str.contains(name_pattern, na=False))
-        ]
-
         # Look for finals/semi-finals
-        major_keywords = ['olympic', 'world', 'grand prix', 'grand slam', 'asian']
-        finals_keywords = ['final', 'gold', 'bronze']
-
-        for _, match in athlete_matches.iterrows():
-            comp_name = str(match.get(comp_col, '')).lower()
-            round_stage = str(match.get(round_col, '')).lower() if round_col else ''
+        comp_names = athlete_matches[comp_col].astype(str).str.lower()
+        round_stages = athlete_matches[round_col].astype(str).str.lower() if round_col else pd.Series('', index=athlete_matches.index)
 
-            is_major = any(kw in comp_name for kw in major_keywords)
-            is_final = any(kw in round_stage for kw in finals_keywords) or any(kw in comp_name for kw in finals_keywords)
+        is_major = comp_names.str.contains('olympic|world|grand prix|grand slam|asian', regex=True, na=False)
+        is_final = (
+            round_stages.str.contains('final|gold|bronze', regex=True, na=False) |
+            comp_names.str.contains('final|gold|bronze', regex=True, na=False)
+        )
 
-            if is_major or is_final:
-                profile.major_results.append({
-                    'competition': match.get(comp_col, ''),
-                    'round': match.get(round_col, '') if round_col else '',
-                    'result': 'Final' if is_final else 'Major Event'
-                })
+        notable = athlete_matches[(is_major | is_final).values].head(5)
+        notable_final = is_final[(is_major | is_final).values].head(5).values
 
         # Limit to 5 most notable
-        profile.major_results = profile.major_results[:5]
+        profile.major_results = [
+            {
+                'competition': comp,
+                'round': rnd if round_col else '',
+                'result': 'Final' if final else 'Major Event'
+            }
+            for comp, rnd, final in zip(
+                notable[comp_col].tolist(),
+                notable[round_col].tolist() if round_col else [''] * len(notable),
+                notable_final
+            )
+        ]
 
     # =========================================================================
     # HEAD-TO-HEAD ANALYSIS
@@ -895,23 +1003,31 @@ class ScoutingManager:
         Returns:
             ScoutingReport with likely opponents and recommendations
         """
-        report = ScoutingReport(
-            athlete_id='',
-            athlete_name=athlete_name,
-            weight_category=weight_category,
-            competition=competition,
-            generated_date=datetime.now().isoformat()
-        )
-
         # Get likely opponents (top ranked in category)
         likely_opponents = self.get_category_rankings(weight_category, limit=10)
 
+        opponents = []
         for opp_data in likely_opponents:
             opp_name = opp_data.get('athlete_name', opp_data.get('NAME', ''))
             if opp_name.upper() != athlete_name.upper():  # Exclude the athlete themselves
                 profile = self.get_opponent_profile(athlete_name=opp_name)
                 if profile:
-                    report.likely_opponents.append(profile)
+                    opponents.append(profile)
+
+        return self._build_report(athlete_name, weight_category, competition, opponents)
+
+    def _build_report(self, athlete_name: str, weight_category: str,
+                      competition: str, opponents: List[OpponentProfile],
+                      draw: List[str] = None) -> ScoutingReport:
+        """Assemble a scouting report from already-built opponent profiles and an optional draw."""
+        report = ScoutingReport(
+            athlete_id='',
+            athlete_name=athlete_name,
+            weight_category=weight_category,
+            competition=competition,
+            generated_date=datetime.now().isoformat()
+        )
+        report.likely_opponents = list(opponents)
 
         # Identify key threats
         for opp in report.likely_opponents:
@@ -921,12 +1037,96 @@ class ScoutingManager:
         # Generate tactical recommendations
         report.recommendations = self._generate_recommendations(athlete_name, report.likely_opponents)
 
-        # Calculate medal probability (simplified)
-        report.medal_probability = self._calculate_medal_probability(athlete_name, weight_category)
-        report.gold_probability = report.medal_probability * 0.3  # Simplified estimate
+        # Medal and gold probability from the simulated seeded bracket
+        bracket = self.get_bracket_probabilities(athlete_name, weight_category, draw=draw)
+        report.medal_probability = bracket['p_medal'] if bracket else 0.0
+        report.gold_probability = bracket['p_gold'] if bracket else 0.0
 
         return report
 
+    def generate_batch_reports(self, weight_category: str = None,
+                               draw: List[str] = None,
+                               competition: str = "Upcoming Competition",
+                               limit: int = 32,
+                               opponents_per_report: int = 10,
+                               workers: int = None) -> Dict[str, ScoutingReport]:
+        """
+        Generate scouting reports for every athlete in a category or draw.
+
+        Each profile in the field is built once and shared by every report
+        that lists it, so a 32-athlete category costs 32 profiles rather
+        than 32 x 10. Profiles are built across a process pool when
+        workers > 1.
+
+        Args:
+            weight_category: Weight category (e.g., '-68kg'); field is its top `limit`
+            draw: Explicit list of athlete names (overrides the category field
+                and is the bracket simulated for medal probability)
+            competition: Competition name
+            limit: Field size taken from the category rankings
+            opponents_per_report: Likely opponents listed in each report
+            workers: Process pool size (None/1 = build in this process)
+
+        Returns:
+            Dict of athlete name -> ScoutingReport, in field order
+        """
+        if draw:
+            field_names = [n for n in draw if n]
+        elif weight_category:
+            field_names = [
+                a.get('athlete_name', a.get('NAME', ''))
+                for a in self.get_category_rankings(weight_category, limit=limit)
+            ]
+        else:
+            return {}
+
+        # Unique names in field order
+        field_names = list(dict.fromkeys(n for n in field_names if n))
+        profiles = self._build_profiles(field_names, workers)
+
+        reports = {}
+        for name in field_names:
+            category = weight_category or (profiles[name].weight_category if name in profiles else '')
+            opponents = [
+                profiles[other] for other in field_names
+                if other != name and other in profiles
+            ][:opponents_per_report]
+            reports[name] = self._build_report(name, category, competition, opponents,
+                                               draw=field_names if draw else None)
+
+        return reports
+
+    def _build_profiles(self, names: List[str], workers: int = None) -> Dict[str, OpponentProfile]:
+        """Build opponent profiles for a list of names, optionally in parallel."""
+        if not workers or workers <= 1 or len(names) < 2:
+            # Warm the shared indexes once before the loop
+            self.get_scoring_table()
+            self._get_match_index()
+            profiles = {}
+            for name in names:
+                profile = self.get_opponent_profile(athlete_name=name)
+                if profile:
+                    profiles[name] = profile
+            return profiles
+
+        # Ratings are updated and saved here once; workers only read them
+        self.get_rating_engine()
+
+        chunks = [names[i::workers] for i in range(workers) if names[i::workers]]
+        profiles = {}
+        with ProcessPoolExecutor(max_workers=len(chunks),
+                                 initializer=_init_profile_worker,
+                                 initargs=(str(self.data_dir),)) as pool:
+            for chunk_profiles in pool.map(_build_profiles_worker, chunks):
+                profiles.update(chunk_profiles)
+
+        # Keep the main-process cache warm for follow-up lookups
+        for name, profile in profiles.items():
+            self._profile_cache[f"{name}_None"] = profile
+
+        # Preserve field order
+        return {name: profiles[name] for name in names if name in profiles}
+
     def get_category_rankings(self, weight_category: str, limit: int = 20) -> List[Dict]:
         """Get top ranked athletes in a weight category."""
         if self.rankings_df is None:
@@ -986,35 +1186,116 @@ class ScoutingManager:
         return recommendations
 
     def _calculate_medal_probability(self, athlete_name: str, weight_category: str) -> float:
-        """Calculate simplified medal probability."""
-        # Find athlete's ranking
-        if self.rankings_df is None:
-            return 0.0
+        """Medal probability from the simulated seeded bracket."""
+        bracket = self.get_bracket_probabilities(athlete_name, weight_category)
+        return bracket['p_medal'] if bracket else 0.0
+
+    def simulate_category_bracket(self, weight_category: str, include: str = None,
+                                  size: int = BRACKET_SIZE,
+                                  n_trials: int = BRACKET_TRIALS,
+                                  draw: List[str] = None) -> pd.DataFrame:
+        """
+        Simulate a WT-seeded draw of the category's top-ranked athletes,
+        or of an explicit draw list seeded by world rank.
 
-        df = self.rankings_df.copy()
-        name_col = 'athlete_name' if 'athlete_name' in df.columns else 'NAME'
-        rank_col = 'rank' if 'rank' in df.columns else 'RANK'
+        Win probabilities come from the trained win probability model when
+        one is saved; otherwise from established match ratings, falling
+        back to the rating implied by world rank.
+
+        Args:
+            weight_category: Weight category (e.g., '-68kg')
+            include: Athlete who must be in the draw (takes the last seed
+                if ranked outside it)
+            size: Draw size
+            n_trials: Simulated tournaments
+            draw: Explicit athlete names (replaces the top-ranked field;
+                unranked entrants take the bottom seeds)
+
+        Returns:
+            DataFrame from BracketSimulator.simulate (empty without rankings)
+        """
+        if draw:
+            names = [n for n in draw if n]
+            entries = [self._find_athlete(athlete_name=n) for n in names]
+            ranks = [e.get('rank', e.get('RANK')) if e else None for e in entries]
+        else:
+            field = self.get_category_rankings(weight_category, limit=size)
+            names = [a.get('athlete_name', a.get('NAME', '')) for a in field]
+            ranks = [a.get('rank', a.get('RANK', i + 1)) for i, a in enumerate(field)]
+
+            if include and name_key(include) not in {name_key(n) for n in names}:
+                entry = self._find_athlete(athlete_name=include)
+                names = names[:size - 1] + [include]
+                ranks = ranks[:size - 1] + [entry.get('rank', entry.get('RANK', size)) if entry else size]
+
+        if len(names) < 2:
+            return pd.DataFrame()
+
+        rank_values = pd.to_numeric(pd.Series(ranks, dtype=object), errors='coerce')
+        if draw:
+            # Seed the given draw in world-rank order, unranked entrants last
+            rank_values = rank_values.fillna(max(size, rank_values.max(skipna=True) or 0) + 1).values
+            order = np.argsort(rank_values, kind='stable')
+            names = [names[i] for i in order]
+            rank_values = rank_values[order]
+        else:
+            rank_values = rank_values.fillna(size).values
 
-        athlete_data = df[df[name_col].str.upper().str.contains(athlete_name.upper(), na=False)]
+        engine = self.get_rating_engine()
+        implied = rank_to_rating(rank_values)
+        ratings = {
+            name: engine.get_rating(name) if engine.is_established(name) else float(implied[i])
+            for i, name in enumerate(names)
+        }
 
-        if athlete_data.empty:
-            return 0.0
+        # Duplicate names in the rankings share one entry in the draw
+        names = list(dict.fromkeys(names))
+        draw = seeded_draw(names)
 
-        rank = athlete_data.iloc[0].get(rank_col, 100)
+        model = self.get_win_model()
+        if model is not None:
+            matrix = model.pairwise_matrix(self.get_matchup_context(),
+                                           [n for n in draw if n], weight_category)
+            return BracketSimulator(draw, matrix).simulate(n_trials=n_trials)
+        return BracketSimulator.from_ratings(draw, ratings).simulate(n_trials=n_trials)
 
-        # Simple probability model based on rank
-        if rank <= 3:
-            return 0.70
-        elif rank <= 5:
-            return 0.55
-        elif rank <= 8:
-            return 0.40
-        elif rank <= 12:
-            return 0.25
-        elif rank <= 20:
-            return 0.15
-        else:
-            return 0.05
+    def get_bracket_probabilities(self, athlete_name: str, weight_category: str,
+                                  draw: List[str] = None) -> Optional[Dict]:
+        """
+        Medal, final and round-of-16 probabilities for an athlete.
+
+        Args:
+            athlete_name: Athlete name
+            weight_category: Weight category (e.g., '-68kg')
+            draw: Explicit draw to simulate instead of the category's top-ranked field
+
+        Returns:
+            Dict with p_gold, p_silver, p_bronze, p_medal, p_final, p_r16
+            (None if the athlete cannot be placed in a draw)
+        """
+        if self.rankings_df is None or not weight_category:
+            return None
+
+        cache_key = (weight_category, tuple(draw)) if draw else weight_category
+        if cache_key not in self._bracket_cache:
+            self._bracket_cache[cache_key] = self.simulate_category_bracket(weight_category, draw=draw)
+        result = self._bracket_cache[cache_key]
+
+        key = name_key(athlete_name)
+        match = result[result['athlete_name'].map(name_key) == key] if not result.empty else result
+        if match.empty and draw:
+            return None
+        if match.empty:
+            # Ranked outside the seeded field: simulate a draw including them
+            result = self.simulate_category_bracket(weight_category, include=athlete_name,
+                                                    n_trials=BRACKET_TRIALS // 5)
+            match = result[result['athlete_name'].map(name_key) == key] if not result.empty else result
+            if match.empty:
+                return None
+
+        row = match.iloc[0]
+        return {col: round(float(row[col]), 4)
+                for col in ['p_gold', 'p_silver', 'p_bronze', 'p_medal', 'p_final', 'p_r16']}
 
     # =========================================================================
     # UTILITY METHODS
@@ -1065,6 +1346,64 @@ class ScoutingManager:
         print(f"Scouting report saved: {output_path}")
         return str(output_path)
 
+    def export_batch_reports(self, reports: Dict[str, ScoutingReport],
+                             output_dir: str = 'reports/scouting',
+                             label: str = 'batch') -> Dict[str, str]:
+        """
+        Export a batch of scouting reports as one JSON file and one HTML bundle.
+
+        Args:
+            reports: Athlete name -> ScoutingReport (from generate_batch_reports)
+            output_dir: Output directory
+            label: File name label (e.g., weight category)
+
+        Returns:
+            Dict with 'json' and 'html' output paths
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        safe_label = label.replace(' ', '_').replace('+', 'plus')
+
+        json_path = output_dir / f"scouting_{safe_label}_{timestamp}.json"
+        html_path = output_dir / f"scouting_{safe_label}_{timestamp}.html"
+
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({name: r.to_dict() for name, r in reports.items()},
+                      f, indent=2, ensure_ascii=False)
+
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(render_report_bundle(reports, title=f"Scouting Reports - {label}"))
+
+        print(f"Batch scouting reports saved: {json_path}, {html_path}")
+        return {'json': str(json_path), 'html': str(html_path)}
+
+
+# =============================================================================
+# BATCH WORKERS
+# =============================================================================
+
+# Per-process manager for batch profile building (set by _init_profile_worker)
+_worker_scout: Optional[ScoutingManager] = None
+
+
+def _init_profile_worker(data_dir: str):
+    """Process pool initializer: load data and shared indexes once per worker."""
+    global _worker_scout
+    _worker_scout = ScoutingManager(data_dir, read_only=True)
+    _worker_scout.get_scoring_table()
+    _worker_scout._get_match_index()
+
+
+def _build_profiles_worker(names: List[str]) -> Dict[str, OpponentProfile]:
+    """Build profiles for a chunk of athlete names inside a worker process."""
+    profiles = {}
+    for name in names:
+        profile = _worker_scout.get_opponent_profile(athlete_name=name)
+        if profile:
+            profiles[name] = profile
+    return profiles
+
 
 # =============================================================================
 # STREAMLIT INTEGRATION
@@ -1146,13 +1485,59 @@ def render_opponent_card(profile: OpponentProfile) -> str:
         <div style="margin-top: 10px; padding-top: 10px; border-top: 1px solid #eee;">
             <span style="color: #666; font-size: 0.85em;">
                 Style: <strong style="color: {TEAL_DARK};">{profile.fighting_style.value}</strong> |
-                Trend: <strong style="color: {TEAL_DARK};">{profile.form_trend}</strong>
+                Trend: <strong style="color: {TEAL_DARK};">{profile.form_trend}</strong> |
+                Rating: <strong style="color: {TEAL_DARK};">{f"{profile.rating:.0f}" if profile.rating_bouts else "N/A"}</strong>
             </span>
         </div>
     </div>
     """
 
 
+def render_report_bundle(reports: Dict[str, ScoutingReport],
+                         title: str = "Scouting Reports") -> str:
+    """Render a batch of scouting reports as a single HTML document."""
+    # Each opponent card is rendered once even if it appears in many reports
+    cards: Dict[str, str] = {}
+    sections = []
+
+    for athlete_name, report in reports.items():
+        opponent_cards = []
+        for opp in report.likely_opponents:
+            if opp.name not in cards:
+                cards[opp.name] = render_opponent_card(opp)
+            opponent_cards.append(cards[opp.name])
+
+        threats_html = ''.join([f'<li>{t}</li>' for t in report.key_threats]) or '<li>None identified</li>'
+        recs_html = ''.join([f'<li>{r}</li>' for r in report.recommendations])
+
+        sections.append(f"""
+    <section style="page-break-after: always; margin-bottom: 40px;">
+        <h2 style="color: #1E5631; border-bottom: 2px solid #a08e66;">{athlete_name}</h2>
+        <p style="color: #666;">{report.weight_category} | {report.competition} |
+           Medal probability: {report.medal_probability:.0%} | Gold probability: {report.gold_probability:.0%}</p>
+        <h3>Key Threats</h3>
+        <ul>{threats_html}</ul>
+        <h3>Recommendations</h3>
+        <ul>{recs_html}</ul>
+        <h3>Likely Opponents</h3>
+        {''.join(opponent_cards)}
+    </section>""")
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+</head>
+<body style="font-family: 'Inter', sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px;">
+    <h1 style="color: #1E5631;">{title}</h1>
+    <p style="color: #666;">Generated {datetime.now().strftime('%Y-%m-%d %H:%M')} | {len(reports)} reports</p>
+    {''.join(sections)}
+</body>
+</html>
+"""
+
+
 # =============================================================================
 # MAIN (CLI Testing)
 # =============================================================================
@@ -10,17 +10,25 @@ Smart update system that:
 
 import sys
 import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# UTF-8 console output on Windows (other platforms already use UTF-8)
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
 import os
 import time
 import json
-import hashlib
 import pandas as pd
+import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 
+from row_hashes import (
+    row_hashes, table_fingerprint, diff_hashes, diff_summary, ranking_key_columns,
+    save_row_hashes, load_row_hashes
+)
+
 try:
     from selenium import webdriver
     from selenium.webdriver.common.by import By
@@ -33,6 +41,10 @@ except ImportError:
     exit(1)
 
 
+# Ranking columns kept in the scrape history for per-athlete change reports
+SNAPSHOT_RANKING_COLUMNS = ['NAME', 'RANK', 'POINTS', 'WEIGHT CATEGORY']
+
+
 class IncrementalScraperAgent:
     """
     Smart incremental scraper that only updates changed data
@@ -183,17 +195,99 @@ class IncrementalScraperAgent:
         return False, f"fresh (last: {days_since}d ago)"
 
     def hash_dataframe(self, df):
-        """Generate hash of dataframe content for change detection"""
-        # Sort to ensure consistent ordering
-        df_sorted = df.sort_values(by=df.columns.tolist()).reset_index(drop=True)
-        content = df_sorted.to_csv(index=False)
-        return hashlib.md5(content.encode()).hexdigest()
+        """Generate order-independent hash of dataframe content for change detection"""
+        return table_fingerprint(row_hashes(df), df.columns)
+
+    def hash_rows(self, df):
+        """Per-row key and content hashes (rankings keyed by athlete and category)"""
+        return row_hashes(df, ranking_key_columns(df))
+
+    def snapshot_summary(self, df):
+        """
+        Comparison state kept in .scrape_history.json for a category
+
+        Holds the table fingerprint, every row's key and content hash (packed
+        hex) and, for rankings, the NAME/RANK/POINTS columns needed for
+        per-athlete change reports, so the next run compares without opening
+        the previous CSV.
+        """
+        hashes = self.hash_rows(df)
+        summary = {
+            'fingerprint': table_fingerprint(hashes),
+            'rows': len(df),
+            'key_hash': hashes['key_hash'].values.astype('>u8').tobytes().hex(),
+            'row_hash': hashes['row_hash'].values.astype('>u8').tobytes().hex(),
+        }
+        if 'NAME' in df.columns and 'RANK' in df.columns:
+            summary['ranking'] = {
+                col: df[col].astype(object).where(df[col].notna(), None).tolist()
+                for col in SNAPSHOT_RANKING_COLUMNS if col in df.columns
+            }
+        return summary
+
+    @staticmethod
+    def stored_hashes(summary):
+        """Row hashes from a stored snapshot summary"""
+        return pd.DataFrame({
+            col: np.frombuffer(bytes.fromhex(summary[col]), dtype='>u8').astype(np.uint64)
+            for col in ('key_hash', 'row_hash')
+        })
 
     def detect_changes(self, new_df, category_key):
         """
         Detect what changed compared to previous scrape
+
+        Compares against the fingerprint and row hashes stored in
+        .scrape_history.json, so only the new page's data is hashed.
+        Categories last scraped before hashes were stored fall back to the
+        previous CSV.
         Returns: (is_changed, change_summary)
         """
+        new_hashes = self.hash_rows(new_df)
+
+        stored = self.metadata['categories'].get(category_key, {}).get('snapshot')
+        if stored:
+            try:
+                return self.compare_with_stored(stored, new_df, new_hashes)
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"  Stored snapshot unusable ({e}), comparing with previous file")
+
+        return self.compare_with_file(new_df, new_hashes, category_key)
+
+    def compare_with_stored(self, stored, new_df, new_hashes):
+        """Compare new data with the snapshot summary from the last scrape"""
+        if stored['fingerprint'] == table_fingerprint(new_hashes):
+            return False, {'type': 'unchanged', 'details': 'Identical data'}
+
+        prev_hashes = self.stored_hashes(stored)
+        changes = {
+            'type': 'changed',
+            'details': {
+                'row_changes': diff_summary(prev_hashes, new_hashes)
+            }
+        }
+
+        # Row count change
+        if len(new_df) != stored['rows']:
+            changes['details']['row_count'] = {
+                'old': stored['rows'],
+                'new': len(new_df),
+                'delta': len(new_df) - stored['rows']
+            }
+
+        # For rankings, compare only athletes whose row was added, removed or changed
+        if 'RANK' in new_df.columns and 'NAME' in new_df.columns and 'ranking' in stored:
+            touched = np.concatenate(list(diff_hashes(prev_hashes, new_hashes).values()))
+            prev_df = pd.DataFrame(stored['ranking'])
+            changes['details']['ranking_changes'] = self.detect_ranking_changes(
+                prev_df[np.isin(prev_hashes['key_hash'].values, touched)],
+                new_df[np.isin(new_hashes['key_hash'].values, touched)]
+            )
+
+        return True, changes
+
+    def compare_with_file(self, new_df, new_hashes, category_key):
+        """Compare new data with the latest previous CSV (legacy metadata)"""
         # Find latest previous file
         prev_files = list((self.output_dir / category_key).glob("*.csv"))
         if not prev_files:
@@ -203,19 +297,25 @@ class IncrementalScraperAgent:
         latest = max(prev_files, key=lambda p: p.stat().st_mtime)
 
         try:
-            prev_df = pd.read_csv(latest, encoding='utf-8-sig')
+            # Row hashes saved with the previous snapshot: identical data is
+            # detected without reading the previous CSV
+            prev_hashes = load_row_hashes(latest)
+            if prev_hashes is not None and table_fingerprint(prev_hashes) == table_fingerprint(new_hashes):
+                return False, {'type': 'unchanged', 'details': 'Identical data'}
 
-            # Quick hash comparison
-            new_hash = self.hash_dataframe(new_df)
-            prev_hash = self.hash_dataframe(prev_df)
+            prev_df = pd.read_csv(latest, encoding='utf-8-sig')
+            if prev_hashes is None:
+                prev_hashes = self.hash_rows(prev_df)
 
-            if new_hash == prev_hash:
+            if table_fingerprint(prev_hashes) == table_fingerprint(new_hashes):
                 return False, {'type': 'unchanged', 'details': 'Identical data'}
 
             # Detailed change detection
             changes = {
                 'type': 'changed',
-                'details': {}
+                'details': {
+                    'row_changes': diff_summary(prev_hashes, new_hashes)
+                }
             }
 
             # Row count change
@@ -430,10 +530,12 @@ class IncrementalScraperAgent:
                 print("  Skipping save - data unchanged")
 
                 # Update metadata but don't save file
+                previous = self.metadata['categories'].get(category_key, {})
                 self.metadata['categories'][category_key] = {
                     'last_scrape': datetime.now().isoformat(),
-                    'last_change': self.metadata['categories'].get(category_key, {}).get('last_change'),
-                    'status': 'unchanged'
+                    'last_change': previous.get('last_change'),
+                    'status': 'unchanged',
+                    'snapshot': previous.get('snapshot') or self.snapshot_summary(new_data)
                 }
                 return None
 
@@ -443,6 +545,11 @@ class IncrementalScraperAgent:
                 rc = change_info['details']['row_count']
                 print(f"    Rows: {rc['old']} → {rc['new']} ({rc['delta']:+d})")
 
+            if 'row_changes' in change_info.get('details', {}):
+                rc = change_info['details']['row_changes']
+                print(f"    Row hashes: {rc['added']} added, {rc['removed']} removed, "
+                      f"{rc['changed']} changed, {rc['unchanged']} unchanged")
+
             if 'ranking_changes' in change_info.get('details', {}):
                 rc = change_info['details']['ranking_changes']
                 if rc['new_entries']:
@@ -457,6 +564,7 @@ class IncrementalScraperAgent:
             filepath = self.output_dir / category_key / filename
 
             new_data.to_csv(filepath, index=False, encoding='utf-8-sig')
+            save_row_hashes(self.hash_rows(new_data), filepath)
             print(f"\n  ✓ SAVED: {filename} ({len(new_data)} rows)")
 
             # Update metadata
@@ -465,11 +573,15 @@ class IncrementalScraperAgent:
                 'last_change': datetime.now().isoformat(),
                 'rows': len(new_data),
                 'file': str(filepath),
-                'status': 'updated'
+                'status': 'updated',
+                'snapshot': self.snapshot_summary(new_data)
             }
 
             self.stats['categories_updated'] += 1
             self.stats['new_data_rows'] += len(new_data)
+            details = change_info.get('details')
+            if isinstance(details, dict) and 'row_changes' in details:
+                self.stats['changed_data_rows'] += details['row_changes']['added'] + details['row_changes']['changed']
             self.stats['changes_detected'].append({
                 'category': category_key,
                 'change_info': change_info
@@ -18,7 +18,6 @@ import sys
 import io
 import argparse
 import json
-import hashlib
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -28,8 +27,14 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
 import pandas as pd
+import numpy as np
 
 # Local imports
+from ranking_features import country_codes, find_column
+from row_hashes import row_hashes, table_fingerprint, diff_summary, ranking_key_columns, save_row_hashes
+from change_events import ChangeEventLog, ranking_events, RANKING_EVENT_TYPES
+from ranking_tracker import RankingHistoryTracker
+
 try:
     from blob_storage import (
         load_rankings, save_rankings, upload_parquet,
@@ -53,7 +58,16 @@ except ImportError:
 # CONFIGURATION
 # =============================================================================
 
-CHANGE_HISTORY_FILE = 'ranking_changes.json'
+# Event log subscriber that turns ranking events into the alert message
+ALERT_SUBSCRIBER = 'alerts'
+ALERT_FILE = 'alert_message.txt'
+
+# Countries whose athletes the alert rules watch
+FOCUS_COUNTRIES = ['KSA']
+
+# Storage mode of the local ranking history database ('full' or 'delta')
+RANKING_HISTORY_STORAGE = os.getenv('RANKING_HISTORY_STORAGE', 'full')
+
 ALERT_THRESHOLDS = {
     'ksa_rank_drop': 3,        # Alert if KSA athlete drops 3+ positions
     'ksa_rank_improve': 1,     # Alert on any improvement
@@ -63,6 +77,12 @@ ALERT_THRESHOLDS = {
 RIVAL_COUNTRIES = ['KOR', 'IRI', 'JOR', 'TUR', 'CHN', 'GBR', 'FRA', 'MEX', 'UAE', 'THA']
 ASIAN_RIVALS = ['KOR', 'IRI', 'JOR', 'CHN', 'JPN', 'UZB', 'THA', 'KAZ']
 
+# Athlete identity across snapshots; the upper-cased name when no id column
+ATHLETE_ID_COLUMNS = ('athlete_id', 'ATHLETE ID')
+
+DIFF_COLUMNS = ['athlete_key', 'athlete_name', 'country', 'weight_category', 'status',
+                'old_rank', 'new_rank', 'rank_change', 'old_points', 'new_points', 'points_change']
+
 
 # =============================================================================
 # SCRAPING FUNCTIONS
@@ -115,17 +135,194 @@ def _load_local_rankings_fallback() -> pd.DataFrame:
 # =============================================================================
 
 def compute_data_hash(df: pd.DataFrame) -> str:
-    """Compute hash of DataFrame for change detection."""
+    """Compute order-independent hash of DataFrame for change detection."""
     if df.empty:
         return ""
 
-    # Sort to ensure consistent hash
-    df_sorted = df.sort_values(by=list(df.columns)).reset_index(drop=True)
-    return hashlib.md5(df_sorted.to_json().encode()).hexdigest()
-
+    # Combines per-row hashes, so no sort or serialization of the frame
+    return table_fingerprint(row_hashes(df), df.columns)
+
+
+def compute_row_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-row key (athlete + category) and content hashes of a rankings frame."""
+    return row_hashes(df, ranking_key_columns(df))
+
+
+def _diff_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Ranked rows keyed for diffing, one per athlete and weight category."""
+    df = _normalize_columns(df.copy())
+    index = df.index
+
+    def text(col):
+        return df[col].fillna('').astype(str).str.strip() if col in df.columns else pd.Series('', index=index)
+
+    names = text('athlete_name')
+    key = names.str.upper()
+    id_col = find_column(df, *ATHLETE_ID_COLUMNS)
+    if id_col:
+        ids = text(id_col)
+        key = ('ID:' + ids).where(ids != '', key)
+
+    frame = pd.DataFrame({
+        'athlete_key': key.values,
+        'athlete_name': names.values,
+        'country': text('country').values,
+        'weight_category': text('weight_category').values,
+        'rank': pd.to_numeric(df['rank'], errors='coerce').values if 'rank' in df.columns else np.nan,
+        'points': pd.to_numeric(df['points'], errors='coerce').values if 'points' in df.columns else np.nan,
+    })
+    frame = frame[frame['rank'].notna() & (frame['athlete_key'] != '')]
+    return frame.drop_duplicates(['athlete_key', 'weight_category'], keep='first')
+
+
+def diff_rankings(old_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keyed diff of two ranking snapshots over the whole field.
+
+    One outer merge on (athlete, weight category) gives every athlete's
+    rank and points deltas; an athlete who left one category and appeared
+    in another is a category move rather than an exit plus an entry.
+
+    Args:
+        old_df: Previous rankings (raw or normalized column names)
+        new_df: Current rankings
+
+    Returns:
+        DataFrame with DIFF_COLUMNS, one row per athlete and category.
+        status is 'entry', 'exit', 'moved_in', 'moved_out', 'changed' or
+        'unchanged'; rank_change is positive for an improvement.
+    """
+    old = _diff_frame(old_df)
+    new = _diff_frame(new_df)
+
+    merged = old.merge(new, on=['athlete_key', 'weight_category'], how='outer',
+                       suffixes=('_old', '_new'), indicator=True)
+    exits = (merged['_merge'] == 'left_only').values
+    entries = (merged['_merge'] == 'right_only').values
+
+    rank_change = merged['rank_old'] - merged['rank_new']
+    points_change = merged['points_new'] - merged['points_old']
+    points_moved = points_change.fillna(0).ne(0) | (merged['points_old'].isna() != merged['points_new'].isna())
+    changed = ~exits & ~entries & (rank_change.ne(0) | points_moved).values
+
+    # Category moves: the same athlete exits one category and enters another
+    keys = merged['athlete_key']
+    moved = keys.isin(set(keys[exits]) & set(keys[entries])).values
+
+    status = np.select(
+        [exits & moved, entries & moved, exits, entries, changed],
+        ['moved_out', 'moved_in', 'exit', 'entry', 'changed'],
+        'unchanged',
+    )
 
-def detect_ranking_changes(old_df: pd.DataFrame, new_df: pd.DataFrame) -> Dict:
-    """Detect significant ranking changes between two snapshots."""
+    diff = pd.DataFrame({
+        'athlete_key': keys.values,
+        'athlete_name': merged['athlete_name_new'].fillna(merged['athlete_name_old']).values,
+        'country': merged['country_new'].fillna(merged['country_old']).values,
+        'weight_category': merged['weight_category'].values,
+        'status': status,
+        'old_rank': merged['rank_old'].values,
+        'new_rank': merged['rank_new'].values,
+        'rank_change': rank_change.values,
+        'old_points': merged['points_old'].values,
+        'new_points': merged['points_new'].values,
+        'points_change': points_change.values,
+    })
+    return diff[DIFF_COLUMNS]
+
+
+def category_moves(diff: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pair each athlete's moved_out and moved_in rows.
+
+    Returns:
+        DataFrame with athlete_name, country, from_category, to_category,
+        old_rank and new_rank
+    """
+    out = diff[diff['status'] == 'moved_out'][['athlete_key', 'weight_category', 'old_rank']]
+    into = diff[diff['status'] == 'moved_in'][['athlete_key', 'athlete_name', 'country',
+                                               'weight_category', 'new_rank']]
+    moves = out.merge(into, on='athlete_key', suffixes=('_from', '_to'))
+    return moves.rename(columns={'weight_category_from': 'from_category',
+                                 'weight_category_to': 'to_category'})[
+        ['athlete_name', 'country', 'from_category', 'to_category', 'old_rank', 'new_rank']]
+
+
+def find_rival_overtakes(diff: pd.DataFrame, focus: pd.Series,
+                         rivals: List[str] = None) -> List[Dict]:
+    """
+    Rivals who moved from behind to ahead of a focus athlete.
+
+    Per weight category, rivals ranked in both snapshots are sorted by old
+    rank; for each focus athlete a binary search finds the rivals who were
+    behind, and one comparison on their new ranks finds who passed.
+
+    Args:
+        diff: Output of diff_rankings
+        focus: Boolean mask over diff rows for the athletes to protect (KSA)
+        rivals: Rival country codes (default RIVAL_COUNTRIES)
+
+    Returns:
+        List of overtake dicts, biggest rank swing first
+    """
+    rivals = rivals or RIVAL_COUNTRIES
+    ranked = diff['status'].isin(['changed', 'unchanged']).values
+    focus = focus.values & ranked
+    is_rival = country_codes(diff['country']).isin(rivals).values & ranked & ~focus
+
+    old_rank = diff['old_rank'].values
+    new_rank = diff['new_rank'].values
+    categories = diff['weight_category'].values
+
+    # Rival row positions per category, ordered by old rank
+    rival_rows = np.flatnonzero(is_rival)
+    rival_rows = rival_rows[np.lexsort((old_rank[rival_rows], categories[rival_rows]))]
+    rival_groups = {cat: rival_rows[categories[rival_rows] == cat]
+                    for cat in np.unique(categories[rival_rows])}
+
+    pairs_focus, pairs_rival = [], []
+    for row in np.flatnonzero(focus):
+        field = rival_groups.get(categories[row])
+        if field is None:
+            continue
+        behind = np.searchsorted(old_rank[field], old_rank[row], side='right')
+        passed = field[behind:][new_rank[field[behind:]] < new_rank[row]]
+        pairs_focus.append(np.full(len(passed), row))
+        pairs_rival.append(passed)
+
+    if not pairs_focus:
+        return []
+    athlete = diff.iloc[np.concatenate(pairs_focus)].reset_index(drop=True)
+    rival = diff.iloc[np.concatenate(pairs_rival)].reset_index(drop=True)
+
+    overtakes = pd.DataFrame({
+        'athlete': athlete['athlete_name'],
+        'category': athlete['weight_category'],
+        'old_rank': athlete['old_rank'].astype(int),
+        'new_rank': athlete['new_rank'].astype(int),
+        'rival': rival['athlete_name'],
+        'rival_country': rival['country'],
+        'rival_old_rank': rival['old_rank'].astype(int),
+        'rival_new_rank': rival['new_rank'].astype(int),
+    })
+    swing = overtakes['rival_old_rank'] - overtakes['rival_new_rank']
+    return overtakes.iloc[np.argsort(-swing.values, kind='stable')].to_dict('records')
+
+
+def detect_ranking_changes(old_df: pd.DataFrame, new_df: pd.DataFrame,
+                           diff: pd.DataFrame = None) -> Dict:
+    """
+    Detect significant ranking changes between two snapshots.
+
+    Diffs the whole field in one pass (diff_rankings) and reports KSA
+    improvements, drops, entries, exits and category moves, plus rivals
+    overtaking KSA athletes in their category.
+
+    Args:
+        old_df: Previous rankings
+        new_df: Current rankings
+        diff: diff_rankings(old_df, new_df) if already computed
+    """
     changes = {
         'timestamp': datetime.now().isoformat(),
         'ksa_improvements': [],
@@ -133,6 +330,7 @@ def detect_ranking_changes(old_df: pd.DataFrame, new_df: pd.DataFrame) -> Dict:
         'rival_overtakes': [],
         'new_entries': [],
         'dropped_out': [],
+        'category_moves': [],
         'summary': {}
     }
 
@@ -140,74 +338,64 @@ def detect_ranking_changes(old_df: pd.DataFrame, new_df: pd.DataFrame) -> Dict:
         changes['summary']['status'] = 'insufficient_data'
         return changes
 
-    # Normalize column names
-    old_df = _normalize_columns(old_df.copy())
-    new_df = _normalize_columns(new_df.copy())
-
-    # Get Saudi athletes
-    old_saudi = old_df[old_df['country'].str.upper().str.contains('KSA|SAUDI', na=False)]
-    new_saudi = new_df[new_df['country'].str.upper().str.contains('KSA|SAUDI', na=False)]
-
-    # Check each Saudi athlete
-    for _, new_row in new_saudi.iterrows():
-        athlete_name = new_row.get('athlete_name', '')
-        new_rank = pd.to_numeric(new_row.get('rank'), errors='coerce')
-
-        if pd.isna(new_rank):
-            continue
-
-        # Find in old data
-        old_match = old_saudi[old_saudi['athlete_name'] == athlete_name]
-
-        if old_match.empty:
-            changes['new_entries'].append({
-                'athlete': athlete_name,
-                'category': new_row.get('weight_category', ''),
-                'new_rank': int(new_rank)
-            })
-        else:
-            old_rank = pd.to_numeric(old_match.iloc[0].get('rank'), errors='coerce')
-            if pd.notna(old_rank):
-                rank_change = int(old_rank - new_rank)  # Positive = improvement
-
-                if rank_change > 0:  # Improved
-                    changes['ksa_improvements'].append({
-                        'athlete': athlete_name,
-                        'category': new_row.get('weight_category', ''),
-                        'old_rank': int(old_rank),
-                        'new_rank': int(new_rank),
-                        'change': rank_change
-                    })
-                elif rank_change < -ALERT_THRESHOLDS['ksa_rank_drop']:  # Dropped significantly
-                    changes['ksa_drops'].append({
-                        'athlete': athlete_name,
-                        'category': new_row.get('weight_category', ''),
-                        'old_rank': int(old_rank),
-                        'new_rank': int(new_rank),
-                        'change': rank_change
-                    })
-
-    # Check for dropped athletes
-    for _, old_row in old_saudi.iterrows():
-        athlete_name = old_row.get('athlete_name', '')
-        if athlete_name not in new_saudi['athlete_name'].values:
-            changes['dropped_out'].append({
-                'athlete': athlete_name,
-                'category': old_row.get('weight_category', ''),
-                'last_rank': int(pd.to_numeric(old_row.get('rank'), errors='coerce') or 0)
-            })
+    if diff is None:
+        diff = diff_rankings(old_df, new_df)
+    is_ksa = diff['country'].str.upper().str.contains('KSA|SAUDI', na=False)
+    ksa = diff[is_ksa]
+
+    def records(frame: pd.DataFrame, columns: Dict[str, str]) -> List[Dict]:
+        frame = frame.rename(columns=columns)[list(columns.values())]
+        for col in frame.columns:
+            if col.endswith('rank') or col == 'change':
+                frame[col] = frame[col].astype(int)
+        return frame.to_dict('records')
+
+    ranked = ksa[ksa['status'].isin(['changed', 'unchanged'])]
+    improved = ranked[ranked['rank_change'] > 0].sort_values('rank_change', ascending=False)
+    dropped = ranked[ranked['rank_change'] < -ALERT_THRESHOLDS['ksa_rank_drop']].sort_values('rank_change')
+
+    rank_columns = {'athlete_name': 'athlete', 'weight_category': 'category',
+                    'old_rank': 'old_rank', 'new_rank': 'new_rank', 'rank_change': 'change'}
+    changes['ksa_improvements'] = records(improved, rank_columns)
+    changes['ksa_drops'] = records(dropped, rank_columns)
+    changes['new_entries'] = records(
+        ksa[ksa['status'] == 'entry'],
+        {'athlete_name': 'athlete', 'weight_category': 'category', 'new_rank': 'new_rank'})
+    changes['dropped_out'] = records(
+        ksa[ksa['status'] == 'exit'],
+        {'athlete_name': 'athlete', 'weight_category': 'category', 'old_rank': 'last_rank'})
+    changes['category_moves'] = records(
+        category_moves(ksa),
+        {'athlete_name': 'athlete', 'from_category': 'from_category', 'to_category': 'to_category',
+         'old_rank': 'old_rank', 'new_rank': 'new_rank'})
+
+    if ALERT_THRESHOLDS['rival_overtake']:
+        changes['rival_overtakes'] = find_rival_overtakes(diff, is_ksa)
+
+    status_counts = diff['status'].value_counts()
 
     # Summary
     changes['summary'] = {
-        'total_ksa_athletes': len(new_saudi),
+        'total_ksa_athletes': int((~ksa['status'].isin(['exit', 'moved_out'])).sum()),
         'improvements': len(changes['ksa_improvements']),
         'drops': len(changes['ksa_drops']),
         'new_entries': len(changes['new_entries']),
         'dropped_out': len(changes['dropped_out']),
+        'category_moves': len(changes['category_moves']),
+        'rival_overtakes': len(changes['rival_overtakes']),
+        'field': {
+            'athletes': int((~diff['status'].isin(['exit', 'moved_out'])).sum()),
+            'changed': int(status_counts.get('changed', 0)),
+            'entries': int(status_counts.get('entry', 0)),
+            'exits': int(status_counts.get('exit', 0)),
+            'category_moves': int(status_counts.get('moved_in', 0)),
+        },
         'has_significant_changes': (
             len(changes['ksa_improvements']) > 0 or
             len(changes['ksa_drops']) > 0 or
-            len(changes['new_entries']) > 0
+            len(changes['new_entries']) > 0 or
+            len(changes['rival_overtakes']) > 0 or
+            len(changes['category_moves']) > 0
         )
     }
 
@@ -247,19 +435,21 @@ def sync_rankings(check_only: bool = False) -> Dict:
         'timestamp': datetime.now().isoformat(),
         'records_scraped': 0,
         'changes': None,
+        'events': [],
         'uploaded': False,
+        'trend_rows': 0,
         'alerts_sent': False,
         'error': None
     }
 
     try:
         # Step 1: Load previous data from Azure
-        print("\n[1/4] Loading previous rankings from Azure...")
+        print("\n[1/5] Loading previous rankings from Azure...")
         old_rankings = load_rankings() if BLOB_STORAGE_AVAILABLE else pd.DataFrame()
         print(f"Previous records: {len(old_rankings):,}")
 
         # Step 2: Scrape new rankings
-        print("\n[2/4] Scraping current rankings...")
+        print("\n[2/5] Scraping current rankings...")
         new_rankings = scrape_rankings()
         result['records_scraped'] = len(new_rankings)
         print(f"New records: {len(new_rankings):,}")
@@ -270,21 +460,32 @@ def sync_rankings(check_only: bool = False) -> Dict:
             return result
 
         # Step 3: Detect changes
-        print("\n[3/4] Detecting changes...")
-        changes = detect_ranking_changes(old_rankings, new_rankings)
+        print("\n[3/5] Detecting changes...")
+        diff = diff_rankings(old_rankings, new_rankings) if not old_rankings.empty else None
+        changes = detect_ranking_changes(old_rankings, new_rankings, diff=diff)
+        new_hashes = compute_row_hashes(new_rankings)
+        changes['summary']['row_changes'] = diff_summary(compute_row_hashes(old_rankings), new_hashes)
+        result['data_hash'] = compute_data_hash(new_rankings)
         result['changes'] = changes
 
         print(f"  KSA Improvements: {changes['summary'].get('improvements', 0)}")
         print(f"  KSA Drops: {changes['summary'].get('drops', 0)}")
         print(f"  New Entries: {changes['summary'].get('new_entries', 0)}")
+        print(f"  Rival Overtakes: {changes['summary'].get('rival_overtakes', 0)}")
+        row_changes = changes['summary']['row_changes']
+        print(f"  Rows: {row_changes['added']} added, {row_changes['removed']} removed, "
+              f"{row_changes['changed']} changed, {row_changes['unchanged']} unchanged")
+
+        events = ranking_events(diff, category_moves(diff), changes['rival_overtakes']) if diff is not None else []
 
         if check_only:
             print("\n[CHECK ONLY MODE - not uploading]")
+            result['events'] = [dict(e, batch=changes['timestamp']) for e in events]
             result['success'] = True
             return result
 
         # Step 4: Upload to Azure
-        print("\n[4/4] Uploading to Azure Blob Storage...")
+        print("\n[4/5] Uploading to Azure Blob Storage...")
         if BLOB_STORAGE_AVAILABLE and _use_azure():
             result['uploaded'] = save_rankings(new_rankings, create_history=True)
             print(f"Upload: {'SUCCESS' if result['uploaded'] else 'FAILED'}")
@@ -294,12 +495,24 @@ def sync_rankings(check_only: bool = False) -> Dict:
             output_dir.mkdir(parents=True, exist_ok=True)
 
             timestamp = datetime.now().strftime('%Y%m%d')
-            new_rankings.to_csv(output_dir / f'rankings_{timestamp}.csv', index=False)
+            snapshot_path = output_dir / f'rankings_{timestamp}.csv'
+            new_rankings.to_csv(snapshot_path, index=False)
+            save_row_hashes(new_hashes, snapshot_path)
             new_rankings.to_parquet(output_dir / 'world_rankings_latest.parquet', index=False)
             result['uploaded'] = True
 
-        # Save change history
-        _save_change_history(changes)
+        # Publish the changes for alert rules, dashboard caches, etc.
+        result['events'] = ChangeEventLog().append(events, batch=changes['timestamp'])
+        print(f"Change events logged: {len(result['events'])}")
+
+        # Step 5: Ranking history and the materialized trend table
+        print("\n[5/5] Updating ranking history and trends...")
+        try:
+            tracker = RankingHistoryTracker(storage=RANKING_HISTORY_STORAGE)
+            tracker.record_current_rankings(new_rankings, source_file='sync_rankings')
+            result['trend_rows'] = tracker.refresh_trend_table()
+        except Exception as e:
+            print(f"Warning: ranking history not updated: {e}")
 
         result['success'] = True
         print("\n" + "=" * 60)
@@ -315,63 +528,76 @@ def sync_rankings(check_only: bool = False) -> Dict:
     return result
 
 
-def _save_change_history(changes: Dict):
-    """Append changes to history file."""
-    history_file = Path(CHANGE_HISTORY_FILE)
-
-    history = []
-    if history_file.exists():
-        try:
-            with open(history_file, 'r') as f:
-                history = json.load(f)
-        except:
-            history = []
-
-    history.append(changes)
-
-    # Keep last 100 entries
-    history = history[-100:]
-
-    with open(history_file, 'w') as f:
-        json.dump(history, f, indent=2)
-
-    print(f"Change history saved: {history_file}")
-
-
 # =============================================================================
 # ALERT OUTPUT (for GitHub Actions)
 # =============================================================================
 
-def generate_alert_output(changes: Dict) -> str:
-    """Generate alert message for GitHub Actions output."""
-    if not changes or not changes.get('summary', {}).get('has_significant_changes'):
+def alert_events(events: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Apply the alert rules to ranking events.
+
+    Returns:
+        Alert-worthy events by section: improvements, drops, new_entries,
+        overtakes and category_moves
+    """
+    focus = [e for e in events if e.get('country_code') in FOCUS_COUNTRIES]
+    ranked = [e for e in focus if e['type'] == 'rank_change' and e.get('change') is not None]
+    return {
+        'improvements': sorted((e for e in ranked if e['change'] >= ALERT_THRESHOLDS['ksa_rank_improve']),
+                               key=lambda e: -e['change']),
+        'drops': sorted((e for e in ranked if e['change'] < -ALERT_THRESHOLDS['ksa_rank_drop']),
+                        key=lambda e: e['change']),
+        'new_entries': [e for e in focus if e['type'] == 'new_entry'],
+        'overtakes': [e for e in events if e['type'] == 'overtake'] if ALERT_THRESHOLDS['rival_overtake'] else [],
+        'category_moves': [e for e in focus if e['type'] == 'category_move'],
+    }
+
+
+def generate_alert_output(events: List[Dict]) -> str:
+    """Generate alert message for GitHub Actions output from ranking events."""
+    alerts = alert_events(events or [])
+    if not any(alerts.values()):
         return ""
 
     lines = [
         "🥋 TAEKWONDO RANKING ALERT - KSA",
         "",
-        f"Sync Time: {changes.get('timestamp', 'Unknown')}",
+        f"Sync Time: {events[-1].get('batch', 'Unknown')}",
         ""
     ]
 
-    if changes.get('ksa_improvements'):
+    if alerts['improvements']:
         lines.append("✅ IMPROVEMENTS:")
-        for imp in changes['ksa_improvements']:
+        for imp in alerts['improvements']:
             lines.append(f"  • {imp['athlete']} ({imp['category']}): #{imp['old_rank']} → #{imp['new_rank']} (+{imp['change']})")
         lines.append("")
 
-    if changes.get('ksa_drops'):
+    if alerts['drops']:
         lines.append("⚠️ DROPS:")
-        for drop in changes['ksa_drops']:
+        for drop in alerts['drops']:
             lines.append(f"  • {drop['athlete']} ({drop['category']}): #{drop['old_rank']} → #{drop['new_rank']} ({drop['change']})")
         lines.append("")
 
-    if changes.get('new_entries'):
+    if alerts['new_entries']:
         lines.append("🆕 NEW ENTRIES:")
-        for entry in changes['new_entries']:
+        for entry in alerts['new_entries']:
             lines.append(f"  • {entry['athlete']} ({entry['category']}): #{entry['new_rank']}")
         lines.append("")
 
+    if alerts['overtakes']:
+        lines.append("🔻 OVERTAKEN BY RIVALS:")
+        for o in alerts['overtakes']:
+            lines.append(f"  • {o['rival']} ({o['rival_country']}) passed {o['athlete']} in {o['category']}: "
+                         f"#{o['rival_old_rank']} → #{o['rival_new_rank']} (vs #{o['new_rank']})")
+        lines.append("")
+
+    if alerts['category_moves']:
+        lines.append("↔️ CATEGORY MOVES:")
+        for move in alerts['category_moves']:
+            lines.append(f"  • {move['athlete']}: {move['from_category']} #{move['old_rank']} → "
+                         f"{move['to_category']} #{move['new_rank']}")
+        lines.append("")
+
     lines.extend([
         "---",
         "Saudi Taekwondo Analytics | Automated Sync"
@@ -380,6 +606,21 @@ def generate_alert_output(changes: Dict) -> str:
     return "\n".join(lines)
 
 
+def write_alert(events: List[Dict]):
+    """Alert subscriber: print the alert message and save it for the next workflow step."""
+    alert_msg = generate_alert_output(events)
+    if not alert_msg:
+        return
+
+    print("\n" + "-" * 60)
+    print("ALERT MESSAGE:")
+    print("-" * 60)
+    print(alert_msg)
+
+    with open(ALERT_FILE, 'w') as f:
+        f.write(alert_msg)
+
+
 def set_github_output(name: str, value: str):
     """Set GitHub Actions output variable."""
     github_output = os.getenv('GITHUB_OUTPUT')
@@ -431,17 +672,13 @@ def main():
         result.get('changes', {}).get('summary', {}).get('has_significant_changes', False)
     ).lower())
 
-    if result.get('changes'):
-        alert_msg = generate_alert_output(result['changes'])
-        if alert_msg:
-            print("\n" + "-" * 60)
-            print("ALERT MESSAGE:")
-            print("-" * 60)
-            print(alert_msg)
-
-            # Save alert for next workflow step
-            with open('alert_message.txt', 'w') as f:
-                f.write(alert_msg)
+    # Alert rules read the ranking events logged since their last offset, so
+    # events from a run whose alert step failed are still reported (in CI the
+    # log and offsets carry over through blob_storage.download_state/upload_state)
+    if args.check_only:
+        write_alert(result['events'])
+    elif result['success']:
+        ChangeEventLog().consume(ALERT_SUBSCRIBER, write_alert, types=RANKING_EVENT_TYPES)
 
     # Exit with appropriate code
     sys.exit(0 if result['success'] else 1)
@@ -0,0 +1,100 @@
+"""
+Tests for the change event log (change_events.ChangeEventLog)
+
+Run with: python -m pytest -q test_change_events.py
+"""
+
+import pytest
+
+from change_events import ChangeEventLog
+
+
+def _events(n, event_type='rank_change'):
+    return [{'type': event_type, 'athlete': f'Athlete {i}', 'change': i} for i in range(n)]
+
+
+@pytest.fixture
+def log(tmp_path):
+    return ChangeEventLog(str(tmp_path / 'events'), segment_events=4)
+
+
+def test_segments_roll_over_at_the_segment_size(log):
+    log.append(_events(3))
+    log.append(_events(6))   # fills the first segment, then spills into two more
+
+    starts = [start for start, _ in log.segments()]
+    assert starts == [0, 4, 8]
+    assert [sum(1 for _ in open(path)) for _, path in log.segments()] == [4, 4, 1]
+    assert log.next_offset == 9
+    assert [e['offset'] for e in log.read()] == list(range(9))
+
+
+def test_read_since_offset_skips_earlier_segments(log):
+    log.append(_events(10))
+
+    events = log.read(since=5)
+    assert [e['offset'] for e in events] == [6, 7, 8, 9]
+    assert [e['offset'] for e in log.read(since=5, limit=2)] == [6, 7]
+
+
+def test_append_rejects_unknown_event_types(log):
+    with pytest.raises(ValueError):
+        log.append([{'type': 'not_an_event'}])
+    assert log.next_offset == 0
+
+
+def test_consume_commits_offset_after_handler(log):
+    log.append(_events(5))
+    seen = []
+
+    assert log.consume('alerts', seen.extend) == 5
+    assert log.get_offset('alerts') == 4
+
+    # Nothing new: handler not called, offset unchanged
+    assert log.consume('alerts', seen.extend) == 0
+    assert len(seen) == 5
+
+    log.append(_events(2))
+    assert log.consume('alerts', seen.extend) == 2
+    assert [e['offset'] for e in seen] == list(range(7))
+    assert log.get_offset('alerts') == 6
+
+
+def test_failed_handler_does_not_commit(log):
+    log.append(_events(3))
+
+    def fail(events):
+        raise RuntimeError('alert step failed')
+
+    with pytest.raises(RuntimeError):
+        log.consume('alerts', fail)
+    assert log.get_offset('alerts') == -1
+
+    seen = []
+    assert log.consume('alerts', seen.extend) == 3
+
+
+def test_type_filter_still_advances_offset(log):
+    log.append(_events(2) + _events(2, 'match_added'))
+    seen = []
+
+    assert log.consume('ratings', seen.extend, types=['match_added']) == 2
+    assert {e['type'] for e in seen} == {'match_added'}
+    assert log.get_offset('ratings') == 3
+
+
+def test_subscribers_keep_separate_offsets_across_instances(log, tmp_path):
+    log.append(_events(4))
+    log.consume('alerts', lambda events: None)
+
+    # A fresh instance (next run) reads the committed offsets from disk
+    reopened = ChangeEventLog(str(tmp_path / 'events'), segment_events=4)
+    reopened.append(_events(1))
+    assert reopened.get_offset('alerts') == 3
+    assert reopened.get_offset('dashboard') == -1
+
+    seen = []
+    reopened.subscribe('alerts', seen.extend)
+    reopened.subscribe('dashboard', lambda events: None)
+    assert reopened.dispatch() == {'alerts': 1, 'dashboard': 5}
+    assert [e['offset'] for e in seen] == [4]
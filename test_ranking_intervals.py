@@ -0,0 +1,94 @@
+"""
+Tests for the delta ranking history (ranking_intervals + RankingHistoryTracker)
+
+Run with: python -m pytest -q test_ranking_intervals.py
+"""
+
+import pandas as pd
+import pytest
+
+from ranking_tracker import RankingHistoryTracker, detect_storage
+from ranking_intervals import encode_intervals, intervals_at
+
+
+def _rankings(rows):
+    return pd.DataFrame(rows, columns=['athlete_name', 'country', 'weight_category', 'rank', 'points'])
+
+
+# Three weekly snapshots: a rank swap, an exit and return, a category move
+SNAPSHOTS = {
+    '2025-01-06': _rankings([
+        ('Kim A', 'KOR', 'M-68kg', 1, 400.0),
+        ('Ali B', 'KSA', 'M-68kg', 2, 350.0),
+        ('Ruiz C', 'MEX', 'M-68kg', 3, 300.0),
+        ('Lee D', 'KOR', 'M-58kg', 1, 380.0),
+    ]),
+    '2025-01-13': _rankings([
+        ('Ali B', 'KSA', 'M-68kg', 1, 420.0),
+        ('Kim A', 'KOR', 'M-68kg', 2, 400.0),
+        ('Lee D', 'KOR', 'M-58kg', 1, 380.0),
+    ]),
+    '2025-01-20': _rankings([
+        ('Ali B', 'KSA', 'M-68kg', 1, 420.0),
+        ('Kim A', 'KOR', 'M-68kg', 2, 390.0),
+        ('Ruiz C', 'MEX', 'M-68kg', 3, 300.0),
+        ('Lee D', 'KOR', 'M-63kg', 4, 200.0),
+    ]),
+}
+
+QUERY_DATES = ['2025-01-01', '2025-01-06', '2025-01-10', '2025-01-13',
+               '2025-01-19', '2025-01-20', '2025-06-30']
+
+
+def _sorted(df):
+    return df.sort_values(['weight_category', 'rank', 'athlete_name']).reset_index(drop=True)
+
+
+@pytest.fixture
+def trackers(tmp_path):
+    """Full and delta trackers fed the same snapshots, the delta one out of order."""
+    full = RankingHistoryTracker(str(tmp_path / 'full.db'), storage='full')
+    delta = RankingHistoryTracker(str(tmp_path / 'delta.db'), storage='delta')
+
+    for date in sorted(SNAPSHOTS):
+        full.record_current_rankings(SNAPSHOTS[date], date=date)
+    for date in ['2025-01-20', '2025-01-06', '2025-01-13', '2025-01-13']:
+        delta.record_current_rankings(SNAPSHOTS[date], date=date)
+
+    yield full, delta
+    full.close()
+    delta.close()
+
+
+def test_delta_snapshot_matches_full_with_out_of_order_inserts(trackers):
+    full, delta = trackers
+    for date in QUERY_DATES:
+        expected = _sorted(full.get_snapshot(date))
+        actual = _sorted(delta.get_snapshot(date))
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, obj=f'snapshot {date}')
+
+
+def test_delta_history_matches_full(trackers):
+    full, delta = trackers
+    columns = ['date', 'athlete_name', 'weight_category', 'rank', 'points']
+    expected = full.get_history()[columns].sort_values(columns[:3]).reset_index(drop=True)
+    actual = delta.get_history()[columns].sort_values(columns[:3]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_detect_storage(trackers, tmp_path):
+    assert detect_storage(str(tmp_path / 'full.db')) == 'full'
+    assert detect_storage(str(tmp_path / 'delta.db')) == 'delta'
+    assert detect_storage(str(tmp_path / 'missing.db')) == 'full'
+
+
+def test_encoded_intervals_reproduce_each_snapshot():
+    history = pd.concat([df.assign(date=date) for date, df in SNAPSHOTS.items()], ignore_index=True)
+    intervals = encode_intervals(history)
+
+    # Unchanged rows share one interval instead of one row per snapshot
+    assert len(intervals) < len(history)
+    for date, snapshot in SNAPSHOTS.items():
+        rebuilt = intervals_at(intervals, date)[['athlete_name', 'weight_category', 'rank', 'points']]
+        expected = snapshot[['athlete_name', 'weight_category', 'rank', 'points']]
+        pd.testing.assert_frame_equal(_sorted(rebuilt), _sorted(expected), check_dtype=False)
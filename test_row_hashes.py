@@ -0,0 +1,62 @@
+"""
+Tests for per-row hashing and table fingerprints (row_hashes)
+
+Run with: python -m pytest -q test_row_hashes.py
+"""
+
+import pandas as pd
+
+from row_hashes import row_hashes, table_fingerprint, diff_summary, ranking_key_columns
+
+
+RANKINGS = pd.DataFrame({
+    'NAME': ['Kim A', 'Ali B', 'Ruiz C', 'Lee D'],
+    'WEIGHT CATEGORY': ['M-68kg', 'M-68kg', 'M-68kg', 'M-58kg'],
+    'RANK': [1, 2, 3, 1],
+    'POINTS': [400.0, 350.0, 300.0, 380.0],
+    'MEMBER NATION': ['KOR', 'KSA', 'MEX', None],
+})
+
+
+def _fingerprint(df):
+    return table_fingerprint(row_hashes(df, ranking_key_columns(df)), df.columns)
+
+
+def test_fingerprint_ignores_row_and_column_order():
+    shuffled = RANKINGS.sample(frac=1, random_state=3).reset_index(drop=True)
+    reordered = shuffled[list(reversed(RANKINGS.columns))]
+    assert _fingerprint(reordered) == _fingerprint(RANKINGS)
+
+
+def test_fingerprint_ignores_csv_round_trip_noise():
+    noisy = RANKINGS.copy()
+    noisy['POINTS'] = noisy['POINTS'] + 1e-12
+    noisy['NAME'] = noisy['NAME'] + ' '
+    assert _fingerprint(noisy) == _fingerprint(RANKINGS)
+
+
+def test_fingerprint_detects_edits_duplicates_and_columns():
+    base = _fingerprint(RANKINGS)
+
+    edited = RANKINGS.copy()
+    edited.loc[2, 'RANK'] = 4
+    assert _fingerprint(edited) != base
+
+    duplicated = pd.concat([RANKINGS, RANKINGS.iloc[[0]]], ignore_index=True)
+    assert _fingerprint(duplicated) != base
+
+    assert _fingerprint(RANKINGS.rename(columns={'POINTS': 'PTS'})) != base
+    assert _fingerprint(RANKINGS.iloc[:0]) == ''
+
+
+def test_diff_summary_counts_keyed_changes():
+    new = RANKINGS.copy()
+    new.loc[0, 'POINTS'] = 410.0                      # changed
+    new = new[new['NAME'] != 'Lee D']                  # removed
+    new = pd.concat([new, pd.DataFrame([{'NAME': 'Sato E', 'WEIGHT CATEGORY': 'M-68kg',
+                                         'RANK': 4, 'POINTS': 250.0, 'MEMBER NATION': 'JPN'}])],
+                    ignore_index=True)                 # added
+
+    counts = diff_summary(row_hashes(RANKINGS, ranking_key_columns(RANKINGS)),
+                          row_hashes(new, ranking_key_columns(new)))
+    assert counts == {'added': 1, 'removed': 1, 'changed': 1, 'unchanged': 2}
@@ -0,0 +1,105 @@
+"""
+Tests for the ranking diff engine (sync_rankings.diff_rankings and friends)
+
+Run with: python -m pytest -q test_sync_rankings.py
+"""
+
+import pandas as pd
+import pytest
+
+# sync_rankings imports the Selenium scraper, which exits without selenium
+pytest.importorskip('selenium')
+
+from sync_rankings import (diff_rankings, category_moves, find_rival_overtakes,
+                           detect_ranking_changes, generate_alert_output)
+from change_events import ranking_events
+
+
+OLD = pd.DataFrame({
+    'NAME': ['Ali B', 'Kim A', 'Ruiz C', 'Dupont E', 'Lee D', 'Faisal F', 'Omar G'],
+    'MEMBER NATION': ['KSA', 'KOR', 'MEX', 'FRA', 'KOR', 'KSA', 'KSA'],
+    'WEIGHT CATEGORY': ['M-68kg', 'M-68kg', 'M-68kg', 'M-68kg', 'M-58kg', 'M-58kg', 'M-80kg'],
+    'RANK': [2, 1, 3, 4, 1, 5, 9],
+    'POINTS': [350.0, 400.0, 300.0, 250.0, 380.0, 120.0, 60.0],
+})
+
+NEW = pd.DataFrame({
+    'NAME': ['Ali B', 'Kim A', 'Ruiz C', 'Dupont E', 'Lee D', 'Faisal F', 'Nasser H'],
+    'MEMBER NATION': ['KSA', 'KOR', 'MEX', 'FRA', 'KOR', 'KSA', 'KSA'],
+    'WEIGHT CATEGORY': ['M-68kg', 'M-68kg', 'M-68kg', 'M-68kg', 'M-58kg', 'M-63kg', 'M-80kg'],
+    'RANK': [3, 1, 4, 2, 1, 12, 15],
+    'POINTS': [340.0, 400.0, 290.0, 360.0, 380.0, 90.0, 30.0],
+})
+
+
+@pytest.fixture
+def diff():
+    return diff_rankings(OLD, NEW).set_index(['athlete_name', 'weight_category'])
+
+
+def test_diff_classifies_every_row(diff):
+    assert diff.loc[('Ali B', 'M-68kg'), 'status'] == 'changed'
+    assert diff.loc[('Kim A', 'M-68kg'), 'status'] == 'unchanged'
+    assert diff.loc[('Dupont E', 'M-68kg'), 'status'] == 'changed'
+    assert diff.loc[('Faisal F', 'M-58kg'), 'status'] == 'moved_out'
+    assert diff.loc[('Faisal F', 'M-63kg'), 'status'] == 'moved_in'
+    assert diff.loc[('Omar G', 'M-80kg'), 'status'] == 'exit'
+    assert diff.loc[('Nasser H', 'M-80kg'), 'status'] == 'entry'
+    assert len(diff) == 9
+
+
+def test_rank_change_is_positive_for_improvement(diff):
+    assert diff.loc[('Ali B', 'M-68kg'), 'rank_change'] == -1
+    assert diff.loc[('Dupont E', 'M-68kg'), 'rank_change'] == 2
+    assert diff.loc[('Ali B', 'M-68kg'), 'points_change'] == -10.0
+    assert pd.isna(diff.loc[('Nasser H', 'M-80kg'), 'old_rank'])
+
+
+def test_points_only_change_counts_as_changed():
+    new = OLD.copy()
+    new.loc[new['NAME'] == 'Kim A', 'POINTS'] = 410.0
+    diff = diff_rankings(OLD, new).set_index('athlete_name')
+    assert diff.loc['Kim A', 'status'] == 'changed'
+    assert (diff.drop(index='Kim A')['status'] == 'unchanged').all()
+
+
+def test_category_moves_pair_out_and_in():
+    moves = category_moves(diff_rankings(OLD, NEW))
+    assert moves.to_dict('records') == [{
+        'athlete_name': 'Faisal F', 'country': 'KSA', 'from_category': 'M-58kg',
+        'to_category': 'M-63kg', 'old_rank': 5.0, 'new_rank': 12.0,
+    }]
+
+
+def test_rival_overtakes_only_count_rivals_passing_from_behind():
+    diff = diff_rankings(OLD, NEW)
+    overtakes = find_rival_overtakes(diff, diff['country'] == 'KSA')
+
+    # Dupont (FRA) went 4 -> 2 past Ali B (2 -> 3); Ruiz (MEX) is a rival
+    # but stayed behind, Kim (KOR) was already ahead
+    assert [(o['rival'], o['athlete']) for o in overtakes] == [('Dupont E', 'Ali B')]
+    assert overtakes[0]['rival_old_rank'] == 4 and overtakes[0]['rival_new_rank'] == 2
+
+    assert find_rival_overtakes(diff, diff['country'] == 'KSA', rivals=['KOR']) == []
+
+
+def test_detect_ranking_changes_summary():
+    changes = detect_ranking_changes(OLD, NEW)
+    summary = changes['summary']
+    assert summary['new_entries'] == 1
+    assert summary['dropped_out'] == 1
+    assert summary['category_moves'] == 1
+    assert summary['rival_overtakes'] == 1
+    assert summary['has_significant_changes']
+
+
+def test_category_move_alone_raises_an_alert():
+    new = OLD.copy()
+    new.loc[new['NAME'] == 'Faisal F', ['WEIGHT CATEGORY', 'RANK']] = ['M-63kg', 12]
+
+    changes = detect_ranking_changes(OLD, new)
+    assert changes['summary']['has_significant_changes']
+
+    diff = diff_rankings(OLD, new)
+    events = [dict(e, batch='test') for e in ranking_events(diff, category_moves(diff))]
+    assert 'CATEGORY MOVES' in generate_alert_output(events)
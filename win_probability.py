@@ -0,0 +1,482 @@
+"""
+Win Probability Model
+P(A beats B) fitted on historical bouts with a numpy logistic regression
+
+Features for a pairing (all antisymmetric, so P(A, B) = 1 - P(B, A)):
+- rank_diff: log(rank B) - log(rank A) (positive when A is ranked higher),
+  using the ranks in force before the bout in training
+- rating_diff: (Elo A - Elo B) / 400, using pre-bout ratings in training
+- h2h: net prior wins of A over B, scaled by meetings
+- form_diff: recent win rate of A minus that of B
+- rating_diff x weight category: per-category deviations from the base
+  rating slope (how predictable each category is)
+
+The model is fitted offline by L2-regularised Newton (IRLS) iterations and
+saved as JSON. Inference takes a MatchupContext (current ranks, ratings,
+form and head-to-head records) and scores arbitrary pairs or a full
+pairwise matrix with array operations only.
+
+Training features are all pre-bout values: ranks come from the ranking
+history snapshot in force before each bout (current rankings would already
+reflect the result), and ratings, form and head-to-head from earlier bouts.
+Without a ranking history the rank feature is left out of the fit.
+
+Usage:
+    from win_probability import WinProbabilityModel, MatchupContext
+
+    history = RankingHistoryTracker(read_only=True).get_history()
+    model = WinProbabilityModel.train(matches_df, history, engine)
+    model.save()
+
+    model = WinProbabilityModel.load()
+    context = MatchupContext.build(matches_df, rankings_df, engine)
+    model.pairwise_matrix(context, names, weight_category='-68kg')
+"""
+
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from match_stats import athlete_perspective, name_keys
+from ranking_features import find_column
+from rating_engine import RatingEngine, INITIAL_RATING, match_ids
+
+
+DEFAULT_MODEL_PATH = 'data/models/win_probability.json'
+
+BASE_FEATURES = ['rank_diff', 'rating_diff', 'h2h', 'form_diff']
+
+# Rank assumed for athletes missing from the rankings
+UNRANKED_RANK = 150
+
+# A bout takes its ranks from a snapshot at most this old (monthly rankings)
+RANK_SNAPSHOT_MAX_AGE_DAYS = 90
+
+# Bouts used for the recent form feature
+FORM_BOUTS = 5
+
+# Categories need this many training bouts for their own rating slope
+MIN_CATEGORY_BOUTS = 30
+
+CATEGORY_PATTERN = re.compile(r'[+-]\s*\d+\s*kg', re.IGNORECASE)
+
+
+def weight_class(category) -> str:
+    """Normalise a category label to its weight class (e.g. 'M-68kg' -> '-68kg')."""
+    match = CATEGORY_PATTERN.search(str(category))
+    return match.group(0).replace(' ', '').lower() if match else ''
+
+
+def sigmoid(z):
+    """Logistic function (vectorized, overflow-safe)."""
+    return 0.5 * (1.0 + np.tanh(0.5 * np.asarray(z, dtype=float)))
+
+
+def _rank_lookup(rankings_df: pd.DataFrame) -> pd.Series:
+    """Best current rank per athlete name key."""
+    if rankings_df is None or rankings_df.empty:
+        return pd.Series(dtype=float)
+    name_col = find_column(rankings_df, 'athlete_name', 'NAME')
+    rank_col = find_column(rankings_df, 'rank', 'RANK')
+    if name_col is None or rank_col is None:
+        return pd.Series(dtype=float)
+    ranks = pd.Series(pd.to_numeric(rankings_df[rank_col], errors='coerce').values,
+                      index=name_keys(rankings_df[name_col]).values)
+    return ranks.dropna().groupby(level=0).min()
+
+
+def _ranks_before(rank_history: pd.DataFrame, keys, dates) -> np.ndarray:
+    """
+    Best rank of each athlete in the latest snapshot before each date.
+
+    Args:
+        rank_history: Snapshots with date, athlete_name and rank columns
+        keys / dates: Athlete name keys and bout dates (aligned arrays)
+
+    Returns:
+        Ranks aligned with keys; UNRANKED_RANK without a snapshot from the
+        previous RANK_SNAPSHOT_MAX_AGE_DAYS
+    """
+    ranks = np.full(len(keys), float(UNRANKED_RANK))
+    if rank_history is None or rank_history.empty or not len(keys):
+        return ranks
+    name_col = find_column(rank_history, 'athlete_name', 'NAME')
+    rank_col = find_column(rank_history, 'rank', 'RANK')
+    if name_col is None or rank_col is None or 'date' not in rank_history.columns:
+        return ranks
+
+    snapshots = pd.DataFrame({
+        'athlete': name_keys(rank_history[name_col]).values,
+        'date': pd.to_datetime(rank_history['date'], errors='coerce').values,
+        'rank': pd.to_numeric(rank_history[rank_col], errors='coerce').values,
+    }).dropna()
+    snapshots = snapshots.groupby(['athlete', 'date'], as_index=False)['rank'].min().sort_values('date')
+
+    bouts = pd.DataFrame({'athlete': np.asarray(keys, dtype=object),
+                          'date': pd.to_datetime(dates), 'row': np.arange(len(keys))})
+    bouts = bouts[bouts['date'].notna()].sort_values('date')
+    joined = pd.merge_asof(bouts, snapshots, on='date', by='athlete', direction='backward',
+                           allow_exact_matches=False,
+                           tolerance=pd.Timedelta(days=RANK_SNAPSHOT_MAX_AGE_DAYS))
+    ranks[joined['row'].values] = joined['rank'].fillna(UNRANKED_RANK).values
+    return ranks
+
+
+def _dated_perspective(matches_df: pd.DataFrame) -> pd.DataFrame:
+    """Stacked bouts (one row per participant) in date order with pre-bout form and H2H."""
+    stacked = athlete_perspective(matches_df)
+    if stacked.empty:
+        return stacked
+
+    dates = (matches_df['match_date'].values if 'match_date' in matches_df.columns
+             else np.full(len(matches_df), np.datetime64('NaT')))
+    stacked = stacked.assign(match_date=dates[stacked['match_idx'].values],
+                             won=stacked['won'].astype(float))
+    stacked = stacked.sort_values(['match_date', 'match_idx'], kind='stable')
+
+    # Recent form before each bout: win rate over the previous FORM_BOUTS bouts
+    wins_before = stacked.groupby('athlete')['won'].cumsum() - stacked['won']
+    window_start = wins_before.groupby(stacked['athlete']).shift(FORM_BOUTS).fillna(0)
+    played = stacked.groupby('athlete').cumcount().clip(upper=FORM_BOUTS)
+    stacked['form'] = ((wins_before - window_start) / played.where(played > 0)).fillna(0.5)
+
+    # Head-to-head record before each bout
+    by_pair = stacked.groupby(['athlete', 'opponent'])['won']
+    prior_wins = by_pair.cumsum() - stacked['won']
+    meetings = by_pair.cumcount()
+    stacked['h2h'] = (2 * prior_wins - meetings) / (meetings + 1)
+    return stacked
+
+
+class MatchupContext:
+    """
+    Current per-athlete state used to score pairings.
+
+    Athletes are held in aligned arrays (rank, rating, form) with one extra
+    default row for unknown athletes, and head-to-head records as sorted
+    integer pair codes, so features for any set of pairs are gathered with
+    array indexing and a binary search.
+    """
+
+    def __init__(self, ranks: pd.Series, ratings: pd.Series, form: pd.Series, h2h: pd.Series):
+        """
+        Args:
+            ranks / ratings / form: Series indexed by athlete name key
+            h2h: Net head-to-head record indexed by (athlete key, opponent key)
+        """
+        pair_keys = [h2h.index.get_level_values(0), h2h.index.get_level_values(1)] if len(h2h) else []
+        self.index = pd.Index(ranks.index).append([pd.Index(ratings.index), pd.Index(form.index), *pair_keys]).unique()
+
+        # Last row holds the defaults for athletes not in the index
+        self.ranks = np.append(ranks.reindex(self.index).fillna(UNRANKED_RANK).values, UNRANKED_RANK)
+        self.ratings = np.append(ratings.reindex(self.index).fillna(INITIAL_RATING).values, INITIAL_RATING)
+        self.form = np.append(form.reindex(self.index).fillna(0.5).values, 0.5)
+
+        size = len(self.index) + 1
+        if len(h2h):
+            codes = (self.index.get_indexer(pair_keys[0]).astype(np.int64) * size
+                     + self.index.get_indexer(pair_keys[1]))
+            order = np.argsort(codes)
+            self._h2h_codes, self._h2h_values = codes[order], h2h.values[order]
+        else:
+            self._h2h_codes, self._h2h_values = np.array([], dtype=np.int64), np.array([])
+
+    @classmethod
+    def build(cls, matches_df: pd.DataFrame, rankings_df: pd.DataFrame = None,
+              engine: RatingEngine = None) -> 'MatchupContext':
+        """Context from the full match history, current rankings and ratings."""
+        ratings = pd.Series(engine.ratings if engine else {}, dtype=float)
+
+        stacked = _dated_perspective(matches_df) if matches_df is not None else pd.DataFrame()
+        if stacked.empty:
+            form = pd.Series(dtype=float)
+            h2h = pd.Series(dtype=float)
+        else:
+            form = stacked.groupby('athlete').tail(FORM_BOUTS).groupby('athlete')['won'].mean()
+            pairs = stacked.groupby(['athlete', 'opponent'])['won'].agg(['sum', 'count'])
+            h2h = (2 * pairs['sum'] - pairs['count']) / (pairs['count'] + 1)
+
+        return cls(_rank_lookup(rankings_df), ratings, form, h2h)
+
+    def positions(self, names) -> np.ndarray:
+        """Row of each athlete name in the context arrays (unknown -> default row)."""
+        unique, inverse = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        found = self.index.get_indexer(name_keys(pd.Series(unique, dtype=object)).values)
+        found = np.where(found < 0, len(self.index), found)
+        return found[np.ravel(inverse)]
+
+    def features(self, pos_a: np.ndarray, pos_b: np.ndarray) -> pd.DataFrame:
+        """Base feature columns for arrays of athlete positions."""
+        h2h = np.zeros(len(pos_a))
+        if len(self._h2h_codes):
+            codes = pos_a.astype(np.int64) * (len(self.index) + 1) + pos_b
+            found = np.minimum(np.searchsorted(self._h2h_codes, codes), len(self._h2h_codes) - 1)
+            hit = self._h2h_codes[found] == codes
+            h2h[hit] = self._h2h_values[found[hit]]
+
+        return pd.DataFrame({
+            'rank_diff': np.log(self.ranks[pos_b]) - np.log(self.ranks[pos_a]),
+            'rating_diff': (self.ratings[pos_a] - self.ratings[pos_b]) / 400.0,
+            'h2h': h2h,
+            'form_diff': self.form[pos_a] - self.form[pos_b],
+        })
+
+
+class WinProbabilityModel:
+    """
+    Logistic regression for P(A beats B) with per-category rating slopes.
+    """
+
+    def __init__(self, coefficients: Dict[str, float] = None, categories: List[str] = None,
+                 metrics: Dict = None, fitted_at: str = None):
+        self.categories = list(categories or [])
+        self.feature_names = BASE_FEATURES + [f'rating_diff_x_{c}' for c in self.categories]
+        coefficients = coefficients or {}
+        self.coef = np.array([coefficients.get(f, 0.0) for f in self.feature_names], dtype=float)
+        self.metrics = metrics or {}
+        self.fitted_at = fitted_at
+
+    # =========================================================================
+    # DESIGN MATRIX
+    # =========================================================================
+
+    def design_matrix(self, base: pd.DataFrame, weight_classes) -> np.ndarray:
+        """Base features plus the rating_diff x category interactions."""
+        X = base[BASE_FEATURES].to_numpy(dtype=float)
+        if not self.categories:
+            return X
+        classes = np.broadcast_to(np.asarray(weight_classes, dtype=object), (len(X),))
+        onehot = classes[:, None] == np.array(self.categories, dtype=object)[None, :]
+        return np.hstack([X, onehot * X[:, [1]]])
+
+    # =========================================================================
+    # TRAINING
+    # =========================================================================
+
+    @staticmethod
+    def training_frame(matches_df: pd.DataFrame, rank_history: pd.DataFrame = None,
+                       engine: RatingEngine = None) -> pd.DataFrame:
+        """
+        One row per participant per decided bout with pre-bout features and outcome.
+
+        Args:
+            matches_df: Match history (match_date parsed)
+            rank_history: Ranking snapshots (date, athlete_name, rank), e.g.
+                RankingHistoryTracker.get_history(); without it rank_diff is 0
+            engine: Rating engine whose history holds the pre-bout ratings
+        """
+        stacked = _dated_perspective(matches_df)
+        if stacked.empty:
+            return pd.DataFrame(columns=BASE_FEATURES + ['weight_class', 'won', 'match_date'])
+
+        # Decided bouts only: exactly one side won
+        decided = stacked.groupby('match_idx')['won'].transform('sum') == 1
+        stacked = stacked[decided]
+
+        # Ranks in force before each bout (current ranks would leak the result)
+        rank_a = _ranks_before(rank_history, stacked['athlete'].values, stacked['match_date'].values)
+        rank_b = _ranks_before(rank_history, stacked['opponent'].values, stacked['match_date'].values)
+
+        # Pre-bout ratings from the rating engine history
+        rating_diff = np.zeros(len(stacked))
+        history = engine.get_history() if engine is not None else pd.DataFrame()
+        if not history.empty:
+            ids = match_ids(matches_df).values[stacked['match_idx'].values]
+            pre = history.drop_duplicates(['match_id', 'athlete']).set_index(['match_id', 'athlete'])
+            joined = pre.reindex(pd.MultiIndex.from_arrays([ids, stacked['athlete'].values]))
+            rating_diff = ((joined['pre_rating'] - joined['opponent_rating']) / 400.0).fillna(0).values
+
+        opponent_form = stacked.set_index(['match_idx', 'athlete'])['form']
+        form_b = opponent_form.reindex(
+            pd.MultiIndex.from_arrays([stacked['match_idx'].values, stacked['opponent'].values])).fillna(0.5).values
+
+        cat_col = next((c for c in ('weight_category', 'category') if c in matches_df.columns), None)
+        classes = (matches_df[cat_col].map(weight_class).values[stacked['match_idx'].values]
+                   if cat_col else np.full(len(stacked), ''))
+
+        return pd.DataFrame({
+            'rank_diff': np.log(rank_b) - np.log(rank_a),
+            'rating_diff': rating_diff,
+            'h2h': stacked['h2h'].values,
+            'form_diff': stacked['form'].values - form_b,
+            'weight_class': classes,
+            'won': stacked['won'].values,
+            'match_date': stacked['match_date'].values,
+        })
+
+    def fit(self, frame: pd.DataFrame, l2: float = 1.0, max_iter: int = 50,
+            tol: float = 1e-8) -> 'WinProbabilityModel':
+        """
+        Fit coefficients by L2-regularised Newton iterations (no intercept).
+
+        Args:
+            frame: Output of training_frame
+            l2: Ridge penalty
+            max_iter: Maximum Newton steps
+            tol: Stop when the largest coefficient step is below this
+        """
+        counts = frame['weight_class'].value_counts()
+        self.categories = sorted(c for c, n in counts.items() if c and n >= MIN_CATEGORY_BOUTS)
+        self.feature_names = BASE_FEATURES + [f'rating_diff_x_{c}' for c in self.categories]
+
+        X = self.design_matrix(frame, frame['weight_class'].values)
+        y = frame['won'].to_numpy(dtype=float)
+        w = np.zeros(X.shape[1])
+        penalty = l2 * np.eye(X.shape[1])
+
+        for _ in range(max_iter):
+            p = sigmoid(X @ w)
+            gradient = X.T @ (p - y) + penalty @ w
+            hessian = (X * (p * (1 - p))[:, None]).T @ X + penalty
+            step = np.linalg.solve(hessian, gradient)
+            w -= step
+            if np.abs(step).max() < tol:
+                break
+
+        self.coef = w
+        self.metrics = self.evaluate(frame)
+        self.fitted_at = datetime.now().isoformat()
+        return self
+
+    @classmethod
+    def train(cls, matches_df: pd.DataFrame, rank_history: pd.DataFrame = None,
+              engine: RatingEngine = None, holdout: float = 0.2,
+              l2: float = 1.0) -> 'WinProbabilityModel':
+        """
+        Fit on the match history, reporting metrics on the most recent bouts.
+
+        Args:
+            rank_history: Ranking snapshots for pre-bout ranks (see training_frame)
+            holdout: Share of bouts (latest by date) held out for evaluation
+        """
+        frame = cls.training_frame(matches_df, rank_history, engine)
+        model = cls()
+        if frame.empty:
+            return model
+
+        frame = frame.sort_values('match_date', kind='stable', ignore_index=True)
+        split = int(len(frame) * (1 - holdout)) if holdout else len(frame)
+        train, test = frame.iloc[:split], frame.iloc[split:]
+
+        model.fit(train if len(train) else frame, l2=l2)
+        if len(test):
+            model.metrics['holdout'] = model.evaluate(test)
+        return model
+
+    def evaluate(self, frame: pd.DataFrame) -> Dict:
+        """Log loss, Brier score and accuracy on a training-style frame."""
+        p = np.clip(self.predict_frame(frame), 1e-9, 1 - 1e-9)
+        y = frame['won'].to_numpy(dtype=float)
+        return {
+            'rows': int(len(y)),
+            'log_loss': round(float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))), 4),
+            'brier': round(float(np.mean((p - y) ** 2)), 4),
+            'accuracy': round(float(np.mean((p > 0.5) == (y > 0.5))), 4),
+        }
+
+    # =========================================================================
+    # INFERENCE
+    # =========================================================================
+
+    def predict_frame(self, frame: pd.DataFrame) -> np.ndarray:
+        """P(win) for each row of a feature frame (with a weight_class column)."""
+        return sigmoid(self.design_matrix(frame, frame['weight_class'].values) @ self.coef)
+
+    def predict(self, context: MatchupContext, athletes_a, athletes_b,
+                weight_category: str = '') -> np.ndarray:
+        """
+        P(A beats B) for arrays of athlete names.
+
+        Args:
+            context: Current athlete state
+            athletes_a, athletes_b: Equal-length sequences of names
+            weight_category: Category of the bouts
+        """
+        return self._predict_positions(context, context.positions(athletes_a),
+                                       context.positions(athletes_b), weight_category)
+
+    def pairwise_matrix(self, context: MatchupContext, athletes: List[str],
+                        weight_category: str = '') -> np.ndarray:
+        """(n, n) matrix of P(row beats column); the diagonal is 0.5."""
+        n = len(athletes)
+        pos = context.positions(athletes)
+        probs = self._predict_positions(context, np.repeat(pos, n), np.tile(pos, n), weight_category)
+        return probs.reshape(n, n)
+
+    def _predict_positions(self, context: MatchupContext, pos_a: np.ndarray, pos_b: np.ndarray,
+                           weight_category: str) -> np.ndarray:
+        base = context.features(pos_a, pos_b)
+        return sigmoid(self.design_matrix(base, weight_class(weight_category)) @ self.coef)
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def to_dict(self) -> Dict:
+        return {
+            'coefficients': {f: round(float(c), 6) for f, c in zip(self.feature_names, self.coef)},
+            'categories': self.categories,
+            'metrics': self.metrics,
+            'fitted_at': self.fitted_at,
+        }
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        """Write the model as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> Optional['WinProbabilityModel']:
+        """Read a saved model (None if missing or unreadable)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return cls(data.get('coefficients'), data.get('categories'),
+                   data.get('metrics'), data.get('fitted_at'))
+
+
+def main():
+    """Fit the model on local match data and save it."""
+    import time
+    from scouting_manager import ScoutingManager
+    from ranking_tracker import RankingHistoryTracker, detect_storage
+
+    print("=" * 60)
+    print("WIN PROBABILITY MODEL")
+    print("=" * 60)
+
+    scout = ScoutingManager()
+    if scout.matches_df is None or scout.matches_df.empty:
+        print("No match data found")
+        return
+
+    engine = scout.get_rating_engine()
+    db_path = str(scout.data_dir / 'data' / 'ranking_history.db')
+    history = RankingHistoryTracker(db_path, read_only=True, storage=detect_storage(db_path)).get_history()
+    print(f"Ranking history: {len(history)} snapshot rows")
+    model = WinProbabilityModel.train(scout.matches_df, history, engine)
+    model.save()
+
+    print(f"Categories with own rating slope: {model.categories}")
+    for name, coef in zip(model.feature_names, model.coef):
+        print(f"  {name:<28} {coef:+.3f}")
+    print(f"Training: {model.metrics}")
+
+    context = MatchupContext.build(scout.matches_df, scout.rankings_df, engine)
+    names = list(context.index[:200])
+    start = time.time()
+    matrix = model.pairwise_matrix(context, names)
+    print(f"\nScored {matrix.size:,} pairings in {(time.time() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()